@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Los eventos en vivo de turnos (GET /api/turnos/eventos/, Server-Sent Events)
+solo funcionan servidos por ASGI, por ejemplo:
+
+    uvicorn core.asgi:application
+
+El broker por defecto (core.eventos.BrokerEnMemoria) es en memoria: usar un
+solo worker o configurar settings.EVENTOS_BROKER con uno externo.
 """
 
 import os
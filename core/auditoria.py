@@ -0,0 +1,182 @@
+"""
+Escritura diferida y por lotes de los registros de auditoría
+(AuditoriaTurnos, AuditoriaPagos).
+
+Los signals ya no hacen un objects.create() por evento: le pasan la
+instancia (sin guardar) a `auditoria.registrar(...)` y el escritor decide
+cuándo insertarla:
+
+1. Dentro de una transacción (atomic): los registros quedan en un
+   callback de transaction.on_commit. Si la transacción (o el savepoint
+   en el que se generaron) se revierte, Django descarta el callback y los
+   registros no se escriben: no quedan auditorías huérfanas.
+2. Los registros confirmados, y los generados fuera de una transacción,
+   van al buffer del request (AuditoriaBufferMiddleware), que se inserta
+   al terminar con un INSERT por modelo. Esos cambios ya están en la
+   base: si el INSERT de la auditoría falla, el middleware lo registra en
+   el log y devuelve la respuesta de la vista (un 500 le haría creer al
+   cliente que su cambio no se guardó).
+3. Sin buffer (comandos, shell) se insertan en el momento: al confirmar
+   la transacción o, en autocommit, enseguida. No hay un hilo que los
+   junte en segundo plano: las operaciones masivas ya pasan todos sus
+   registros en un solo registrar_varios (un INSERT), y un hilo retendría
+   en memoria auditorías de cambios ya confirmados que se perderían si el
+   proceso termina antes de vaciarlo. Un comando que genere muchos
+   eventos sueltos puede agruparlos con `with auditoria.contexto():`.
+"""
+import contextvars
+import logging
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+
+logger = logging.getLogger(__name__)
+
+# Buffer del request/contexto actual (lista de (instancia, base)) o None
+_buffer_contexto = contextvars.ContextVar('auditoria_buffer', default=None)
+
+
+def escribir_registros(registros, using=DEFAULT_DB_ALIAS):
+    """
+    Inserta los registros agrupados por modelo (un INSERT por modelo).
+
+    Las FK con on_delete=SET_NULL (ej. turno, pago) se verifican antes: si
+    el objeto se eliminó entre que se generó el evento y el flush, se deja
+    la FK en NULL, igual que haría Django al borrar el objeto.
+    """
+    por_modelo = {}
+    for registro in registros:
+        por_modelo.setdefault(type(registro), []).append(registro)
+
+    for modelo, lote in por_modelo.items():
+        for field in modelo._meta.concrete_fields:
+            if not field.is_relation or field.remote_field.on_delete is not models.SET_NULL:
+                continue
+            ids = {getattr(r, field.attname) for r in lote} - {None}
+            if not ids:
+                continue
+            existentes = set(
+                field.related_model._base_manager.using(using)
+                .filter(pk__in=ids).values_list('pk', flat=True)
+            )
+            for registro in lote:
+                if getattr(registro, field.attname) not in existentes:
+                    setattr(registro, field.attname, None)
+        modelo._base_manager.using(using).bulk_create(lote)
+
+
+def lotes_buffer(buffer):
+    """Agrupa un buffer de (registro, base) por (base, modelo)."""
+    lotes = {}
+    for registro, using in buffer:
+        lotes.setdefault((using, type(registro)), []).append(registro)
+    return lotes
+
+
+def escribir_buffer(buffer):
+    """Escribe un buffer de (registro, base): un INSERT por modelo y base."""
+    for (using, _), registros in lotes_buffer(buffer).items():
+        escribir_registros(registros, using=using)
+
+
+def escribir_buffer_request(buffer):
+    """
+    Escribe el buffer al terminar un request sin propagar errores: los
+    cambios auditados ya se confirmaron. Cada lote (base, modelo) se
+    intenta por separado y el que falla queda en el log.
+    """
+    for (using, modelo), registros in lotes_buffer(buffer).items():
+        try:
+            escribir_registros(registros, using=using)
+        except Exception:
+            logger.exception(
+                "No se pudieron escribir %d registros de %s al terminar el request",
+                len(registros), modelo.__name__,
+            )
+
+
+class EscritorAuditoria:
+
+    # --- Registro ---
+
+    def registrar(self, registro, using=DEFAULT_DB_ALIAS):
+        self.registrar_varios([registro], using=using)
+
+    def registrar_varios(self, registros, using=DEFAULT_DB_ALIAS):
+        registros = list(registros)
+        if not registros:
+            return
+        if connections[using].in_atomic_block:
+            # Django asocia el callback al savepoint actual: si ese savepoint
+            # (o la transacción) se revierte, se descarta con sus registros
+            transaction.on_commit(lambda: self._confirmados(registros, using), using=using)
+            return
+        self._confirmados(registros, using)
+
+    def _confirmados(self, registros, using):
+        """Registros cuyo cambio ya quedó en la base: al buffer o a la base."""
+        buffer = _buffer_contexto.get()
+        if buffer is not None:
+            buffer.extend((registro, using) for registro in registros)
+            return
+        escribir_registros(registros, using=using)
+
+    # --- Buffer por request / contexto ---
+
+    @contextmanager
+    def contexto(self):
+        """
+        Acumula los registros ya confirmados y los escribe todos juntos al
+        salir (también si hubo una excepción: los cambios confirmados antes
+        del error quedaron en la base y su auditoría debe quedar).
+        """
+        buffer = []
+        token = _buffer_contexto.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _buffer_contexto.reset(token)
+            escribir_buffer(buffer)
+
+
+auditoria = EscritorAuditoria()
+
+
+class AuditoriaBufferMiddleware:
+    """
+    Agrupa en un solo INSERT los registros de auditoría de cada request.
+    Funciona en WSGI y en ASGI: las vistas síncronas corren en otro hilo,
+    pero heredan el contexto (y el buffer) del request. Un error al
+    escribir queda en el log y no cambia la respuesta.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        buffer = []
+        token = _buffer_contexto.set(buffer)
+        try:
+            return self.get_response(request)
+        finally:
+            _buffer_contexto.reset(token)
+            if buffer:
+                escribir_buffer_request(buffer)
+
+    async def __acall__(self, request):
+        buffer = []
+        token = _buffer_contexto.set(buffer)
+        try:
+            return await self.get_response(request)
+        finally:
+            _buffer_contexto.reset(token)
+            if buffer:
+                await sync_to_async(escribir_buffer_request)(buffer)
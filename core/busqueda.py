@@ -0,0 +1,207 @@
+"""
+Búsqueda de texto en las tablas de auditoría (nombres de paciente y
+odontólogo, observaciones...), con resultados ordenados por relevancia.
+
+- PostgreSQL: dos índices GIN sobre la MISMA expresión que arma la
+  consulta ("documento" = los campos concatenados):
+    * to_tsvector('spanish', documento): palabras completas, con raíces
+      ("cancelado" encuentra "cancelación"), rankeado con ts_rank.
+    * documento gin_trgm_ops (extensión pg_trgm): fragmentos ("gonz") y
+      errores de tipeo ("gonzales" ~ "gonzález") con ILIKE y word_similarity.
+  Si la expresión de la consulta no coincide con la del índice, el planner
+  no lo usa: por eso ambas salen de documento_sql(). Si el servidor no
+  tiene pg_trgm (PostgreSQL sin contrib) se usa solo el tsvector.
+- SQLite (desarrollo y tests): tabla virtual FTS5 "<tabla>_fts" con el
+  contenido de la tabla, sincronizada por triggers; rango = -bm25().
+- Otras bases: icontains sin índice y sin ranking.
+
+Ojo en SQLite: si una migración posterior reconstruye la tabla (AddField,
+AlterField...) se pierden los triggers; volver a llamar a
+crear_indices_busqueda() en esa migración (es idempotente).
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Orden de la paginación por cursor cuando hay búsqueda
+ORDEN_RELEVANCIA = ('-rango', '-fecha_accion', '-id')
+
+CONFIGURACION_TS = 'spanish'
+
+
+def _fts(tabla):
+    return f'{tabla}_fts'
+
+
+def documento_sql(campos, tabla=None, quote=None):
+    """Expresión SQL que concatena los campos (NULL = cadena vacía)."""
+    partes = []
+    for campo in campos:
+        columna = f'{quote(tabla)}.{quote(campo)}' if tabla else campo
+        partes.append(f"coalesce({columna}, '')")
+    return " || ' ' || ".join(partes)
+
+
+def tiene_trigramas(connection):
+    """¿Está instalada pg_trgm? Se consulta una vez por conexión."""
+    if not hasattr(connection, '_tiene_pg_trgm'):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            connection._tiene_pg_trgm = cursor.fetchone() is not None
+    return connection._tiene_pg_trgm
+
+
+def tiene_fts(connection, tabla):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [_fts(tabla)]
+        )
+        return cursor.fetchone() is not None
+
+
+# ============================================
+# ÍNDICES (se llaman desde migraciones)
+# ============================================
+
+def crear_indices_busqueda(schema_editor, tabla, campos):
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+
+    if connection.vendor == 'postgresql':
+        documento = documento_sql(campos)
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(tabla + "_busqueda_tsv")} ON {quote(tabla)} '
+            f"USING gin (to_tsvector('{CONFIGURACION_TS}', {documento}))"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                return
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(tabla + "_busqueda_trgm")} ON {quote(tabla)} '
+            f'USING gin (({documento}) gin_trgm_ops)'
+        )
+
+    elif connection.vendor == 'sqlite':
+        fts = quote(_fts(tabla))
+        columnas = ', '.join(quote(campo) for campo in campos)
+        nuevos = ', '.join(f'new.{quote(campo)}' for campo in campos)
+        viejos = ', '.join(f'old.{quote(campo)}' for campo in campos)
+        borrar = f"INSERT INTO {fts}({fts}, rowid, {columnas}) VALUES ('delete', old.id, {viejos});"
+        insertar = f'INSERT INTO {fts}(rowid, {columnas}) VALUES (new.id, {nuevos});'
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columnas}, '
+                f"content={quote(tabla)}, content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+        except Exception:
+            # SQLite compilado sin FTS5: queda la búsqueda con icontains
+            return
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {quote(_fts(tabla) + "_ai")} AFTER INSERT ON {quote(tabla)} '
+            f'BEGIN {insertar} END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {quote(_fts(tabla) + "_ad")} AFTER DELETE ON {quote(tabla)} '
+            f'BEGIN {borrar} END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {quote(_fts(tabla) + "_au")} AFTER UPDATE ON {quote(tabla)} '
+            f'BEGIN {borrar} {insertar} END'
+        )
+        schema_editor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def eliminar_indices_busqueda(schema_editor, tabla):
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+
+    if connection.vendor == 'postgresql':
+        # La extensión pg_trgm se deja: puede usarla otra tabla
+        schema_editor.execute(f'DROP INDEX IF EXISTS {quote(tabla + "_busqueda_tsv")}')
+        schema_editor.execute(f'DROP INDEX IF EXISTS {quote(tabla + "_busqueda_trgm")}')
+
+    elif connection.vendor == 'sqlite':
+        for sufijo in ('_ai', '_ad', '_au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {quote(_fts(tabla) + sufijo)}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {quote(_fts(tabla))}')
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def _patron_like(texto):
+    escapado = texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escapado}%'
+
+
+def _consulta_fts(texto):
+    """'gonz perez' -> '"gonz"* "perez"*' (todas las palabras, por prefijo)."""
+    palabras = re.findall(r'\w+', texto)
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def condicion_y_rango(modelo, texto, campos, using='default'):
+    """
+    (condición, rango) para filtrar y ordenar 'modelo' por 'texto'.
+    La condición es una expresión booleana (usable dentro de un Q).
+    """
+    connection = connections[using]
+    tabla = modelo._meta.db_table
+    quote = connection.ops.quote_name
+
+    if connection.vendor == 'postgresql':
+        documento = documento_sql(campos, tabla, quote)
+        vector = f"to_tsvector('{CONFIGURACION_TS}', {documento})"
+        consulta = f"websearch_to_tsquery('{CONFIGURACION_TS}', %s)"
+        if tiene_trigramas(connection):
+            condicion = RawSQL(
+                f'({vector} @@ {consulta} OR {documento} ILIKE %s OR %s <%% {documento})',
+                [texto, _patron_like(texto), texto],
+                output_field=BooleanField(),
+            )
+            rango = RawSQL(
+                f'(ts_rank({vector}, {consulta}) + word_similarity(%s, {documento}))::double precision',
+                [texto, texto],
+                output_field=FloatField(),
+            )
+        else:
+            condicion = RawSQL(f'{vector} @@ {consulta}', [texto], output_field=BooleanField())
+            rango = RawSQL(f'ts_rank({vector}, {consulta})::double precision', [texto], output_field=FloatField())
+        return condicion, rango
+
+    if connection.vendor == 'sqlite' and tiene_fts(connection, tabla):
+        fts = quote(_fts(tabla))
+        consulta = _consulta_fts(texto)
+        if not consulta:
+            return Q(pk__in=[]), Value(0.0)
+        condicion = RawSQL(
+            f'{quote(tabla)}.{quote("id")} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)',
+            [consulta],
+            output_field=BooleanField(),
+        )
+        rango = RawSQL(
+            f'(SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = {quote(tabla)}.{quote("id")})',
+            [consulta],
+            output_field=FloatField(),
+        )
+        return condicion, rango
+
+    condicion = Q()
+    for campo in campos:
+        condicion |= Q(**{f'{campo}__icontains': texto})
+    return condicion, Value(0.0)
+
+
+def buscar_texto(queryset, texto, campos):
+    """
+    Filtra el queryset por 'texto' y lo ordena por relevancia (anotación
+    'rango'); el orden previo del queryset queda como desempate.
+    """
+    condicion, rango = condicion_y_rango(queryset.model, texto, campos, using=queryset.db)
+    orden = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset.filter(condicion).annotate(rango=rango).order_by('-rango', *orden)
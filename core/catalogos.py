@@ -0,0 +1,134 @@
+"""
+Cache de los catálogos (estados, horarios, géneros, obras sociales...):
+tablas chicas que el frontend vuelve a pedir en casi cada pantalla.
+
+- Cada tabla tiene una versión en el cache de Django que los signals
+  incrementan (tras el commit) ante cualquier alta, cambio o baja.
+- El listado ya serializado se guarda en memoria del proceso bajo la
+  clave (vista, parámetros, versión): mientras la versión no cambie, la
+  respuesta sale sin tocar la base.
+- La respuesta lleva un ETag y "Cache-Control: no-cache": el navegador
+  revalida con If-None-Match y, si no hubo cambios, recibe un 304 vacío.
+
+Si el cache de Django es local al proceso (LocMemCache), un worker no ve
+las versiones que incrementa otro: por eso las entradas vencen a los
+TTL_SEGUNDOS y el ETag es un hash del contenido, así un 304 nunca
+confirma datos distintos a los que tiene el cliente.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+TTL_SEGUNDOS = 60
+MAX_ENTRADAS = 256
+
+
+def _clave_version(modelo):
+    return f'catalogo:version:{modelo._meta.db_table}'
+
+
+def version_catalogo(modelo):
+    return cache.get_or_set(_clave_version(modelo), time.time_ns, None)
+
+
+def invalidar_catalogo(modelo):
+    """
+    Cambia la versión de la tabla cuando la transacción confirma (antes
+    del commit otro request podría guardar datos viejos con la versión
+    nueva). Las entradas viejas quedan huérfanas y vencen por TTL.
+    """
+    def incrementar():
+        try:
+            cache.incr(_clave_version(modelo))
+        except ValueError:
+            # La clave se perdió (reinicio o desalojo): una versión nueva y única
+            cache.set(_clave_version(modelo), time.time_ns(), None)
+
+    transaction.on_commit(incrementar)
+
+
+class _CacheProceso:
+    """LRU en memoria: {clave: (etag, datos, vence)}."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[2] < time.monotonic():
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[:2]
+
+    def guardar(self, clave, etag, datos):
+        with self._lock:
+            self._entradas[clave] = (etag, datos, time.monotonic() + TTL_SEGUNDOS)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > MAX_ENTRADAS:
+                self._entradas.popitem(last=False)
+
+
+cache_catalogos = _CacheProceso()
+
+
+def _calcular_etag(datos):
+    contenido = json.dumps(datos, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return '"%s"' % hashlib.sha1(contenido).hexdigest()
+
+
+def _coincide(request, etag):
+    """If-None-Match con comparación débil (un proxy puede agregar W/)."""
+    encabezado = request.headers.get('If-None-Match')
+    if not encabezado:
+        return False
+    etags = [e.removeprefix('W/') for e in parse_etags(encabezado)]
+    return '*' in etags or etag in etags
+
+
+class CatalogoCacheMixin:
+    """
+    Para ListAPIView / ListCreateAPIView / ModelViewSet de catálogos: cachea
+    el list() y responde GET condicionales. La versión sale del modelo del
+    queryset; si el serializer lee otras tablas, agregarlas en
+    'modelos_catalogo'. Las escrituras pasan por la vista normal y los
+    signals de cada app llaman a invalidar_catalogo().
+    """
+
+    modelos_catalogo = ()
+
+    def _modelos_catalogo(self):
+        return (self.queryset.model, *self.modelos_catalogo)
+
+    def list(self, request, *args, **kwargs):
+        versiones = tuple(version_catalogo(modelo) for modelo in self._modelos_catalogo())
+        clave = (type(self).__module__, type(self).__qualname__, request.GET.urlencode(), versiones)
+
+        encontrado = cache_catalogos.obtener(clave)
+        if encontrado is None:
+            respuesta = super().list(request, *args, **kwargs)
+            if respuesta.status_code != status.HTTP_200_OK:
+                return respuesta
+            encontrado = (_calcular_etag(respuesta.data), respuesta.data)
+            cache_catalogos.guardar(clave, *encontrado)
+
+        etag, datos = encontrado
+        if _coincide(request, etag):
+            respuesta = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            respuesta = Response(datos)
+        respuesta['ETag'] = etag
+        # El navegador guarda la respuesta pero la revalida en cada uso
+        patch_cache_control(respuesta, private=True, no_cache=True)
+        return respuesta
@@ -0,0 +1,179 @@
+"""
+Canal de eventos en vivo (push) para los clientes del frontend.
+
+Los signals publican deltas ("turno creado / modificado / eliminado") en un
+broker y las vistas de streaming (Server-Sent Events, servidas por ASGI) se
+los reenvían a cada navegador suscripto. Así la recepción ve los cambios de
+la otra PC sin volver a descargar la lista completa.
+
+El broker por defecto vive en memoria del proceso: alcanza para un solo
+worker ASGI. Para varios procesos se puede reemplazar por uno externo
+(Redis, Postgres LISTEN/NOTIFY...) indicando su ruta en
+settings.EVENTOS_BROKER; solo tiene que implementar publicar(),
+suscribir(), tiene_suscriptores() y omitir() con la misma firma que
+BrokerEnMemoria.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+
+class Evento:
+    __slots__ = ('id', 'canal', 'tipo', 'datos')
+
+    def __init__(self, id, canal, tipo, datos):
+        self.id = id
+        self.canal = canal
+        self.tipo = tipo
+        self.datos = datos
+
+    def como_sse(self):
+        """Texto del evento en formato text/event-stream."""
+        datos = json.dumps(self.datos, cls=DjangoJSONEncoder, ensure_ascii=False)
+        return f'id: {self.id}\nevent: {self.tipo}\ndata: {datos}\n\n'
+
+
+class Suscripcion:
+    """
+    Cola de un cliente. Vive en el event loop que la creó; publicar() puede
+    llamarse desde cualquier hilo (las vistas síncronas corren en threads).
+    """
+
+    def __init__(self, broker, canal, tamanio_cola):
+        self.broker = broker
+        self.canal = canal
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(maxsize=tamanio_cola)
+        # Si el cliente no lee y la cola se llena, se descartan eventos y se
+        # le avisa con un 'reset' para que vuelva a pedir la lista completa
+        self.desbordada = False
+
+    def _entregar(self, evento):
+        if self.desbordada:
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordada = True
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(Evento(evento.id, self.canal, 'reset', {}))
+
+    def entregar(self, evento):
+        try:
+            self.loop.call_soon_threadsafe(self._entregar, evento)
+        except RuntimeError:
+            # El loop ya se cerró (cliente desconectado sin cerrar la suscripción)
+            self.broker._quitar(self)
+
+    async def siguiente(self, timeout=None):
+        """Próximo evento o None si pasó 'timeout' segundos sin novedades."""
+        try:
+            evento = await asyncio.wait_for(self.cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if evento.tipo == 'reset':
+            self.desbordada = False
+        return evento
+
+    def cerrar(self):
+        self.broker._quitar(self)
+
+
+class BrokerEnMemoria:
+    """
+    Broker pub/sub dentro del proceso. Guarda los últimos eventos de cada
+    canal para reenviar lo que un cliente se perdió al reconectarse
+    (encabezado Last-Event-ID).
+    """
+
+    HISTORIAL = 500
+    TAMANIO_COLA = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ultimo_id = {}       # canal -> último ID asignado (consecutivos por canal)
+        self._suscripciones = {}   # canal -> set(Suscripcion)
+        self._historial = {}       # canal -> deque(Evento)
+
+    def _siguiente_id(self, canal):
+        numero = self._ultimo_id[canal] = self._ultimo_id.get(canal, 0) + 1
+        return numero
+
+    def publicar(self, canal, tipo, datos):
+        with self._lock:
+            evento = Evento(self._siguiente_id(canal), canal, tipo, datos)
+            self._historial.setdefault(canal, deque(maxlen=self.HISTORIAL)).append(evento)
+            destinatarios = list(self._suscripciones.get(canal, ()))
+        for suscripcion in destinatarios:
+            suscripcion.entregar(evento)
+        return evento
+
+    def tiene_suscriptores(self, canal):
+        """Si hay alguien escuchando: sin suscriptores no vale la pena armar los datos."""
+        with self._lock:
+            return bool(self._suscripciones.get(canal))
+
+    def omitir(self, canal):
+        """
+        Registra un cambio que no se publicó (no había suscriptores). El
+        historial ya no sirve para reenviar lo perdido: se descarta, y quien
+        reconecte con un Last-Event-ID anterior recibe un 'reset'. Si alguien
+        se suscribió mientras tanto, también recibe el 'reset'.
+        """
+        with self._lock:
+            evento = Evento(self._siguiente_id(canal), canal, 'reset', {})
+            self._historial.pop(canal, None)
+            destinatarios = list(self._suscripciones.get(canal, ()))
+        for suscripcion in destinatarios:
+            suscripcion.entregar(evento)
+        return evento
+
+    def suscribir(self, canal, ultimo_id=None):
+        """
+        Crea la suscripción (debe llamarse desde el event loop que la va a
+        leer). Devuelve (suscripcion, pendientes): los eventos posteriores a
+        'ultimo_id' que siguen en el historial. Si 'ultimo_id' ya salió del
+        historial, pendientes trae un único evento 'reset'.
+        """
+        suscripcion = Suscripcion(self, canal, self.TAMANIO_COLA)
+        with self._lock:
+            self._suscripciones.setdefault(canal, set()).add(suscripcion)
+            historial = list(self._historial.get(canal, ()))
+            ultimo_publicado = self._ultimo_id.get(canal, 0)
+        if ultimo_id is None:
+            return suscripcion, []
+
+        # Hay un hueco si los eventos que faltan ya salieron del historial (o
+        # se omitieron) o si el ID es de otro proceso (ej. el servidor se reinició)
+        primero = historial[0].id if historial else ultimo_publicado + 1
+        hueco = ultimo_id > ultimo_publicado or primero > ultimo_id + 1
+        if hueco:
+            return suscripcion, [Evento(ultimo_publicado, canal, 'reset', {})]
+        return suscripcion, [evento for evento in historial if evento.id > ultimo_id]
+
+    def _quitar(self, suscripcion):
+        with self._lock:
+            suscripciones = self._suscripciones.get(suscripcion.canal)
+            if suscripciones is not None:
+                suscripciones.discard(suscripcion)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def obtener_broker():
+    """Instancia única del broker configurado en settings.EVENTOS_BROKER."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                ruta = getattr(settings, 'EVENTOS_BROKER', 'core.eventos.BrokerEnMemoria')
+                _broker = import_string(ruta)()
+    return _broker
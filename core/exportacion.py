@@ -0,0 +1,246 @@
+"""
+Exportación de listados a CSV o XLSX como respuesta en streaming.
+
+Las filas llegan de un generador (en lotes, ver iterar_por_clave) y se
+escriben a medida que salen de la base: la memoria queda acotada a un
+lote y los primeros bytes se envían enseguida, sin importar el tamaño
+del archivo.
+
+- CSV: UTF-8 con BOM (Excel lo abre con los acentos bien), fechas en la
+  hora local.
+- XLSX: se arma con zipfile de la biblioteca estándar sobre una salida
+  no "seekable" (zipfile escribe cada parte con data descriptor, sin
+  volver atrás). Una sola hoja, textos "inline" (sin tabla de strings
+  compartidos, que obligaría a tener todos los textos en memoria) y
+  fechas/horas como números con formato.
+"""
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Caracteres de control que XML 1.0 no admite
+_CONTROL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_ORIGEN_EXCEL = datetime(1899, 12, 30)
+
+# Filas por consulta al recorrer el queryset (iterar_por_clave)
+LOTE_FILAS = 1000
+
+
+def _local(momento):
+    if timezone.is_aware(momento):
+        momento = timezone.localtime(momento)
+    return momento.replace(tzinfo=None)
+
+
+# ============================================
+# CSV
+# ============================================
+
+class _Eco:
+    """'Archivo' que devuelve lo escrito, para usar csv.writer en un generador."""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    if isinstance(valor, datetime):
+        return _local(valor).strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, time):
+        return valor.strftime('%H:%M')
+    return valor
+
+
+def generar_csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow([_valor_csv(valor) for valor in fila])
+
+
+# ============================================
+# XLSX
+# ============================================
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Estilos de celda (cellXfs): 0 general, 1 fecha y hora, 2 fecha, 3 hora, 4 encabezado
+_ESTILO_FECHA_HORA, _ESTILO_FECHA, _ESTILO_HORA, _ESTILO_ENCABEZADO = 1, 2, 3, 4
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="3">'
+    '<numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm"/>'
+    '<numFmt numFmtId="165" formatCode="dd/mm/yyyy"/>'
+    '<numFmt numFmtId="166" formatCode="hh:mm"/>'
+    '</numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="166" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+
+
+def _workbook(hoja):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(hoja[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+
+
+def _celda_texto(texto, estilo=0):
+    atributo = f' s="{estilo}"' if estilo else ''
+    texto = escape(_CONTROL_XML.sub('', str(texto)))
+    return f'<c t="inlineStr"{atributo}><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _celda(valor):
+    if valor is None or valor == '':
+        return '<c/>'
+    if isinstance(valor, bool):
+        return f'<c t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float, Decimal)):
+        return f'<c><v>{valor}</v></c>'
+    if isinstance(valor, datetime):
+        dias = (_local(valor) - _ORIGEN_EXCEL).total_seconds() / 86400
+        return f'<c s="{_ESTILO_FECHA_HORA}"><v>{dias}</v></c>'
+    if isinstance(valor, date):
+        return f'<c s="{_ESTILO_FECHA}"><v>{(valor - _ORIGEN_EXCEL.date()).days}</v></c>'
+    if isinstance(valor, time):
+        segundos = valor.hour * 3600 + valor.minute * 60 + valor.second
+        return f'<c s="{_ESTILO_HORA}"><v>{segundos / 86400}</v></c>'
+    return _celda_texto(valor)
+
+
+class _SalidaSinSeek(io.RawIOBase):
+    """Acumula lo que escribe zipfile hasta que el generador lo envía."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def generar_xlsx(encabezados, filas, hoja='Hoja1'):
+    salida = _SalidaSinSeek()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as archivo:
+        archivo.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archivo.writestr('_rels/.rels', _RELS)
+        archivo.writestr('xl/workbook.xml', _workbook(hoja))
+        archivo.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        archivo.writestr('xl/styles.xml', _STYLES)
+        yield salida.vaciar()
+
+        # Sin seek, zipfile no puede agrandar el encabezado si la hoja pasa
+        # de 4 GiB: se reserva desde el principio (ZIP64)
+        with archivo.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilla:
+            planilla.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData><row>'
+                + ''.join(_celda_texto(titulo, _ESTILO_ENCABEZADO) for titulo in encabezados)
+                + '</row>'
+            ).encode('utf-8'))
+            for fila in filas:
+                planilla.write(('<row>' + ''.join(_celda(valor) for valor in fila) + '</row>').encode('utf-8'))
+                # El compresor entrega bloques cada tanto: se envían apenas hay bytes
+                datos = salida.vaciar()
+                if datos:
+                    yield datos
+            planilla.write(b'</sheetData></worksheet>')
+    # Lo que queda: el final de la hoja y el directorio central del zip
+    yield salida.vaciar()
+
+
+# ============================================
+# RESPUESTA
+# ============================================
+
+def respuesta_exportacion(formato, encabezados, filas, nombre_archivo, hoja='Hoja1'):
+    """
+    StreamingHttpResponse con el archivo 'nombre_archivo.<formato>'.
+    'filas' es un iterable de tuplas en el orden de 'encabezados'.
+    """
+    if formato == 'xlsx':
+        contenido = generar_xlsx(encabezados, filas, hoja)
+    else:
+        contenido = generar_csv(encabezados, filas)
+    response = StreamingHttpResponse(contenido, content_type=FORMATOS[formato])
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.{formato}"'
+    response['Cache-Control'] = 'no-cache'
+    # Que un proxy (nginx) no junte toda la respuesta antes de enviarla
+    response['X-Accel-Buffering'] = 'no'
+    return response
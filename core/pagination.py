@@ -0,0 +1,244 @@
+"""
+Paginación por clave (keyset / "seek") compartida entre las apps.
+
+A diferencia de PageNumberPagination, no hace COUNT(*) ni OFFSET: cada
+página se pide con un cursor que codifica los valores de orden de la
+última fila entregada, y la consulta siguiente filtra "después de" esa
+fila. El costo de una página profunda es el mismo que el de la primera.
+"""
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    'ordering' es la tupla de campos que define el orden total (el último
+    debe ser único, normalmente 'id'). Prefijo '-' = descendente.
+    Los campos tienen que ser columnas o anotaciones del queryset: los
+    valores se leen de cada fila para armar el cursor.
+    """
+
+    ordering = ('id',)
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    # --- Cursor ---
+
+    def encode_cursor(self, valores):
+        crudo = json.dumps([
+            valor.isoformat() if hasattr(valor, 'isoformat') else valor
+            for valor in valores
+        ])
+        return base64.urlsafe_b64encode(crudo.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(valores, list) or len(valores) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return valores
+
+    def filtro_posterior(self, valores):
+        """
+        Q equivalente a (c1, c2, ..., cn) > (v1, v2, ..., vn) respetando
+        la dirección de cada campo:
+        c1 > v1  OR  (c1 = v1 AND c2 > v2)  OR  ...
+
+        Se antepone además "c1 >= v1" (redundante): el OR no sirve como
+        condición de índice y sin esa cota el planner recorre el índice
+        desde el principio filtrando fila por fila.
+        """
+        condicion = Q()
+        iguales = Q()
+        for campo, valor in zip(self.ordering, valores):
+            nombre = campo.lstrip('-')
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            condicion |= iguales & Q(**{f'{nombre}__{operador}': valor})
+            iguales &= Q(**{nombre: valor})
+        if len(self.ordering) > 1:
+            primero = self.ordering[0]
+            operador = 'lte' if primero.startswith('-') else 'gte'
+            condicion = Q(**{f'{primero.lstrip("-")}__{operador}': valores[0]}) & condicion
+        return condicion
+
+    @staticmethod
+    def valor_de(fila, nombre):
+        if isinstance(fila, dict):
+            return fila[nombre]
+        return getattr(fila, nombre)
+
+    # --- API de DRF ---
+
+    def get_page_size(self, request):
+        valor = request.query_params.get(self.page_size_query_param)
+        if valor:
+            try:
+                tamanio = int(valor)
+            except ValueError:
+                return self.page_size
+            if tamanio > 0:
+                return min(tamanio, self.max_page_size)
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        tamanio = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                queryset = queryset.filter(self.filtro_posterior(self.decode_cursor(cursor)))
+            except (ValidationError, ValueError, TypeError):
+                # Valores que no corresponden a los campos del orden (cursor armado a mano)
+                raise NotFound(self.invalid_cursor_message)
+
+        # Se pide una fila de más para saber si hay página siguiente
+        filas = list(queryset[:tamanio + 1])
+        self.has_next = len(filas) > tamanio
+        filas = filas[:tamanio]
+
+        self.next_cursor = None
+        if self.has_next:
+            ultima = filas[-1]
+            self.next_cursor = self.encode_cursor(
+                [self.valor_de(ultima, campo.lstrip('-')) for campo in self.ordering]
+            )
+        return filas
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ]))
+
+
+class AuditoriaCursorPagination(KeysetPagination):
+    """
+    Paginación por cursor de las tablas de auditoría, del registro más
+    nuevo al más viejo. (fecha_accion, id) es único y tiene índice, así que
+    cada página es un recorrido corto del índice aunque la tabla tenga
+    millones de filas.
+
+    El total no se calcula salvo que se pida con ?conteo=aprox: en ese caso
+    se agrega 'count' (estimado, ver contar_aproximado) solo en la primera
+    página; las siguientes no lo necesitan.
+    """
+
+    ordering = ('-fecha_accion', '-id')
+    page_size = 10
+    max_page_size = 50
+    modo_query_param = 'paginacion'
+    conteo_query_param = 'conteo'
+
+    @classmethod
+    def solicitada(cls, request):
+        """True si el cliente pidió el modo cursor (o ya está navegando con uno)."""
+        return (
+            request.query_params.get(cls.modo_query_param) == 'cursor'
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if (request.query_params.get(self.conteo_query_param) == 'aprox'
+                and not request.query_params.get(self.cursor_query_param)):
+            self.count = contar_aproximado(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        respuesta = OrderedDict([('next', self.get_next_link()), ('first', self.get_first_link())])
+        if self.count is not None:
+            respuesta['count'] = self.count
+            respuesta['count_aproximado'] = True
+        respuesta['results'] = data
+        return Response(respuesta)
+
+
+# Por debajo de este número la estimación del planner es poco confiable y
+# contar de verdad es barato
+CONTEO_EXACTO_HASTA = 10000
+CONTEO_CACHE_TTL = 60
+
+
+def contar_aproximado(queryset):
+    """
+    Total aproximado de filas de un queryset sin recorrer la tabla.
+
+    En PostgreSQL se usa la estimación del planner (EXPLAIN, "Plan Rows");
+    si da menos de CONTEO_EXACTO_HASTA se cuenta exacto. En las demás bases
+    se hace COUNT(*) pero se cachea CONTEO_CACHE_TTL segundos por consulta,
+    así paginar o refrescar la pantalla no vuelve a contar.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimado = int(plan[0]['Plan']['Plan Rows'])
+        if estimado >= CONTEO_EXACTO_HASTA:
+            return estimado
+        return queryset.count()
+
+    sql, params = queryset.query.sql_with_params()
+    huella = hashlib.sha1(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+    return cache.get_or_set(f'conteo:{queryset.db}:{huella}', queryset.count, CONTEO_CACHE_TTL)
+
+
+def iterar_por_clave(queryset, ordering, tamanio_lote=500):
+    """
+    Recorre un queryset completo en lotes de 'tamanio_lote' filas usando la
+    misma condición de keyset que KeysetPagination (sin OFFSET).
+
+    Es la alternativa a .iterator(chunk_size=...) cuando la base está detrás
+    de un pooler en modo transacción (Supabase, pgbouncer), donde los cursores
+    del lado del servidor no sirven y psycopg2 traería todo el resultado de
+    una vez. La memoria queda acotada a un lote.
+    """
+    paginador = KeysetPagination(ordering)
+    queryset = queryset.order_by(*paginador.ordering)
+    campos = [campo.lstrip('-') for campo in paginador.ordering]
+    filtro = None
+    while True:
+        lote = queryset.filter(filtro) if filtro is not None else queryset
+        filas = list(lote[:tamanio_lote])
+        yield from filas
+        if len(filas) < tamanio_lote:
+            return
+        ultima = filas[-1]
+        filtro = paginador.filtro_posterior([paginador.valor_de(ultima, campo) for campo in campos])
@@ -0,0 +1,27 @@
+"""
+Lectura de parámetros de la query string compartida por las vistas.
+
+parse_date devuelve None si el texto no tiene la forma AAAA-MM-DD, pero
+lanza ValueError si la tiene y la fecha no existe (2025-02-30): sin
+atraparlo la vista responde 500. Aquí los dos casos terminan en un 400
+de DRF ({"detail": ...}) que nombra el parámetro.
+"""
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ParseError
+
+
+def parametro_fecha(params, nombre):
+    """
+    Fecha del parámetro 'nombre' (None si no vino o está vacío).
+    Lanza ParseError (400) si no es una fecha AAAA-MM-DD válida.
+    """
+    valor = params.get(nombre, None)
+    if not valor:
+        return None
+    try:
+        fecha = parse_date(valor)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ParseError(f"El parámetro '{nombre}' debe ser una fecha válida con formato AAAA-MM-DD.")
+    return fecha
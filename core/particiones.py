@@ -0,0 +1,326 @@
+"""
+Particionado mensual por rango (PostgreSQL) de las tablas de auditoría.
+
+AuditoriaTurnos y AuditoriaPagos solo crecen y casi siempre se consultan
+por rangos de fecha_accion. Particionadas por mes:
+
+- Postgres descarta las particiones fuera del rango pedido (partition
+  pruning), así que una consulta acotada por fecha lee solo esos meses.
+- La retención es un DETACH (y opcionalmente DROP) de la partición vieja,
+  en lugar de un DELETE masivo.
+
+Cada tabla tiene además una partición DEFAULT que recibe las filas de
+meses sin partición propia; al crear ese mes (o al desvincular los meses
+viejos), las filas se mueven.
+
+En otros motores (SQLite en desarrollo) las tablas quedan como están y la
+retención se hace con DELETE (ver podar_tabla).
+"""
+import re
+from datetime import date, datetime, time
+
+from django.utils import timezone
+
+SUFIJO_DEFAULT = '_default'
+PATRON_PARTICION = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def soporta_particiones(connection):
+    return connection.vendor == 'postgresql'
+
+
+# --- Fechas ---
+
+def inicio_mes(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(mes, cantidad):
+    total = mes.year * 12 + mes.month - 1 + cantidad
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def limite(mes):
+    """Inicio del mes como timestamptz en la zona horaria del proyecto."""
+    return timezone.make_aware(datetime.combine(mes, time.min))
+
+
+def nombre_particion(tabla, mes):
+    return f'{tabla}_p{mes:%Y_%m}'
+
+
+# --- Introspección ---
+
+def esta_particionada(cursor, tabla):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [tabla])
+    fila = cursor.fetchone()
+    return fila is not None and fila[0] == 'p'
+
+
+def existe_tabla(cursor, tabla):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [tabla])
+    return cursor.fetchone()[0]
+
+
+def particiones_mensuales(cursor, tabla):
+    """[(mes, nombre)] de las particiones adjuntas, ordenadas por mes."""
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        """,
+        [tabla],
+    )
+    particiones = []
+    for (nombre,) in cursor.fetchall():
+        coincidencia = PATRON_PARTICION.search(nombre)
+        if coincidencia:
+            mes = date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1)
+            particiones.append((mes, nombre))
+    return sorted(particiones)
+
+
+def particiones_archivadas(cursor, tabla):
+    """[(mes, nombre)] de las particiones mensuales que se desvincularon (tablas sueltas)."""
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_class c
+        WHERE c.relkind = 'r' AND NOT c.relispartition
+          AND c.relnamespace = current_schema()::regnamespace
+          AND c.relname LIKE %s
+        """,
+        [tabla.replace('_', r'\_') + r'\_p%'],
+    )
+    archivadas = []
+    for (nombre,) in cursor.fetchall():
+        coincidencia = PATRON_PARTICION.search(nombre)
+        if coincidencia and nombre == f'{tabla}_p{coincidencia.group(1)}_{coincidencia.group(2)}':
+            archivadas.append((date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1), nombre))
+    return sorted(archivadas)
+
+
+def _indices_y_fks(cursor, tabla):
+    """Definiciones de índices (sin la PK) y FKs de la tabla, para recrearlas."""
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+        """,
+        [tabla],
+    )
+    indices = [fila[0] for fila in cursor.fetchall()]
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [tabla],
+    )
+    return indices, cursor.fetchall()
+
+
+def _recrear_indices_y_fks(cursor, quote, tabla_vieja, tabla, indices, fks):
+    patron = re.compile(rf'\bON (ONLY )?(\S+\.)?"?{re.escape(tabla_vieja)}"? ')
+    for definicion in indices:
+        cursor.execute(patron.sub(f'ON {quote(tabla)} ', definicion, count=1))
+    for nombre, definicion in fks:
+        cursor.execute(f'ALTER TABLE {quote(tabla)} ADD CONSTRAINT {quote(nombre)} {definicion}')
+
+
+def _renombrar_pk(cursor, quote, tabla):
+    """La PK nueva se crea mientras existe la vieja (nombre <tabla>_pkey1): se normaliza."""
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+        [tabla],
+    )
+    actual = cursor.fetchone()[0]
+    if actual != f'{tabla}_pkey':
+        cursor.execute(f'ALTER TABLE {quote(tabla)} RENAME CONSTRAINT {quote(actual)} TO {quote(tabla + "_pkey")}')
+
+
+def _copiar_filas(cursor, quote, origen, destino, columna_id):
+    """Copia todas las filas y ajusta la secuencia del id de la tabla destino."""
+    cursor.execute(
+        f'INSERT INTO {quote(destino)} OVERRIDING SYSTEM VALUE SELECT * FROM {quote(origen)}'
+    )
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [destino, columna_id])
+    secuencia = cursor.fetchone()[0]
+    if secuencia is None:
+        # Columna serial (no identity): la secuencia pertenece a la tabla vieja
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [origen, columna_id])
+        secuencia = cursor.fetchone()[0]
+        if secuencia:
+            cursor.execute(f'ALTER SEQUENCE {secuencia} OWNED BY {quote(destino)}.{quote(columna_id)}')
+    if secuencia:
+        cursor.execute(
+            f'SELECT setval(%s, COALESCE(MAX({quote(columna_id)}), 1), MAX({quote(columna_id)}) IS NOT NULL) '
+            f'FROM {quote(destino)}',
+            [secuencia],
+        )
+
+
+# --- Conversión (migraciones) ---
+
+def particionar_tabla(connection, tabla, columna='fecha_accion', meses_adelante=3):
+    """
+    Convierte 'tabla' en una tabla particionada por mes sobre 'columna'
+    conservando filas, ids, índices y FKs. La PK pasa a ser (id, columna),
+    porque Postgres exige que incluya la clave de partición.
+    No hace nada si ya está particionada o si el motor no es Postgres.
+    """
+    if not soporta_particiones(connection):
+        return
+    quote = connection.ops.quote_name
+    vieja = f'{tabla}_sin_particionar'
+    with connection.cursor() as cursor:
+        if esta_particionada(cursor, tabla):
+            return
+        cursor.execute(f'ALTER TABLE {quote(tabla)} RENAME TO {quote(vieja)}')
+        indices, fks = _indices_y_fks(cursor, vieja)
+
+        cursor.execute(
+            f'CREATE TABLE {quote(tabla)} '
+            f'(LIKE {quote(vieja)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE ({quote(columna)})'
+        )
+        cursor.execute(f'ALTER TABLE {quote(tabla)} ADD PRIMARY KEY ("id", {quote(columna)})')
+        cursor.execute(
+            f'CREATE TABLE {quote(tabla + SUFIJO_DEFAULT)} PARTITION OF {quote(tabla)} DEFAULT'
+        )
+
+        # Particiones para los meses que ya tienen datos y los próximos
+        cursor.execute(f'SELECT MIN({quote(columna)}), MAX({quote(columna)}) FROM {quote(vieja)}')
+        minimo, maximo = cursor.fetchone()
+        hoy = inicio_mes(timezone.localdate())
+        desde = inicio_mes(timezone.localtime(minimo).date()) if minimo else hoy
+        hasta = max(inicio_mes(timezone.localtime(maximo).date()) if maximo else hoy, hoy)
+        mes = desde
+        while mes <= sumar_meses(hasta, meses_adelante):
+            crear_particion(connection, tabla, mes, columna, cursor=cursor)
+            mes = sumar_meses(mes, 1)
+
+        _copiar_filas(cursor, quote, vieja, tabla, 'id')
+        cursor.execute(f'DROP TABLE {quote(vieja)}')
+        _renombrar_pk(cursor, quote, tabla)
+        _recrear_indices_y_fks(cursor, quote, vieja, tabla, indices, fks)
+
+
+def desparticionar_tabla(connection, tabla):
+    """Inverso de particionar_tabla: vuelve a una tabla común con PK (id)."""
+    if not soporta_particiones(connection):
+        return
+    quote = connection.ops.quote_name
+    vieja = f'{tabla}_particionada'
+    with connection.cursor() as cursor:
+        if not esta_particionada(cursor, tabla):
+            return
+        cursor.execute(f'ALTER TABLE {quote(tabla)} RENAME TO {quote(vieja)}')
+        indices, fks = _indices_y_fks(cursor, vieja)
+
+        cursor.execute(
+            f'CREATE TABLE {quote(tabla)} '
+            f'(LIKE {quote(vieja)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY)'
+        )
+        cursor.execute(f'ALTER TABLE {quote(tabla)} ADD PRIMARY KEY ("id")')
+        _copiar_filas(cursor, quote, vieja, tabla, 'id')
+        cursor.execute(f'DROP TABLE {quote(vieja)} CASCADE')
+        _renombrar_pk(cursor, quote, tabla)
+        _recrear_indices_y_fks(cursor, quote, vieja, tabla, indices, fks)
+
+
+# --- Mantenimiento (comando particiones_auditoria) ---
+
+def crear_particion(connection, tabla, mes, columna='fecha_accion', cursor=None):
+    """
+    Crea la partición del mes si no existe. Si la partición DEFAULT ya
+    tiene filas de ese mes, se mueven a la nueva antes de adjuntarla.
+    Devuelve True si la creó.
+    """
+    if cursor is None:
+        with connection.cursor() as cursor:
+            return crear_particion(connection, tabla, mes, columna, cursor=cursor)
+
+    quote = connection.ops.quote_name
+    nombre = nombre_particion(tabla, mes)
+    if existe_tabla(cursor, nombre):
+        return False
+    desde, hasta = limite(mes), limite(sumar_meses(mes, 1))
+    default = tabla + SUFIJO_DEFAULT
+
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM {quote(default)} '
+        f'WHERE {quote(columna)} >= %s AND {quote(columna)} < %s)',
+        [desde, hasta],
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(
+            f'CREATE TABLE {quote(nombre)} PARTITION OF {quote(tabla)} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [desde, hasta],
+        )
+        return True
+
+    cursor.execute(
+        f'CREATE TABLE {quote(nombre)} (LIKE {quote(tabla)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    cursor.execute(
+        f'WITH movidas AS (DELETE FROM {quote(default)} '
+        f'WHERE {quote(columna)} >= %s AND {quote(columna)} < %s RETURNING *) '
+        f'INSERT INTO {quote(nombre)} SELECT * FROM movidas',
+        [desde, hasta],
+    )
+    cursor.execute(
+        f'ALTER TABLE {quote(tabla)} ATTACH PARTITION {quote(nombre)} '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [desde, hasta],
+    )
+    return True
+
+
+def desvincular_particiones(connection, tabla, antes_de, eliminar=False, columna='fecha_accion'):
+    """
+    DETACH de las particiones mensuales anteriores al mes de 'antes_de'.
+    Quedan como tablas sueltas (archivo) salvo que eliminar=True.
+    Las filas viejas que estén en la partición DEFAULT (meses que nunca
+    tuvieron partición propia) se mueven antes a la de su mes, así la
+    retención también las alcanza.
+    Devuelve los nombres de las particiones procesadas.
+    """
+    quote = connection.ops.quote_name
+    corte = inicio_mes(antes_de)
+    procesadas = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', {quote(columna)} AT TIME ZONE %s)::date "
+            f'FROM {quote(tabla + SUFIJO_DEFAULT)} WHERE {quote(columna)} < %s',
+            [timezone.get_current_timezone_name(), limite(corte)],
+        )
+        for (mes,) in cursor.fetchall():
+            crear_particion(connection, tabla, mes, columna, cursor=cursor)
+
+        for mes, nombre in particiones_mensuales(cursor, tabla):
+            if mes >= corte:
+                break
+            cursor.execute(f'ALTER TABLE {quote(tabla)} DETACH PARTITION {quote(nombre)}')
+            if eliminar:
+                cursor.execute(f'DROP TABLE {quote(nombre)}')
+            procesadas.append(nombre)
+
+        if eliminar:
+            # Particiones desvinculadas en corridas anteriores (archivadas)
+            for mes, nombre in particiones_archivadas(cursor, tabla):
+                if mes < corte:
+                    cursor.execute(f'DROP TABLE {quote(nombre)}')
+                    procesadas.append(nombre)
+    return procesadas
+
+
+def podar_tabla(modelo, antes_de, columna='fecha_accion'):
+    """Retención sin particiones: DELETE de las filas anteriores al mes de 'antes_de'."""
+    corte = limite(inicio_mes(antes_de))
+    cantidad, _ = modelo._base_manager.filter(**{f'{columna}__lt': corte}).delete()
+    return cantidad
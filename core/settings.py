@@ -65,6 +65,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # Agrupa las auditorías de cada request en un solo INSERT
+    'core.auditoria.AuditoriaBufferMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -0,0 +1,93 @@
+"""
+Rastreo de cambios de campos para modelos de Django.
+
+Los signals de auditoría necesitan comparar el estado anterior con el
+nuevo. Antes lo hacían con un Model.objects.get(pk=...) en cada pre_save;
+este mixin guarda una "foto" de los valores tal como se leyeron de la base
+(from_db) y la refresca después de cada save(), así que la comparación no
+cuesta ninguna consulta.
+"""
+
+
+class RastreoCambiosMixin:
+    """
+    Mixin para modelos. Debe ir ANTES de models.Model en la herencia:
+
+        class Turnos(RastreoCambiosMixin, models.Model): ...
+
+    La foto guarda los attname de los campos concretos (para las FK se
+    guarda el id, ej. 'estado_turno_id'), así que no dispara consultas.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tomar_foto()
+        return instance
+
+    def _tomar_foto(self, campos=None):
+        """Guarda los valores actuales. Los campos diferidos (.only/.defer) se omiten."""
+        foto = getattr(self, '_valores_originales', None)
+        if foto is None or campos is None:
+            foto = {}
+        for field in self._meta.concrete_fields:
+            if campos is not None and field.name not in campos and field.attname not in campos:
+                continue
+            if field.attname in self.__dict__:
+                foto[field.attname] = self.__dict__[field.attname]
+        self._valores_originales = foto
+
+    def valores_originales(self):
+        """
+        Devuelve {attname: valor} tal como está en la base.
+        Si la instancia no se cargó desde la base (ej. se construyó a mano
+        con un pk), se lee una vez con una consulta, como fallback.
+        """
+        foto = getattr(self, '_valores_originales', None)
+        if foto is None:
+            if self.pk is None:
+                return {}
+            attnames = [field.attname for field in self._meta.concrete_fields]
+            foto = type(self)._base_manager.filter(pk=self.pk).values(*attnames).first() or {}
+            self._valores_originales = foto
+        return foto
+
+    def valor_original(self, campo):
+        """Valor original de un campo ('estado_turno' o 'estado_turno_id')."""
+        field = self._meta.get_field(campo)
+        return self.valores_originales().get(field.attname)
+
+    def campos_modificados(self):
+        """
+        Nombres (field.name) de los campos que cambiaron desde la foto.
+        Para una instancia nueva devuelve todos los campos concretos.
+        """
+        foto = self.valores_originales() if self.pk is not None else {}
+        modificados = set()
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:
+                continue  # diferido: no se tocó
+            if field.attname not in foto or foto[field.attname] != self.__dict__[field.attname]:
+                modificados.add(field.name)
+        return modificados
+
+    def guardar_cambios(self, **kwargs):
+        """
+        save() con update_fields limitado a los campos modificados.
+        Si no cambió nada no se ejecuta ninguna consulta.
+        """
+        if self.pk is None or self._state.adding:
+            return self.save(**kwargs)
+        campos = self.campos_modificados()
+        if not campos:
+            return None
+        return self.save(update_fields=campos, **kwargs)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Después del save (y de los signals post_save) la base ya tiene estos valores
+        self._tomar_foto(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._tomar_foto(fields)
@@ -160,6 +160,66 @@ export const updateSeguimiento = async (historiaId, seguimientoId, seguimientoDa
     }
 };
 
+/**
+ * Pagos de una historia clínica (filtrados en el servidor).
+ * @param {number} historiaId - ID de la Historia Clínica
+ * @param {object} params - Opcionales: pagado, tipo_pago, fecha_desde, fecha_hasta, page_size, cursor
+ */
+export const getPagosHistoriaClinica = async (historiaId, params = {}) => {
+    try {
+        const response = await historiasApi.get(`/historias/${historiaId}/pagos/`, { params });
+        return response.data;
+    } catch (error) {
+        console.error(`Error al obtener los pagos de la HC ${historiaId}:`, error.response?.data || error);
+        throw error;
+    }
+};
+
+/**
+ * Plan de cuotas de una historia clínica con el estado de cada pago.
+ * Respuesta: { historia_clinica, ortodoncia, total, pagadas, cuotas: [{ tipo_pago, tipo_pago_nombre, pago, pagado, fecha_pago, monto, registrado_por_nombre, existe }] }
+ * @param {number} historiaId - ID de la Historia Clínica
+ */
+export const getPlanCuotas = async (historiaId) => {
+    try {
+        const response = await historiasApi.get(`/historias/${historiaId}/plan-cuotas/`);
+        return response.data;
+    } catch (error) {
+        console.error(`Error al obtener el plan de cuotas de la HC ${historiaId}:`, error.response?.data || error);
+        throw error;
+    }
+};
+
+/**
+ * Crea los pagos (sin pagar) que falten del plan de cuotas y devuelve el plan actualizado.
+ * @param {number} historiaId - ID de la Historia Clínica
+ * @param {Object} montos - Monto de cada cuota nueva por ID de tipo de pago (opcional): { 3: 15000 }
+ */
+export const generarPlanCuotas = async (historiaId, montos = {}) => {
+    try {
+        const response = await historiasApi.post(`/historias/${historiaId}/plan-cuotas/`, { montos });
+        return response.data;
+    } catch (error) {
+        console.error(`Error al generar el plan de cuotas de la HC ${historiaId}:`, error.response?.data || error);
+        throw error;
+    }
+};
+
+/**
+ * Saldo precalculado de una historia clínica.
+ * Respuesta: { hist_clin, cantidad_pagos, cantidad_pagados, monto_total, monto_pagado, saldo }
+ * @param {number} historiaId - ID de la Historia Clínica
+ */
+export const getSaldoHistoriaClinica = async (historiaId) => {
+    try {
+        const response = await historiasApi.get(`/historias/${historiaId}/saldo/`);
+        return response.data;
+    } catch (error) {
+        console.error(`Error al obtener el saldo de la HC ${historiaId}:`, error.response?.data || error);
+        throw error;
+    }
+};
+
 // ... (Puedes añadir funciones para editar o eliminar seguimientos,
 
 /**
@@ -37,9 +37,10 @@ pagosApi.interceptors.response.use(
 // A. CRUD PRINCIPAL (PAGOS)
 // ===============================================
 
-export const getPagos = async () => {
+// Filtros opcionales: hist_clin, pagado, tipo_pago, fecha_desde, fecha_hasta (y page_size/cursor para paginar)
+export const getPagos = async (params = {}) => {
     try {
-        const response = await pagosApi.get('/');
+        const response = await pagosApi.get('/', { params });
         return response.data;
     } catch (error) {
         console.error('Error al obtener la lista de pagos:', error);
@@ -138,4 +139,55 @@ export const getAuditoriaDetail = async (id) => {
         console.error(`Error al obtener auditoría ${id}:`, error);
         throw error;
     }
-}
\ No newline at end of file
+}
+
+/**
+ * Exporta la auditoría de pagos (mismos filtros que el listado, sin paginar).
+ * Parámetros: formato ('csv' | 'xlsx') y los filtros de getAuditorias
+ * Respuesta: Blob con el archivo
+ * Endpoint: GET /api/pagos/auditoria/exportar/
+ */
+export const exportarAuditorias = async (filtros = {}, formato = 'csv') => {
+    try {
+        const response = await pagosApi.get('/auditoria/exportar/', {
+            params: { ...filtros, formato },
+            responseType: 'blob'
+        });
+        return response.data;
+    } catch (error) {
+        console.error('Error al exportar auditorías:', error);
+        throw error;
+    }
+}
+
+/**
+ * Ingresos por día (pagos marcados como pagados) y totales del período.
+ * Parámetros: fecha_desde, fecha_hasta (opcionales, AAAA-MM-DD)
+ * Respuesta: { totales: { cantidad_pagos, monto }, dias: [{ fecha, cantidad_pagos, monto }] }
+ * Endpoint: GET /api/pagos/ingresos/
+ */
+export const getIngresos = async (params = {}) => {
+    try {
+        const response = await pagosApi.get('/ingresos/', { params });
+        return response.data;
+    } catch (error) {
+        console.error('Error al obtener los ingresos:', error);
+        throw error;
+    }
+}
+
+/**
+ * Pacientes con pagos sin pagar, de la deuda más vieja a la más nueva.
+ * Parámetros: paciente, odontologo, dias_min (opcionales)
+ * Respuesta: { tramos: [{ tramo, pacientes, cuotas_impagas, monto_adeudado }], deudores: [...] }
+ * Endpoint: GET /api/pagos/deudores/
+ */
+export const getDeudores = async (params = {}) => {
+    try {
+        const response = await pagosApi.get('/deudores/', { params });
+        return response.data;
+    } catch (error) {
+        console.error('Error al obtener los deudores:', error);
+        throw error;
+    }
+}
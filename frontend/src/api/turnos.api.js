@@ -12,9 +12,14 @@ const turnosApi = axios.create({
 // A. CRUD PRINCIPAL (TURNOS)
 // ===============================================
 
-export const getTurnos = async () => {
+/**
+ * Lista de turnos. Filtros opcionales: odontologo, paciente, estado, fecha,
+ * fecha_desde, fecha_hasta. Con page_size/cursor la respuesta viene paginada
+ * ({ next, first, results }).
+ */
+export const getTurnos = async (params = {}) => {
     try {
-        const response = await turnosApi.get('/');
+        const response = await turnosApi.get('/', { params });
         return response.data;
     } catch (error) {
         console.error('Error al obtener la lista de turnos:', error);
@@ -52,6 +57,43 @@ export const updateTurno = async (id, turnoData) => {
     }
 }
 
+/**
+ * Cambia el estado de varios turnos en una sola petición.
+ * Endpoint: POST /api/turnos/cambiar-estado/
+ */
+export const cambiarEstadoTurnos = async (turnoIds, estadoId, modificadoPor = null) => {
+    try {
+        const response = await turnosApi.post('/cambiar-estado/', {
+            turnos: turnoIds,
+            estado_turno: estadoId,
+            modificado_por: modificadoPor,
+        });
+        return response.data;
+    } catch (error) {
+        console.error('Error al cambiar el estado de los turnos:', error.response?.data || error);
+        throw error;
+    }
+}
+
+/**
+ * Crea una serie de turnos recurrentes (semanal, quincenal o mensual).
+ * Devuelve { creados, conflictos } (los conflictos traen alternativas libres).
+ * Endpoint: POST /api/turnos/series/
+ */
+export const createSerieTurnos = async (serieData) => {
+    try {
+        const response = await turnosApi.post('/series/', serieData);
+        return response.data;
+    } catch (error) {
+        // 409: ninguna fecha estaba libre, la respuesta igual trae los conflictos
+        if (error.response?.status === 409) {
+            return error.response.data;
+        }
+        console.error('Error al crear la serie de turnos:', error.response?.data || error);
+        throw error;
+    }
+}
+
 export const deleteTurno = async (id) => {
     try {
         await turnosApi.delete(`/${id}/`);
@@ -62,6 +104,91 @@ export const deleteTurno = async (id) => {
     }
 }
 
+/**
+ * Horarios libres por odontólogo y por día, calculados en el servidor.
+ * Parámetros: odontologos ('1,2'), fecha_desde, fecha_hasta, excluir_turno (opcional)
+ * Endpoint: GET /api/turnos/disponibilidad/
+ */
+export const getDisponibilidad = async (params = {}) => {
+    try {
+        const response = await turnosApi.get('/disponibilidad/', { params });
+        return response.data;
+    } catch (error) {
+        console.error('Error al obtener la disponibilidad de horarios:', error);
+        throw error;
+    }
+}
+
+/**
+ * Próximos horarios libres entre todos los odontólogos activos ("primer turno disponible").
+ * Parámetros: cantidad (1-50, por defecto 5), especialidad, fecha_desde (opcionales)
+ * Respuesta: { horarios: [{ fecha, hora, horario_turno, odontologo, odontologo_nombre }], horizonte_dias }
+ * Endpoint: GET /api/turnos/disponibilidad/primeros/
+ */
+export const getPrimerosTurnosDisponibles = async (params = {}) => {
+    try {
+        const response = await turnosApi.get('/disponibilidad/primeros/', { params });
+        return response.data;
+    } catch (error) {
+        console.error('Error al obtener los primeros turnos disponibles:', error);
+        throw error;
+    }
+}
+
+/**
+ * Resumen diario precalculado de la agenda y sus totales.
+ * Parámetros: fecha_desde, fecha_hasta, odontologo (opcionales)
+ * Respuesta: { totales: { total_turnos, por_estado: { [estadoId]: n }, ocupados, libres }, dias: [...] }
+ * Endpoint: GET /api/turnos/resumen/
+ */
+export const getResumenAgenda = async (params = {}) => {
+    try {
+        const response = await turnosApi.get('/resumen/', { params });
+        return response.data;
+    } catch (error) {
+        console.error('Error al obtener el resumen de la agenda:', error);
+        throw error;
+    }
+}
+
+/**
+ * Estadísticas agregadas en el servidor: por estado, odontólogo, día de la semana y horario.
+ * Parámetros: periodo ('last_week' | 'last_month' | 'last_year' | 'all'), estado, odontologo
+ * Endpoint: GET /api/turnos/estadisticas/
+ */
+export const getEstadisticasTurnos = async (params = {}) => {
+    try {
+        const response = await turnosApi.get('/estadisticas/', { params });
+        return response.data;
+    } catch (error) {
+        console.error('Error al obtener las estadísticas de turnos:', error);
+        throw error;
+    }
+}
+
+/**
+ * Se suscribe al canal de eventos en vivo (SSE) de turnos.
+ * handlers: { creado, modificado, eliminado, reset } reciben el dato del evento.
+ * Devuelve una función para cerrar la conexión. El navegador reconecta solo
+ * y manda Last-Event-ID para recuperar lo que se perdió.
+ */
+export const suscribirEventosTurnos = (handlers = {}) => {
+    const source = new EventSource(`${turnosApi.defaults.baseURL}/eventos/`);
+    ['creado', 'modificado', 'eliminado', 'reset'].forEach((tipo) => {
+        source.addEventListener(tipo, (event) => {
+            try {
+                handlers[tipo]?.(JSON.parse(event.data));
+            } catch (error) {
+                console.error(`Error al procesar el evento '${tipo}' de turnos:`, error);
+            }
+        });
+    });
+    source.onerror = (error) => {
+        console.error('Error en el canal de eventos de turnos:', error);
+    };
+    return () => source.close();
+}
+
 
 // ===============================================
 // B. LISTADOS DE OPCIONES (LOOKUP DATA)
@@ -160,4 +287,23 @@ export const getAuditoriaTurnoDetail = async (id) => {
         console.error(`Error al obtener auditoría de turno ${id}:`, error);
         throw error;
     }
+}
+
+/**
+ * Exporta la auditoría de turnos (mismos filtros que el listado, sin paginar).
+ * Parámetros: formato ('csv' | 'xlsx') y los filtros de getAuditoriasTurnos
+ * Respuesta: Blob con el archivo
+ * Endpoint: GET /api/turnos/auditoria/exportar/
+ */
+export const exportarAuditoriasTurnos = async (filtros = {}, formato = 'csv') => {
+    try {
+        const response = await turnosApi.get('/auditoria/exportar/', {
+            params: { ...filtros, formato },
+            responseType: 'blob'
+        });
+        return response.data;
+    } catch (error) {
+        console.error('Error al exportar auditorías de turnos:', error);
+        throw error;
+    }
 }
\ No newline at end of file
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react'; // 👈 Importar useCallback
+import React, { useState, useEffect, useCallback, useRef } from 'react'; // 👈 Importar useCallback
 import { getAuditorias } from '../../api/pagos.api';
 import styles from './AuditoriaPagos.module.css';
 
@@ -13,6 +13,10 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
     // --- ESTADO DE PAGINACIÓN ---
     const [paginaActual, setPaginaActual] = useState(1);
     const [totalRegistros, setTotalRegistros] = useState(0);
+    // Paginación por cursor: cursores[i] es el cursor de la página i + 1
+    // (la primera no tiene). Así "Anterior" no necesita OFFSET.
+    const cursores = useRef([null]);
+    const [haySiguiente, setHaySiguiente] = useState(false);
     // ----------------------------
     
     // Filtros
@@ -20,6 +24,7 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
         accion: '',
         fecha_desde: '',
         fecha_hasta: '',
+        buscar: '',
     });
 
     // 👇 1. Envolver cargarAuditorias en useCallback
@@ -28,8 +33,15 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
         setError(null);
         try {
             const params = {
-                page: paginaActual // 👈 AÑADIR PÁGINA ACTUAL
+                paginacion: 'cursor',
             };
+            const cursor = cursores.current[paginaActual - 1];
+            if (cursor) {
+                params.cursor = cursor;
+            } else {
+                // Total estimado, solo en la primera página
+                params.conteo = 'aprox';
+            }
             
             if (historiaClinicaId) {
                 params.hist_clin_id = historiaClinicaId;
@@ -38,12 +50,17 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
             if (filtros.accion) params.accion = filtros.accion;
             if (filtros.fecha_desde) params.fecha_desde = filtros.fecha_desde;
             if (filtros.fecha_hasta) params.fecha_hasta = filtros.fecha_hasta;
+            if (filtros.buscar) params.buscar = filtros.buscar;
             
             // 👇 LA RESPUESTA DE LA API AHORA SERÁ UN OBJETO PAGINADO
             const data = await getAuditorias(params);
             
             setAuditorias(data.results); // 👈 Los datos están en 'results'
-            setTotalRegistros(data.count); // 👈 El total está en 'count'
+            if (data.count !== undefined) setTotalRegistros(data.count);
+
+            const siguiente = data.next ? new URL(data.next).searchParams.get('cursor') : null;
+            setHaySiguiente(Boolean(siguiente));
+            if (siguiente) cursores.current[paginaActual] = siguiente;
 
         } catch (err) {
             console.error('Error al cargar auditorías:', err);
@@ -65,10 +82,12 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
             [name]: value
         }));
         setPaginaActual(1); // 👈 RESETEAR A PÁGINA 1 AL CAMBIAR FILTRO
+        cursores.current = [null];
     };
 
     const aplicarFiltros = () => {
         setPaginaActual(1); // Resetear a página 1 al filtrar manualmente
+        cursores.current = [null];
         cargarAuditorias(); // Cargar con los filtros actuales
     };
 
@@ -78,8 +97,10 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
             accion: '',
             fecha_desde: '',
             fecha_hasta: '',
+            buscar: '',
         });
         setPaginaActual(1); // 👈 RESETEAR A PÁGINA 1 AL LIMPIAR
+        cursores.current = [null];
         // Ya no se necesita setTimeout, el useEffect se encargará
     };
 
@@ -87,7 +108,7 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
     const totalPaginas = Math.ceil(totalRegistros / REGISTROS_POR_PAGINA);
 
     const irPaginaSiguiente = () => {
-        setPaginaActual(prev => Math.min(prev + 1, totalPaginas));
+        if (haySiguiente) setPaginaActual(prev => prev + 1);
     };
 
     const irPaginaAnterior = () => {
@@ -122,6 +143,18 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
             {!historiaClinicaId && (
                 <div className={styles.filtrosContainer}>
                     {/* ... (Filtros no cambian) ... */}
+                    <div className={styles.filtroGroup}>
+                        <label htmlFor="buscar">Buscar:</label>
+                        <input 
+                            type="search"
+                            id="buscar"
+                            name="buscar"
+                            placeholder="Paciente, tipo de pago u observaciones"
+                            value={filtros.buscar}
+                            onChange={handleFiltroChange}
+                        />
+                    </div>
+
                     <div className={styles.filtroGroup}>
                         <label htmlFor="accion">Acción:</label>
                         <select 
@@ -225,11 +258,11 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
                         ‹ Anterior
                     </button>
                     <span className={styles.paginacionInfo}>
-                        Página {paginaActual} de {totalPaginas}
+                        Página {paginaActual} de ~{Math.max(totalPaginas, paginaActual)}
                     </span>
                     <button 
                         onClick={irPaginaSiguiente} 
-                        disabled={paginaActual >= totalPaginas}
+                        disabled={!haySiguiente}
                         className={styles.btnPaginacion}
                     >
                         Siguiente ›
@@ -240,7 +273,7 @@ export default function AuditoriaPagos({ historiaClinicaId = null }) {
 
             <div className={styles.totalRegistros}>
                 {/* 👇 ACTUALIZAR EL TOTAL PARA USAR 'totalRegistros' */}
-                Total de registros: <strong>{totalRegistros}</strong>
+                Total de registros (aprox.): <strong>{totalRegistros}</strong>
             </div>
         </div>
     );
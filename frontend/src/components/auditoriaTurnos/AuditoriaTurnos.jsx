@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { getAuditoriasTurnos } from '../../api/turnos.api';
 import styles from './AuditoriaTurnos.module.css';
 
@@ -13,12 +13,17 @@ export default function AuditoriaTurnos({ turnoNumero = null }) {
     // --- ESTADO DE PAGINACIÓN ---
     const [paginaActual, setPaginaActual] = useState(1);
     const [totalRegistros, setTotalRegistros] = useState(0);
+    // Paginación por cursor: cursores[i] es el cursor de la página i + 1
+    // (la primera no tiene). Así "Anterior" no necesita OFFSET.
+    const cursores = useRef([null]);
+    const [haySiguiente, setHaySiguiente] = useState(false);
     // ----------------------------
 
     const [filtros, setFiltros] = useState({
         accion: '',
         fecha_accion: '',
         fecha_turno: '',
+        buscar: '',
     });
 
     const cargarAuditorias = useCallback(async () => {
@@ -26,8 +31,15 @@ export default function AuditoriaTurnos({ turnoNumero = null }) {
         setError(null);
         try {
             const params = {
-                page: paginaActual // 👈 AÑADIR PÁGINA ACTUAL A LOS PARÁMETROS
+                paginacion: 'cursor',
             };
+            const cursor = cursores.current[paginaActual - 1];
+            if (cursor) {
+                params.cursor = cursor;
+            } else {
+                // Total estimado, solo en la primera página
+                params.conteo = 'aprox';
+            }
             
             if (turnoNumero) {
                 params.turno_numero = turnoNumero;
@@ -37,12 +49,17 @@ export default function AuditoriaTurnos({ turnoNumero = null }) {
             if (filtros.accion) params.accion = filtros.accion;
             if (filtros.fecha_accion) params.fecha_accion = filtros.fecha_accion;
             if (filtros.fecha_turno) params.fecha_turno = filtros.fecha_turno;
+            if (filtros.buscar) params.buscar = filtros.buscar;
             
             // 👇 LA RESPUESTA DE LA API AHORA SERÁ UN OBJETO PAGINADO
             const data = await getAuditoriasTurnos(params); 
             
             setAuditorias(data.results); // 👈 Los datos están en 'results'
-            setTotalRegistros(data.count); // 👈 El total está en 'count'
+            if (data.count !== undefined) setTotalRegistros(data.count);
+
+            const siguiente = data.next ? new URL(data.next).searchParams.get('cursor') : null;
+            setHaySiguiente(Boolean(siguiente));
+            if (siguiente) cursores.current[paginaActual] = siguiente;
 
         } catch (err) {
             console.error('Error al cargar auditorías:', err);
@@ -64,6 +81,7 @@ export default function AuditoriaTurnos({ turnoNumero = null }) {
             [name]: value
         }));
         setPaginaActual(1); // 👈 RESETEAR A PÁGINA 1 AL CAMBIAR FILTRO
+        cursores.current = [null];
     };
 
     const limpiarFiltros = () => {
@@ -71,15 +89,17 @@ export default function AuditoriaTurnos({ turnoNumero = null }) {
             accion: '',
             fecha_accion: '',
             fecha_turno: '',
+            buscar: '',
         });
         setPaginaActual(1); // 👈 RESETEAR A PÁGINA 1 AL LIMPIAR
+        cursores.current = [null];
     };
 
     // --- LÓGICA DE PAGINACIÓN ---
     const totalPaginas = Math.ceil(totalRegistros / REGISTROS_POR_PAGINA);
 
     const irPaginaSiguiente = () => {
-        setPaginaActual(prev => Math.min(prev + 1, totalPaginas));
+        if (haySiguiente) setPaginaActual(prev => prev + 1);
     };
 
     const irPaginaAnterior = () => {
@@ -157,6 +177,18 @@ export default function AuditoriaTurnos({ turnoNumero = null }) {
             {!turnoNumero && (
                 <div className={styles.filtrosContainer}>
                     {/* ... (Filtros no cambian) ... */}
+                    <div className={styles.filtroGroup}>
+                        <label htmlFor="buscar">Buscar:</label>
+                        <input 
+                            type="search"
+                            id="buscar"
+                            name="buscar"
+                            placeholder="Paciente, odontólogo u observaciones"
+                            value={filtros.buscar}
+                            onChange={handleFiltroChange}
+                        />
+                    </div>
+
                     <div className={styles.filtroGroup}>
                         <label htmlFor="accion">Acción:</label>
                         <select 
@@ -282,11 +314,11 @@ export default function AuditoriaTurnos({ turnoNumero = null }) {
                         ‹ Anterior
                     </button>
                     <span className={styles.paginacionInfo}>
-                        Página {paginaActual} de {totalPaginas}
+                        Página {paginaActual} de ~{Math.max(totalPaginas, paginaActual)}
                     </span>
                     <button 
                         onClick={irPaginaSiguiente} 
-                        disabled={paginaActual >= totalPaginas}
+                        disabled={!haySiguiente}
                         className={styles.btnPaginacion}
                     >
                         Siguiente ›
@@ -297,7 +329,7 @@ export default function AuditoriaTurnos({ turnoNumero = null }) {
 
             <div className={styles.totalRegistros}>
                 {/* 👇 ACTUALIZAR EL TOTAL PARA USAR 'totalRegistros' */}
-                Total de registros: <strong>{totalRegistros}</strong>
+                Total de registros (aprox.): <strong>{totalRegistros}</strong>
             </div>
         </div>
     );
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback, useMemo } from 'react';
-import { getTurnos, getEstadosTurno } from '../../api/turnos.api'; 
+import { getEstadisticasTurnos, getEstadosTurno } from '../../api/turnos.api'; 
 import { Bar } from 'react-chartjs-2'; 
 import { 
     Chart as ChartJS, 
@@ -23,28 +23,8 @@ ChartJS.register(
     Legend
 );
 
-const getStartDate = (filter) => {
-    const now = new Date();
-    const date = new Date(now.getFullYear(), now.getMonth(), now.getDate()); 
-
-    switch (filter) {
-        case 'last_week':
-            date.setDate(date.getDate() - 7);
-            return date;
-        case 'last_month':
-            date.setMonth(date.getMonth() - 1);
-            return date;
-        case 'last_year':
-            date.setFullYear(date.getFullYear() - 1);
-            return date;
-        case 'all':
-        default:
-            return null; 
-    }
-};
-
 export default function GraficosTurnos() {
-    const [turnos, setTurnos] = useState([]);
+    const [countsByState, setCountsByState] = useState({});
     const [estadosTurno, setEstadosTurno] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
@@ -59,14 +39,19 @@ export default function GraficosTurnos() {
         { value: 'all', label: 'Todos los Tiempos' },
     ];
 
+    // Los conteos por estado se calculan en el servidor para el período elegido
     const loadData = useCallback(async () => {
         try {
             setLoading(true);
-            const [turnosData, estadosData] = await Promise.all([
-                getTurnos(), 
+            const [estadisticasData, estadosData] = await Promise.all([
+                getEstadisticasTurnos({ periodo: filterPeriod }),
                 getEstadosTurno()
             ]);
-            setTurnos(turnosData);
+            const counts = {};
+            estadisticasData.por_estado.forEach(grupo => {
+                counts[grupo.estado] = grupo.cantidad;
+            });
+            setCountsByState(counts);
             setEstadosTurno(estadosData);
         } catch (err) {
             console.error("Error al cargar datos para gráficos:", err);
@@ -74,37 +59,19 @@ export default function GraficosTurnos() {
         } finally {
             setLoading(false);
         }
-    }, []);
+    }, [filterPeriod]);
 
     useEffect(() => {
         loadData();
     }, [loadData]);
 
     const { processedData, estadoNames } = useMemo(() => {
-        const startDate = getStartDate(filterPeriod);
-        
-        const filteredByDate = turnos.filter(turno => {
-            if (!startDate) return true;
-            return new Date(turno.fecha_turno) >= startDate;
-        });
-
-        const filteredTurnos = filteredByDate.filter(turno => {
-            if (!filterStatus) return true;
-            return String(turno.estado_turno) === filterStatus;
-        });
-
-        const countsByState = {};
         const stateNameMap = {};
 
         estadosTurno.forEach(estado => {
             stateNameMap[estado.id] = estado.nombre_est_tur;
         });
 
-        filteredTurnos.forEach(turno => {
-            const estadoId = turno.estado_turno; 
-            countsByState[estadoId] = (countsByState[estadoId] || 0) + 1;
-        });
-
         let labels = [];
         let dataCounts = [];
         let backgroundColors = [];
@@ -176,7 +143,7 @@ export default function GraficosTurnos() {
             estadoNames: stateNameMap 
         };
 
-    }, [turnos, estadosTurno, filterPeriod, filterStatus]);
+    }, [countsByState, estadosTurno, filterPeriod, filterStatus]);
 
     const chartOptions = {
         responsive: true,
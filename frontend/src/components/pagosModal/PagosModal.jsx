@@ -2,9 +2,22 @@ import React, { useState, useEffect, useCallback } from 'react';
 import ModalAdd from '../modalAdd/ModalAdd';
 import { useAlert } from '../../hooks/useAlert';
 import { useConfirm } from '../../hooks/useConfirm';
-import { getPagos, getTiposPagos, createPago, patchPago } from '../../api/pagos.api'; 
+import { createPago, patchPago } from '../../api/pagos.api'; 
+import { getPlanCuotas, generarPlanCuotas } from '../../api/historias.api';
 import styles from './PagosModal.module.css'; 
 
+// El plan (tipos de pago del tratamiento + estado de cada pago) lo arma el servidor
+const aDisplay = (plan) => plan.cuotas.map(cuota => ({
+    tipoPagoId: cuota.tipo_pago,
+    tipoPagoNombre: cuota.tipo_pago_nombre,
+    pagoId: cuota.pago,
+    pagado: cuota.pagado,
+    fecha_pago: cuota.fecha_pago,
+    monto: cuota.monto,
+    registrado_por_nombre: cuota.registrado_por_nombre || 'N/A',
+    existe: cuota.existe
+}));
+
 export default function PagosModal({ historiaClinica, currentPersonalId, esOrtodoncia, onClose }) {
     const { showSuccess, showError } = useAlert();
     const { showConfirm } = useConfirm();
@@ -13,85 +26,22 @@ export default function PagosModal({ historiaClinica, currentPersonalId, esOrtod
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [saving, setSaving] = useState(false);
+    // Montos cargados para las cuotas que todavía no existen: { tipoPagoId: '15000' }
+    const [montos, setMontos] = useState({});
 
-    // 🚨 LÓGICA DE FILTRADO MEJORADA
     const fetchDatosDePagos = useCallback(async () => {
         setLoading(true);
         setError(null);
         try {
-            const [todosLosTiposDePago, todosLosPagos] = await Promise.all([
-                getTiposPagos(),
-                getPagos() 
-            ]);
-
-            // 🚨 FILTRAR TIPOS DE PAGO SEGÚN SI ES ORTODONCIA O NO
-            // Función auxiliar para detectar "Pago único" por nombre
-            const esPagoUnico = (nombreTipoPago) => {
-                const nombre = nombreTipoPago.toLowerCase().trim();
-                return nombre.includes('pago único') || 
-                       nombre.includes('pago unico') ||
-                       nombre === 'único' ||
-                       nombre === 'unico';
-            };
-
-            let tiposDePagoFiltrados;
-            
-            if (esOrtodoncia) {
-                // Si es ortodoncia: Mostrar TODO excepto "Pago único"
-                tiposDePagoFiltrados = todosLosTiposDePago.filter(
-                    tipo => !esPagoUnico(tipo.nombre_tipo_pago)
-                );
-            } else {
-                // Si NO es ortodoncia: Mostrar SOLO "Pago único"
-                tiposDePagoFiltrados = todosLosTiposDePago.filter(
-                    tipo => esPagoUnico(tipo.nombre_tipo_pago)
-                );
-            }
-
-            // Filtrar los pagos que pertenecen solo a esta Historia Clínica
-            const pagosDeEstaHC = todosLosPagos.filter(
-                pago => pago.hist_clin === historiaClinica.id
-            );
-
-            // Fusionar las listas (solo con los tipos filtrados)
-            const listaFusionada = tiposDePagoFiltrados.map(tipoPago => {
-                const pagoExistente = pagosDeEstaHC.find(
-                    p => p.tipo_pago === tipoPago.id
-                );
-
-                if (pagoExistente) {
-                    return {
-                        tipoPagoId: tipoPago.id,
-                        tipoPagoNombre: tipoPago.nombre_tipo_pago,
-                        pagoId: pagoExistente.id,
-                        pagado: pagoExistente.pagado,
-                        fecha_pago: pagoExistente.fecha_pago,
-                        // 🚨 USAR EL NOMBRE CORRECTO DEL SERIALIZER
-                        registrado_por_nombre: pagoExistente.registrado_por_nombre || 'N/A',
-                        existe: true
-                    };
-                } else {
-                    return {
-                        tipoPagoId: tipoPago.id,
-                        tipoPagoNombre: tipoPago.nombre_tipo_pago,
-                        pagoId: null,
-                        pagado: false,
-                        fecha_pago: null,
-                        registrado_por_nombre: 'N/A',
-                        existe: false
-                    };
-                }
-            });
-
-            setPagosDisplay(listaFusionada);
-
+            const plan = await getPlanCuotas(historiaClinica.id);
+            setPagosDisplay(aDisplay(plan));
         } catch (err) {
             console.error("Error al cargar datos de pagos:", err);
             setError("No se pudieron cargar los datos de pagos.");
         } finally {
             setLoading(false);
         }
-    }, [historiaClinica.id, esOrtodoncia]); // 🚨 Agregamos esOrtodoncia como dependencia
+    }, [historiaClinica.id]);
 
     useEffect(() => {
         fetchDatosDePagos();
@@ -144,6 +94,9 @@ export default function PagosModal({ historiaClinica, currentPersonalId, esOrtod
                     tipo_pago: itemPagoDisplay.tipoPagoId,
                     registrado_por: currentPersonalId
                 };
+                if (montos[itemPagoDisplay.tipoPagoId]) {
+                    payload.monto = montos[itemPagoDisplay.tipoPagoId];
+                }
                 pagoActualizadoServidor = await createPago(payload);
             
             } else {
@@ -160,6 +113,7 @@ export default function PagosModal({ historiaClinica, currentPersonalId, esOrtod
                             pagoId: pagoActualizadoServidor.id,
                             pagado: pagoActualizadoServidor.pagado,
                             fecha_pago: pagoActualizadoServidor.fecha_pago,
+                            monto: pagoActualizadoServidor.monto,
                             registrado_por_nombre: pagoActualizadoServidor.registrado_por_nombre,
                             existe: true
                         };
@@ -177,6 +131,26 @@ export default function PagosModal({ historiaClinica, currentPersonalId, esOrtod
         }
     };
 
+    // Crea de una vez todas las cuotas que falten (sin marcarlas como pagadas), con sus montos
+    const handleGenerarPlan = async () => {
+        if (saving) return;
+        setSaving(true);
+        try {
+            const montosCargados = Object.fromEntries(
+                Object.entries(montos).filter(([, monto]) => monto !== '')
+            );
+            const plan = await generarPlanCuotas(historiaClinica.id, montosCargados);
+            setPagosDisplay(aDisplay(plan));
+            setMontos({});
+            showSuccess(`Plan de cuotas generado (${plan.creados} cuotas nuevas).`);
+        } catch (err) {
+            console.error("Error al generar el plan de cuotas:", err);
+            showError("No se pudo generar el plan de cuotas.");
+        } finally {
+            setSaving(false);
+        }
+    };
+
     const formatearFecha = (fechaISO) => {
         if (!fechaISO) return 'Pendiente';
         return new Date(fechaISO).toLocaleDateString('es-ES');
@@ -208,6 +182,7 @@ export default function PagosModal({ historiaClinica, currentPersonalId, esOrtod
                             <thead>
                                 <tr>
                                     <th>Concepto (Tipo de Pago)</th>
+                                    <th>Monto</th>
                                     <th>Registrado / Cancelado por</th>
                                     <th>Pagado</th>
                                     <th>Fecha de Pago</th>
@@ -216,7 +191,7 @@ export default function PagosModal({ historiaClinica, currentPersonalId, esOrtod
                             <tbody>
                                 {pagosDisplay.length === 0 ? (
                                     <tr>
-                                        <td colSpan="4">
+                                        <td colSpan="5">
                                             {esOrtodoncia 
                                                 ? "No se encontraron tipos de pago configurados para ortodoncia."
                                                 : "No se encontró configuración de pago único."}
@@ -226,6 +201,21 @@ export default function PagosModal({ historiaClinica, currentPersonalId, esOrtod
                                     pagosDisplay.map(item => (
                                         <tr key={item.tipoPagoId} className={item.pagado ? styles.pagado : styles.pendiente}>
                                             <td>{item.tipoPagoNombre || 'N/A'}</td>
+                                            <td>
+                                                {item.existe ? (
+                                                    `$ ${item.monto}`
+                                                ) : (
+                                                    <input
+                                                        type="number"
+                                                        min="0"
+                                                        step="0.01"
+                                                        placeholder="0.00"
+                                                        value={montos[item.tipoPagoId] ?? ''}
+                                                        onChange={(e) => setMontos(prev => ({ ...prev, [item.tipoPagoId]: e.target.value }))}
+                                                        disabled={saving}
+                                                    />
+                                                )}
+                                            </td>
                                             <td>{item.registrado_por_nombre || 'N/A'}</td>
                                             
                                             <td className={styles.checkboxCell}>
@@ -246,6 +236,16 @@ export default function PagosModal({ historiaClinica, currentPersonalId, esOrtod
                 )}
 
                 <div className={styles.modalFooter}>
+                    {esOrtodoncia && !loading && pagosDisplay.some(item => !item.existe) && (
+                        <button
+                            type="button"
+                            className={styles.cancelButton}
+                            onClick={handleGenerarPlan}
+                            disabled={saving}
+                        >
+                            Generar plan de cuotas
+                        </button>
+                    )}
                     <button 
                         type="button" 
                         className={styles.cancelButton} 
@@ -4,6 +4,7 @@ import React, { useState, useEffect } from 'react';
 import Select from 'react-select'; // 1. Importamos la librería
 import styles from './TurnosForm.module.css'; 
 import { useAlert } from '../../hooks/useAlert';
+import { getDisponibilidad } from '../../api/turnos.api';
 
 // obtener la fecha de hoy en formato YYYY-MM-DD
 const getTodayDateString = () => {
@@ -83,6 +84,8 @@ export default function TurnosForm({
     const { showWarning, showError } = useAlert();
     const [formData, setFormData] = useState(initialFormData);
     const [dateError, setDateError] = useState('');
+    // IDs de horarios libres informados por el servidor (null = sin consultar)
+    const [horariosLibresIDs, setHorariosLibresIDs] = useState(null);
 
     // 3. Transformamos los pacientes al formato que pide react-select: { value, label }
     const pacienteOptions = React.useMemo(() => {
@@ -92,6 +95,34 @@ export default function TurnosForm({
         }));
     }, [pacientes]);
 
+    // Consultar al servidor los horarios libres del odontólogo en la fecha elegida
+    useEffect(() => {
+        const { odontologo, fecha_turno } = formData;
+        if (!odontologo || !fecha_turno) {
+            setHorariosLibresIDs(null);
+            return;
+        }
+
+        let cancelado = false;
+        getDisponibilidad({
+            odontologos: odontologo,
+            fecha_desde: fecha_turno,
+            fecha_hasta: fecha_turno,
+            excluir_turno: isEditing ? initialData?.id : undefined,
+        })
+            .then(data => {
+                if (cancelado) return;
+                const dia = data.odontologos[0]?.dias[0];
+                setHorariosLibresIDs(new Set((dia?.horarios_libres || []).map(h => h.id)));
+            })
+            .catch(() => {
+                // Si falla, se usa el cálculo local con turnosExistentes
+                if (!cancelado) setHorariosLibresIDs(null);
+            });
+
+        return () => { cancelado = true; };
+    }, [formData.odontologo, formData.fecha_turno, isEditing, initialData]);
+
     const horariosDisponibles = React.useMemo(() => {
         const { odontologo, fecha_turno } = formData;
         
@@ -99,6 +130,10 @@ export default function TurnosForm({
             return horariosFijos; 
         }
 
+        if (horariosLibresIDs) {
+            return horariosFijos.filter(horario => horariosLibresIDs.has(horario.id));
+        }
+
         const horariosOcupadosIDs = turnosExistentes
             .filter(turno => 
                 turno.fecha_turno === fecha_turno && 
@@ -117,7 +152,7 @@ export default function TurnosForm({
             return !horariosOcupadosIDs.includes(horario.id);
         });
         
-    }, [formData, horariosFijos, turnosExistentes, isEditing, initialData]);
+    }, [formData, horariosFijos, turnosExistentes, isEditing, initialData, horariosLibresIDs]);
 
     
 
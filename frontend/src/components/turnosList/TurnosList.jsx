@@ -12,7 +12,7 @@ import { useConfirm } from '../../hooks/useConfirm';
 import { 
     getTurnos, createTurno, updateTurno, 
     getHorariosFijos, updateHorarioFijo, deleteHorarioFijo, createHorarioFijo,
-    deleteTurno, getEstadosTurno
+    deleteTurno, getEstadosTurno, cambiarEstadoTurnos, suscribirEventosTurnos
 } from '../../api/turnos.api';
 import { getPacientes } from '../../api/pacientes.api'; 
 import { getPersonal } from '../../api/personal.api';
@@ -149,16 +149,12 @@ export default function TurnosList() {
         if (!confirmed) return;
 
         try {
-            // 🚨 CORRECCIÓN: Añadimos modificado_por al payload
-            const updatePayload = { 
-                estado_turno: CANCELADO_ESTADO_ID,
-                modificado_por: currentUser?.id // <--- Esto faltaba
-            };
-
-            const updatePromises = Array.from(selectedTurnos).map(id => 
-                updateTurno(id, updatePayload)
+            // Un solo request para todo el lote (una transacción en el servidor)
+            await cambiarEstadoTurnos(
+                Array.from(selectedTurnos),
+                CANCELADO_ESTADO_ID,
+                currentUser?.id
             );
-            await Promise.all(updatePromises);
 
             showSuccess(`${selectedTurnos.size} turno(s) cancelados correctamente.`);
             setSelectedTurnos(new Set());
@@ -178,16 +174,12 @@ export default function TurnosList() {
         if (!confirmed) return;
 
         try {
-            // 🚨 CORRECCIÓN: Añadimos modificado_por al payload
-            const updatePayload = { 
-                estado_turno: ATENDIDO_ESTADO_ID,
-                modificado_por: currentUser?.id // <--- Esto faltaba
-            };
-
-            const updatePromises = Array.from(selectedTurnos).map(id => 
-                updateTurno(id, updatePayload)
+            // Un solo request para todo el lote (una transacción en el servidor)
+            await cambiarEstadoTurnos(
+                Array.from(selectedTurnos),
+                ATENDIDO_ESTADO_ID,
+                currentUser?.id
             );
-            await Promise.all(updatePromises);
 
             showSuccess(`${selectedTurnos.size} turno(s) marcados como atendidos correctamente.`);
             setSelectedTurnos(new Set());
@@ -291,6 +283,19 @@ export default function TurnosList() {
         }
     }, [loadHorarios, loadData]);
 
+    // Cambios hechos desde otra PC: se aplican los deltas sin recargar la lista
+    useEffect(() => {
+        const cerrar = suscribirEventosTurnos({
+            creado: (turno) => setTurnos(prev => (
+                prev.some(t => t.id === turno.id) ? prev : [...prev, turno]
+            )),
+            modificado: (turno) => setTurnos(prev => prev.map(t => (t.id === turno.id ? turno : t))),
+            eliminado: ({ id }) => setTurnos(prev => prev.filter(t => t.id !== id)),
+            reset: () => loadData(),
+        });
+        return cerrar;
+    }, [loadData]);
+
     const userRole = currentUser?.puesto_info?.nombre_puesto;
     const isFilterBlocked = userRole === 'Odontólogo/a'
     const loggedInUserId = currentUser?.id;
@@ -318,6 +323,14 @@ export default function TurnosList() {
             setEditingTurno(null);
         } catch (err) {
             console.error("Error al guardar el turno:", err.response?.data || err);
+            if (err.response?.status === 409) {
+                // Otra recepción tomó el horario: se muestran las alternativas libres
+                const alternativas = (err.response.data.alternativas || [])
+                    .map(alt => `${alt.fecha} ${String(alt.hora).slice(0, 5)}`)
+                    .join(', ');
+                showError(`${err.response.data.detail}${alternativas ? ` Horarios libres: ${alternativas}` : ''}`);
+                return;
+            }
             showError("Hubo un error al guardar el turno.");
         }
     };
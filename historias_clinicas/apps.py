@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class HistoriasClinicasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'historias_clinicas'
+
+    def ready(self):
+        """
+        Importa las señales cuando la aplicación está lista.
+        Esto asegura que los signals se registren correctamente.
+        """
+        import historias_clinicas.signals
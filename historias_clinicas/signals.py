@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.catalogos import invalidar_catalogo
+from .models import Tratamientos, PiezasDentales, CarasDentales
+
+
+@receiver(post_save, sender=Tratamientos)
+@receiver(post_delete, sender=Tratamientos)
+@receiver(post_save, sender=PiezasDentales)
+@receiver(post_delete, sender=PiezasDentales)
+@receiver(post_save, sender=CarasDentales)
+@receiver(post_delete, sender=CarasDentales)
+def invalidar_catalogos_historias(sender, **kwargs):
+    """Cambia el ETag del listado del catálogo modificado."""
+    invalidar_catalogo(sender)
@@ -2,6 +2,12 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from core.catalogos import CatalogoCacheMixin
+from pagos.models import Pagos
+from pagos.plan_cuotas import plan_de_cuotas, generar_plan_de_cuotas
+from pagos.serializers import GenerarPlanCuotasSerializer
+from pagos.filtros import listar_pagos
+from pagos.saldos import saldo_historia_clinica
 from .models import (
     HistoriasClinicas, 
     PiezasDentales, 
@@ -54,6 +60,52 @@ class HistoriaClinicaViewSet(viewsets.ModelViewSet):
             return None
         return super().paginate_queryset(queryset)
 
+    @action(detail=True, methods=['get'], url_path='pagos')
+    def pagos(self, request, pk=None):
+        """
+        Pagos de una Historia Clínica, con los mismos filtros y paginación
+        que /api/pagos/ (pagado, tipo_pago, fecha_desde, fecha_hasta...).
+        URL generada: /historias/{pk}/pagos/ [GET]
+        """
+        if not HistoriasClinicas.objects.filter(pk=pk).exists():
+            return Response({'detail': 'Historia Clínica no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        return listar_pagos(request, Pagos.objects.filter(hist_clin_id=pk), view=self)
+
+    @action(detail=True, methods=['get'], url_path='saldo')
+    def saldo(self, request, pk=None):
+        """
+        Saldo de la Historia Clínica (total del plan, pagado y pendiente),
+        leído de la fila precalculada, sin sumar los pagos.
+        URL generada: /historias/{pk}/saldo/ [GET]
+        """
+        if not HistoriasClinicas.objects.filter(pk=pk).exists():
+            return Response({'detail': 'Historia Clínica no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(saldo_historia_clinica(int(pk)))
+
+    @action(detail=True, methods=['get', 'post'], url_path='plan-cuotas')
+    def plan_cuotas(self, request, pk=None):
+        """
+        Plan de cuotas de la Historia Clínica con el estado de cada pago.
+        GET: solo consulta. POST: crea los pagos que falten del plan, con
+        montos opcionales por tipo de pago: {"montos": {"3": 15000, "4": 5000}}.
+        URL generada: /historias/{pk}/plan-cuotas/ [GET, POST]
+        """
+        if not HistoriasClinicas.objects.filter(pk=pk).exists():
+            return Response({'detail': 'Historia Clínica no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        historia_id = int(pk)
+
+        if request.method == 'GET':
+            return Response(plan_de_cuotas(historia_id))
+
+        serializer = GenerarPlanCuotasSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        creados, plan = generar_plan_de_cuotas(historia_id, serializer.validated_data.get('montos'))
+        return Response(
+            dict(plan, creados=creados),
+            status=status.HTTP_201_CREATED if creados else status.HTTP_200_OK
+        )
+
     @action(detail=True, methods=['post'], url_path='seguimientos')
     def create_seguimiento(self, request, pk=None):
         """
@@ -106,18 +158,18 @@ class HistoriaClinicaViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-class TratamientoViewSet(viewsets.ModelViewSet):
+class TratamientoViewSet(CatalogoCacheMixin, viewsets.ModelViewSet):
     """ CRUD para el catálogo de Tratamientos. """
     queryset = Tratamientos.objects.all().order_by('nombre_trat')
     serializer_class = TratamientoSerializer
 
-class PiezaDentalViewSet(viewsets.ModelViewSet):
+class PiezaDentalViewSet(CatalogoCacheMixin, viewsets.ModelViewSet):
     """ CRUD para el catálogo de Piezas Dentales. """
     # Ordenamos por el código para una lista lógica
     queryset = PiezasDentales.objects.all().order_by('codigo_pd') 
     serializer_class = PiezaDentalSerializer
 
-class CaraDentalViewSet(viewsets.ModelViewSet):
+class CaraDentalViewSet(CatalogoCacheMixin, viewsets.ModelViewSet):
     """ CRUD para el catálogo de Caras Dentales. """
     queryset = CarasDentales.objects.all().order_by('nombre_cara')
     serializer_class = CaraDentalSerializer
\ No newline at end of file
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class PacientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pacientes'
+
+    def ready(self):
+        """
+        Importa las señales cuando la aplicación está lista.
+        Esto asegura que los signals se registren correctamente.
+        """
+        import pacientes.signals
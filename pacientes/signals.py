@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.catalogos import invalidar_catalogo
+from .models import Generos, Antecedentes, AnalisisFuncional, ObrasSociales
+
+
+@receiver(post_save, sender=Generos)
+@receiver(post_delete, sender=Generos)
+@receiver(post_save, sender=Antecedentes)
+@receiver(post_delete, sender=Antecedentes)
+@receiver(post_save, sender=AnalisisFuncional)
+@receiver(post_delete, sender=AnalisisFuncional)
+@receiver(post_save, sender=ObrasSociales)
+@receiver(post_delete, sender=ObrasSociales)
+def invalidar_catalogos_pacientes(sender, **kwargs):
+    """Cambia el ETag del listado del catálogo modificado."""
+    invalidar_catalogo(sender)
@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated # Si quieres proteger las vistas
+from core.catalogos import CatalogoCacheMixin
 
 # Importar modelos y serializers. Asegúrate de que los serializers existan en pacientes/serializers.py
 from .models import Pacientes, Generos, Antecedentes, AnalisisFuncional, ObrasSociales
@@ -84,12 +85,12 @@ class PacientesDetail(APIView):
 # --- Vistas para Listados de Opciones (Generics) ---
 # Estas son importantes para cargar los <select> en el formulario de React.
 
-class GenerosList(generics.ListAPIView):
+class GenerosList(CatalogoCacheMixin, generics.ListAPIView):
     queryset = Generos.objects.all()
     serializer_class = GenerosSerializer
 
 # Vistas CRUD para Antecedentes
-class AntecedentesList(generics.ListCreateAPIView): # 🚨 CAMBIO A ListCreateAPIView
+class AntecedentesList(CatalogoCacheMixin, generics.ListCreateAPIView): # 🚨 CAMBIO A ListCreateAPIView
     queryset = Antecedentes.objects.all()
     serializer_class = AntecedentesSerializer
 
@@ -115,7 +116,7 @@ class AntecedentesDetail(generics.RetrieveUpdateDestroyAPIView): # 🚨 NUEVA VI
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 # Vistas CRUD para Análisis Funcional
-class AnalisisFuncionalList(generics.ListCreateAPIView): # 🚨 CAMBIO A ListCreateAPIView
+class AnalisisFuncionalList(CatalogoCacheMixin, generics.ListCreateAPIView): # 🚨 CAMBIO A ListCreateAPIView
     queryset = AnalisisFuncional.objects.all()
     serializer_class = AnalisisFuncionalSerializer
 
@@ -140,7 +141,7 @@ class AnalisisFuncionalDetail(generics.RetrieveUpdateDestroyAPIView): # 🚨 NUE
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 # Vistas CRUD para Obras Sociales
-class ObrasSocialesList(generics.ListCreateAPIView): # 🚨 CAMBIO A ListCreateAPIView
+class ObrasSocialesList(CatalogoCacheMixin, generics.ListCreateAPIView): # 🚨 CAMBIO A ListCreateAPIView
     queryset = ObrasSociales.objects.all()
     serializer_class = ObrasSocialesSerializer
 
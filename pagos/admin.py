@@ -1,15 +1,18 @@
 from django.contrib import admin
-from .models import Pagos, TiposPagos, AuditoriaPagos
+from django.db.models import Q
+
+from core.busqueda import condicion_y_rango
+from .models import Pagos, TiposPagos, AuditoriaPagos, SaldoHistoriaClinica, IngresoDiario
 
 class PagosAdmin(admin.ModelAdmin):
-    list_display = ('id', 'hist_clin', 'tipo_pago', 'pagado', 'registrado_por', 'fecha_pago')
+    list_display = ('id', 'hist_clin', 'tipo_pago', 'monto', 'pagado', 'registrado_por', 'fecha_pago')
     list_filter = ('pagado', 'tipo_pago', 'fecha_pago')
     search_fields = ('hist_clin__id', 'hist_clin__paciente__nombre', 'hist_clin__paciente__apellido')
     readonly_fields = ('fecha_pago',)
     
     fieldsets = (
         ('Información del Pago', {
-            'fields': ('hist_clin', 'tipo_pago', 'pagado', 'fecha_pago')
+            'fields': ('hist_clin', 'tipo_pago', 'monto', 'pagado', 'fecha_pago')
         }),
         ('Auditoría', {
             'fields': ('registrado_por',)
@@ -17,6 +20,16 @@ class PagosAdmin(admin.ModelAdmin):
     )
 
 
+class SaldoHistoriaClinicaAdmin(admin.ModelAdmin):
+    list_display = ('hist_clin', 'cantidad_pagos', 'cantidad_pagados', 'monto_total', 'monto_pagado', 'saldo')
+    list_select_related = ('hist_clin__paciente',)
+
+
+class IngresoDiarioAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'cantidad_pagos', 'monto')
+    date_hierarchy = 'fecha'
+
+
 class AuditoriaPagosAdmin(admin.ModelAdmin):
     list_display = (
         'id', 
@@ -76,7 +89,20 @@ class AuditoriaPagosAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         return False
 
+    def get_search_results(self, request, queryset, search_term):
+        # Texto con los índices de core.busqueda; DNI e historia clínica por igualdad
+        texto = search_term.strip()
+        if not texto:
+            return queryset, False
+        condicion, _ = condicion_y_rango(self.model, texto, AuditoriaPagos.CAMPOS_BUSQUEDA, using=queryset.db)
+        exactos = Q(paciente_dni=texto)
+        if texto.isdigit():
+            exactos |= Q(hist_clin_numero=int(texto)) | Q(hist_clin_id=int(texto))
+        return queryset.filter(Q(condicion) | exactos), False
+
 
 admin.site.register(Pagos, PagosAdmin)
 admin.site.register(TiposPagos)
-admin.site.register(AuditoriaPagos, AuditoriaPagosAdmin)
\ No newline at end of file
+admin.site.register(AuditoriaPagos, AuditoriaPagosAdmin)
+admin.site.register(SaldoHistoriaClinica, SaldoHistoriaClinicaAdmin)
+admin.site.register(IngresoDiario, IngresoDiarioAdmin)
\ No newline at end of file
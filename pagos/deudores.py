@@ -0,0 +1,111 @@
+"""
+Reporte de deudores: pacientes con pagos sin pagar (pagado=False),
+agrupados por paciente y por antigüedad de la deuda.
+
+La antigüedad de una historia clínica es la del pago impago más viejo
+(Pagos.creado). La consulta solo lee los pagos impagos y usa el índice
+parcial pagos_impagos_hist_clin_idx (hist_clin, creado) WHERE pagado =
+false: los pagados, que con el tiempo son casi todos, no se recorren.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Min, Sum
+from django.utils import timezone
+
+from .models import Pagos
+
+CERO = Decimal('0')
+
+# (etiqueta, días máximos) de cada tramo de antigüedad; el último no tiene tope
+TRAMOS = (
+    ('0-30', 30),
+    ('31-60', 60),
+    ('61-90', 90),
+    ('+90', None),
+)
+
+
+def tramo_de(dias):
+    for etiqueta, maximo in TRAMOS:
+        if maximo is None or dias <= maximo:
+            return etiqueta
+
+
+def deudas_por_historia(paciente_id=None, odontologo_id=None):
+    """Una fila por historia clínica con pagos impagos (consulta agregada)."""
+    pagos = Pagos.objects.filter(pagado=False)
+    if paciente_id:
+        pagos = pagos.filter(hist_clin__paciente_id=paciente_id)
+    if odontologo_id:
+        pagos = pagos.filter(hist_clin__odontologo_id=odontologo_id)
+    return (
+        pagos.order_by()
+        .values(
+            'hist_clin_id',
+            'hist_clin__odontologo_id',
+            'hist_clin__paciente_id',
+            'hist_clin__paciente__nombre',
+            'hist_clin__paciente__apellido',
+            'hist_clin__paciente__dni',
+            'hist_clin__paciente__telefono',
+        )
+        .annotate(
+            cuotas_impagas=Count('id'),
+            monto_adeudado=Sum('monto'),
+            deuda_desde=Min('creado'),
+        )
+    )
+
+
+def reporte_deudores(paciente_id=None, odontologo_id=None, dias_min=None, ahora=None):
+    """
+    {'tramos': [...], 'deudores': [...]}: un deudor por paciente, con sus
+    historias clínicas adeudadas, de la deuda más vieja a la más nueva.
+    'dias_min' deja solo a los pacientes con deudas de al menos esos días.
+    """
+    ahora = ahora or timezone.now()
+    deudores = {}
+    for fila in deudas_por_historia(paciente_id, odontologo_id):
+        dias = (ahora - fila['deuda_desde']).days
+        historia = {
+            'hist_clin': fila['hist_clin_id'],
+            'odontologo': fila['hist_clin__odontologo_id'],
+            'cuotas_impagas': fila['cuotas_impagas'],
+            'monto_adeudado': fila['monto_adeudado'] or CERO,
+            'deuda_desde': fila['deuda_desde'],
+            'dias_deuda': dias,
+        }
+        deudor = deudores.get(fila['hist_clin__paciente_id'])
+        if deudor is None:
+            deudor = deudores[fila['hist_clin__paciente_id']] = {
+                'paciente': fila['hist_clin__paciente_id'],
+                'paciente_nombre': f"{fila['hist_clin__paciente__nombre']} {fila['hist_clin__paciente__apellido']}",
+                'paciente_dni': fila['hist_clin__paciente__dni'],
+                'paciente_telefono': fila['hist_clin__paciente__telefono'],
+                'cuotas_impagas': 0,
+                'monto_adeudado': CERO,
+                'deuda_desde': historia['deuda_desde'],
+                'dias_deuda': dias,
+                'historias': [],
+            }
+        deudor['historias'].append(historia)
+        deudor['cuotas_impagas'] += historia['cuotas_impagas']
+        deudor['monto_adeudado'] += historia['monto_adeudado']
+        if historia['deuda_desde'] < deudor['deuda_desde']:
+            deudor['deuda_desde'] = historia['deuda_desde']
+            deudor['dias_deuda'] = dias
+
+    lista = sorted(
+        (d for d in deudores.values() if dias_min is None or d['dias_deuda'] >= dias_min),
+        key=lambda d: (d['deuda_desde'], d['paciente']),
+    )
+    tramos = {etiqueta: {'tramo': etiqueta, 'pacientes': 0, 'cuotas_impagas': 0, 'monto_adeudado': CERO}
+              for etiqueta, _ in TRAMOS}
+    for deudor in lista:
+        deudor['historias'].sort(key=lambda h: (h['deuda_desde'], h['hist_clin']))
+        deudor['tramo'] = tramo_de(deudor['dias_deuda'])
+        tramo = tramos[deudor['tramo']]
+        tramo['pacientes'] += 1
+        tramo['cuotas_impagas'] += deudor['cuotas_impagas']
+        tramo['monto_adeudado'] += deudor['monto_adeudado']
+    return {'tramos': list(tramos.values()), 'deudores': lista}
@@ -0,0 +1,76 @@
+"""
+Filtros y listado de pagos compartidos por /api/pagos/ y por la ruta de
+pagos de una historia clínica (/api/historias_clinicas/historias/{id}/pagos/).
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.pagination import KeysetPagination
+from core.parametros import parametro_fecha
+from .serializers import PagosSerializer
+
+
+class PagosPagination(KeysetPagination):
+    # Los más recientes primero
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 200
+
+
+def inicio_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def filtrar_pagos(pagos, params):
+    """
+    Aplica los filtros de la lista de pagos (hist_clin, tipo_pago, pagado,
+    fecha_desde, fecha_hasta sobre fecha_pago). Devuelve None si algún ID o
+    'pagado' es inválido; una fecha inválida responde 400 (ver parametro_fecha).
+    """
+    for param, campo in (('hist_clin', 'hist_clin_id'), ('tipo_pago', 'tipo_pago_id')):
+        valor = params.get(param, None)
+        if valor:
+            if not valor.isdigit():
+                return None
+            pagos = pagos.filter(**{campo: int(valor)})
+
+    pagado = params.get('pagado', None)
+    if pagado:
+        if pagado not in ('true', 'false'):
+            return None
+        pagos = pagos.filter(pagado=pagado == 'true')
+
+    # Rango por día completo sin __date (así sirve un índice sobre fecha_pago)
+    for param, lookup, dias in (('fecha_desde', 'fecha_pago__gte', 0), ('fecha_hasta', 'fecha_pago__lt', 1)):
+        fecha = parametro_fecha(params, param)
+        if fecha:
+            pagos = pagos.filter(**{lookup: inicio_dia(fecha + timedelta(days=dias))})
+    return pagos
+
+
+def listar_pagos(request, pagos, view=None):
+    """
+    Respuesta de un listado de pagos con los filtros de la request.
+    Si se envía 'cursor' o 'page_size' se pagina por clave (-id):
+    {"next": ..., "first": ..., "results": [...]}. Sin esos parámetros se
+    devuelve la lista completa, como antes.
+    """
+    pagos = filtrar_pagos(pagos, request.query_params)
+    if pagos is None:
+        return Response(
+            {"detail": "Filtros inválidos: use IDs numéricos y pagado=true/false."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    # registrado_por_nombre lee el Personal: se trae en el mismo JOIN
+    pagos = pagos.select_related('registrado_por')
+
+    if 'cursor' in request.query_params or 'page_size' in request.query_params:
+        paginator = PagosPagination()
+        pagina = paginator.paginate_queryset(pagos, request, view=view)
+        return paginator.get_paginated_response(PagosSerializer(pagina, many=True).data)
+
+    pagos = pagos.order_by(*PagosPagination.ordering)
+    return Response(PagosSerializer(pagos, many=True).data)
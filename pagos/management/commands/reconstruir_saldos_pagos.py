@@ -0,0 +1,19 @@
+# pagos/management/commands/reconstruir_saldos_pagos.py
+from django.core.management.base import BaseCommand
+
+from pagos.saldos import reconstruir_saldos, reconstruir_ingresos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula SaldoHistoriaClinica e IngresoDiario desde la tabla de pagos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--historia', type=int, help='Solo el saldo de esta historia clínica (ID)')
+
+    def handle(self, *args, **options):
+        historia = options['historia']
+        saldos = reconstruir_saldos(historia)
+        self.stdout.write(self.style.SUCCESS(f'Saldos reconstruidos: {saldos} filas.'))
+        if historia is None:
+            ingresos = reconstruir_ingresos()
+            self.stdout.write(self.style.SUCCESS(f'Ingresos diarios reconstruidos: {ingresos} filas.'))
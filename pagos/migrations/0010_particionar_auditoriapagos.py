@@ -0,0 +1,27 @@
+# Particiona por mes (fecha_accion) la tabla de auditoría de pagos.
+# Solo en PostgreSQL; en otros motores no hace nada.
+
+from django.db import migrations
+
+from core.particiones import particionar_tabla, desparticionar_tabla
+
+
+def particionar(apps, schema_editor):
+    modelo = apps.get_model('pagos', 'AuditoriaPagos')
+    particionar_tabla(schema_editor.connection, modelo._meta.db_table)
+
+
+def desparticionar(apps, schema_editor):
+    modelo = apps.get_model('pagos', 'AuditoriaPagos')
+    desparticionar_tabla(schema_editor.connection, modelo._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pagos', '0009_remove_auditoriapagos_pagos_audit_hist_cl_424db3_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
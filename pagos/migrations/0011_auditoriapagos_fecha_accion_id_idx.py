@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('historias_clinicas', '0007_alter_detalleshc_cara_dental_and_more'),
+        ('pagos', '0010_particionar_auditoriapagos'),
+        ('personal', '0008_remove_personal_fecha_nacimiento_personal_fecha_alta'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditoriapagos',
+            name='pagos_audit_fecha_a_7f89e4_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditoriapagos',
+            index=models.Index(fields=['fecha_accion', 'id'], name='pagos_audit_fecha_a_fe8f8b_idx'),
+        ),
+    ]
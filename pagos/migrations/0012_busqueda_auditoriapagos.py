@@ -0,0 +1,30 @@
+# Índices de búsqueda de texto de la auditoría de pagos:
+# GIN (tsvector + pg_trgm) en PostgreSQL, tabla FTS5 en SQLite.
+
+from django.db import migrations
+
+from core.busqueda import crear_indices_busqueda, eliminar_indices_busqueda
+
+# Copia fija de AuditoriaPagos.CAMPOS_BUSQUEDA al momento de esta migración
+CAMPOS = ('paciente_nombre', 'tipo_pago_nombre', 'observaciones')
+
+
+def crear(apps, schema_editor):
+    modelo = apps.get_model('pagos', 'AuditoriaPagos')
+    crear_indices_busqueda(schema_editor, modelo._meta.db_table, CAMPOS)
+
+
+def eliminar(apps, schema_editor):
+    modelo = apps.get_model('pagos', 'AuditoriaPagos')
+    eliminar_indices_busqueda(schema_editor, modelo._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pagos', '0011_auditoriapagos_fecha_accion_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, eliminar),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('historias_clinicas', '0007_alter_detalleshc_cara_dental_and_more'),
+        ('pagos', '0012_busqueda_auditoriapagos'),
+        ('personal', '0008_remove_personal_fecha_nacimiento_personal_fecha_alta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pagos',
+            index=models.Index(fields=['hist_clin', 'tipo_pago'], name='pagos_hist_clin_tipo_idx'),
+        ),
+    ]
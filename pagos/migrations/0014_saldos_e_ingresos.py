@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:42
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('historias_clinicas', '0007_alter_detalleshc_cara_dental_and_more'),
+        ('pagos', '0013_pagos_hist_clin_tipo_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngresoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha')),
+                ('cantidad_pagos', models.PositiveIntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Ingreso Diario',
+                'verbose_name_plural': 'Ingresos Diarios',
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pagos',
+            name='monto',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, validators=[django.core.validators.MinValueValidator(0)]),
+        ),
+        migrations.CreateModel(
+            name='SaldoHistoriaClinica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad_pagos', models.PositiveIntegerField(default=0)),
+                ('cantidad_pagados', models.PositiveIntegerField(default=0)),
+                ('monto_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('monto_pagado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saldo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('hist_clin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='saldo', to='historias_clinicas.historiasclinicas')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Historia Clínica',
+                'verbose_name_plural': 'Saldos de Historias Clínicas',
+            },
+        ),
+    ]
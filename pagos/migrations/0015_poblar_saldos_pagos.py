@@ -0,0 +1,59 @@
+# Carga inicial de SaldoHistoriaClinica e IngresoDiario desde los pagos
+# existentes (luego los mantienen los signals; para recalcular más
+# adelante: manage.py reconstruir_saldos_pagos).
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def poblar(apps, schema_editor):
+    Pagos = apps.get_model('pagos', 'Pagos')
+    SaldoHistoriaClinica = apps.get_model('pagos', 'SaldoHistoriaClinica')
+    IngresoDiario = apps.get_model('pagos', 'IngresoDiario')
+
+    saldos = []
+    for fila in (
+        Pagos.objects.order_by().values('hist_clin_id').annotate(
+            cantidad_pagos=Count('id'),
+            cantidad_pagados=Count('id', filter=Q(pagado=True)),
+            monto_total=Sum('monto'),
+            monto_pagado=Sum('monto', filter=Q(pagado=True)),
+        )
+    ):
+        monto_total = fila['monto_total'] or 0
+        monto_pagado = fila['monto_pagado'] or 0
+        saldos.append(SaldoHistoriaClinica(
+            hist_clin_id=fila['hist_clin_id'],
+            cantidad_pagos=fila['cantidad_pagos'],
+            cantidad_pagados=fila['cantidad_pagados'],
+            monto_total=monto_total,
+            monto_pagado=monto_pagado,
+            saldo=monto_total - monto_pagado,
+        ))
+    SaldoHistoriaClinica.objects.bulk_create(saldos, batch_size=1000)
+
+    IngresoDiario.objects.bulk_create([
+        IngresoDiario(fecha=fila['fecha'], cantidad_pagos=fila['cantidad_pagos'], monto=fila['monto'] or 0)
+        for fila in (
+            Pagos.objects.filter(pagado=True, fecha_pago__isnull=False).order_by()
+            .values(fecha=TruncDate('fecha_pago'))
+            .annotate(cantidad_pagos=Count('id'), monto=Sum('monto'))
+        )
+    ], batch_size=1000)
+
+
+def vaciar(apps, schema_editor):
+    apps.get_model('pagos', 'SaldoHistoriaClinica').objects.all().delete()
+    apps.get_model('pagos', 'IngresoDiario').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pagos', '0014_saldos_e_ingresos'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar, vaciar),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:44
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fechar_pagos_existentes(apps, schema_editor):
+    # Los pagos anteriores no tienen fecha de alta: se usa el inicio de su
+    # historia clínica (la deuda no puede ser más vieja que eso)
+    Pagos = apps.get_model('pagos', 'Pagos')
+    HistoriasClinicas = apps.get_model('historias_clinicas', 'HistoriasClinicas')
+    Pagos.objects.update(creado=Subquery(
+        HistoriasClinicas.objects.filter(pk=OuterRef('hist_clin_id')).values('fecha_inicio')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('historias_clinicas', '0007_alter_detalleshc_cara_dental_and_more'),
+        ('pagos', '0015_poblar_saldos_pagos'),
+        ('personal', '0008_remove_personal_fecha_nacimiento_personal_fecha_alta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagos',
+            name='creado',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(fechar_pagos_existentes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pagos',
+            index=models.Index(condition=models.Q(('pagado', False)), fields=['hist_clin', 'creado'], name='pagos_impagos_hist_clin_idx'),
+        ),
+    ]
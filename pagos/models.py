@@ -1,8 +1,10 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from historias_clinicas.models import HistoriasClinicas
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 from personal.models import Personal
+from core.tracking import RastreoCambiosMixin
 
 # Create your models here.
 
@@ -23,7 +25,7 @@ class TiposPagos(models.Model):
 #         verbose_name = 'Cuota'
 #         verbose_name_plural = 'Cuotas'
 
-class Pagos(models.Model):
+class Pagos(RastreoCambiosMixin, models.Model):
     tipo_pago = models.ForeignKey(TiposPagos, 
                                  on_delete=models.PROTECT,
                                  null=True, blank=True)
@@ -42,6 +44,10 @@ class Pagos(models.Model):
     
     fecha_pago = models.DateTimeField(null=True, blank=True)
     pagado = models.BooleanField(default=False)
+    monto = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                validators=[MinValueValidator(0)])
+    # Alta del pago (cuota generada): desde cuándo se adeuda si no está pagado
+    creado = models.DateTimeField(default=timezone.now, editable=False)
 
     def save(self, *args, **kwargs):
         # La lógica de fecha_limite fue eliminada
@@ -50,6 +56,11 @@ class Pagos(models.Model):
             self.fecha_pago = timezone.now()
         elif not self.pagado:
             self.fecha_pago = None
+
+        # fecha_pago depende de pagado: si se guarda uno, se guarda el otro
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'pagado' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'fecha_pago'}
             
         super(Pagos, self).save(*args, **kwargs)
 
@@ -60,6 +71,70 @@ class Pagos(models.Model):
     class Meta:
         verbose_name = 'Pago'
         verbose_name_plural = 'Pagos'
+        indexes = [
+            # Pagos de una historia clínica (y de un tipo dentro de ella)
+            models.Index(fields=['hist_clin', 'tipo_pago'], name='pagos_hist_clin_tipo_idx'),
+            # Solo los impagos (reporte de deudores): con el tiempo casi todos
+            # los pagos quedan pagados y el índice sigue chico
+            models.Index(
+                fields=['hist_clin', 'creado'],
+                name='pagos_impagos_hist_clin_idx',
+                condition=models.Q(pagado=False),
+            ),
+        ]
+
+
+# ============================================
+# SALDOS E INGRESOS (precalculados)
+# ============================================
+
+class SaldoHistoriaClinica(models.Model):
+    """
+    Saldo precalculado de una historia clínica: una fila por HC con los
+    totales de sus pagos. Lo mantienen los signals de Pagos de forma
+    incremental (ver pagos/saldos.py); se reconstruye con el comando
+    reconstruir_saldos_pagos.
+
+    - monto_total: suma de los montos de todos sus pagos (el plan)
+    - monto_pagado: suma de los pagos marcados como pagados
+    - saldo: lo que falta pagar (monto_total - monto_pagado)
+    """
+    hist_clin = models.OneToOneField(
+        HistoriasClinicas,
+        on_delete=models.CASCADE,
+        related_name='saldo'
+    )
+    cantidad_pagos = models.PositiveIntegerField(default=0)
+    cantidad_pagados = models.PositiveIntegerField(default=0)
+    monto_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    monto_pagado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saldo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"HC {self.hist_clin_id}: saldo {self.saldo}"
+
+    class Meta:
+        verbose_name = 'Saldo de Historia Clínica'
+        verbose_name_plural = 'Saldos de Historias Clínicas'
+
+
+class IngresoDiario(models.Model):
+    """
+    Ingresos por día (pagos marcados como pagados, por la fecha local de
+    fecha_pago), para reportes por período sin recorrer los pagos.
+    Se mantiene igual que SaldoHistoriaClinica.
+    """
+    fecha = models.DateField(unique=True, verbose_name='Fecha')
+    cantidad_pagos = models.PositiveIntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.fecha}: {self.monto} ({self.cantidad_pagos} pagos)"
+
+    class Meta:
+        verbose_name = 'Ingreso Diario'
+        verbose_name_plural = 'Ingresos Diarios'
+        ordering = ['fecha']
 
 
 # ============================================
@@ -78,6 +153,9 @@ class AuditoriaPagos(models.Model):
         ('REGISTRO', 'Pago Registrado'),
         ('CANCELACION', 'Pago Cancelado'),
     ]
+
+    # Campos que cubre la búsqueda de texto (core.busqueda)
+    CAMPOS_BUSQUEDA = ('paciente_nombre', 'tipo_pago_nombre', 'observaciones')
     
     # Información del pago
     pago = models.ForeignKey(
@@ -130,7 +208,8 @@ class AuditoriaPagos(models.Model):
         verbose_name_plural = 'Auditorías de Pagos'
         ordering = ['-fecha_accion']
         indexes = [
-            models.Index(fields=['fecha_accion']),
+            # (fecha_accion, id): orden total para la paginación por cursor
+            models.Index(fields=['fecha_accion', 'id']),
             models.Index(fields=['pago']),
             models.Index(fields=['hist_clin_numero']),
         ]
\ No newline at end of file
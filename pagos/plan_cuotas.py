@@ -0,0 +1,106 @@
+"""
+Plan de cuotas de una historia clínica: un Pago por cada tipo de pago que
+corresponde al tratamiento.
+
+- Ortodoncia (algún detalle con un tratamiento cuyo nombre contiene
+  "ortodoncia"): todos los tipos excepto "Pago único" (entregas y cuotas).
+- Otros tratamientos: solo "Pago único".
+
+Son las mismas reglas que aplicaba PagosModal.jsx en el navegador; ahora
+el plan y su estado salen de dos consultas chicas (tipos y pagos de ESA
+historia) y los pagos que faltan se crean con un solo bulk_create.
+"""
+from django.db import transaction
+
+from historias_clinicas.models import HistoriasClinicas
+from .models import Pagos, TiposPagos
+from .saldos import aplicar_aportes, aporte_pago
+
+NOMBRES_PAGO_UNICO = ('único', 'unico')
+
+
+def es_pago_unico(nombre_tipo_pago):
+    nombre = nombre_tipo_pago.lower().strip()
+    return 'pago único' in nombre or 'pago unico' in nombre or nombre in NOMBRES_PAGO_UNICO
+
+
+def es_ortodoncia(historia_id):
+    return HistoriasClinicas.objects.filter(
+        pk=historia_id, detalles__tratamiento__nombre_trat__icontains='ortodoncia'
+    ).exists()
+
+
+def tipos_del_plan(ortodoncia):
+    """Tipos de pago del plan, en el orden en que se cargaron."""
+    return [
+        tipo for tipo in TiposPagos.objects.order_by('id')
+        if es_pago_unico(tipo.nombre_tipo_pago) != ortodoncia
+    ]
+
+
+def plan_de_cuotas(historia_id, ortodoncia=None):
+    """
+    Estado del plan: una fila por tipo de pago, con el pago existente (si
+    lo hay). Los pagos de otros tipos (cargados antes de un cambio de
+    tratamiento, por ejemplo) no se muestran, igual que en el modal.
+    """
+    if ortodoncia is None:
+        ortodoncia = es_ortodoncia(historia_id)
+    pagos = {}
+    for pago in Pagos.objects.filter(hist_clin_id=historia_id).select_related('registrado_por').order_by('id'):
+        # Si hubiera dos pagos del mismo tipo se muestra el primero
+        pagos.setdefault(pago.tipo_pago_id, pago)
+
+    cuotas = []
+    for tipo in tipos_del_plan(ortodoncia):
+        pago = pagos.get(tipo.id)
+        registrado_por = pago.registrado_por if pago else None
+        cuotas.append({
+            'tipo_pago': tipo.id,
+            'tipo_pago_nombre': tipo.nombre_tipo_pago,
+            'pago': pago.id if pago else None,
+            'pagado': pago.pagado if pago else False,
+            'fecha_pago': pago.fecha_pago if pago else None,
+            'monto': pago.monto if pago else None,
+            'registrado_por_nombre': (
+                f"{registrado_por.nombre} {registrado_por.apellido}" if registrado_por else 'N/A'
+            ),
+            'existe': pago is not None,
+        })
+    return {
+        'historia_clinica': historia_id,
+        'ortodoncia': ortodoncia,
+        'cuotas': cuotas,
+        'total': len(cuotas),
+        'pagadas': sum(1 for cuota in cuotas if cuota['pagado']),
+    }
+
+
+def generar_plan_de_cuotas(historia_id, montos=None):
+    """
+    Crea (sin marcar como pagados) los pagos del plan que todavía no
+    existen, con un solo bulk_create. 'montos' ({tipo_pago_id: monto}) fija
+    el importe de cada cuota nueva; los tipos sin monto quedan en 0 y los
+    que no son del plan se ignoran. Es idempotente: volver a llamarla no
+    duplica cuotas ni cambia el monto de las que ya existen.
+    Devuelve (creados, plan).
+
+    bulk_create no dispara los signals de Pagos: un pago sin pagar no
+    genera auditoría, pero sí cuenta en el saldo, que se ajusta aquí.
+    """
+    montos = montos or {}
+    ortodoncia = es_ortodoncia(historia_id)
+    with transaction.atomic():
+        # Bloquea la historia: dos pedidos simultáneos no duplican el plan
+        list(HistoriasClinicas.objects.select_for_update().filter(pk=historia_id).values_list('pk', flat=True))
+        existentes = set(
+            Pagos.objects.filter(hist_clin_id=historia_id).values_list('tipo_pago_id', flat=True)
+        )
+        nuevos = [
+            Pagos(hist_clin_id=historia_id, tipo_pago=tipo, pagado=False, monto=montos.get(tipo.id, 0))
+            for tipo in tipos_del_plan(ortodoncia)
+            if tipo.id not in existentes
+        ]
+        Pagos.objects.bulk_create(nuevos)
+        aplicar_aportes([aporte_pago(pago) for pago in nuevos])
+    return len(nuevos), plan_de_cuotas(historia_id, ortodoncia=ortodoncia)
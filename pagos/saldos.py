@@ -0,0 +1,174 @@
+"""
+Mantenimiento de los saldos por historia clínica (SaldoHistoriaClinica) y
+de los ingresos por día (IngresoDiario).
+
+Cada pago "aporta" a la fila de su historia clínica (+1 pago, +monto al
+total y, si está pagado, +1 pagado y +monto a lo pagado) y, si está
+pagado, a la fila del día de su fecha_pago. Al crear, modificar o eliminar
+un pago se resta el aporte anterior y se suma el nuevo; si se anulan
+entre sí (ej. solo cambió quién lo registró) no se toca la base.
+
+Las filas se actualizan con UPDATE ... SET campo = campo + delta (F()),
+así dos pagos simultáneos de la misma historia no se pisan.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Pagos, SaldoHistoriaClinica, IngresoDiario
+
+CERO = Decimal('0')
+
+
+def aporte(hist_clin_id, monto, pagado, fecha_pago, signo=1):
+    """Aporte de un pago a los saldos e ingresos (signo=-1 para quitarlo)."""
+    monto = Decimal(monto or 0)
+    fecha = timezone.localdate(fecha_pago) if pagado and fecha_pago else None
+    return hist_clin_id, monto, bool(pagado), fecha, signo
+
+
+def aporte_pago(pago, signo=1):
+    return aporte(pago.hist_clin_id, pago.monto, pago.pagado, pago.fecha_pago, signo)
+
+
+def aporte_valores(valores, signo=1):
+    """Aporte a partir de la foto de RastreoCambiosMixin ({attname: valor})."""
+    return aporte(
+        valores.get('hist_clin_id'),
+        valores.get('monto'),
+        valores.get('pagado'),
+        valores.get('fecha_pago'),
+        signo,
+    )
+
+
+def _actualizar_o_crear(modelo, filtro, deltas):
+    """UPDATE con F() + delta; si la fila no existe se crea con los deltas."""
+    if modelo.objects.filter(**filtro).update(
+        **{campo: F(campo) + delta for campo, delta in deltas.items()}
+    ):
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**filtro, **deltas)
+    except IntegrityError:
+        # Otra transacción la creó primero
+        modelo.objects.filter(**filtro).update(
+            **{campo: F(campo) + delta for campo, delta in deltas.items()}
+        )
+
+
+def aplicar_aportes(aportes):
+    saldos = defaultdict(lambda: {'cantidad_pagos': 0, 'cantidad_pagados': 0,
+                                  'monto_total': CERO, 'monto_pagado': CERO})
+    ingresos = defaultdict(lambda: {'cantidad_pagos': 0, 'monto': CERO})
+    for hist_clin_id, monto, pagado, fecha, signo in aportes:
+        if hist_clin_id is None:
+            continue
+        saldo = saldos[hist_clin_id]
+        saldo['cantidad_pagos'] += signo
+        saldo['monto_total'] += signo * monto
+        if pagado:
+            saldo['cantidad_pagados'] += signo
+            saldo['monto_pagado'] += signo * monto
+        if fecha is not None:
+            ingresos[fecha]['cantidad_pagos'] += signo
+            ingresos[fecha]['monto'] += signo * monto
+
+    with transaction.atomic():
+        # En orden, para no generar deadlocks entre dos transacciones
+        for hist_clin_id in sorted(saldos):
+            delta = saldos[hist_clin_id]
+            if not any(delta.values()):
+                continue
+            delta['saldo'] = delta['monto_total'] - delta['monto_pagado']
+            _actualizar_o_crear(SaldoHistoriaClinica, {'hist_clin_id': hist_clin_id}, delta)
+
+        for fecha in sorted(ingresos):
+            delta = ingresos[fecha]
+            if not any(delta.values()):
+                continue
+            _actualizar_o_crear(IngresoDiario, {'fecha': fecha}, delta)
+            if delta['cantidad_pagos'] < 0:
+                IngresoDiario.objects.filter(fecha=fecha, cantidad_pagos=0).delete()
+
+
+# ============================================
+# RECONSTRUCCIÓN (comando reconstruir_saldos_pagos)
+# ============================================
+
+def reconstruir_saldos(hist_clin_id=None):
+    """
+    Recalcula los saldos desde Pagos (todas las historias o una) con una
+    consulta agregada. Devuelve la cantidad de filas generadas.
+    """
+    pagos = Pagos.objects.all()
+    saldos = SaldoHistoriaClinica.objects.all()
+    if hist_clin_id:
+        pagos = pagos.filter(hist_clin_id=hist_clin_id)
+        saldos = saldos.filter(hist_clin_id=hist_clin_id)
+
+    agregados = (
+        pagos.order_by()
+        .values('hist_clin_id')
+        .annotate(
+            cantidad_pagos=Count('id'),
+            cantidad_pagados=Count('id', filter=Q(pagado=True)),
+            monto_total=Sum('monto'),
+            monto_pagado=Sum('monto', filter=Q(pagado=True)),
+        )
+    )
+    filas = []
+    for fila in agregados:
+        monto_total = fila['monto_total'] or CERO
+        monto_pagado = fila['monto_pagado'] or CERO
+        filas.append(SaldoHistoriaClinica(
+            hist_clin_id=fila['hist_clin_id'],
+            cantidad_pagos=fila['cantidad_pagos'],
+            cantidad_pagados=fila['cantidad_pagados'],
+            monto_total=monto_total,
+            monto_pagado=monto_pagado,
+            saldo=monto_total - monto_pagado,
+        ))
+
+    with transaction.atomic():
+        saldos.delete()
+        SaldoHistoriaClinica.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def reconstruir_ingresos():
+    """
+    Recalcula los ingresos diarios desde los pagos pagados con una
+    consulta agregada. TruncDate usa la zona horaria local, igual que el
+    mantenimiento incremental. Devuelve la cantidad de filas generadas.
+    """
+    agregados = (
+        Pagos.objects.filter(pagado=True, fecha_pago__isnull=False)
+        .order_by()
+        .values(fecha=TruncDate('fecha_pago'))
+        .annotate(cantidad_pagos=Count('id'), monto=Sum('monto'))
+    )
+    filas = [
+        IngresoDiario(fecha=fila['fecha'], cantidad_pagos=fila['cantidad_pagos'], monto=fila['monto'] or CERO)
+        for fila in agregados
+    ]
+
+    with transaction.atomic():
+        IngresoDiario.objects.all().delete()
+        IngresoDiario.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def saldo_historia_clinica(historia_id):
+    """Saldo precalculado de una historia clínica (una fila; ceros si no tiene pagos)."""
+    saldo = SaldoHistoriaClinica.objects.filter(hist_clin_id=historia_id).values(
+        'cantidad_pagos', 'cantidad_pagados', 'monto_total', 'monto_pagado', 'saldo'
+    ).first()
+    if saldo is None:
+        saldo = {'cantidad_pagos': 0, 'cantidad_pagados': 0, 'monto_total': 0, 'monto_pagado': 0, 'saldo': 0}
+    return dict(saldo, hist_clin=historia_id)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Pagos, TiposPagos, AuditoriaPagos
 from historias_clinicas.models import HistoriasClinicas
+from personal.models import Personal
 
 # --- Serializer de TiposPagos ---
 class TiposPagosSerializer(serializers.ModelSerializer):
@@ -50,6 +51,7 @@ class PagosSerializer(serializers.ModelSerializer):
             'registrado_por',
             'pagado',
             'fecha_pago',
+            'monto',
             'registrado_por_nombre',
         )
         read_only_fields = ('fecha_pago',)
@@ -57,4 +59,40 @@ class PagosSerializer(serializers.ModelSerializer):
     def get_registrado_por_nombre(self, obj):
         if obj.registrado_por:
             return f"{obj.registrado_por.nombre} {obj.registrado_por.apellido}"
-        return "N/A"
\ No newline at end of file
+        return "N/A"
+
+    def update(self, instance, validated_data):
+        # Solo se escriben las columnas que cambiaron (UPDATE ... SET con update_fields)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.guardar_cambios()
+        return instance
+
+
+# --- Serializer para marcar muchos pagos a la vez (ej. un plan de cuotas) ---
+class MarcarPagosSerializer(serializers.Serializer):
+    pagos = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=500
+    )
+    pagado = serializers.BooleanField()
+    registrado_por = serializers.PrimaryKeyRelatedField(
+        queryset=Personal.objects.all(),
+        required=False,
+        allow_null=True
+    )
+
+
+# --- Serializer para generar el plan de cuotas (montos opcionales por tipo de pago) ---
+class GenerarPlanCuotasSerializer(serializers.Serializer):
+    # {"<id de TiposPagos>": monto}
+    montos = serializers.DictField(
+        child=serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0),
+        required=False
+    )
+
+    def validate_montos(self, montos):
+        if not all(str(tipo_pago).isdigit() for tipo_pago in montos):
+            raise serializers.ValidationError('Las claves deben ser IDs de tipos de pago.')
+        return {int(tipo_pago): monto for tipo_pago, monto in montos.items()}
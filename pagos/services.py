@@ -0,0 +1,78 @@
+"""
+Operaciones de escritura sobre Pagos que no pasan por el serializer uno
+por uno (ej. marcar como pagadas todas las cuotas de un plan).
+"""
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.auditoria import auditoria
+from .models import Pagos
+from .saldos import aplicar_aportes, aporte_pago
+from .signals import auditoria_cambio_pagado
+
+# Relaciones que usa la auditoría (pagos.signals.datos_auditoria)
+PAGOS_RELACIONES_AUDITORIA = ('hist_clin__paciente', 'tipo_pago')
+
+
+def marcar_pagos(pago_ids, pagado, usuario=None):
+    """
+    Marca (o desmarca) muchos pagos dentro de una transacción.
+
+    - 1 SELECT con los JOINs que necesita la auditoría (y bloqueo de filas)
+    - 1 UPDATE para todos los pagos que cambian (fecha_pago igual que en
+      Pagos.save(): se completa al pagar y se borra al desmarcar)
+    - los saldos e ingresos se ajustan una vez por historia clínica y por
+      día (aplicar_aportes), no una vez por pago
+    - 1 INSERT (bulk_create) con todas las auditorías al confirmarse
+
+    Los signals de post_save no se disparan: la auditoría se arma aquí con
+    el mismo formato que usa registrar_auditoria_pago.
+
+    Devuelve un dict con los IDs actualizados, los que ya estaban en ese
+    estado y los que no existen.
+    """
+    pago_ids = set(pago_ids)
+
+    with transaction.atomic():
+        pagos = list(
+            Pagos.objects.filter(pk__in=pago_ids)
+            .select_related(*PAGOS_RELACIONES_AUDITORIA)
+            .select_for_update(of=('self',))
+            .order_by('pk')
+        )
+
+        a_actualizar = [p for p in pagos if p.pagado != pagado]
+        if a_actualizar:
+            ahora = timezone.now()
+            cambios = {
+                'pagado': pagado,
+                'fecha_pago': Coalesce('fecha_pago', Value(ahora)) if pagado else None,
+            }
+            if usuario is not None:
+                cambios['registrado_por'] = usuario
+            Pagos.objects.filter(pk__in=[p.pk for p in a_actualizar]).update(**cambios)
+
+            aportes = [aporte_pago(p, signo=-1) for p in a_actualizar]
+            for pago in a_actualizar:
+                pago.pagado = pagado
+                pago.fecha_pago = (pago.fecha_pago or ahora) if pagado else None
+                if usuario is not None:
+                    pago.registrado_por = usuario
+            aplicar_aportes(aportes + [aporte_pago(p) for p in a_actualizar])
+
+            if pagado:
+                accion, observaciones = 'REGISTRO', "Pago marcado como pagado."
+            else:
+                accion, observaciones = 'CANCELACION', "Pago cancelado (desmarcado)."
+            auditoria.registrar_varios(
+                auditoria_cambio_pagado(pago, accion, observaciones) for pago in a_actualizar
+            )
+
+    actualizados = [p.pk for p in a_actualizar]
+    return {
+        'actualizados': actualizados,
+        'sin_cambios': sorted({p.pk for p in pagos} - set(actualizados)),
+        'no_encontrados': sorted(pago_ids - {p.pk for p in pagos}),
+    }
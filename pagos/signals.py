@@ -1,6 +1,10 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import Pagos, AuditoriaPagos
+from core.auditoria import auditoria
+from core.catalogos import invalidar_catalogo
+from historias_clinicas.models import HistoriasClinicas
+from .models import Pagos, AuditoriaPagos, TiposPagos
+from .saldos import aplicar_aportes, aporte_pago, aporte_valores
 
 @receiver(pre_save, sender=Pagos)
 def guardar_estado_anterior(sender, instance, **kwargs):
@@ -9,71 +13,128 @@ def guardar_estado_anterior(sender, instance, **kwargs):
     para poder compararlo después.
     """
     if instance.pk:  # Solo si el objeto ya existe (es una actualización)
-        try:
-            instance._estado_anterior = Pagos.objects.get(pk=instance.pk)
-        except Pagos.DoesNotExist:
-            instance._estado_anterior = None
+        # Foto tomada al cargar el pago (RastreoCambiosMixin): no hace falta re-consultar
+        instance._estado_anterior = instance.valores_originales() or None
     else:
         instance._estado_anterior = None
 
 
+def datos_auditoria(pago):
+    """
+    Valores desnormalizados de la auditoría: nombre y DNI del paciente y
+    nombre del tipo de pago.
+
+    Si el pago ya trae cargados hist_clin.paciente y tipo_pago (ej. se leyó
+    con select_related, como hace marcar_pagos) no se consulta nada; si no,
+    se resuelven en UNA consulta con JOINs en lugar de tres cargas perezosas.
+    """
+    hist_clin_cargada = Pagos.hist_clin.is_cached(pago) and (
+        pago.hist_clin is None or HistoriasClinicas.paciente.is_cached(pago.hist_clin)
+    )
+    tipo_cargado = pago.tipo_pago_id is None or Pagos.tipo_pago.is_cached(pago)
+
+    if hist_clin_cargada and tipo_cargado:
+        paciente = pago.hist_clin.paciente if pago.hist_clin else None
+        return {
+            'paciente_nombre': str(paciente) if paciente else 'N/A',
+            'paciente_dni': paciente.dni if paciente else 'N/A',
+            'tipo_pago_nombre': str(pago.tipo_pago) if pago.tipo_pago else 'Sin tipo',
+        }
+
+    fila = Pagos._base_manager.filter(pk=pago.pk).values(
+        'tipo_pago__nombre_tipo_pago',
+        'hist_clin__paciente__nombre',
+        'hist_clin__paciente__apellido',
+        'hist_clin__paciente__dni',
+    ).first() or {}
+    tiene_paciente = fila.get('hist_clin__paciente__dni') is not None
+    return {
+        # Mismo formato que Pacientes.__str__
+        'paciente_nombre': (
+            f"{fila['hist_clin__paciente__nombre']} {fila['hist_clin__paciente__apellido']}"
+            if tiene_paciente else 'N/A'
+        ),
+        'paciente_dni': fila['hist_clin__paciente__dni'] if tiene_paciente else 'N/A',
+        'tipo_pago_nombre': fila.get('tipo_pago__nombre_tipo_pago') or 'Sin tipo',
+    }
+
+
 @receiver(post_save, sender=Pagos)
 def registrar_auditoria_pago(sender, instance, created, **kwargs):
     """
     Signal que se ejecuta después de guardar un Pago.
     Registra en auditoría SOLO cuando se marca o desmarca como pagado.
+    Los datos del paciente y del tipo de pago se buscan solo si hay algo
+    que registrar (ver datos_auditoria).
     """
     
-    # Obtener información del paciente
-    paciente = instance.hist_clin.paciente if instance.hist_clin else None
-    paciente_nombre = str(paciente) if paciente else 'N/A'
-    paciente_dni = paciente.dni if paciente else 'N/A'
-    
-    # Obtener el nombre del tipo de pago
-    tipo_pago_nombre = str(instance.tipo_pago) if instance.tipo_pago else 'Sin tipo'
-    
     # Determinar si hubo cambio en el estado 'pagado'
     accion = None
     observaciones = ""
-    usuario_que_realizo_accion = instance.registrado_por  # Usuario actual por defecto
     
     if created:
         # Es un nuevo registro
         if instance.pagado:
             accion = 'REGISTRO'
             observaciones = f"Pago registrado como pagado al momento de crear."
-            usuario_que_realizo_accion = instance.registrado_por
         # Si se crea sin marcar como pagado, NO registramos en auditoría
     else:
         # Es una actualización - verificar si cambió el estado
         estado_anterior = getattr(instance, '_estado_anterior', None)
         
         if estado_anterior:
-            if not estado_anterior.pagado and instance.pagado:
+            if not estado_anterior['pagado'] and instance.pagado:
                 # Se marcó como pagado
                 accion = 'REGISTRO'
                 observaciones = f"Pago marcado como pagado."
-                usuario_que_realizo_accion = instance.registrado_por
-            elif estado_anterior.pagado and not instance.pagado:
+            elif estado_anterior['pagado'] and not instance.pagado:
                 # Se canceló el pago
                 accion = 'CANCELACION'
                 observaciones = f"Pago cancelado (desmarcado)."
-                # 🚨 USAR EL USUARIO ACTUAL (quien desmarca)
-                usuario_que_realizo_accion = instance.registrado_por
             # Si no cambió el estado 'pagado', no registramos nada
     
     # Solo crear registro de auditoría si hubo una acción relevante
     if accion:
-        AuditoriaPagos.objects.create(
-            pago=instance,
-            accion=accion,
-            usuario=usuario_que_realizo_accion,  # 🚨 USUARIO CORRECTO
-            hist_clin=instance.hist_clin,
-            tipo_pago_nombre=tipo_pago_nombre,
-            hist_clin_numero=instance.hist_clin.id if instance.hist_clin else None,
-            paciente_nombre=paciente_nombre,
-            paciente_dni=paciente_dni,
-            estado_pagado=instance.pagado,
-            fecha_pago=instance.fecha_pago,
-            observaciones=observaciones,
-        )
\ No newline at end of file
+        auditoria.registrar(auditoria_cambio_pagado(instance, accion, observaciones))
+
+
+def auditoria_cambio_pagado(pago, accion, observaciones):
+    """AuditoriaPagos de un REGISTRO / CANCELACION (compartido con marcar_pagos)."""
+    # Las FK van por id: asignar los objetos cargaría Personal e HC de más
+    return AuditoriaPagos(
+        pago=pago,
+        accion=accion,
+        usuario_id=pago.registrado_por_id,  # Quien marca o desmarca
+        hist_clin_id=pago.hist_clin_id,
+        hist_clin_numero=pago.hist_clin_id,
+        estado_pagado=pago.pagado,
+        fecha_pago=pago.fecha_pago,
+        observaciones=observaciones,
+        **datos_auditoria(pago),
+    )
+
+
+# ============================================
+# SALDOS E INGRESOS (incremental)
+# ============================================
+
+@receiver(post_save, sender=Pagos)
+def actualizar_saldos_pago(sender, instance, created, **kwargs):
+    """Resta el aporte anterior del pago y suma el nuevo (en la misma transacción)."""
+    anterior = getattr(instance, '_estado_anterior', None)
+    aportes = [aporte_pago(instance)]
+    if anterior:
+        aportes.append(aporte_valores(anterior, signo=-1))
+    aplicar_aportes(aportes)
+
+
+@receiver(post_delete, sender=Pagos)
+def descontar_saldos_pago(sender, instance, **kwargs):
+    aplicar_aportes([aporte_pago(instance, signo=-1)])
+
+
+@receiver(post_save, sender=TiposPagos)
+@receiver(post_delete, sender=TiposPagos)
+def invalidar_catalogo_tipos_pagos(sender, **kwargs):
+    """Cambia el ETag del listado de tipos de pago."""
+    invalidar_catalogo(sender)
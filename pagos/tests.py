@@ -1,3 +1,468 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from historias_clinicas.models import DetallesHC, HistoriasClinicas, Tratamientos
+from pacientes.models import Pacientes, Generos
+from personal.models import Personal, Puestos
+from .models import Pagos, TiposPagos, AuditoriaPagos, SaldoHistoriaClinica, IngresoDiario
+from .saldos import reconstruir_saldos, reconstruir_ingresos
+from .deudores import reporte_deudores, tramo_de
+from .plan_cuotas import es_ortodoncia, es_pago_unico, generar_plan_de_cuotas, tipos_del_plan
+from .services import marcar_pagos, PAGOS_RELACIONES_AUDITORIA
+from .signals import datos_auditoria
+
+
+class DatosPagosMixin:
+    """Dos historias clínicas (pacientes distintos), un tipo de pago y quien registra."""
+
+    @classmethod
+    def setUpTestData(cls):
+        puesto = Puestos.objects.create(nombre_puesto='Odontólogo/a')
+        genero = Generos.objects.create(nombre_ge='Otro')
+        cls.odontologo = Personal.objects.create(
+            nombre='Ana', apellido='Pérez', dni='1', domicilio='-', telefono='1',
+            email='ana@consultorio.com', puesto=puesto,
+        )
+        cls.tipo = TiposPagos.objects.create(nombre_tipo_pago='Efectivo')
+        cls.historias = []
+        for numero, nombre in enumerate(('Juan', 'Laura'), start=1):
+            paciente = Pacientes.objects.create(
+                nombre=nombre, apellido='López', dni=str(30000000 + numero),
+                fecha_nacimiento=date(1990, 1, 1), telefono='3', genero=genero,
+            )
+            cls.historias.append(HistoriasClinicas.objects.create(paciente=paciente, odontologo=cls.odontologo))
+
+    def crear_pago(self, historia, monto, pagado=False, **campos):
+        return Pagos.objects.create(
+            hist_clin=historia, tipo_pago=self.tipo, monto=Decimal(monto), pagado=pagado, **campos
+        )
+
+    def assertIgualAReconstruido(self):
+        """Los saldos e ingresos incrementales coinciden con la reconstrucción completa."""
+        def saldos():
+            return sorted(SaldoHistoriaClinica.objects.values_list(
+                'hist_clin_id', 'cantidad_pagos', 'cantidad_pagados', 'monto_total', 'monto_pagado', 'saldo'
+            ))
+
+        def ingresos():
+            return sorted(IngresoDiario.objects.values_list('fecha', 'cantidad_pagos', 'monto'))
+
+        incrementales = saldos(), ingresos()
+        reconstruir_saldos()
+        reconstruir_ingresos()
+        self.assertEqual(incrementales, (saldos(), ingresos()))
+
+
+# ============================================
+# SALDOS E INGRESOS (incremental)
+# ============================================
+
+class SaldosPagosTests(DatosPagosMixin, TestCase):
+
+    def test_altas_cambios_y_bajas_coinciden_con_la_reconstruccion(self):
+        primera, segunda = self.historias
+        pagos = [self.crear_pago(primera, monto) for monto in ('1000', '2500.50', '300')]
+        pagado = self.crear_pago(segunda, '800', pagado=True)
+        self.assertIgualAReconstruido()
+
+        pagos[0].pagado = True
+        pagos[0].save()
+        pagos[1].monto = Decimal('2000')
+        pagos[1].save()
+        pagos[2].hist_clin = segunda
+        pagos[2].save()
+        # Otro día: el ingreso pasa de una fecha a la otra
+        pagado.fecha_pago = timezone.now() - timedelta(days=3)
+        pagado.save()
+        self.assertIgualAReconstruido()
+
+        pagos[0].pagado = False
+        pagos[0].save()
+        pagado.delete()
+        self.assertIgualAReconstruido()
+        saldo = SaldoHistoriaClinica.objects.get(hist_clin=primera)
+        self.assertEqual((saldo.monto_total, saldo.monto_pagado, saldo.saldo),
+                         (Decimal('3000'), Decimal('0'), Decimal('3000')))
+
+
+# ============================================
+# MARCAR PAGOS EN LOTE
+# ============================================
+
+class MarcarPagosTests(DatosPagosMixin, TestCase):
+
+    def crear_cuotas(self, cantidad):
+        return [
+            self.crear_pago(self.historias[numero % 2], str(100 * (numero + 1)))
+            for numero in range(cantidad)
+        ]
+
+    def consultas_al_marcar(self, pagos, pagado):
+        with CaptureQueriesContext(connection) as consultas:
+            marcar_pagos([p.pk for p in pagos], pagado, usuario=self.odontologo)
+        return len(consultas)
+
+    def test_las_consultas_no_dependen_de_la_cantidad_de_pagos(self):
+        # El primer pago del día crea la fila de IngresoDiario (una consulta más)
+        marcar_pagos([self.crear_pago(self.historias[0], '1').pk], True)
+        pocas = self.consultas_al_marcar(self.crear_cuotas(2), True)
+        muchas = self.consultas_al_marcar(self.crear_cuotas(20), True)
+        self.assertEqual(pocas, muchas)
+
+    def test_saldos_auditoria_y_fecha_de_pago(self):
+        cuotas = self.crear_cuotas(5)
+        ya_pagado = self.crear_pago(self.historias[0], '50', pagado=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post('/api/pagos/marcar/', {
+                'pagos': [p.pk for p in cuotas] + [ya_pagado.pk, 999999],
+                'pagado': True,
+                'registrado_por': self.odontologo.pk,
+            }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {
+            'actualizados': sorted(p.pk for p in cuotas),
+            'sin_cambios': [ya_pagado.pk],
+            'no_encontrados': [999999],
+        })
+        self.assertIgualAReconstruido()
+        self.assertFalse(Pagos.objects.filter(pk__in=[p.pk for p in cuotas], fecha_pago__isnull=True).exists())
+
+        registros = AuditoriaPagos.objects.filter(pago__in=cuotas).order_by('pago_id')
+        self.assertEqual(len(registros), 5)
+        registro = registros[0]
+        self.assertEqual(
+            (registro.accion, registro.usuario_id, registro.estado_pagado, registro.paciente_nombre,
+             registro.tipo_pago_nombre),
+            ('REGISTRO', self.odontologo.pk, True, 'Juan López', 'Efectivo'),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            marcar_pagos([p.pk for p in cuotas[:2]], False)
+        self.assertIgualAReconstruido()
+        self.assertFalse(Pagos.objects.filter(pk__in=[p.pk for p in cuotas[:2]], fecha_pago__isnull=False).exists())
+        self.assertEqual(AuditoriaPagos.objects.filter(accion='CANCELACION').count(), 2)
+
+
+# ============================================
+# AUDITORÍA AL GUARDAR UN PAGO (signals)
+# ============================================
+
+class AuditoriaPagoSignalTests(DatosPagosMixin, TestCase):
+
+    def setUp(self):
+        # Con un pago ya cobrado hoy la fila de IngresoDiario existe: marcar
+        # otro pago la actualiza sin crearla y las consultas no varían
+        self.crear_pago(self.historias[1], '10', pagado=True)
+        self.pendientes = [self.crear_pago(self.historias[0], monto) for monto in ('100', '200')]
+
+    def marcar(self, pago, consultas):
+        pago.pagado = True
+        pago.registrado_por = self.odontologo
+        with self.assertNumQueries(consultas), self.captureOnCommitCallbacks(execute=True):
+            pago.save()
+        return AuditoriaPagos.objects.get(pago=pago)
+
+    def test_con_select_related_no_consulta_los_datos_del_paciente(self):
+        relacionado = Pagos.objects.select_related(*PAGOS_RELACIONES_AUDITORIA).get(pk=self.pendientes[0].pk)
+        with self.assertNumQueries(0):
+            datos = datos_auditoria(relacionado)
+        suelto = Pagos.objects.get(pk=self.pendientes[0].pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(datos_auditoria(suelto), datos)
+
+        # UPDATE, saldo e ingreso (con su savepoint), verificación de las FK
+        # SET_NULL (pago, usuario, historia) y el INSERT; sin select_related,
+        # un JOIN más
+        self.marcar(relacionado, 9)
+        registro = self.marcar(Pagos.objects.get(pk=self.pendientes[1].pk), 10)
+
+        pago = Pagos.objects.get(pk=self.pendientes[1].pk)
+        self.assertEqual(
+            (registro.accion, registro.usuario_id, registro.hist_clin_id, registro.hist_clin_numero,
+             registro.estado_pagado, registro.fecha_pago, registro.observaciones),
+            ('REGISTRO', self.odontologo.pk, self.historias[0].pk, self.historias[0].pk,
+             True, pago.fecha_pago, 'Pago marcado como pagado.'),
+        )
+        self.assertEqual(
+            (registro.paciente_nombre, registro.paciente_dni, registro.tipo_pago_nombre),
+            ('Juan López', '30000001', 'Efectivo'),
+        )
+
+    def test_sin_tipo_de_pago_y_sin_cambio_de_pagado(self):
+        pago = Pagos.objects.create(hist_clin=self.historias[0], monto=Decimal('5'))
+        self.assertEqual(datos_auditoria(Pagos.objects.get(pk=pago.pk))['tipo_pago_nombre'], 'Sin tipo')
+
+        pago.monto = Decimal('6')
+        with self.captureOnCommitCallbacks(execute=True):
+            pago.save()
+        self.assertFalse(AuditoriaPagos.objects.filter(pago=pago).exists())
+
+        pago.pagado = True
+        with self.captureOnCommitCallbacks(execute=True):
+            pago.save()
+        pago.pagado = False
+        with self.captureOnCommitCallbacks(execute=True):
+            pago.save()
+        self.assertEqual(
+            list(AuditoriaPagos.objects.filter(pago=pago).order_by('id').values_list(
+                'accion', 'estado_pagado', 'tipo_pago_nombre', 'paciente_nombre'
+            )),
+            [('REGISTRO', True, 'Sin tipo', 'Juan López'), ('CANCELACION', False, 'Sin tipo', 'Juan López')],
+        )
+
+
+# ============================================
+# PLAN DE CUOTAS
+# ============================================
+
+class PlanCuotasTests(DatosPagosMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.pago_unico = TiposPagos.objects.create(nombre_tipo_pago='Pago Único')
+        cls.entrega = TiposPagos.objects.create(nombre_tipo_pago='Entrega inicial')
+        cls.cuota = TiposPagos.objects.create(nombre_tipo_pago='Cuota 1')
+        cls.ortodoncia, cls.simple = cls.historias
+        DetallesHC.objects.create(
+            historia_clinica=cls.ortodoncia, tratamiento=Tratamientos.objects.create(nombre_trat='Ortodoncia fija')
+        )
+        DetallesHC.objects.create(
+            historia_clinica=cls.simple, tratamiento=Tratamientos.objects.create(nombre_trat='Limpieza')
+        )
+
+    def url(self, historia):
+        return f'/api/historias_clinicas/historias/{historia.pk}/plan-cuotas/'
+
+    def test_reglas_del_plan(self):
+        self.assertTrue(es_ortodoncia(self.ortodoncia.pk))
+        self.assertFalse(es_ortodoncia(self.simple.pk))
+        self.assertEqual(tipos_del_plan(True), [self.tipo, self.entrega, self.cuota])
+        self.assertEqual(tipos_del_plan(False), [self.pago_unico])
+        self.assertTrue(all(es_pago_unico(nombre) for nombre in ('Pago único', 'PAGO UNICO', ' único ')))
+        self.assertFalse(es_pago_unico('Cuota única de ortodoncia'))
+
+    def test_genera_las_cuotas_con_sus_montos_una_sola_vez(self):
+        respuesta = self.client.post(self.url(self.ortodoncia), {
+            'montos': {str(self.entrega.pk): '15000.50', str(self.cuota.pk): 5000, str(self.pago_unico.pk): 99},
+        }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+        plan = respuesta.json()
+        self.assertEqual((plan['creados'], plan['ortodoncia'], plan['total'], plan['pagadas']), (3, True, 3, 0))
+        self.assertEqual(
+            [(cuota['tipo_pago'], Decimal(cuota['monto'])) for cuota in plan['cuotas']],
+            [(self.tipo.pk, Decimal('0')), (self.entrega.pk, Decimal('15000.50')), (self.cuota.pk, Decimal('5000'))],
+        )
+        # El tipo que no es del plan se ignora; el saldo ya incluye las cuotas nuevas
+        self.assertFalse(Pagos.objects.filter(tipo_pago=self.pago_unico).exists())
+        saldo = SaldoHistoriaClinica.objects.get(hist_clin=self.ortodoncia)
+        self.assertEqual((saldo.cantidad_pagos, saldo.monto_total, saldo.saldo),
+                         (3, Decimal('20000.50'), Decimal('20000.50')))
+        self.assertIgualAReconstruido()
+
+        # Idempotente: no duplica ni cambia los montos ya cargados
+        respuesta = self.client.post(self.url(self.ortodoncia), {'montos': {str(self.entrega.pk): 1}},
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['creados'], 0)
+        self.assertEqual(Pagos.objects.filter(hist_clin=self.ortodoncia).count(), 3)
+        self.assertEqual(Pagos.objects.get(hist_clin=self.ortodoncia, tipo_pago=self.entrega).monto, Decimal('15000.50'))
+        self.assertIgualAReconstruido()
+
+    def test_solo_crea_lo_que_falta_y_sin_montos_queda_en_cero(self):
+        Pagos.objects.create(hist_clin=self.ortodoncia, tipo_pago=self.entrega, monto=Decimal('700'), pagado=True)
+        creados, plan = generar_plan_de_cuotas(self.ortodoncia.pk)
+        self.assertEqual(creados, 2)
+        self.assertEqual([cuota['existe'] for cuota in plan['cuotas']], [True, True, True])
+        self.assertEqual(plan['pagadas'], 1)
+        self.assertEqual(
+            set(Pagos.objects.filter(hist_clin=self.ortodoncia, pagado=False).values_list('monto', flat=True)),
+            {Decimal('0')},
+        )
+
+        creados, plan = generar_plan_de_cuotas(self.simple.pk, {self.pago_unico.pk: Decimal('1200')})
+        self.assertEqual((creados, plan['ortodoncia']), (1, False))
+        self.assertEqual(plan['cuotas'][0]['monto'], Decimal('1200'))
+        self.assertIgualAReconstruido()
+
+    def test_montos_invalidos_devuelven_400(self):
+        for montos in ({str(self.cuota.pk): -1}, {'cuota': 10}, {str(self.cuota.pk): 'mucho'}, [1, 2]):
+            with self.subTest(montos=montos):
+                respuesta = self.client.post(self.url(self.ortodoncia), {'montos': montos},
+                                             content_type='application/json')
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('montos', respuesta.json())
+        self.assertFalse(Pagos.objects.exists())
+
+# ============================================
+# REPORTE DE DEUDORES
+# ============================================
+
+class DeudoresTests(DatosPagosMixin, TestCase):
+
+    def setUp(self):
+        self.ahora = timezone.now()
+        juan, laura = self.historias
+        self.juan_otra = HistoriasClinicas.objects.create(paciente=juan.paciente, odontologo=self.odontologo)
+
+        def pago(historia, monto, dias, pagado=False):
+            return self.crear_pago(historia, monto, pagado=pagado, creado=self.ahora - timedelta(days=dias))
+
+        pago(juan, '100', 10)
+        pago(juan, '200', 45)
+        pago(juan, '999', 400, pagado=True)
+        pago(self.juan_otra, '50', 5)
+        pago(laura, '300', 91)
+        # Historia sin deuda: solo pagos pagados
+        self.sin_deuda = HistoriasClinicas.objects.create(paciente=laura.paciente, odontologo=self.odontologo)
+        pago(self.sin_deuda, '700', 200, pagado=True)
+
+    def test_tramos_en_sus_limites(self):
+        for dias, tramo in ((0, '0-30'), (30, '0-30'), (31, '31-60'), (60, '31-60'),
+                            (61, '61-90'), (90, '61-90'), (91, '+90'), (1000, '+90')):
+            with self.subTest(dias=dias):
+                self.assertEqual(tramo_de(dias), tramo)
+
+    def test_agrupa_por_paciente_e_historia_sin_los_pagados(self):
+        reporte = reporte_deudores(ahora=self.ahora)
+        juan, laura = self.historias
+        # De la deuda más vieja a la más nueva
+        self.assertEqual([d['paciente'] for d in reporte['deudores']], [laura.paciente_id, juan.paciente_id])
+        deudor_laura, deudor_juan = reporte['deudores']
+
+        self.assertEqual(
+            (deudor_juan['cuotas_impagas'], deudor_juan['monto_adeudado'], deudor_juan['dias_deuda'], deudor_juan['tramo']),
+            (3, Decimal('350'), 45, '31-60'),
+        )
+        self.assertEqual(deudor_juan['paciente_nombre'], 'Juan López')
+        self.assertEqual(
+            [(h['hist_clin'], h['cuotas_impagas'], h['monto_adeudado'], h['dias_deuda']) for h in deudor_juan['historias']],
+            [(juan.pk, 2, Decimal('300'), 45), (self.juan_otra.pk, 1, Decimal('50'), 5)],
+        )
+        # La historia con todo pagado no aparece
+        self.assertEqual([h['hist_clin'] for h in deudor_laura['historias']], [laura.pk])
+        self.assertEqual((deudor_laura['dias_deuda'], deudor_laura['tramo']), (91, '+90'))
+
+        tramos = {tramo['tramo']: tramo for tramo in reporte['tramos']}
+        self.assertEqual(list(tramos), ['0-30', '31-60', '61-90', '+90'])
+        self.assertEqual((tramos['31-60']['pacientes'], tramos['31-60']['monto_adeudado']), (1, Decimal('350')))
+        self.assertEqual((tramos['+90']['pacientes'], tramos['+90']['cuotas_impagas']), (1, 1))
+        self.assertEqual(tramos['0-30']['pacientes'], 0)
+
+    def test_filtros(self):
+        juan, laura = self.historias
+        self.assertEqual([d['paciente'] for d in reporte_deudores(dias_min=60, ahora=self.ahora)['deudores']],
+                         [laura.paciente_id])
+        solo_juan = reporte_deudores(paciente_id=juan.paciente_id, ahora=self.ahora)['deudores']
+        self.assertEqual([d['paciente'] for d in solo_juan], [juan.paciente_id])
+
+        respuesta = self.client.get('/api/pagos/deudores/', {'odontologo': self.odontologo.pk})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()['deudores']), 2)
+        self.assertEqual(self.client.get('/api/pagos/deudores/', {'dias_min': 'x'}).status_code, 400)
+
+# ============================================
+# LISTADO DE PAGOS (filtros y paginación por clave)
+# ============================================
+
+class ListadoPagosTests(DatosPagosMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.transferencia = TiposPagos.objects.create(nombre_tipo_pago='Transferencia')
+
+    def setUp(self):
+        juan, laura = self.historias
+        momento = lambda dia: timezone.make_aware(datetime(2025, 3, dia, 12))
+        self.pago_juan = self.crear_pago(juan, '100', pagado=True, fecha_pago=momento(10))
+        self.pago_juan_tarde = self.crear_pago(juan, '200', pagado=True, fecha_pago=momento(20))
+        self.pendiente_juan = Pagos.objects.create(hist_clin=juan, tipo_pago=self.transferencia, monto=Decimal('300'))
+        self.pago_laura = self.crear_pago(laura, '400', pagado=True, fecha_pago=momento(15))
+
+    def ids(self, respuesta):
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        filas = datos['results'] if isinstance(datos, dict) else datos
+        return [fila['id'] for fila in filas]
+
+    def test_cada_filtro(self):
+        juan, laura = self.historias
+        casos = (
+            ({}, [self.pago_laura, self.pendiente_juan, self.pago_juan_tarde, self.pago_juan]),
+            ({'hist_clin': laura.pk}, [self.pago_laura]),
+            ({'tipo_pago': self.transferencia.pk}, [self.pendiente_juan]),
+            ({'pagado': 'false'}, [self.pendiente_juan]),
+            ({'pagado': 'true', 'hist_clin': juan.pk}, [self.pago_juan_tarde, self.pago_juan]),
+            # Día completo en la zona del consultorio, en los dos extremos
+            ({'fecha_desde': '2025-03-15'}, [self.pago_laura, self.pago_juan_tarde]),
+            ({'fecha_hasta': '2025-03-15'}, [self.pago_laura, self.pago_juan]),
+            ({'fecha_desde': '2025-03-11', 'fecha_hasta': '2025-03-19'}, [self.pago_laura]),
+        )
+        for params, esperados in casos:
+            with self.subTest(params=params):
+                self.assertEqual(self.ids(self.client.get('/api/pagos/', params)), [p.pk for p in esperados])
+
+    def test_filtros_invalidos_devuelven_400(self):
+        for params in ({'hist_clin': 'abc'}, {'tipo_pago': '1x'}, {'pagado': 'si'}, {'fecha_desde': '2025-13-01'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/pagos/', params).status_code, 400)
+
+    def test_paginas_por_clave_en_orden_descendente_de_id(self):
+        for numero in range(5):
+            self.crear_pago(self.historias[0], str(numero + 1))
+        esperados = list(Pagos.objects.order_by('-id').values_list('id', flat=True))
+
+        vistos = []
+        respuesta = self.client.get('/api/pagos/', {'page_size': 3})
+        while True:
+            datos = respuesta.json()
+            self.assertLessEqual(len(datos['results']), 3)
+            vistos += [fila['id'] for fila in datos['results']]
+            if not datos['next']:
+                break
+            respuesta = self.client.get(datos['next'])
+        self.assertEqual(vistos, esperados)
+
+        # Un pago nuevo no corre las páginas siguientes (se ve solo en la primera)
+        primera = self.client.get('/api/pagos/', {'page_size': 3}).json()
+        nuevo = self.crear_pago(self.historias[1], '9')
+        segunda = self.client.get(primera['next']).json()
+        self.assertEqual([fila['id'] for fila in segunda['results']], esperados[3:6])
+        self.assertEqual(self.ids(self.client.get(primera['first']))[0], nuevo.pk)
+
+    def test_ruta_de_pagos_de_la_historia_clinica(self):
+        juan, laura = self.historias
+        url = f'/api/historias_clinicas/historias/{juan.pk}/pagos/'
+        self.assertEqual(self.ids(self.client.get(url)), [self.pendiente_juan.pk, self.pago_juan_tarde.pk, self.pago_juan.pk])
+        # Mismos filtros que /api/pagos/, sin salirse de la historia
+        self.assertEqual(self.ids(self.client.get(url, {'pagado': 'true', 'fecha_desde': '2025-03-15'})), [self.pago_juan_tarde.pk])
+        self.assertEqual(self.ids(self.client.get(url, {'hist_clin': laura.pk})), [])
+        self.assertEqual(self.ids(self.client.get(url, {'page_size': 2})), [self.pendiente_juan.pk, self.pago_juan_tarde.pk])
+        self.assertEqual(self.client.get(url, {'pagado': 'quizas'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/historias_clinicas/historias/999999/pagos/').status_code, 404)
+
+
+# ============================================
+# PARÁMETROS DE FECHA
+# ============================================
+
+class FechasInvalidasPagosTests(TestCase):
 
-# Create your tests here.
+    def test_fecha_imposible_devuelve_400_con_el_parametro(self):
+        for url, param in (
+            ('/api/pagos/', 'fecha_desde'),
+            ('/api/pagos/ingresos/', 'fecha_hasta'),
+            ('/api/pagos/auditoria/', 'fecha_desde'),
+        ):
+            for valor in ('2025-02-30', '30/01/2025'):
+                with self.subTest(url=url, valor=valor):
+                    respuesta = self.client.get(url, {param: valor})
+                    self.assertEqual(respuesta.status_code, 400)
+                    self.assertIn(f"'{param}'", respuesta.json()['detail'])
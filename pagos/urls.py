@@ -2,17 +2,29 @@ from django.urls import path
 from .views import (
     PagosList, 
     PagosDetail, 
+    PagosMarcar,
+    IngresosPagos,
+    DeudoresPagos,
     TiposPagosList,
     AuditoriaPagosList,
-    AuditoriaPagosDetail
+    AuditoriaPagosDetail,
+    ExportarAuditoriaPagos,
 )
 
 urlpatterns = [
     path('', PagosList.as_view(), name='pagos-list'), 
     path('<int:pk>/', PagosDetail.as_view(), name='pagos-detail'),
+    # Marcar/desmarcar muchos pagos a la vez
+    path('marcar/', PagosMarcar.as_view(), name='pagos-marcar'),
     path('tipos-pagos/', TiposPagosList.as_view(), name='tipos-pagos-list'),
+    # Ingresos por día (precalculados)
+    path('ingresos/', IngresosPagos.as_view(), name='pagos-ingresos'),
+    # Pacientes con pagos impagos, por antigüedad de la deuda
+    path('deudores/', DeudoresPagos.as_view(), name='pagos-deudores'),
     
     # Auditoría
     path('auditoria/', AuditoriaPagosList.as_view(), name='auditoria-list'),
     path('auditoria/<int:pk>/', AuditoriaPagosDetail.as_view(), name='auditoria-detail'),
+    # Exportación CSV/XLSX (mismos filtros que el listado)
+    path('auditoria/exportar/', ExportarAuditoriaPagos.as_view(), name='auditoria-exportar'),
 ]
\ No newline at end of file
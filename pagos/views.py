@@ -5,25 +5,33 @@ from rest_framework.response import Response
 from rest_framework import generics, status
 from django.shortcuts import get_object_or_404
 
-from django.utils.dateparse import parse_date
 from datetime import datetime, time
+from decimal import Decimal
 from django.utils import timezone
 # --- IMPORTAR PAGINADOR ---
 from rest_framework.pagination import PageNumberPagination
-from .models import Pagos, TiposPagos, AuditoriaPagos
-from .serializers import PagosSerializer, TiposPagosSerializer, AuditoriaPagosSerializer
+from core.busqueda import buscar_texto, ORDEN_RELEVANCIA
+from core.catalogos import CatalogoCacheMixin
+from core.exportacion import FORMATOS, LOTE_FILAS, respuesta_exportacion
+from core.pagination import AuditoriaCursorPagination, iterar_por_clave
+from core.parametros import parametro_fecha
+from .models import Pagos, TiposPagos, AuditoriaPagos, IngresoDiario
+from .serializers import PagosSerializer, TiposPagosSerializer, AuditoriaPagosSerializer, MarcarPagosSerializer
+from .services import marcar_pagos, PAGOS_RELACIONES_AUDITORIA
+from .deudores import reporte_deudores
+from .filtros import inicio_dia, listar_pagos
 from rest_framework.permissions import IsAuthenticated
 
 
-# (PagosList, PagosDetail, TiposPagosList no cambian)
 # --- 1. Vistas CRUD para Pagos ---
 
 class PagosList(APIView):
-    # ... (código sin cambios) ...
     def get(self, request):
-        pagos = Pagos.objects.all().order_by('-id')
-        serializer = PagosSerializer(pagos, many=True)
-        return Response(serializer.data)
+        """
+        Lista de pagos con filtros opcionales:
+        GET /api/pagos/?hist_clin=3&pagado=true&tipo_pago=2&fecha_desde=2025-01-01&fecha_hasta=2025-01-31
+        """
+        return listar_pagos(request, Pagos.objects.all(), view=self)
     
     def post(self, request):
         serializer = PagosSerializer(data=request.data)
@@ -33,10 +41,30 @@ class PagosList(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     
+class PagosMarcar(APIView):
+    """
+    Marca (o desmarca) como pagados muchos pagos en una sola transacción
+    (ej. todas las cuotas de un plan).
+    POST /api/pagos/marcar/  {"pagos": [1, 2, 3], "pagado": true, "registrado_por": 5}
+    """
+
+    def post(self, request):
+        serializer = MarcarPagosSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        resultado = marcar_pagos(
+            serializer.validated_data['pagos'],
+            serializer.validated_data['pagado'],
+            usuario=serializer.validated_data.get('registrado_por'),
+        )
+        return Response(resultado, status=status.HTTP_200_OK)
+
+
 class PagosDetail(APIView):
-    # ... (código sin cambios) ...
     def get_object(self, pk):
-        return get_object_or_404(Pagos, pk=pk)
+        # Con los JOINs que usa la auditoría, guardar no hace consultas extra
+        return get_object_or_404(Pagos.objects.select_related(*PAGOS_RELACIONES_AUDITORIA), pk=pk)
 
     def get(self, request, pk):
         pago = self.get_object(pk)
@@ -65,9 +93,57 @@ class PagosDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class IngresosPagos(APIView):
+    """
+    Ingresos precalculados por día (pagos marcados como pagados) y sus
+    totales, para reportes por período sin recorrer los pagos.
+    GET /api/pagos/ingresos/?fecha_desde=2025-01-01&fecha_hasta=2025-12-31
+    """
+
+    def get(self, request):
+        ingresos = IngresoDiario.objects.all()
+        for param, lookup in (('fecha_desde', 'fecha__gte'), ('fecha_hasta', 'fecha__lte')):
+            fecha = parametro_fecha(request.query_params, param)
+            if fecha:
+                ingresos = ingresos.filter(**{lookup: fecha})
+
+        dias = list(ingresos.values('fecha', 'cantidad_pagos', 'monto'))
+        totales = {
+            'cantidad_pagos': sum(dia['cantidad_pagos'] for dia in dias),
+            'monto': sum((dia['monto'] for dia in dias), Decimal('0')),
+        }
+        return Response({'totales': totales, 'dias': dias})
+
+
+class DeudoresPagos(APIView):
+    """
+    Pacientes con pagos sin pagar, de la deuda más vieja a la más nueva,
+    con el resumen por tramo de antigüedad (0-30, 31-60, 61-90, +90 días).
+    GET /api/pagos/deudores/?paciente=5&odontologo=2&dias_min=30
+    """
+
+    def get(self, request):
+        filtros = {}
+        for param in ('paciente', 'odontologo', 'dias_min'):
+            valor = request.query_params.get(param)
+            if valor:
+                if not valor.isdigit():
+                    return Response(
+                        {"detail": f"El parámetro '{param}' debe ser un número entero."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                filtros[param] = int(valor)
+
+        return Response(reporte_deudores(
+            paciente_id=filtros.get('paciente'),
+            odontologo_id=filtros.get('odontologo'),
+            dias_min=filtros.get('dias_min'),
+        ))
+
+
 # --- 2. Vistas para Tablas Maestras (Opciones) ---
 
-class TiposPagosList(generics.ListAPIView):
+class TiposPagosList(CatalogoCacheMixin, generics.ListAPIView):
     queryset = TiposPagos.objects.all()
     serializer_class = TiposPagosSerializer
 
@@ -80,75 +156,78 @@ class AuditoriaPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 50
 
+
+def filtrar_auditoria_pagos(auditorias, params):
+    """
+    Filtros del listado de auditoría de pagos (hist_clin_id, paciente_dni,
+    accion, fecha_desde, fecha_hasta, buscar), compartidos con la
+    exportación. Ordena por (-fecha_accion, -id) o por relevancia si hay
+    búsqueda. Devuelve None si hist_clin_id no es numérico; una fecha
+    inválida responde 400 (ver parametro_fecha).
+    """
+    auditorias = auditorias.order_by('-fecha_accion', '-id')
+
+    hist_clin_id = params.get('hist_clin_id', None)
+    if hist_clin_id:
+        if not hist_clin_id.isdigit():
+            return None
+        auditorias = auditorias.filter(hist_clin_numero=int(hist_clin_id))
+    
+    paciente_dni = params.get('paciente_dni', None)
+    if paciente_dni:
+        auditorias = auditorias.filter(paciente_dni=paciente_dni)
+    
+    accion = params.get('accion', None)
+    if accion:
+        auditorias = auditorias.filter(accion=accion)
+
+    # Lógica manual de rangos para evitar usar __date en MySQL
+    date_obj = parametro_fecha(params, 'fecha_desde')
+    if date_obj:
+        # Desde el inicio del día (00:00:00)
+        auditorias = auditorias.filter(fecha_accion__gte=inicio_dia(date_obj))
+    
+    date_obj = parametro_fecha(params, 'fecha_hasta')
+    if date_obj:
+        # Hasta el final del día (23:59:59.999999)
+        end_dt = timezone.make_aware(datetime.combine(date_obj, time.max))
+        auditorias = auditorias.filter(fecha_accion__lte=end_dt)
+
+    # Búsqueda de texto (paciente, tipo de pago, observaciones), por relevancia
+    buscar = params.get('buscar', '').strip()
+    if buscar:
+        auditorias = buscar_texto(auditorias, buscar, AuditoriaPagos.CAMPOS_BUSQUEDA)
+    return auditorias
+
+
+FILTROS_AUDITORIA_INVALIDOS = "Filtros inválidos: 'hist_clin_id' debe ser un ID numérico."
+
+
 class AuditoriaPagosList(APIView):
     pagination_class = AuditoriaPagination
+    # Modo cursor: ?paginacion=cursor, total aproximado opcional con ?conteo=aprox
+    cursor_pagination_class = AuditoriaCursorPagination
 
     @property
     def paginator(self):
         if not hasattr(self, '_paginator'):
             if self.pagination_class is None:
                 self._paginator = None
+            elif self.cursor_pagination_class.solicitada(self.request):
+                # Con búsqueda, el cursor sigue el orden por relevancia
+                orden = ORDEN_RELEVANCIA if self.request.query_params.get('buscar') else None
+                self._paginator = self.cursor_pagination_class(orden)
             else:
                 self._paginator = self.pagination_class()
         return self._paginator
     
     def get(self, request):
-        auditorias = AuditoriaPagos.objects.all().select_related(
-            'usuario', 'hist_clin', 'pago'
-        ).order_by('-fecha_accion')
-        
-        # (Filtros hist_clin_id, paciente_dni, accion no cambian)
-        hist_clin_id = request.query_params.get('hist_clin_id', None)
-        if hist_clin_id:
-            auditorias = auditorias.filter(hist_clin_numero=hist_clin_id)
-        
-        paciente_dni = request.query_params.get('paciente_dni', None)
-        if paciente_dni:
-            auditorias = auditorias.filter(paciente_dni=paciente_dni)
-        
-        accion = request.query_params.get('accion', None)
-        if accion:
-            auditorias = auditorias.filter(accion=accion)
-        
-        # # --- CORRECCIÓN AQUÍ ---
-        # fecha_desde = request.query_params.get('fecha_desde', None)
-        # fecha_hasta = request.query_params.get('fecha_hasta', None)
-        
-        # if fecha_desde:
-        #     # gte (mayor o igual) ya funciona bien con 'date'
-        #     auditorias = auditorias.filter(fecha_accion__date__gte=fecha_desde)
-        
-        # if fecha_hasta:
-        #     # 👇 CAMBIO: Usar '__date__lte' en lugar de '__lte'
-        #     auditorias = auditorias.filter(fecha_accion__date__lte=fecha_hasta)
-
-        # 👇👇👇 --- CORRECCIÓN MYSQL AQUÍ --- 👇👇👇
-        
-        fecha_desde = request.query_params.get('fecha_desde', None)
-        fecha_hasta = request.query_params.get('fecha_hasta', None)
-        
-        # Lógica manual de rangos para evitar usar __date en MySQL
-        if fecha_desde:
-            date_obj = parse_date(fecha_desde)
-            if date_obj:
-                # Desde el inicio del día (00:00:00)
-                start_dt = datetime.combine(date_obj, time.min)
-                if timezone.is_naive(start_dt):
-                    start_dt = timezone.make_aware(start_dt)
-                
-                # Usamos __gte (mayor o igual al datetime completo)
-                auditorias = auditorias.filter(fecha_accion__gte=start_dt)
-        
-        if fecha_hasta:
-            date_obj = parse_date(fecha_hasta)
-            if date_obj:
-                # Hasta el final del día (23:59:59.999999)
-                end_dt = datetime.combine(date_obj, time.max)
-                if timezone.is_naive(end_dt):
-                    end_dt = timezone.make_aware(end_dt)
-                
-                # Usamos __lte (menor o igual al datetime completo)
-                auditorias = auditorias.filter(fecha_accion__lte=end_dt)
+        auditorias = filtrar_auditoria_pagos(
+            AuditoriaPagos.objects.all().select_related('usuario', 'hist_clin', 'pago'),
+            request.query_params,
+        )
+        if auditorias is None:
+            return Response({"detail": FILTROS_AUDITORIA_INVALIDOS}, status=status.HTTP_400_BAD_REQUEST)
         
         # (Lógica de paginación no cambia)
         if self.paginator:
@@ -165,4 +244,67 @@ class AuditoriaPagosDetail(APIView):
     def get(self, request, pk):
         auditoria = get_object_or_404(AuditoriaPagos, pk=pk)
         serializer = AuditoriaPagosSerializer(auditoria)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+# Columnas de la exportación: (encabezado, campo de .values())
+COLUMNAS_EXPORTACION_AUDITORIA = (
+    ('ID', 'id'),
+    ('Fecha de la acción', 'fecha_accion'),
+    ('Acción', 'accion'),
+    ('Usuario', 'usuario_nombre'),
+    ('Historia clínica', 'hist_clin_numero'),
+    ('Paciente', 'paciente_nombre'),
+    ('DNI', 'paciente_dni'),
+    ('Tipo de pago', 'tipo_pago_nombre'),
+    ('Pagado', 'estado_pagado'),
+    ('Fecha de pago', 'fecha_pago'),
+    ('Observaciones', 'observaciones'),
+)
+
+
+class ExportarAuditoriaPagos(APIView):
+    """
+    Exporta la auditoría de pagos a CSV o XLSX con los mismos filtros que
+    el listado, sin paginar. Se envía en streaming: las filas se leen por
+    lotes (iterar_por_clave) y la memoria no depende del período.
+    GET /api/pagos/auditoria/exportar/?formato=xlsx&fecha_desde=2025-01-01&fecha_hasta=2025-12-31
+    """
+
+    def get(self, request):
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            return Response(
+                {"detail": "El parámetro 'formato' debe ser 'csv' o 'xlsx'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        auditorias = filtrar_auditoria_pagos(AuditoriaPagos.objects.all(), request.query_params)
+        if auditorias is None:
+            return Response({"detail": FILTROS_AUDITORIA_INVALIDOS}, status=status.HTTP_400_BAD_REQUEST)
+        campos = [campo for _, campo in COLUMNAS_EXPORTACION_AUDITORIA if campo != 'usuario_nombre']
+        orden = ('-fecha_accion', '-id')
+        if request.query_params.get('buscar', '').strip():
+            # El orden por relevancia necesita el rango en cada fila
+            campos.append('rango')
+            orden = ORDEN_RELEVANCIA
+        auditorias = auditorias.values(*campos, 'usuario__nombre', 'usuario__apellido')
+
+        acciones = dict(AuditoriaPagos.ACCIONES)
+
+        def filas():
+            for auditoria in iterar_por_clave(auditorias, orden, LOTE_FILAS):
+                auditoria['accion'] = acciones.get(auditoria['accion'], auditoria['accion'])
+                auditoria['usuario_nombre'] = (
+                    f"{auditoria['usuario__nombre']} {auditoria['usuario__apellido']}"
+                    if auditoria['usuario__nombre'] is not None else 'N/A'
+                )
+                yield [auditoria[campo] for _, campo in COLUMNAS_EXPORTACION_AUDITORIA]
+
+        return respuesta_exportacion(
+            formato,
+            [encabezado for encabezado, _ in COLUMNAS_EXPORTACION_AUDITORIA],
+            filas(),
+            f'auditoria-pagos-{timezone.localdate():%Y%m%d}',
+            hoja='Auditoría de pagos',
+        )
@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import Personal
+from core.catalogos import invalidar_catalogo
+from .models import Personal, Puestos, Especialidades
 
 @receiver(pre_save, sender=Personal)
 def sincronizar_estado_activo(sender, instance, **kwargs):
@@ -28,3 +29,12 @@ def sincronizar_email(sender, instance, **kwargs):
         # Sincronizar el estado: activo del Personal -> is_active del User
         instance.user.email = instance.email
         instance.user.save()
+
+
+@receiver(post_save, sender=Puestos)
+@receiver(post_delete, sender=Puestos)
+@receiver(post_save, sender=Especialidades)
+@receiver(post_delete, sender=Especialidades)
+def invalidar_catalogos_personal(sender, **kwargs):
+    """Cambia el ETag de los listados de puestos y especialidades."""
+    invalidar_catalogo(sender)
@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from .models import Personal
 from .serializers import Personal1Serializer
 from rest_framework import generics, status
+from core.catalogos import CatalogoCacheMixin
 from .models import Puestos, Especialidades
 from .serializers import PuestosSerializer, EspecialidadesSerializer, PasswordResetRequestSerializer, PasswordResetConfirmSerializer
 
@@ -53,11 +54,11 @@ class PersonalDetail(APIView):
         personal.delete()
         return Response(status=204)
     
-class PuestosList(generics.ListAPIView):
+class PuestosList(CatalogoCacheMixin, generics.ListAPIView):
     queryset = Puestos.objects.all()
     serializer_class = PuestosSerializer
 
-class EspecialidadesList(generics.ListAPIView):
+class EspecialidadesList(CatalogoCacheMixin, generics.ListAPIView):
     queryset = Especialidades.objects.all()
     serializer_class = EspecialidadesSerializer
 
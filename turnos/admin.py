@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Turnos, EstadosTurnos, HorarioFijo, DiaSemana, AuditoriaTurnos
+from django.db.models import Q
+
+from core.busqueda import condicion_y_rango
+from .models import Turnos, EstadosTurnos, HorarioFijo, DiaSemana, AuditoriaTurnos, ResumenAgendaDiaria, ListaEspera, OfertaTurno
 
 # Register your models here.
 
@@ -7,6 +10,19 @@ class TurnosAdmin(admin.ModelAdmin):
     list_display = ('odontologo', 'paciente', 'fecha_turno', 'horario_turno', 'estado_turno')
     search_fields = ('odontologo', 'paciente', 'fecha_turno')
 
+class ResumenAgendaDiariaAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'odontologo', 'total_turnos', 'ocupados', 'libres')
+    list_filter = ('odontologo',)
+    date_hierarchy = 'fecha'
+
+class ListaEsperaAdmin(admin.ModelAdmin):
+    list_display = ('paciente', 'odontologo', 'fecha_desde', 'fecha_hasta', 'prioridad', 'estado', 'creado')
+    list_filter = ('estado', 'odontologo')
+
+class OfertaTurnoAdmin(admin.ModelAdmin):
+    list_display = ('lista_espera', 'odontologo', 'fecha_turno', 'horario_turno', 'estado', 'vence')
+    list_filter = ('estado',)
+
 class AuditoriaTurnosAdmin(admin.ModelAdmin):
     list_display = (
         'id',
@@ -78,10 +94,25 @@ class AuditoriaTurnosAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         return False
 
+    def get_search_results(self, request, queryset, search_term):
+        # Texto con los índices de core.busqueda (no icontains sobre toda la
+        # tabla); DNI y número de turno por igualdad
+        texto = search_term.strip()
+        if not texto:
+            return queryset, False
+        condicion, _ = condicion_y_rango(self.model, texto, AuditoriaTurnos.CAMPOS_BUSQUEDA, using=queryset.db)
+        exactos = Q(paciente_dni=texto)
+        if texto.isdigit():
+            exactos |= Q(turno_numero=int(texto))
+        return queryset.filter(Q(condicion) | exactos), False
+
 
 
 admin.site.register(Turnos, TurnosAdmin)
 admin.site.register(EstadosTurnos)
 admin.site.register(HorarioFijo)
 admin.site.register(DiaSemana)
-admin.site.register(AuditoriaTurnos, AuditoriaTurnosAdmin)
\ No newline at end of file
+admin.site.register(AuditoriaTurnos, AuditoriaTurnosAdmin)
+admin.site.register(ResumenAgendaDiaria, ResumenAgendaDiariaAdmin)
+admin.site.register(ListaEspera, ListaEsperaAdmin)
+admin.site.register(OfertaTurno, OfertaTurnoAdmin)
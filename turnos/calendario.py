@@ -0,0 +1,122 @@
+"""
+Generación del feed iCalendar (.ics) con la agenda de un odontólogo.
+
+El feed se arma como un generador de líneas: los turnos se leen con
+.values() en lotes de CHUNK_SIZE (por clave, ver iterar_por_clave) y se van
+enviando a medida que salen de la base, así que nunca se carga la tabla
+completa en memoria.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+
+from core.pagination import iterar_por_clave
+from .models import Turnos
+
+# Los turnos no tienen duración propia: se asume la de un horario fijo
+DURACION_TURNO = timedelta(minutes=30)
+CHUNK_SIZE = 500
+PRODID = '-//Consultorio Manjon//Agenda de Turnos//ES'
+
+
+def escapar(texto):
+    """Escapa un valor TEXT según RFC 5545."""
+    return (
+        str(texto)
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def plegar(linea):
+    """Corta las líneas de más de 75 octetos (continuación con un espacio)."""
+    datos = linea.encode('utf-8')
+    if len(datos) <= 75:
+        return linea + '\r\n'
+    partes = []
+    while datos:
+        limite = 75 if not partes else 74
+        corte = min(limite, len(datos))
+        # No cortar en medio de un carácter multibyte
+        while corte < len(datos) and (datos[corte] & 0xC0) == 0x80:
+            corte -= 1
+        partes.append(datos[:corte].decode('utf-8'))
+        datos = datos[corte:]
+    return '\r\n '.join(partes) + '\r\n'
+
+
+def formato_utc(momento):
+    return momento.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def turnos_agenda(odontologo_id, desde=None):
+    """Turnos del odontólogo desde 'desde' (hoy por defecto), como dicts."""
+    desde = desde or timezone.localdate()
+    return (
+        Turnos.objects.filter(odontologo_id=odontologo_id, fecha_turno__gte=desde)
+        .annotate(hora_orden=Coalesce('horario_turno__hora', Value(time.min)))
+        .values(
+            'id',
+            'fecha_turno',
+            'motivo',
+            'hora_orden',
+            hora=F('horario_turno__hora'),
+            estado=F('estado_turno__nombre_est_tur'),
+            paciente_nombre=Concat('paciente__nombre', Value(' '), 'paciente__apellido'),
+        )
+    )
+
+
+def evento_turno(turno, dtstamp):
+    """Líneas VEVENT de un turno."""
+    lineas = [
+        'BEGIN:VEVENT',
+        f"UID:turno-{turno['id']}@consultorio",
+        f'DTSTAMP:{dtstamp}',
+    ]
+    if turno['hora']:
+        inicio = timezone.make_aware(datetime.combine(turno['fecha_turno'], turno['hora']))
+        lineas.append(f'DTSTART:{formato_utc(inicio)}')
+        lineas.append(f'DTEND:{formato_utc(inicio + DURACION_TURNO)}')
+    else:
+        # Turno sin horario asignado: evento de día completo
+        lineas.append(f"DTSTART;VALUE=DATE:{turno['fecha_turno'].strftime('%Y%m%d')}")
+
+    lineas.append(f"SUMMARY:{escapar('Turno: ' + turno['paciente_nombre'])}")
+    descripcion = f"Estado: {turno['estado']}"
+    if turno['motivo']:
+        descripcion += f"\nMotivo: {turno['motivo']}"
+    lineas.append(f'DESCRIPTION:{escapar(descripcion)}')
+    if turno['estado'] == 'Cancelado':
+        lineas.append('STATUS:CANCELLED')
+    else:
+        lineas.append('STATUS:CONFIRMED')
+    lineas.append('END:VEVENT')
+    return lineas
+
+
+def generar_ics(odontologo_id, nombre_calendario, modificado):
+    """Generador de texto del calendario completo, línea por línea."""
+    dtstamp = formato_utc(modificado or timezone.now())
+    for linea in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escapar(nombre_calendario)}',
+    ):
+        yield plegar(linea)
+
+    turnos = iterar_por_clave(
+        turnos_agenda(odontologo_id), ('fecha_turno', 'hora_orden', 'id'), CHUNK_SIZE
+    )
+    for turno in turnos:
+        yield ''.join(plegar(linea) for linea in evento_turno(turno, dtstamp))
+
+    yield plegar('END:VCALENDAR')
@@ -0,0 +1,356 @@
+"""
+Cálculo de horarios libres (disponibilidad) de los odontólogos.
+
+Los horarios ocupados se obtienen con UNA sola consulta sobre
+Turnos(odontologo, fecha_turno, horario_turno), que está cubierta por el
+índice único que genera el unique_together del modelo.
+
+Además se mantiene un índice en memoria (por proceso) con un bitmap por
+(odontólogo, día): el bit N indica si el N-ésimo HorarioFijo (ordenado por
+hora) está ocupado. Los signals de turnos lo parchean en cada alta, cambio
+o baja, así que preguntar "¿está libre este horario?" cuesta un acceso a
+diccionario y un test de bit.
+"""
+import heapq
+import threading
+import time as time_module
+from collections import OrderedDict
+from datetime import timedelta
+from itertools import islice
+
+from django.utils import timezone
+
+from personal.models import Personal
+from .models import Turnos, HorarioFijo, DiaSemana
+
+# Límite de días por consulta para que la respuesta no crezca sin control
+MAX_DIAS_RANGO = 62
+# Horizonte de búsqueda del "primer turno disponible"
+MAX_DIAS_BUSQUEDA = 180
+# Días que se cargan juntos en el índice al avanzar la búsqueda
+BLOQUE_DIAS_BUSQUEDA = 7
+# Mismo criterio que usa el frontend (TurnosList.jsx) para listar odontólogos
+PUESTOS_ODONTOLOGO = ('Odontólogo/a', 'Admin')
+
+
+def dias_habiles():
+    """
+    Devuelve los números de día (0 = Lunes) cargados en DiaSemana.
+    Si la tabla está vacía se consideran todos los días.
+    """
+    return set(DiaSemana.objects.values_list('numero_dia', flat=True))
+
+
+def iterar_fechas(fecha_desde, fecha_hasta, dias=None):
+    """Genera las fechas del rango (inclusive), filtrando por días hábiles."""
+    fecha = fecha_desde
+    while fecha <= fecha_hasta:
+        if not dias or fecha.weekday() in dias:
+            yield fecha
+        fecha += timedelta(days=1)
+
+
+def horarios_ocupados(odontologo_ids, fecha_desde, fecha_hasta, excluir_turno=None):
+    """
+    Devuelve un dict {(odontologo_id, fecha): {horario_id, ...}} con los
+    horarios tomados en el rango, resuelto en una sola consulta.
+    """
+    turnos = Turnos.objects.filter(
+        odontologo_id__in=odontologo_ids,
+        fecha_turno__range=(fecha_desde, fecha_hasta),
+        horario_turno__isnull=False,
+    )
+    if excluir_turno:
+        turnos = turnos.exclude(pk=excluir_turno)
+
+    ocupados = {}
+    for odontologo_id, fecha, horario_id in turnos.values_list(
+        'odontologo_id', 'fecha_turno', 'horario_turno_id'
+    ):
+        ocupados.setdefault((odontologo_id, fecha), set()).add(horario_id)
+    return ocupados
+
+
+# ============================================
+# ÍNDICE DE DISPONIBILIDAD EN MEMORIA
+# ============================================
+
+class IndiceDisponibilidad:
+    """
+    Cache local al proceso con un bitmap por (odontólogo, fecha).
+
+    - Las entradas se cargan por rangos con una sola consulta.
+    - Los signals de Turnos las parchean (marcar/liberar) tras el commit.
+    - Un cambio en HorarioFijo reordena los bits, así que invalida todo.
+    - Cada entrada vence a los TTL_SEGUNDOS, para acotar lo desactualizado
+      que puede quedar un proceso cuando otro (otro worker) modifica turnos.
+    """
+
+    TTL_SEGUNDOS = 60
+    MAX_ENTRADAS = 20000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._horarios = None      # [(id, hora), ...] ordenados por hora
+        self._posiciones = None    # {horario_id: bit}
+        self._mapas = OrderedDict()  # {(odontologo_id, fecha): (bitmap, vence)}
+        self._version = 0          # cambia en cada invalidación total
+
+    # --- Horarios (define el orden de los bits) ---
+
+    def _leer_horarios(self):
+        return list(HorarioFijo.objects.order_by('hora').values_list('id', 'hora'))
+
+    def _estado(self):
+        """
+        (horarios, posiciones, version) de una misma carga, leídos juntos.
+        La consulta a la base se hace fuera del lock (los lectores no
+        esperan a la base); si se invalidó mientras tanto, se vuelve a leer.
+        """
+        while True:
+            with self._lock:
+                if self._horarios is not None:
+                    return self._horarios, self._posiciones, self._version
+                version = self._version
+            horarios = self._leer_horarios()
+            posiciones = {horario_id: bit for bit, (horario_id, _) in enumerate(horarios)}
+            with self._lock:
+                if self._version != version:
+                    continue
+                if self._horarios is None:
+                    self._horarios, self._posiciones = horarios, posiciones
+                return self._horarios, self._posiciones, self._version
+
+    def horarios(self):
+        return self._estado()[0]
+
+    def bit(self, horario_id):
+        """Posición del horario en los bitmaps (None si no existe)."""
+        return self._estado()[1].get(horario_id)
+
+    # --- Lectura ---
+
+    def cargar(self, odontologo_ids, fecha_desde, fecha_hasta):
+        """
+        Asegura que estén en cache todos los (odontólogo, día) del rango.
+        Si falta alguno, se recarga el rango completo en una sola consulta.
+        """
+        _, posiciones, version = self._estado()
+        ahora = time_module.monotonic()
+        claves = [
+            (odontologo_id, fecha)
+            for odontologo_id in odontologo_ids
+            for fecha in iterar_fechas(fecha_desde, fecha_hasta)
+        ]
+        with self._lock:
+            faltantes = [
+                clave for clave in claves
+                if clave not in self._mapas or self._mapas[clave][1] < ahora
+            ]
+        if not faltantes:
+            return
+
+        ocupados = horarios_ocupados(odontologo_ids, fecha_desde, fecha_hasta)
+        vence = ahora + self.TTL_SEGUNDOS
+        with self._lock:
+            if version != self._version:
+                # Se invalidó todo mientras consultábamos: no guardar bits viejos
+                return
+            for clave in claves:
+                bitmap = 0
+                for horario_id in ocupados.get(clave, ()):
+                    bit = posiciones.get(horario_id)
+                    if bit is not None:
+                        bitmap |= 1 << bit
+                self._mapas[clave] = (bitmap, vence)
+                self._mapas.move_to_end(clave)
+            while len(self._mapas) > self.MAX_ENTRADAS:
+                self._mapas.popitem(last=False)
+
+    def bitmap(self, odontologo_id, fecha):
+        """Bitmap de horarios ocupados del odontólogo en esa fecha."""
+        with self._lock:
+            entrada = self._mapas.get((odontologo_id, fecha))
+            if entrada and entrada[1] >= time_module.monotonic():
+                return entrada[0]
+        self.cargar([odontologo_id], fecha, fecha)
+        with self._lock:
+            entrada = self._mapas.get((odontologo_id, fecha))
+        if entrada is None:
+            # Invalidado durante la carga: se responde directo desde la base
+            ocupados = horarios_ocupados([odontologo_id], fecha, fecha)
+            bitmap = 0
+            for horario_id in ocupados.get((odontologo_id, fecha), ()):
+                bit = self.bit(horario_id)
+                if bit is not None:
+                    bitmap |= 1 << bit
+            return bitmap
+        return entrada[0]
+
+    def esta_libre(self, odontologo_id, fecha, horario_id):
+        """True si el horario existe y no está tomado por ningún turno."""
+        bit = self.bit(horario_id)
+        if bit is None:
+            return False
+        return not (self.bitmap(odontologo_id, fecha) >> bit) & 1
+
+    def horarios_libres(self, odontologo_id, fecha, liberar=0):
+        """
+        Lista [(id, hora), ...] de horarios libres según el bitmap.
+        'liberar' es una máscara de bits que se consideran libres igual.
+        """
+        bitmap = self.bitmap(odontologo_id, fecha) & ~liberar
+        return [
+            (horario_id, hora)
+            for bit, (horario_id, hora) in enumerate(self.horarios())
+            if not (bitmap >> bit) & 1
+        ]
+
+    # --- Escritura (la usan los signals) ---
+
+    def marcar(self, odontologo_id, fecha, horario_id, ocupado=True):
+        """
+        Parchea un bit si la entrada está en cache. Si no está, no hace nada:
+        se cargará desde la base la próxima vez que se consulte.
+        """
+        if odontologo_id is None or fecha is None or horario_id is None:
+            return
+        bit = self.bit(horario_id)
+        clave = (odontologo_id, fecha)
+        with self._lock:
+            entrada = self._mapas.get(clave)
+            if entrada is None:
+                return
+            if bit is None:
+                # Horario desconocido para este proceso: mejor recargar
+                del self._mapas[clave]
+                return
+            bitmap, vence = entrada
+            if ocupado:
+                bitmap |= 1 << bit
+            else:
+                bitmap &= ~(1 << bit)
+            self._mapas[clave] = (bitmap, vence)
+
+    def invalidar(self, odontologo_id=None, fecha=None):
+        """Descarta una entrada puntual o, sin argumentos, todo el índice."""
+        with self._lock:
+            if odontologo_id is None:
+                self._mapas.clear()
+                self._horarios = None
+                self._posiciones = None
+                self._version += 1
+            else:
+                self._mapas.pop((odontologo_id, fecha), None)
+
+
+indice_disponibilidad = IndiceDisponibilidad()
+
+
+def calcular_disponibilidad(odontologo_ids, fecha_desde, fecha_hasta, excluir_turno=None):
+    """
+    Arma la disponibilidad por odontólogo y por día a partir del índice.
+    Las fechas pasadas no tienen horarios libres y, para hoy, solo se
+    devuelven los horarios posteriores a la hora actual.
+    """
+    indice = indice_disponibilidad
+    dias = dias_habiles()
+    indice.cargar(odontologo_ids, fecha_desde, fecha_hasta)
+
+    # El turno que se está editando no ocupa su propio horario
+    liberado = None
+    if excluir_turno:
+        liberado = Turnos.objects.filter(pk=excluir_turno).values_list(
+            'odontologo_id', 'fecha_turno', 'horario_turno_id'
+        ).first()
+
+    ahora = timezone.localtime()
+    hoy = ahora.date()
+
+    resultado = []
+    for odontologo_id in odontologo_ids:
+        dias_odontologo = []
+        for fecha in iterar_fechas(fecha_desde, fecha_hasta, dias):
+            if fecha < hoy:
+                libres = []
+            else:
+                mascara = 0
+                if liberado and liberado[:2] == (odontologo_id, fecha):
+                    bit = indice.bit(liberado[2])
+                    mascara = (1 << bit) if bit is not None else 0
+                libres = [
+                    {'id': horario_id, 'hora': hora.isoformat()}
+                    for horario_id, hora in indice.horarios_libres(odontologo_id, fecha, mascara)
+                    if fecha > hoy or hora > ahora.time()
+                ]
+            dias_odontologo.append({
+                'fecha': fecha.isoformat(),
+                'horarios_libres': libres,
+            })
+        resultado.append({
+            'odontologo': odontologo_id,
+            'dias': dias_odontologo,
+        })
+    return resultado
+
+
+
+# ============================================
+# PRIMER TURNO DISPONIBLE
+# ============================================
+
+def odontologos_activos(especialidad=None):
+    """IDs de los odontólogos activos, opcionalmente de una especialidad."""
+    personal = Personal.objects.filter(activo=True, puesto__nombre_puesto__in=PUESTOS_ODONTOLOGO)
+    if especialidad:
+        personal = personal.filter(especialidades=especialidad)
+    return list(personal.order_by('id').values_list('id', flat=True).distinct())
+
+
+def _iterar_libres(odontologo_id, fecha_desde, fecha_hasta, dias, ahora):
+    """
+    Genera (fecha, hora, odontologo_id, horario_id) libres del odontólogo en
+    orden cronológico. El índice se carga de a bloques a medida que se
+    avanza, así que solo se consultan los días que realmente se recorren.
+    """
+    indice = indice_disponibilidad
+    inicio = fecha_desde
+    while inicio <= fecha_hasta:
+        fin = min(inicio + timedelta(days=BLOQUE_DIAS_BUSQUEDA - 1), fecha_hasta)
+        indice.cargar([odontologo_id], inicio, fin)
+        for fecha in iterar_fechas(inicio, fin, dias):
+            for horario_id, hora in indice.horarios_libres(odontologo_id, fecha):
+                if fecha == ahora.date() and hora <= ahora.time():
+                    continue
+                yield fecha, hora, odontologo_id, horario_id
+        inicio = fin + timedelta(days=1)
+
+
+def primeros_horarios_libres(odontologo_ids, cantidad, fecha_desde=None, dias_max=MAX_DIAS_BUSQUEDA):
+    """
+    Los 'cantidad' horarios libres más próximos entre todos los odontólogos,
+    como tuplas (fecha, hora, odontologo_id, horario_id).
+
+    Cada odontólogo aporta un generador ya ordenado y heapq.merge los
+    intercala tomando siempre el menor: se recorre día por día solo lo
+    necesario para juntar 'cantidad' resultados, sin armar la grilla
+    completa días x horarios x odontólogos. A igual fecha y hora desempata
+    el ID del odontólogo.
+    """
+    ahora = timezone.localtime()
+    fecha_desde = max(fecha_desde or ahora.date(), ahora.date())
+    fecha_hasta = fecha_desde + timedelta(days=dias_max - 1)
+    if not odontologo_ids or cantidad <= 0:
+        return []
+
+    dias = dias_habiles()
+    # El primer bloque de todos en una sola consulta (casi siempre alcanza)
+    indice_disponibilidad.cargar(
+        odontologo_ids, fecha_desde,
+        min(fecha_desde + timedelta(days=BLOQUE_DIAS_BUSQUEDA - 1), fecha_hasta),
+    )
+    iteradores = [
+        _iterar_libres(odontologo_id, fecha_desde, fecha_hasta, dias, ahora)
+        for odontologo_id in odontologo_ids
+    ]
+    return list(islice(heapq.merge(*iteradores), cantidad))
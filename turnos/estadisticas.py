@@ -0,0 +1,115 @@
+"""
+Estadísticas de turnos agregadas en la base (para GraficosTurnos).
+
+Una sola consulta agrupa por (estado, odontólogo, día de la semana,
+horario) con Count(); los cuatro desgloses se arman sumando esas pocas
+filas. El resultado se cachea por (período, filtros) con un TTL corto y
+una versión que los signals incrementan ante cualquier cambio en Turnos.
+"""
+import time
+
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db.models import Count, Value
+from django.db.models.functions import Concat, ExtractIsoWeekDay
+from django.utils import timezone
+
+from .models import Turnos, DiaSemana
+
+# Mismos períodos que getStartDate() en GraficosTurnos.jsx
+PERIODOS = {
+    'last_week': relativedelta(days=7),
+    'last_month': relativedelta(months=1),
+    'last_year': relativedelta(years=1),
+    'all': None,
+}
+
+CACHE_TTL = 60
+CACHE_VERSION_KEY = 'turnos:estadisticas:version'
+
+NOMBRES_DIAS = {**dict(DiaSemana.DIAS), 5: 'Sábado', 6: 'Domingo'}
+
+
+def fecha_inicio_periodo(periodo, hoy=None):
+    """Primer día incluido en el período (None = sin límite)."""
+    delta = PERIODOS[periodo]
+    if delta is None:
+        return None
+    return (hoy or timezone.localdate()) - delta
+
+
+def calcular_estadisticas(periodo, estado=None, odontologo=None):
+    turnos = Turnos.objects.all()
+    desde = fecha_inicio_periodo(periodo)
+    if desde:
+        turnos = turnos.filter(fecha_turno__gte=desde)
+    if estado:
+        turnos = turnos.filter(estado_turno_id=estado)
+    if odontologo:
+        turnos = turnos.filter(odontologo_id=odontologo)
+
+    grupos = (
+        turnos.order_by()
+        .values(
+            'estado_turno_id',
+            'estado_turno__nombre_est_tur',
+            'odontologo_id',
+            'horario_turno_id',
+            'horario_turno__hora',
+            odontologo_nombre=Concat('odontologo__nombre', Value(' '), 'odontologo__apellido'),
+            dia_iso=ExtractIsoWeekDay('fecha_turno'),
+        )
+        .annotate(cantidad=Count('id'))
+    )
+
+    por_estado, por_odontologo, por_dia, por_horario = {}, {}, {}, {}
+
+    def sumar(destino, clave, cantidad, **datos):
+        if clave not in destino:
+            destino[clave] = dict(datos, cantidad=0)
+        destino[clave]['cantidad'] += cantidad
+
+    total = 0
+    for grupo in grupos:
+        cantidad = grupo['cantidad']
+        total += cantidad
+        sumar(por_estado, grupo['estado_turno_id'], cantidad,
+              estado=grupo['estado_turno_id'], nombre=grupo['estado_turno__nombre_est_tur'])
+        sumar(por_odontologo, grupo['odontologo_id'], cantidad,
+              odontologo=grupo['odontologo_id'], nombre=grupo['odontologo_nombre'])
+        numero_dia = grupo['dia_iso'] - 1  # ISO: 1 = Lunes; DiaSemana: 0 = Lunes
+        sumar(por_dia, numero_dia, cantidad, numero_dia=numero_dia, nombre=NOMBRES_DIAS[numero_dia])
+        hora = grupo['horario_turno__hora']
+        sumar(por_horario, grupo['horario_turno_id'], cantidad,
+              horario_turno=grupo['horario_turno_id'], hora=hora.strftime('%H:%M') if hora else None)
+
+    return {
+        'periodo': periodo,
+        'fecha_desde': desde,
+        'total': total,
+        'por_estado': sorted(por_estado.values(), key=lambda g: g['estado']),
+        'por_odontologo': sorted(por_odontologo.values(), key=lambda g: -g['cantidad']),
+        'por_dia_semana': sorted(por_dia.values(), key=lambda g: g['numero_dia']),
+        # Los turnos sin horario van al final
+        'por_horario': sorted(por_horario.values(), key=lambda g: (g['hora'] is None, g['hora'] or '')),
+    }
+
+
+def obtener_estadisticas(periodo, estado=None, odontologo=None):
+    """calcular_estadisticas() con cache por (versión, día, período, filtros)."""
+    version = cache.get_or_set(CACHE_VERSION_KEY, time.time_ns, None)
+    clave = f'turnos:estadisticas:{version}:{timezone.localdate()}:{periodo}:{estado or ""}:{odontologo or ""}'
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular_estadisticas(periodo, estado=estado, odontologo=odontologo)
+        cache.set(clave, datos, CACHE_TTL)
+    return datos
+
+
+def invalidar_estadisticas():
+    """Cambia la versión: las entradas viejas quedan huérfanas y vencen por TTL."""
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        # La clave se perdió (reinicio o desalojo): una versión nueva y única
+        cache.set(CACHE_VERSION_KEY, time.time_ns(), None)
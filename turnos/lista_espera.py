@@ -0,0 +1,162 @@
+"""
+Motor de la lista de espera: cuando se libera un horario (se elimina un
+turno) se busca al paciente que mejor encaja y se le genera una oferta.
+
+Cada entrada ESPERANDO se "expande" en filas de VentanaEspera, una por día
+aceptable, con su franja horaria. Así, para un horario liberado
+(odontólogo, fecha, hora) los candidatos salen de una búsqueda por
+igualdad en el índice (fecha, odontologo, -prioridad, creado): el costo
+depende de cuántos esperan ESE día, no del tamaño total de la lista.
+
+Reglas:
+- Gana la mayor prioridad y, a igual prioridad, la entrada más antigua.
+- Una entrada solo tiene una oferta pendiente a la vez: al ofrecerle un
+  horario sale del índice, y vuelve si rechaza o la oferta vence.
+- A quien ya se le ofreció ese mismo horario no se le vuelve a ofrecer.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .disponibilidad import iterar_fechas, indice_disponibilidad
+from .models import Turnos, ListaEspera, VentanaEspera, OfertaTurno
+
+# Ventana máxima de una entrada (acota las filas del índice)
+MAX_DIAS_ESPERA = 92
+# Tiempo que tiene el paciente para confirmar una oferta
+HORAS_OFERTA = 24
+
+
+def generar_ventanas(entrada):
+    """
+    Regenera las filas del índice de una entrada (se llama al crearla o
+    modificarla). Si ya no está ESPERANDO, solo se borran.
+    """
+    VentanaEspera.objects.filter(lista_espera=entrada).delete()
+    if entrada.estado != 'ESPERANDO':
+        return 0
+
+    desde = max(entrada.fecha_desde, timezone.localdate())
+    dias = set(entrada.dias_semana or ())
+    ventanas = [
+        VentanaEspera(
+            lista_espera=entrada,
+            fecha=fecha,
+            odontologo_id=entrada.odontologo_id,
+            hora_desde=entrada.hora_desde or time.min,
+            hora_hasta=entrada.hora_hasta or time.max,
+            prioridad=entrada.prioridad,
+            creado=entrada.creado,
+        )
+        for fecha in iterar_fechas(desde, entrada.fecha_hasta, dias)
+    ]
+    VentanaEspera.objects.bulk_create(ventanas)
+    return len(ventanas)
+
+
+def volver_a_esperar(entrada_id):
+    """La entrada vuelve a la lista (rechazó o no confirmó una oferta)."""
+    ListaEspera.objects.filter(pk=entrada_id, estado='OFRECIDO').update(estado='ESPERANDO')
+    generar_ventanas(ListaEspera.objects.get(pk=entrada_id))
+
+
+def candidato(odontologo_id, fecha, hora, excluir=None):
+    """
+    ID de la entrada que mejor encaja en el horario (o None).
+
+    Se hacen dos búsquedas por igualdad, una para "este odontólogo" y otra
+    para "cualquiera" (un OR entre ambas haría que la base use solo la
+    fecha del índice y recorra todo el día). Cada una recorre el índice
+    ya ordenado por prioridad y corta en la primera fila cuya franja
+    incluye la hora.
+    """
+    mejores = []
+    for odontologo in (Q(odontologo_id=odontologo_id), Q(odontologo__isnull=True)):
+        ventanas = VentanaEspera.objects.filter(
+            odontologo, fecha=fecha, hora_desde__lte=hora, hora_hasta__gte=hora
+        )
+        if excluir is not None:
+            ventanas = ventanas.exclude(lista_espera_id__in=excluir)
+        fila = (
+            ventanas.order_by('-prioridad', 'creado', 'lista_espera_id')
+            .values_list('prioridad', 'creado', 'lista_espera_id')
+            .first()
+        )
+        if fila:
+            mejores.append(fila)
+    if not mejores:
+        return None
+    return min(mejores, key=lambda fila: (-fila[0], fila[1], fila[2]))[2]
+
+
+def ofrecer_horario(odontologo_id, fecha, horario_id):
+    """
+    Genera la oferta para un horario liberado (o None si nadie lo espera).
+    Corre dentro de la transacción que liberó el horario: si esa se
+    revierte, la oferta tampoco existe.
+    """
+    if odontologo_id is None or fecha is None or horario_id is None:
+        return None
+    hora = dict(indice_disponibilidad.horarios()).get(horario_id)
+    if hora is None:
+        return None
+    ahora = timezone.localtime()
+    if fecha < ahora.date() or (fecha == ahora.date() and hora <= ahora.time()):
+        return None
+
+    ofertas_horario = OfertaTurno.objects.filter(
+        odontologo_id=odontologo_id, fecha_turno=fecha, horario_turno_id=horario_id
+    )
+    with transaction.atomic():
+        pendiente = ofertas_horario.filter(estado='PENDIENTE', vence__gt=timezone.now()).first()
+        if pendiente is not None:
+            return pendiente
+
+        ya_ofrecidas = ofertas_horario.values('lista_espera_id')
+        while True:
+            entrada_id = candidato(odontologo_id, fecha, hora, excluir=ya_ofrecidas)
+            if entrada_id is None:
+                return None
+            # UPDATE condicional: si otra transacción ya tomó la entrada, no
+            # se actualiza ninguna fila y se pasa al siguiente candidato
+            tomada = ListaEspera.objects.filter(pk=entrada_id, estado='ESPERANDO').update(estado='OFRECIDO')
+            VentanaEspera.objects.filter(lista_espera_id=entrada_id).delete()
+            if tomada:
+                return OfertaTurno.objects.create(
+                    lista_espera_id=entrada_id,
+                    odontologo_id=odontologo_id,
+                    fecha_turno=fecha,
+                    horario_turno_id=horario_id,
+                    vence=min(
+                        timezone.now() + timedelta(hours=HORAS_OFERTA),
+                        timezone.make_aware(datetime.combine(fecha, hora)),
+                    ),
+                )
+
+
+def vencer_ofertas(ahora=None):
+    """
+    Marca como VENCIDAS las ofertas pendientes cuyo plazo pasó, devuelve
+    sus entradas a la lista y ofrece cada horario (si sigue libre) al
+    siguiente candidato. También borra las ventanas de días ya pasados.
+    Devuelve (vencidas, reofrecidas).
+    """
+    ahora = ahora or timezone.now()
+    VentanaEspera.objects.filter(fecha__lt=timezone.localdate()).delete()
+    vencidas = reofrecidas = 0
+    for oferta in OfertaTurno.objects.filter(estado='PENDIENTE', vence__lte=ahora).order_by('vence'):
+        with transaction.atomic():
+            if not OfertaTurno.objects.filter(pk=oferta.pk, estado='PENDIENTE').update(estado='VENCIDA'):
+                continue
+            vencidas += 1
+            volver_a_esperar(oferta.lista_espera_id)
+            ocupado = Turnos.objects.filter(
+                odontologo_id=oferta.odontologo_id,
+                fecha_turno=oferta.fecha_turno,
+                horario_turno_id=oferta.horario_turno_id,
+            ).exists()
+            if not ocupado and ofrecer_horario(oferta.odontologo_id, oferta.fecha_turno, oferta.horario_turno_id):
+                reofrecidas += 1
+    return vencidas, reofrecidas
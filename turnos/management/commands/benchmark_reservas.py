@@ -0,0 +1,155 @@
+# turnos/management/commands/benchmark_reservas.py
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, time as hora, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.utils import timezone
+
+from personal.models import Personal, Puestos
+from pacientes.models import Pacientes, Generos
+from turnos.models import Turnos, EstadosTurnos, HorarioFijo
+from turnos.serializers import TurnosSerializer
+from turnos.services import reservar_turno, HorarioOcupado
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de reservas concurrentes: varios hilos intentan reservar los mismos '
+        'horarios y se mide reservas/seg y la latencia de los conflictos (409). '
+        'Corre sobre una base de pruebas temporal (como manage.py test) que se '
+        'elimina al terminar: no toca los datos reales.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Recepciones simultáneas')
+        parser.add_argument('--intentos', type=int, default=50, help='Reservas que intenta cada hilo')
+        parser.add_argument('--dias', type=int, default=5, help='Días distintos sobre los que se reserva')
+        parser.add_argument('--horarios', type=int, default=8, help='Horarios fijos por día')
+        parser.add_argument('--semilla', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not 1 <= options['horarios'] <= 24:
+            raise CommandError('--horarios debe estar entre 1 y 24.')
+        conexion = connections['default']
+        nombre_real = conexion.settings_dict['NAME']
+        if conexion.vendor == 'sqlite' and not conexion.settings_dict['TEST'].get('NAME'):
+            # La base de pruebas por defecto es en memoria con caché compartida, que
+            # bloquea por tabla entre hilos: con un archivo se mide lo mismo que en uso real
+            conexion.settings_dict['TEST']['NAME'] = os.path.join(
+                tempfile.gettempdir(), f'benchmark_reservas_{os.getpid()}.sqlite3'
+            )
+        conexion.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self._benchmark(options)
+        finally:
+            conexion.creation.destroy_test_db(nombre_real, verbosity=0)
+
+    def _datos_prueba(self, cantidad_horarios):
+        puesto = Puestos.objects.create(nombre_puesto='Odontólogo/a')
+        odontologo = Personal.objects.create(
+            nombre='Benchmark', apellido='Odontólogo', dni='-', domicilio='-', telefono='-',
+            email='benchmark@consultorio.com', puesto=puesto,
+        )
+        paciente = Pacientes.objects.create(
+            nombre='Benchmark', apellido='Paciente', dni='-', fecha_nacimiento=date(1990, 1, 1),
+            telefono='-', genero=Generos.objects.create(nombre_ge='Otro'),
+        )
+        estado = EstadosTurnos.objects.create(nombre_est_tur='Pendiente')
+        horarios = [HorarioFijo.objects.create(hora=hora(h, 0)) for h in range(cantidad_horarios)]
+        return odontologo, paciente, estado, horarios
+
+    def _benchmark(self, options):
+        odontologo, paciente, estado, horarios = self._datos_prueba(options['horarios'])
+
+        inicio = timezone.localdate() + timedelta(days=1)
+        fechas = [inicio + timedelta(days=i) for i in range(options['dias'])]
+        slots = [(fecha, horario) for fecha in fechas for horario in horarios]
+        rnd = random.Random(options['semilla'])
+
+        resultados = {'reservas': [], 'conflictos': [], 'errores': []}
+        creados = []
+        lock = threading.Lock()
+        barrera = threading.Barrier(options['hilos'])
+
+        def recepcion():
+            propios = {'reservas': [], 'conflictos': [], 'errores': []}
+            ids = []
+            try:
+                barrera.wait()
+                for _ in range(options['intentos']):
+                    fecha, horario = rnd.choice(slots)
+                    serializer = TurnosSerializer(data={
+                        'odontologo': odontologo.pk,
+                        'paciente': paciente.pk,
+                        'horario_turno': horario.pk,
+                        'estado_turno': estado.pk,
+                        'fecha_turno': fecha.isoformat(),
+                    })
+                    serializer.is_valid(raise_exception=True)
+                    comienzo = time.perf_counter()
+                    try:
+                        turno = reservar_turno(serializer)
+                    except HorarioOcupado:
+                        propios['conflictos'].append(time.perf_counter() - comienzo)
+                    except OperationalError:
+                        # SQLite: 'database is locked' cuando hay muchos escritores
+                        propios['errores'].append(time.perf_counter() - comienzo)
+                    else:
+                        propios['reservas'].append(time.perf_counter() - comienzo)
+                        ids.append(turno.pk)
+            finally:
+                connections.close_all()
+                with lock:
+                    for clave, valores in propios.items():
+                        resultados[clave].extend(valores)
+                    creados.extend(ids)
+
+        hilos = [threading.Thread(target=recepcion) for _ in range(options['hilos'])]
+        comienzo = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - comienzo
+
+        self._reportar(resultados, duracion, len(slots), options)
+
+        # Sanidad: nunca puede haber dos turnos en el mismo horario
+        duplicados = len(creados) - len(set(
+            Turnos.objects.filter(pk__in=creados).values_list('fecha_turno', 'horario_turno')
+        ))
+        if duplicados:
+            self.stdout.write(self.style.ERROR(f'¡{duplicados} reservas duplicadas!'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Sin reservas duplicadas.'))
+
+    def _reportar(self, resultados, duracion, total_slots, options):
+        def ms(valores, percentil):
+            if not valores:
+                return '-'
+            if len(valores) == 1:
+                return f'{valores[0] * 1000:.1f} ms'
+            cortes = statistics.quantiles(valores, n=100)
+            return f'{cortes[percentil - 1] * 1000:.1f} ms'
+
+        reservas, conflictos, errores = (
+            resultados['reservas'], resultados['conflictos'], resultados['errores']
+        )
+        intentos = len(reservas) + len(conflictos) + len(errores)
+        self.stdout.write(
+            f"{options['hilos']} hilos x {options['intentos']} intentos sobre {total_slots} horarios "
+            f"({connections['default'].vendor})"
+        )
+        self.stdout.write(f'Duración: {duracion:.2f} s ({intentos / duracion:.1f} intentos/s)')
+        self.stdout.write(f'Reservas: {len(reservas)} ({len(reservas) / duracion:.1f} reservas/s), '
+                          f'p50 {ms(reservas, 50)}, p95 {ms(reservas, 95)}')
+        self.stdout.write(f'Conflictos (409): {len(conflictos)}, '
+                          f'p50 {ms(conflictos, 50)}, p95 {ms(conflictos, 95)}')
+        if errores:
+            self.stdout.write(self.style.WARNING(f'Errores de bloqueo de la base: {len(errores)}'))
@@ -0,0 +1,72 @@
+# turnos/management/commands/particiones_auditoria.py
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import particiones
+from pagos.models import AuditoriaPagos
+from turnos.models import AuditoriaTurnos
+
+MODELOS_AUDITORIA = (AuditoriaTurnos, AuditoriaPagos)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mantenimiento de las particiones mensuales de auditoría (turnos y pagos): '
+        'crea las de los próximos meses y, con --retener-meses, desvincula las viejas. '
+        'Pensado para correr una vez por mes (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses-adelante', type=int, default=3,
+                            help='Meses futuros que deben tener partición (default: 3)')
+        parser.add_argument('--retener-meses', type=int, default=None,
+                            help='Desvincular (DETACH) las particiones anteriores a hoy - N meses')
+        parser.add_argument('--eliminar', action='store_true',
+                            help='Además de desvincularlas, eliminar (DROP) las particiones viejas')
+
+    def handle(self, *args, **options):
+        hoy = timezone.localdate()
+        corte = None
+        if options['retener_meses'] is not None:
+            corte = hoy - relativedelta(months=options['retener_meses'])
+
+        if not particiones.soporta_particiones(connection):
+            self.stdout.write(self.style.WARNING(
+                f'El motor {connection.vendor} no soporta particiones: solo se aplica la retención.'
+            ))
+            if corte:
+                for modelo in MODELOS_AUDITORIA:
+                    borrados = particiones.podar_tabla(modelo, corte)
+                    self.stdout.write(f'{modelo._meta.db_table}: {borrados} registros eliminados.')
+            return
+
+        for modelo in MODELOS_AUDITORIA:
+            tabla = modelo._meta.db_table
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    if not particiones.esta_particionada(cursor, tabla):
+                        self.stdout.write(self.style.WARNING(
+                            f'{tabla} no está particionada (¿faltan migraciones?).'
+                        ))
+                        continue
+
+                mes = particiones.inicio_mes(hoy)
+                creadas = []
+                for _ in range(options['meses_adelante'] + 1):
+                    if particiones.crear_particion(connection, tabla, mes):
+                        creadas.append(particiones.nombre_particion(tabla, mes))
+                    mes = particiones.sumar_meses(mes, 1)
+
+                viejas = []
+                if corte:
+                    viejas = particiones.desvincular_particiones(
+                        connection, tabla, corte, eliminar=options['eliminar']
+                    )
+
+            self.stdout.write(f'{tabla}: {len(creadas)} particiones creadas' + (f' {creadas}' if creadas else ''))
+            if viejas:
+                accion = 'eliminadas' if options['eliminar'] else 'desvinculadas'
+                self.stdout.write(f'{tabla}: {len(viejas)} particiones {accion} {viejas}')
+        self.stdout.write(self.style.SUCCESS('Particiones de auditoría al día.'))
@@ -0,0 +1,24 @@
+# turnos/management/commands/reconstruir_resumen_agenda.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from turnos.resumen import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = 'Recalcula ResumenAgendaDiaria desde la tabla de turnos (todo o un rango de fechas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial AAAA-MM-DD (inclusive)')
+        parser.add_argument('--hasta', help='Fecha final AAAA-MM-DD (inclusive)')
+
+    def handle(self, *args, **options):
+        fechas = {}
+        for opcion in ('desde', 'hasta'):
+            valor = options[opcion]
+            fechas[opcion] = parse_date(valor) if valor else None
+            if valor and not fechas[opcion]:
+                raise CommandError(f'--{opcion} debe tener el formato AAAA-MM-DD.')
+
+        filas = reconstruir_resumen(fechas['desde'], fechas['hasta'])
+        self.stdout.write(self.style.SUCCESS(f'Resumen reconstruido: {filas} filas.'))
@@ -0,0 +1,18 @@
+# turnos/management/commands/vencer_ofertas_lista_espera.py
+from django.core.management.base import BaseCommand
+
+from turnos.lista_espera import vencer_ofertas
+
+
+class Command(BaseCommand):
+    help = (
+        'Vence las ofertas de la lista de espera que no se confirmaron a tiempo y '
+        'ofrece esos horarios al siguiente paciente. Pensado para correr por cron '
+        '(ej. cada 15 minutos).'
+    )
+
+    def handle(self, *args, **options):
+        vencidas, reofrecidas = vencer_ofertas()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ofertas vencidas: {vencidas}. Horarios ofrecidos a otro paciente: {reofrecidas}.'
+        ))
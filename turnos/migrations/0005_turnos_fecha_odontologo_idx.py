@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0011_merge_20251020_2214'),
+        ('personal', '0008_remove_personal_fecha_nacimiento_personal_fecha_alta'),
+        ('turnos', '0004_turnos_modificado_por'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='turnos',
+            index=models.Index(fields=['fecha_turno', 'odontologo'], name='turnos_turn_fecha_t_67d077_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personal', '0008_remove_personal_fecha_nacimiento_personal_fecha_alta'),
+        ('turnos', '0005_turnos_fecha_odontologo_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionAgenda',
+            fields=[
+                ('odontologo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='version_agenda', serialize=False, to='personal.personal')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('modificado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versión de Agenda',
+                'verbose_name_plural': 'Versiones de Agendas',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personal', '0008_remove_personal_fecha_nacimiento_personal_fecha_alta'),
+        ('turnos', '0006_versionagenda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenAgendaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('total_turnos', models.PositiveIntegerField(default=0)),
+                ('por_estado', models.JSONField(default=dict, verbose_name='Turnos por estado')),
+                ('ocupados', models.PositiveIntegerField(default=0, verbose_name='Horarios ocupados')),
+                ('libres', models.PositiveIntegerField(default=0, verbose_name='Horarios libres')),
+                ('odontologo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_agenda', to='personal.personal')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Agenda Diaria',
+                'verbose_name_plural': 'Resúmenes de Agenda Diaria',
+                'ordering': ['fecha', 'odontologo'],
+                'unique_together': {('fecha', 'odontologo')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Particiona por mes (fecha_accion) la tabla de auditoría de turnos.
+# Solo en PostgreSQL; en otros motores no hace nada.
+
+from django.db import migrations
+
+from core.particiones import particionar_tabla, desparticionar_tabla
+
+
+def particionar(apps, schema_editor):
+    modelo = apps.get_model('turnos', 'AuditoriaTurnos')
+    particionar_tabla(schema_editor.connection, modelo._meta.db_table)
+
+
+def desparticionar(apps, schema_editor):
+    modelo = apps.get_model('turnos', 'AuditoriaTurnos')
+    desparticionar_tabla(schema_editor.connection, modelo._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('turnos', '0007_resumenagendadiaria'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
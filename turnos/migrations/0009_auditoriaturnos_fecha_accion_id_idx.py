@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personal', '0008_remove_personal_fecha_nacimiento_personal_fecha_alta'),
+        ('turnos', '0008_particionar_auditoriaturnos'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditoriaturnos',
+            name='turnos_audi_fecha_a_8cf76e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditoriaturnos',
+            index=models.Index(fields=['fecha_accion', 'id'], name='turnos_audi_fecha_a_3d4515_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Índices de búsqueda de texto de la auditoría de turnos:
+# GIN (tsvector + pg_trgm) en PostgreSQL, tabla FTS5 en SQLite.
+
+from django.db import migrations
+
+from core.busqueda import crear_indices_busqueda, eliminar_indices_busqueda
+
+# Copia fija de AuditoriaTurnos.CAMPOS_BUSQUEDA al momento de esta migración
+CAMPOS = ('paciente_nombre', 'odontologo_nombre', 'observaciones')
+
+
+def crear(apps, schema_editor):
+    modelo = apps.get_model('turnos', 'AuditoriaTurnos')
+    crear_indices_busqueda(schema_editor, modelo._meta.db_table, CAMPOS)
+
+
+def eliminar(apps, schema_editor):
+    modelo = apps.get_model('turnos', 'AuditoriaTurnos')
+    eliminar_indices_busqueda(schema_editor, modelo._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('turnos', '0009_auditoriaturnos_fecha_accion_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, eliminar),
+    ]
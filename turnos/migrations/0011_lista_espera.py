@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pacientes', '0011_merge_20251020_2214'),
+        ('personal', '0008_remove_personal_fecha_nacimiento_personal_fecha_alta'),
+        ('turnos', '0010_busqueda_auditoriaturnos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_desde', models.DateField()),
+                ('fecha_hasta', models.DateField()),
+                ('dias_semana', models.JSONField(blank=True, default=list, verbose_name='Días de la semana (0 = Lunes)')),
+                ('hora_desde', models.TimeField(blank=True, null=True)),
+                ('hora_hasta', models.TimeField(blank=True, null=True)),
+                ('prioridad', models.PositiveSmallIntegerField(default=0)),
+                ('estado', models.CharField(choices=[('ESPERANDO', 'Esperando'), ('OFRECIDO', 'Turno Ofrecido'), ('ASIGNADO', 'Turno Asignado'), ('CANCELADO', 'Cancelado')], default='ESPERANDO', max_length=20)),
+                ('observaciones', models.TextField(blank=True, null=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('odontologo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='listas_espera', to='personal.personal', verbose_name='Odontólogo preferido')),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listas_espera', to='pacientes.pacientes')),
+                ('turno_asignado', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='turnos.turnos')),
+            ],
+            options={
+                'verbose_name': 'Lista de Espera',
+                'verbose_name_plural': 'Listas de Espera',
+                'ordering': ['-prioridad', 'creado'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OfertaTurno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_turno', models.DateField()),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ACEPTADA', 'Aceptada'), ('RECHAZADA', 'Rechazada'), ('VENCIDA', 'Vencida')], default='PENDIENTE', max_length=20)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('vence', models.DateTimeField()),
+                ('horario_turno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='turnos.horariofijo')),
+                ('lista_espera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ofertas', to='turnos.listaespera')),
+                ('odontologo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ofertas_turno', to='personal.personal')),
+                ('turno', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='turnos.turnos')),
+            ],
+            options={
+                'verbose_name': 'Oferta de Turno',
+                'verbose_name_plural': 'Ofertas de Turnos',
+                'ordering': ['-creada'],
+                'indexes': [models.Index(fields=['odontologo', 'fecha_turno', 'horario_turno'], name='turnos_ofer_odontol_e81564_idx'), models.Index(fields=['estado', 'vence'], name='turnos_ofer_estado_7438ee_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentanaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('hora_desde', models.TimeField()),
+                ('hora_hasta', models.TimeField()),
+                ('prioridad', models.PositiveSmallIntegerField(default=0)),
+                ('creado', models.DateTimeField()),
+                ('lista_espera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventanas', to='turnos.listaespera')),
+                ('odontologo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='personal.personal')),
+            ],
+            options={
+                'verbose_name': 'Ventana de Espera',
+                'verbose_name_plural': 'Ventanas de Espera',
+                'indexes': [models.Index(fields=['fecha', 'odontologo', '-prioridad', 'creado'], name='turnos_vent_fecha_5e8267_idx')],
+            },
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from personal.models import Personal
 from pacientes.models import Pacientes
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from core.tracking import RastreoCambiosMixin
 
 # Create your models here.
 
@@ -54,7 +56,7 @@ class DiaSemana(models.Model):
         verbose_name_plural = 'Días de la Semana'
 
 
-class Turnos(models.Model):
+class Turnos(RastreoCambiosMixin, models.Model):
     odontologo = models.ForeignKey(Personal, on_delete=models.PROTECT)
     paciente = models.ForeignKey(Pacientes, on_delete=models.PROTECT)
     fecha_turno = models.DateField(verbose_name='Fecha')
@@ -75,6 +77,85 @@ class Turnos(models.Model):
         verbose_name = 'Turno'
         verbose_name_plural = 'Turnos'
         unique_together = ('odontologo', 'fecha_turno', 'horario_turno')
+        indexes = [
+            # Listados por rango de fechas (agenda, paginación por clave)
+            models.Index(fields=['fecha_turno', 'odontologo']),
+        ]
+
+
+class VersionAgenda(models.Model):
+    """
+    Contador de cambios de la agenda de cada odontólogo.
+    Lo incrementan los signals (y las operaciones masivas) en cada alta,
+    cambio o baja de turnos, y también los cambios de catálogo que el feed
+    muestra (nombre del paciente, del estado o del odontólogo); se usa como
+    ETag / Last-Modified del feed .ics.
+    """
+    odontologo = models.OneToOneField(
+        Personal,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='version_agenda'
+    )
+    version = models.PositiveIntegerField(default=0)
+    modificado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Agenda de {self.odontologo_id} (v{self.version})"
+
+    @classmethod
+    def incrementar(cls, *odontologo_ids):
+        """Suma 1 a la versión de cada odontólogo (un UPDATE; INSERT la primera vez)."""
+        ahora = timezone.now()
+        for odontologo_id in {pk for pk in odontologo_ids if pk is not None}:
+            actualizadas = cls.objects.filter(odontologo_id=odontologo_id).update(
+                version=models.F('version') + 1,
+                modificado=ahora
+            )
+            if not actualizadas:
+                cls.objects.get_or_create(odontologo_id=odontologo_id, defaults={'version': 1})
+
+    @classmethod
+    def incrementar_todas(cls):
+        """Suma 1 a todas las agendas (un cambio de catálogo que se ve en todos los feeds)."""
+        cls.objects.update(version=models.F('version') + 1, modificado=timezone.now())
+
+    class Meta:
+        verbose_name = 'Versión de Agenda'
+        verbose_name_plural = 'Versiones de Agendas'
+
+
+class ResumenAgendaDiaria(models.Model):
+    """
+    Resumen precalculado de la agenda: una fila por (fecha, odontólogo).
+    Lo mantienen los signals de Turnos de forma incremental (ver
+    turnos/resumen.py); se reconstruye con el comando reconstruir_resumen_agenda.
+
+    - por_estado: {"<id de EstadosTurnos>": cantidad}
+    - ocupados: turnos con horario asignado (un cancelado no libera el horario)
+    - libres: horarios fijos que quedan sin turno ese día
+
+    Solo hay filas para los días con al menos un turno.
+    """
+    fecha = models.DateField(verbose_name='Fecha')
+    odontologo = models.ForeignKey(
+        Personal,
+        on_delete=models.CASCADE,
+        related_name='resumenes_agenda'
+    )
+    total_turnos = models.PositiveIntegerField(default=0)
+    por_estado = models.JSONField(default=dict, verbose_name='Turnos por estado')
+    ocupados = models.PositiveIntegerField(default=0, verbose_name='Horarios ocupados')
+    libres = models.PositiveIntegerField(default=0, verbose_name='Horarios libres')
+
+    def __str__(self):
+        return f"{self.fecha} - {self.odontologo_id}: {self.total_turnos} turnos"
+
+    class Meta:
+        verbose_name = 'Resumen de Agenda Diaria'
+        verbose_name_plural = 'Resúmenes de Agenda Diaria'
+        unique_together = ('fecha', 'odontologo')
+        ordering = ['fecha', 'odontologo']
 
 
 # ============================================
@@ -93,6 +174,9 @@ class AuditoriaTurnos(models.Model):
         ('CAMBIO_ESTADO', 'Cambio de Estado'),
         ('ELIMINACION', 'Turno Eliminado (Horario Liberado)'),
     ]
+
+    # Campos que cubre la búsqueda de texto (core.busqueda)
+    CAMPOS_BUSQUEDA = ('paciente_nombre', 'odontologo_nombre', 'observaciones')
     
     # Información del turno
     turno = models.ForeignKey(
@@ -138,7 +222,127 @@ class AuditoriaTurnos(models.Model):
         verbose_name_plural = 'Auditorías de Turnos'
         ordering = ['-fecha_accion']
         indexes = [
-            models.Index(fields=['fecha_accion']),
+            # (fecha_accion, id): orden total para la paginación por cursor
+            models.Index(fields=['fecha_accion', 'id']),
             models.Index(fields=['turno']),
             models.Index(fields=['turno_numero']),
-        ]
\ No newline at end of file
+        ]
+
+# ============================================
+# LISTA DE ESPERA
+# ============================================
+
+class ListaEspera(models.Model):
+    """
+    Paciente que espera un turno (o uno antes del que tiene).
+    Cuando se elimina un turno y se libera un horario, el motor de
+    turnos/lista_espera.py busca la entrada que mejor encaja y le genera
+    una OfertaTurno en la misma transacción.
+
+    La preferencia es una ventana: rango de fechas, días de la semana
+    (vacío = todos), franja horaria (vacía = todo el día) y odontólogo
+    (vacío = cualquiera).
+    """
+
+    ESTADOS = [
+        ('ESPERANDO', 'Esperando'),
+        ('OFRECIDO', 'Turno Ofrecido'),
+        ('ASIGNADO', 'Turno Asignado'),
+        ('CANCELADO', 'Cancelado'),
+    ]
+
+    paciente = models.ForeignKey(Pacientes, on_delete=models.CASCADE, related_name='listas_espera')
+    odontologo = models.ForeignKey(
+        Personal,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='listas_espera',
+        verbose_name='Odontólogo preferido'
+    )
+    fecha_desde = models.DateField()
+    fecha_hasta = models.DateField()
+    dias_semana = models.JSONField(default=list, blank=True, verbose_name='Días de la semana (0 = Lunes)')
+    hora_desde = models.TimeField(null=True, blank=True)
+    hora_hasta = models.TimeField(null=True, blank=True)
+    prioridad = models.PositiveSmallIntegerField(default=0)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='ESPERANDO')
+    observaciones = models.TextField(blank=True, null=True)
+    turno_asignado = models.ForeignKey(
+        Turnos,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.paciente} ({self.fecha_desde} a {self.fecha_hasta}) - {self.estado}"
+
+    class Meta:
+        verbose_name = 'Lista de Espera'
+        verbose_name_plural = 'Listas de Espera'
+        ordering = ['-prioridad', 'creado']
+
+
+class VentanaEspera(models.Model):
+    """
+    Índice de la lista de espera: una fila por cada día en que una entrada
+    en estado ESPERANDO acepta un turno, con su franja horaria.
+
+    Buscar candidatos para un horario liberado es una búsqueda por
+    igualdad en (fecha, odontólogo) sobre este índice, en lugar de revisar
+    toda la lista comparando rangos. Las filas las genera y borra
+    turnos/lista_espera.py; no se editan a mano.
+    """
+    lista_espera = models.ForeignKey(ListaEspera, on_delete=models.CASCADE, related_name='ventanas')
+    fecha = models.DateField()
+    # NULL = cualquier odontólogo
+    odontologo = models.ForeignKey(Personal, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    # Sin preferencia horaria: time.min / time.max
+    hora_desde = models.TimeField()
+    hora_hasta = models.TimeField()
+    # Copias de la entrada para ordenar sin join
+    prioridad = models.PositiveSmallIntegerField(default=0)
+    creado = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Ventana de Espera'
+        verbose_name_plural = 'Ventanas de Espera'
+        indexes = [
+            # Candidatos de un horario: (fecha, odontólogo) por igualdad, ya en orden
+            models.Index(fields=['fecha', 'odontologo', '-prioridad', 'creado']),
+        ]
+
+
+class OfertaTurno(models.Model):
+    """Horario liberado ofrecido a una entrada de la lista de espera."""
+
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('ACEPTADA', 'Aceptada'),
+        ('RECHAZADA', 'Rechazada'),
+        ('VENCIDA', 'Vencida'),
+    ]
+
+    lista_espera = models.ForeignKey(ListaEspera, on_delete=models.CASCADE, related_name='ofertas')
+    odontologo = models.ForeignKey(Personal, on_delete=models.CASCADE, related_name='ofertas_turno')
+    fecha_turno = models.DateField()
+    horario_turno = models.ForeignKey(HorarioFijo, on_delete=models.CASCADE)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='PENDIENTE')
+    creada = models.DateTimeField(auto_now_add=True)
+    vence = models.DateTimeField()
+    turno = models.ForeignKey(Turnos, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    def __str__(self):
+        return f"Oferta {self.fecha_turno} {self.horario_turno} a {self.lista_espera.paciente} - {self.estado}"
+
+    class Meta:
+        verbose_name = 'Oferta de Turno'
+        verbose_name_plural = 'Ofertas de Turnos'
+        ordering = ['-creada']
+        indexes = [
+            models.Index(fields=['odontologo', 'fecha_turno', 'horario_turno']),
+            models.Index(fields=['estado', 'vence']),
+        ]
@@ -0,0 +1,152 @@
+"""
+Mantenimiento del resumen diario de agenda (ResumenAgendaDiaria).
+
+Cada turno "aporta" a la fila de su (fecha, odontólogo): +1 en su estado,
++1 en el total y +1 en ocupados si tiene horario. Al crear, modificar o
+eliminar un turno se resta el aporte anterior y se suma el nuevo; si se
+anulan entre sí (ej. solo cambió el motivo) no se toca la base.
+
+Solo hay filas para los días con al menos un turno: un día sin turnos no
+tiene fila (todos sus horarios fijos están libres).
+"""
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from core.catalogos import TTL_SEGUNDOS, version_catalogo
+from .models import Turnos, HorarioFijo, ResumenAgendaDiaria
+
+# Campos de Turnos que cambian el aporte de un turno al resumen
+CAMPOS_RESUMEN = ('odontologo', 'fecha_turno', 'estado_turno', 'horario_turno')
+
+
+def aporte(odontologo_id, fecha, estado_id, horario_id, signo=1):
+    """Aporte de un turno al resumen (signo=-1 para quitarlo)."""
+    return (fecha, odontologo_id), estado_id, horario_id is not None, signo
+
+
+def aporte_turno(turno, signo=1):
+    return aporte(turno.odontologo_id, turno.fecha_turno, turno.estado_turno_id, turno.horario_turno_id, signo)
+
+
+def aporte_valores(valores, signo=1):
+    """Aporte a partir de la foto de RastreoCambiosMixin ({attname: valor})."""
+    return aporte(
+        valores.get('odontologo_id'),
+        valores.get('fecha_turno'),
+        valores.get('estado_turno_id'),
+        valores.get('horario_turno_id'),
+        signo,
+    )
+
+
+def total_horarios():
+    """
+    Cantidad de horarios fijos, cacheada junto con la versión del catálogo
+    HorarioFijo (cambia con cada alta o baja, ver core.catalogos): el alta o
+    la modificación de un turno no vuelve a contar la tabla.
+    """
+    clave = f'resumen:total_horarios:{version_catalogo(HorarioFijo)}'
+    return cache.get_or_set(clave, HorarioFijo.objects.count, TTL_SEGUNDOS)
+
+
+def aplicar_aportes(aportes):
+    """
+    Aplica una lista de aportes. Agrupa por fila y bloquea cada fila con
+    SELECT ... FOR UPDATE (en orden, para no generar deadlocks entre dos
+    transacciones que tocan los mismos días).
+    """
+    deltas = defaultdict(lambda: {'estados': Counter(), 'total': 0, 'ocupados': 0})
+    for clave, estado_id, ocupa, signo in aportes:
+        delta = deltas[clave]
+        delta['estados'][str(estado_id)] += signo
+        delta['total'] += signo
+        if ocupa:
+            delta['ocupados'] += signo
+
+    deltas = {
+        clave: delta for clave, delta in deltas.items()
+        if delta['total'] or delta['ocupados'] or any(delta['estados'].values())
+    }
+    if not deltas:
+        return
+
+    horarios = total_horarios()
+    with transaction.atomic():
+        for (fecha, odontologo_id) in sorted(deltas):
+            delta = deltas[(fecha, odontologo_id)]
+            fila = _fila_bloqueada(fecha, odontologo_id)
+
+            por_estado = Counter(fila.por_estado)
+            por_estado.update(delta['estados'])
+            fila.por_estado = {estado: n for estado, n in por_estado.items() if n > 0}
+            fila.total_turnos = max(fila.total_turnos + delta['total'], 0)
+            fila.ocupados = max(fila.ocupados + delta['ocupados'], 0)
+            fila.libres = max(horarios - fila.ocupados, 0)
+
+            if fila.total_turnos:
+                fila.save()
+            else:
+                fila.delete()
+
+
+def _fila_bloqueada(fecha, odontologo_id):
+    filas = ResumenAgendaDiaria.objects.select_for_update()
+    fila = filas.filter(fecha=fecha, odontologo_id=odontologo_id).first()
+    if fila is not None:
+        return fila
+    try:
+        with transaction.atomic():
+            return ResumenAgendaDiaria.objects.create(fecha=fecha, odontologo_id=odontologo_id)
+    except IntegrityError:
+        # Otra transacción la creó primero
+        return filas.get(fecha=fecha, odontologo_id=odontologo_id)
+
+
+def recalcular_libres():
+    """Tras agregar o quitar horarios fijos: libres = horarios - ocupados, en un UPDATE."""
+    horarios = HorarioFijo.objects.count()
+    ResumenAgendaDiaria.objects.update(
+        libres=Greatest(Value(horarios) - F('ocupados'), Value(0))
+    )
+
+
+def reconstruir_resumen(fecha_desde=None, fecha_hasta=None):
+    """
+    Recalcula el resumen desde Turnos (todo o un rango de fechas) con una
+    consulta agregada. Devuelve la cantidad de filas generadas.
+    """
+    turnos = Turnos.objects.all()
+    resumenes = ResumenAgendaDiaria.objects.all()
+    if fecha_desde:
+        turnos = turnos.filter(fecha_turno__gte=fecha_desde)
+        resumenes = resumenes.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        turnos = turnos.filter(fecha_turno__lte=fecha_hasta)
+        resumenes = resumenes.filter(fecha__lte=fecha_hasta)
+
+    agregados = (
+        turnos.order_by()
+        .values('fecha_turno', 'odontologo_id', 'estado_turno_id')
+        .annotate(cantidad=Count('id'), con_horario=Count('horario_turno'))
+    )
+    horarios = HorarioFijo.objects.count()
+    filas = {}
+    for fila in agregados:
+        clave = (fila['fecha_turno'], fila['odontologo_id'])
+        if clave not in filas:
+            filas[clave] = ResumenAgendaDiaria(fecha=clave[0], odontologo_id=clave[1], por_estado={})
+        resumen = filas[clave]
+        resumen.por_estado[str(fila['estado_turno_id'])] = fila['cantidad']
+        resumen.total_turnos += fila['cantidad']
+        resumen.ocupados += fila['con_horario']
+    for resumen in filas.values():
+        resumen.libres = max(horarios - resumen.ocupados, 0)
+
+    with transaction.atomic():
+        resumenes.delete()
+        ResumenAgendaDiaria.objects.bulk_create(filas.values(), batch_size=1000)
+    return len(filas)
@@ -1,5 +1,9 @@
 from rest_framework import serializers
-from .models import Turnos, EstadosTurnos, HorarioFijo, DiaSemana, AuditoriaTurnos
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from .models import Turnos, EstadosTurnos, HorarioFijo, DiaSemana, AuditoriaTurnos, ListaEspera, OfertaTurno
+from .lista_espera import MAX_DIAS_ESPERA
 from pacientes.models import Pacientes
 from personal.models import Personal
 # Asegúrate de que los modelos externos (Personal, Pacientes) también están disponibles
@@ -72,6 +76,58 @@ class TurnosSerializer(serializers.ModelSerializer):
         
         # Los campos de nombre solo se incluyen en las respuestas (GET), no son modificables.
         read_only_fields = ('odontologo_nombre', 'paciente_nombre', 'horario_display', 'estado_nombre')
+        # Sin UniqueTogetherValidator: ese SELECT previo no evita la carrera entre
+        # dos reservas simultáneas. El choque lo resuelve la restricción única en
+        # services.reservar_turno (409 con alternativas).
+        validators = []
+
+    def update(self, instance, validated_data):
+        # Solo se escriben las columnas que cambiaron (UPDATE ... SET con update_fields)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.guardar_cambios()
+        return instance
+
+# Relaciones que lee TurnosSerializer (para select_related y evitar N+1)
+TURNOS_RELACIONES = ('odontologo', 'paciente', 'horario_turno', 'estado_turno')
+
+
+# --- Proyección plana de Turnos (listados) ---
+# Misma salida que TurnosSerializer, pero armada con values() y anotaciones:
+# una sola consulta con JOINs y sin instanciar modelos.
+
+TURNOS_PLANO_ANOTACIONES = {
+    'odontologo_nombre': Concat('odontologo__nombre', Value(' '), 'odontologo__apellido'),
+    'paciente_nombre': Concat('paciente__nombre', Value(' '), 'paciente__apellido'),
+    'horario_hora': F('horario_turno__hora'),
+    'estado_nombre': F('estado_turno__nombre_est_tur'),
+}
+
+
+def proyectar_turnos(queryset):
+    """Convierte un queryset de Turnos en un queryset de dicts (values())."""
+    columnas = [
+        campo for campo in TurnosSerializer.Meta.fields
+        if campo not in TurnosSerializer.Meta.read_only_fields
+    ]
+    extras = [campo for campo in queryset.query.annotations if campo not in TURNOS_PLANO_ANOTACIONES]
+    return queryset.values(*columnas, *extras, **TURNOS_PLANO_ANOTACIONES)
+
+
+# Mismo formato de fecha que TurnosSerializer (respeta DATE_FORMAT de DRF)
+_FECHA_TURNO = serializers.DateField()
+
+
+def turno_plano(fila):
+    """Da a una fila de proyectar_turnos() el formato de TurnosSerializer."""
+    hora = fila['horario_hora']
+    datos = dict(
+        fila,
+        fecha_turno=_FECHA_TURNO.to_representation(fila['fecha_turno']),
+        horario_display=hora.strftime('%H:%M') if hora else None,
+    )
+    return {campo: datos[campo] for campo in TurnosSerializer.Meta.fields}
+
 
 # --- Serializer de Auditoría de Turnos ---
 class AuditoriaTurnosSerializer(serializers.ModelSerializer):
@@ -106,4 +162,139 @@ class AuditoriaTurnosSerializer(serializers.ModelSerializer):
     def get_horario_display(self, obj):
         if obj.horario_turno:
             return obj.horario_turno.strftime('%H:%M')
-        return 'N/A'
\ No newline at end of file
+        return 'N/A'
+
+# --- Serializer de Cambio de Estado Masivo ---
+class CambioEstadoMasivoSerializer(serializers.Serializer):
+    # IDs de los turnos a modificar (ej. todos los turnos del día)
+    turnos = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=500
+    )
+    estado_turno = serializers.PrimaryKeyRelatedField(queryset=EstadosTurnos.objects.all())
+    modificado_por = serializers.PrimaryKeyRelatedField(
+        queryset=Personal.objects.all(),
+        required=False,
+        allow_null=True
+    )
+
+
+# --- Serializer de Serie de Turnos (tratamientos recurrentes) ---
+class SerieTurnosSerializer(serializers.Serializer):
+    odontologo = serializers.PrimaryKeyRelatedField(queryset=Personal.objects.all())
+    paciente = serializers.PrimaryKeyRelatedField(queryset=Pacientes.objects.all())
+    horario_turno = serializers.PrimaryKeyRelatedField(queryset=HorarioFijo.objects.all())
+    estado_turno = serializers.PrimaryKeyRelatedField(queryset=EstadosTurnos.objects.all())
+    fecha_inicio = serializers.DateField()
+    frecuencia = serializers.ChoiceField(choices=('semanal', 'quincenal', 'mensual'))
+    cantidad = serializers.IntegerField(min_value=1, max_value=52)
+    motivo = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    modificado_por = serializers.PrimaryKeyRelatedField(
+        queryset=Personal.objects.all(),
+        required=False,
+        allow_null=True
+    )
+
+    def validate(self, data):
+        ahora = timezone.localtime()
+        if data['fecha_inicio'] < ahora.date() or (
+            data['fecha_inicio'] == ahora.date() and data['horario_turno'].hora <= ahora.time()
+        ):
+            raise serializers.ValidationError({'fecha_inicio': 'La serie no puede empezar en el pasado.'})
+        return data
+
+
+# --- Serializers de Lista de Espera ---
+class ListaEsperaSerializer(serializers.ModelSerializer):
+    paciente_nombre = serializers.StringRelatedField(source='paciente', read_only=True)
+    odontologo_nombre = serializers.StringRelatedField(source='odontologo', read_only=True)
+
+    class Meta:
+        model = ListaEspera
+        fields = (
+            'id',
+            'paciente',
+            'paciente_nombre',
+            'odontologo',
+            'odontologo_nombre',
+            'fecha_desde',
+            'fecha_hasta',
+            'dias_semana',
+            'hora_desde',
+            'hora_hasta',
+            'prioridad',
+            'estado',
+            'observaciones',
+            'turno_asignado',
+            'creado',
+        )
+        read_only_fields = ('turno_asignado', 'creado')
+
+    def validate_estado(self, value):
+        """
+        El estado lo maneja el motor de la lista de espera (ofertas, turnos
+        asignados). A mano solo se puede cancelar una entrada que espera:
+        una entrada con oferta pendiente se libera rechazando la oferta.
+        """
+        actual = self.instance.estado if self.instance else 'ESPERANDO'
+        if value == actual or (value == 'CANCELADO' and actual == 'ESPERANDO'):
+            return value
+        raise serializers.ValidationError('Solo se puede cancelar una entrada en estado ESPERANDO.')
+
+    def validate_dias_semana(self, value):
+        if not isinstance(value, list) or any(not isinstance(dia, int) or not 0 <= dia <= 6 for dia in value):
+            raise serializers.ValidationError('Debe ser una lista de días entre 0 (Lunes) y 6 (Domingo).')
+        return sorted(set(value))
+
+    def validate(self, data):
+        def valor(campo):
+            return data[campo] if campo in data else getattr(self.instance, campo, None)
+
+        fecha_desde, fecha_hasta = valor('fecha_desde'), valor('fecha_hasta')
+        if fecha_desde and fecha_hasta:
+            if fecha_hasta < fecha_desde:
+                raise serializers.ValidationError({'fecha_hasta': 'Debe ser posterior a fecha_desde.'})
+            if (fecha_hasta - fecha_desde).days > MAX_DIAS_ESPERA:
+                raise serializers.ValidationError(
+                    {'fecha_hasta': f'La espera no puede abarcar más de {MAX_DIAS_ESPERA} días.'}
+                )
+        hora_desde, hora_hasta = valor('hora_desde'), valor('hora_hasta')
+        if hora_desde and hora_hasta and hora_hasta < hora_desde:
+            raise serializers.ValidationError({'hora_hasta': 'Debe ser posterior a hora_desde.'})
+        return data
+
+
+class OfertaTurnoSerializer(serializers.ModelSerializer):
+    paciente = serializers.IntegerField(source='lista_espera.paciente_id', read_only=True)
+    paciente_nombre = serializers.StringRelatedField(source='lista_espera.paciente', read_only=True)
+    odontologo_nombre = serializers.StringRelatedField(source='odontologo', read_only=True)
+    horario_display = serializers.StringRelatedField(source='horario_turno', read_only=True)
+
+    class Meta:
+        model = OfertaTurno
+        fields = (
+            'id',
+            'lista_espera',
+            'paciente',
+            'paciente_nombre',
+            'odontologo',
+            'odontologo_nombre',
+            'fecha_turno',
+            'horario_turno',
+            'horario_display',
+            'estado',
+            'creada',
+            'vence',
+            'turno',
+        )
+        read_only_fields = fields
+
+
+class AceptarOfertaSerializer(serializers.Serializer):
+    estado_turno = serializers.PrimaryKeyRelatedField(queryset=EstadosTurnos.objects.all(), required=False)
+    modificado_por = serializers.PrimaryKeyRelatedField(
+        queryset=Personal.objects.all(),
+        required=False,
+        allow_null=True
+    )
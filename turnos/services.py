@@ -0,0 +1,351 @@
+"""
+Operaciones de escritura sobre Turnos: reservas con control de
+concurrencia y operaciones que no pasan por el serializer uno por uno
+(cambios masivos, series, etc.).
+"""
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.auditoria import auditoria
+
+from .disponibilidad import dias_habiles, indice_disponibilidad
+from .estadisticas import invalidar_estadisticas
+from .lista_espera import ofrecer_horario, volver_a_esperar
+from .resumen import aplicar_aportes, aporte_turno
+from .serializers import TurnosSerializer
+from .models import Turnos, AuditoriaTurnos, VersionAgenda, EstadosTurnos, ListaEspera, OfertaTurno
+from .signals import observacion_cambio_estado, publicar_turnos
+
+
+# ============================================
+# RESERVA DE TURNOS (concurrencia)
+# ============================================
+
+class HorarioOcupado(Exception):
+    """El horario ya lo tiene otro turno del mismo odontólogo ese día."""
+
+    def __init__(self, odontologo_id, fecha, horario, alternativas):
+        super().__init__('El horario ya está ocupado para ese odontólogo.')
+        self.odontologo_id = odontologo_id
+        self.fecha = fecha
+        self.horario = horario
+        self.alternativas = alternativas
+
+
+def reservar_turno(serializer):
+    """
+    Guarda un TurnosSerializer ya validado (alta o reprogramación).
+
+    No se consulta antes si el horario está libre (eso deja una ventana
+    entre el SELECT y el INSERT en la que otra recepción puede ganar el
+    mismo horario): se intenta escribir directamente y la restricción única
+    (odontologo, fecha_turno, horario_turno) decide. Si el INSERT/UPDATE
+    choca, se revierte solo el savepoint y se lanza HorarioOcupado con
+    alternativas libres cercanas.
+    """
+    try:
+        with transaction.atomic():
+            return serializer.save()
+    except IntegrityError:
+        instancia = serializer.instance
+        datos = serializer.validated_data
+
+        def valor(campo):
+            return datos[campo] if campo in datos else getattr(instancia, campo, None)
+
+        odontologo, fecha, horario = valor('odontologo'), valor('fecha_turno'), valor('horario_turno')
+        if odontologo is None or horario is None:
+            raise
+        ocupado = Turnos.objects.filter(odontologo=odontologo, fecha_turno=fecha, horario_turno=horario)
+        if instancia is not None and instancia.pk:
+            ocupado = ocupado.exclude(pk=instancia.pk)
+        if not ocupado.exists():
+            raise  # Otra restricción: no es un choque de horarios
+
+        # El índice de este proceso puede no haber visto aún el turno ganador
+        indice_disponibilidad.invalidar(odontologo.pk, fecha)
+        alternativas = sugerir_alternativas(odontologo.pk, fecha, horario, dias_habiles())
+        raise HorarioOcupado(odontologo.pk, fecha, horario, alternativas)
+
+
+def cambiar_estado_masivo(turno_ids, estado, usuario=None):
+    """
+    Pasa muchos turnos a un nuevo estado dentro de una transacción.
+
+    - 1 SELECT (con los joins necesarios para la auditoría y bloqueo de filas)
+    - 1 UPDATE para todos los turnos que cambian
+    - 1 INSERT (bulk_create) con todos los registros de AuditoriaTurnos,
+      que el escritor de auditoría hace al confirmarse la transacción
+
+    Los signals de pre_save/post_save no se disparan: la auditoría se
+    escribe aquí con el mismo formato que usa registrar_auditoria_turno.
+
+    Devuelve un dict con los IDs actualizados, los que ya estaban en ese
+    estado y los que no existen.
+    """
+    turno_ids = set(turno_ids)
+    estado_nuevo_nombre = str(estado)
+
+    with transaction.atomic():
+        turnos = list(
+            Turnos.objects.filter(pk__in=turno_ids)
+            .select_related('paciente', 'odontologo', 'horario_turno', 'estado_turno')
+            .select_for_update(of=('self',))
+        )
+
+        a_actualizar = [t for t in turnos if t.estado_turno_id != estado.pk]
+        sin_cambios = sorted(t.pk for t in turnos if t.estado_turno_id == estado.pk)
+        no_encontrados = sorted(turno_ids - {t.pk for t in turnos})
+
+        if a_actualizar:
+            Turnos.objects.filter(pk__in=[t.pk for t in a_actualizar]).update(
+                estado_turno=estado,
+                modificado_por=usuario,
+            )
+
+            registros = []
+            for turno in a_actualizar:
+                estado_anterior_nombre = str(turno.estado_turno)
+                paciente = turno.paciente
+                registros.append(AuditoriaTurnos(
+                    turno=turno,
+                    accion='CAMBIO_ESTADO',
+                    usuario=usuario,
+                    turno_numero=turno.pk,
+                    paciente_nombre=str(paciente) if paciente else 'N/A',
+                    paciente_dni=paciente.dni if paciente else 'N/A',
+                    odontologo_nombre=str(turno.odontologo) if turno.odontologo else 'N/A',
+                    fecha_turno=turno.fecha_turno,
+                    horario_turno=turno.horario_turno.hora if turno.horario_turno else None,
+                    estado_anterior=estado_anterior_nombre,
+                    estado_nuevo=estado_nuevo_nombre,
+                    observaciones=observacion_cambio_estado(estado_anterior_nombre, estado_nuevo_nombre),
+                ))
+            auditoria.registrar_varios(registros)
+            VersionAgenda.incrementar(*{t.odontologo_id for t in a_actualizar})
+
+            aportes = [aporte_turno(t, signo=-1) for t in a_actualizar]
+            for turno in a_actualizar:
+                turno.estado_turno = estado
+                turno.modificado_por = usuario
+            aplicar_aportes(aportes + [aporte_turno(t) for t in a_actualizar])
+            transaction.on_commit(invalidar_estadisticas)
+            publicar_turnos('modificado', a_actualizar)
+
+    return {
+        'actualizados': sorted(t.pk for t in a_actualizar),
+        'sin_cambios': sin_cambios,
+        'no_encontrados': no_encontrados,
+    }
+
+
+# ============================================
+# SERIES DE TURNOS (tratamientos recurrentes)
+# ============================================
+
+FRECUENCIAS = {
+    'semanal': relativedelta(weeks=1),
+    'quincenal': relativedelta(weeks=2),
+    'mensual': relativedelta(months=1),
+}
+
+MAX_ALTERNATIVAS = 3
+DIAS_BUSQUEDA_ALTERNATIVAS = 14
+
+
+def fechas_serie(fecha_inicio, frecuencia, cantidad):
+    """Fechas candidatas de la serie (la primera es fecha_inicio)."""
+    paso = FRECUENCIAS[frecuencia]
+    # Se suma desde la fecha inicial (y no acumulando) para que 'mensual'
+    # no se corra: 31/01 -> 28/02 -> 31/03
+    return [fecha_inicio + paso * i for i in range(cantidad)]
+
+
+def sugerir_alternativas(odontologo_id, fecha, horario, dias):
+    """
+    Horarios libres cercanos al pedido: primero el mismo día (ordenados por
+    cercanía a la hora original) y, si no alcanza, el mismo horario en los
+    días hábiles siguientes. Lee del índice de disponibilidad.
+    """
+    def minutos(hora):
+        return hora.hour * 60 + hora.minute
+
+    # Una sola consulta para todo el rango que se puede llegar a mirar
+    indice_disponibilidad.cargar([odontologo_id], fecha, fecha + timedelta(days=DIAS_BUSQUEDA_ALTERNATIVAS))
+
+    alternativas = []
+    if not dias or fecha.weekday() in dias:
+        libres = indice_disponibilidad.horarios_libres(odontologo_id, fecha)
+        libres.sort(key=lambda libre: abs(minutos(libre[1]) - minutos(horario.hora)))
+        for horario_id, hora in libres[:MAX_ALTERNATIVAS]:
+            alternativas.append({'fecha': fecha, 'horario_turno': horario_id, 'hora': hora})
+
+    siguiente = fecha
+    for _ in range(DIAS_BUSQUEDA_ALTERNATIVAS):
+        if len(alternativas) >= MAX_ALTERNATIVAS:
+            break
+        siguiente += timedelta(days=1)
+        if dias and siguiente.weekday() not in dias:
+            continue
+        if indice_disponibilidad.esta_libre(odontologo_id, siguiente, horario.pk):
+            alternativas.append({'fecha': siguiente, 'horario_turno': horario.pk, 'hora': horario.hora})
+    return alternativas
+
+
+def crear_serie_turnos(odontologo, paciente, horario, estado, fecha_inicio, frecuencia, cantidad,
+                       usuario=None, motivo=None):
+    """
+    Crea una serie de turnos recurrentes en el mismo HorarioFijo.
+
+    - 1 SELECT para detectar, sobre el índice único (odontologo, fecha_turno,
+      horario_turno), cuáles de las fechas candidatas ya están tomadas.
+    - 1 INSERT (bulk_create) con los turnos libres.
+    - 1 INSERT con la auditoría de CREACION (al confirmarse la transacción).
+
+    Devuelve (turnos_creados, conflictos). Cada conflicto trae la fecha,
+    el motivo y algunas alternativas libres.
+    """
+    dias = dias_habiles()
+    candidatas = fechas_serie(fecha_inicio, frecuencia, cantidad)
+
+    for intento in range(2):
+        try:
+            with transaction.atomic():
+                ocupadas = set(
+                    Turnos.objects.filter(
+                        odontologo=odontologo,
+                        horario_turno=horario,
+                        fecha_turno__in=candidatas,
+                    ).values_list('fecha_turno', flat=True)
+                )
+                conflictos = []
+                nuevos = []
+                for fecha in candidatas:
+                    if dias and fecha.weekday() not in dias:
+                        conflictos.append({'fecha': fecha, 'motivo': 'dia_no_habil'})
+                    elif fecha in ocupadas:
+                        conflictos.append({'fecha': fecha, 'motivo': 'ocupado'})
+                    else:
+                        nuevos.append(Turnos(
+                            odontologo=odontologo,
+                            paciente=paciente,
+                            fecha_turno=fecha,
+                            horario_turno=horario,
+                            estado_turno=estado,
+                            motivo=motivo,
+                            modificado_por=usuario,
+                        ))
+
+                creados = Turnos.objects.bulk_create(nuevos)
+                auditoria.registrar_varios(_auditoria_creacion(turno) for turno in creados)
+                for turno in creados:
+                    _marcar_ocupado_al_confirmar(turno)
+                if creados:
+                    VersionAgenda.incrementar(odontologo.pk)
+                aplicar_aportes(aporte_turno(turno) for turno in creados)
+                if creados:
+                    transaction.on_commit(invalidar_estadisticas)
+                publicar_turnos('creado', creados)
+            break
+        except IntegrityError:
+            # Otro usuario tomó alguna de las fechas entre el SELECT y el INSERT:
+            # se vuelve a calcular una vez con el estado actualizado
+            if intento:
+                raise
+
+    for conflicto in conflictos:
+        conflicto['alternativas'] = sugerir_alternativas(odontologo.pk, conflicto['fecha'], horario, dias)
+    return creados, conflictos
+
+
+# ============================================
+# LISTA DE ESPERA (ofertas de horarios liberados)
+# ============================================
+
+class OfertaNoDisponible(Exception):
+    """La oferta ya fue respondida o venció."""
+
+
+def _oferta_pendiente(oferta_id):
+    """Bloquea la oferta y verifica que siga pendiente y en plazo."""
+    oferta = OfertaTurno.objects.select_for_update().select_related('lista_espera').get(pk=oferta_id)
+    if oferta.estado != 'PENDIENTE':
+        raise OfertaNoDisponible('La oferta ya fue respondida.')
+    if oferta.vence <= timezone.now():
+        raise OfertaNoDisponible('La oferta venció.')
+    return oferta
+
+
+def aceptar_oferta(oferta_id, estado=None, usuario=None):
+    """
+    Reserva el horario ofrecido para el paciente de la lista de espera.
+    'estado' es el estado inicial del turno (por defecto, 'Pendiente').
+    Si mientras tanto alguien ocupó el horario, la oferta vence, la entrada
+    vuelve a la lista y se relanza HorarioOcupado (con alternativas).
+    """
+    try:
+        with transaction.atomic():
+            oferta = _oferta_pendiente(oferta_id)
+            if estado is None:
+                estado = EstadosTurnos.objects.filter(nombre_est_tur__iexact='Pendiente').first()
+            serializer = TurnosSerializer(data={
+                'odontologo': oferta.odontologo_id,
+                'paciente': oferta.lista_espera.paciente_id,
+                'fecha_turno': oferta.fecha_turno,
+                'horario_turno': oferta.horario_turno_id,
+                'estado_turno': estado.pk if estado else None,
+                'modificado_por': usuario.pk if usuario else None,
+            })
+            serializer.is_valid(raise_exception=True)
+            turno = reservar_turno(serializer)
+            OfertaTurno.objects.filter(pk=oferta.pk).update(estado='ACEPTADA', turno=turno)
+            ListaEspera.objects.filter(pk=oferta.lista_espera_id).update(estado='ASIGNADO', turno_asignado=turno)
+            return turno
+    except HorarioOcupado:
+        # Fuera de la transacción revertida: la oferta queda vencida igual
+        with transaction.atomic():
+            if OfertaTurno.objects.filter(pk=oferta_id, estado='PENDIENTE').update(estado='VENCIDA'):
+                volver_a_esperar(oferta.lista_espera_id)
+        raise
+
+
+def rechazar_oferta(oferta_id):
+    """
+    El paciente no quiere el horario: vuelve a la lista y el horario se
+    ofrece al siguiente candidato. Devuelve la nueva oferta (o None).
+    """
+    with transaction.atomic():
+        oferta = _oferta_pendiente(oferta_id)
+        OfertaTurno.objects.filter(pk=oferta.pk).update(estado='RECHAZADA')
+        volver_a_esperar(oferta.lista_espera_id)
+        return ofrecer_horario(oferta.odontologo_id, oferta.fecha_turno, oferta.horario_turno_id)
+
+
+def _auditoria_creacion(turno):
+    """Registro de CREACION con el mismo formato que registrar_auditoria_turno."""
+    paciente_nombre = str(turno.paciente)
+    odontologo_nombre = str(turno.odontologo)
+    horario = turno.horario_turno.hora if turno.horario_turno else None
+    return AuditoriaTurnos(
+        turno=turno,
+        accion='CREACION',
+        usuario=turno.modificado_por,
+        turno_numero=turno.pk,
+        paciente_nombre=paciente_nombre,
+        paciente_dni=turno.paciente.dni,
+        odontologo_nombre=odontologo_nombre,
+        fecha_turno=turno.fecha_turno,
+        horario_turno=horario,
+        estado_anterior=None,
+        estado_nuevo=str(turno.estado_turno),
+        observaciones=f"Turno agendado para {paciente_nombre} con {odontologo_nombre} el {turno.fecha_turno} a las {horario or 'N/A'} (serie).",
+    )
+
+
+def _marcar_ocupado_al_confirmar(turno):
+    """bulk_create no dispara post_save: se parchea el índice a mano."""
+    slot = (turno.odontologo_id, turno.fecha_turno, turno.horario_turno_id)
+    transaction.on_commit(lambda: indice_disponibilidad.marcar(*slot, ocupado=True))
@@ -1,20 +1,60 @@
+from django.db import transaction
+from django.db.models import F
 from django.db.models.signals import post_save, pre_save, post_delete, pre_delete
 from django.dispatch import receiver
-from .models import Turnos, AuditoriaTurnos
+from django.utils import timezone
+from core.auditoria import auditoria
+from core.catalogos import invalidar_catalogo
+from core.eventos import obtener_broker
+from .models import Turnos, AuditoriaTurnos, HorarioFijo, EstadosTurnos, DiaSemana, VersionAgenda, ListaEspera
+from pacientes.models import Pacientes
+from personal.models import Personal
+from .disponibilidad import indice_disponibilidad
+from .estadisticas import invalidar_estadisticas
+from .lista_espera import generar_ventanas, ofrecer_horario
+from .resumen import CAMPOS_RESUMEN, aplicar_aportes, aporte_turno, aporte_valores, recalcular_libres
+from .serializers import TurnosSerializer
+
+CANAL_TURNOS = 'turnos'
+
+# Campos de Turnos que se ven en el feed .ics (ver calendario.evento_turno)
+CAMPOS_AGENDA = ('odontologo', 'paciente', 'fecha_turno', 'horario_turno', 'estado_turno', 'motivo')
+
+def observacion_cambio_estado(estado_anterior_nombre, estado_nuevo_nombre):
+    """Texto de auditoría para un CAMBIO_ESTADO (compartido con los cambios masivos)."""
+    if estado_nuevo_nombre == 'Atendido':
+        return f"Turno marcado como ATENDIDO (antes: {estado_anterior_nombre})."
+    if estado_nuevo_nombre == 'Cancelado':
+        return f"Turno CANCELADO por inasistencia o imposibilidad (antes: {estado_anterior_nombre}). El horario NO fue liberado."
+    return f"Estado cambiado de '{estado_anterior_nombre}' a '{estado_nuevo_nombre}'."
+
+
+def _objeto_anterior(modelo, pk):
+    """Trae el objeto relacionado que tenía el turno antes del cambio (solo si cambió)."""
+    if pk is None:
+        return None
+    return modelo.objects.filter(pk=pk).first()
+
 
 @receiver(pre_save, sender=Turnos)
 def guardar_estado_anterior_turno(sender, instance, **kwargs):
     """
     Antes de guardar, almacenamos el estado anterior del turno
     para poder compararlo después.
+    Ya no se consulta la base: se usa la foto que RastreoCambiosMixin tomó
+    al cargar el turno ({attname: valor}, las FK como *_id).
     """
     if instance.pk:  # Solo si el objeto ya existe (es una actualización)
-        try:
-            instance._estado_anterior = Turnos.objects.get(pk=instance.pk)
-        except Turnos.DoesNotExist:
-            instance._estado_anterior = None
+        instance._estado_anterior = instance.valores_originales() or None
     else:
         instance._estado_anterior = None
+    instance._campos_modificados = instance.campos_modificados() if instance._estado_anterior else None
+
+
+def _modifico(instance, campos):
+    """Si el save cambió alguno de 'campos' (un alta cambia todos)."""
+    modificados = getattr(instance, '_campos_modificados', None)
+    return modificados is None or not modificados.isdisjoint(campos)
 
 
 @receiver(post_save, sender=Turnos)
@@ -54,34 +94,31 @@ def registrar_auditoria_turno(sender, instance, created, **kwargs):
         
         if estado_anterior:
             # 🚨 PRIORIDAD: Verificar si cambió el estado
-            if estado_anterior.estado_turno != instance.estado_turno:
+            if estado_anterior['estado_turno_id'] != instance.estado_turno_id:
                 accion = 'CAMBIO_ESTADO'
-                estado_anterior_nombre = str(estado_anterior.estado_turno)
+                estado_anterior_nombre = str(_objeto_anterior(EstadosTurnos, estado_anterior['estado_turno_id']) or 'N/A')
                 
                 # Mensajes específicos según el cambio de estado
-                if estado_nuevo_nombre == 'Atendido':
-                    observaciones = f"Turno marcado como ATENDIDO (antes: {estado_anterior_nombre})."
-                elif estado_nuevo_nombre == 'Cancelado':
-                    observaciones = f"Turno CANCELADO por inasistencia o imposibilidad (antes: {estado_anterior_nombre}). El horario NO fue liberado."
-                else:
-                    observaciones = f"Estado cambiado de '{estado_anterior_nombre}' a '{estado_nuevo_nombre}'."
+                observaciones = observacion_cambio_estado(estado_anterior_nombre, estado_nuevo_nombre)
             
             # Si NO cambió el estado, verificar otros cambios
             else:
                 cambios = []
                 
-                if estado_anterior.fecha_turno != instance.fecha_turno:
-                    cambios.append(f"fecha ({estado_anterior.fecha_turno} → {instance.fecha_turno})")
+                if estado_anterior['fecha_turno'] != instance.fecha_turno:
+                    cambios.append(f"fecha ({estado_anterior['fecha_turno']} → {instance.fecha_turno})")
                 
-                if estado_anterior.horario_turno != instance.horario_turno:
-                    hora_anterior = estado_anterior.horario_turno.hora if estado_anterior.horario_turno else 'N/A'
+                if estado_anterior['horario_turno_id'] != instance.horario_turno_id:
+                    horario_anterior = _objeto_anterior(HorarioFijo, estado_anterior['horario_turno_id'])
+                    hora_anterior = horario_anterior.hora if horario_anterior else 'N/A'
                     hora_nueva = instance.horario_turno.hora if instance.horario_turno else 'N/A'
                     cambios.append(f"horario ({hora_anterior} → {hora_nueva})")
                 
-                if estado_anterior.odontologo != instance.odontologo:
-                    cambios.append(f"odontólogo ({estado_anterior.odontologo} → {instance.odontologo})")
+                if estado_anterior['odontologo_id'] != instance.odontologo_id:
+                    odontologo_anterior = _objeto_anterior(Personal, estado_anterior['odontologo_id'])
+                    cambios.append(f"odontólogo ({odontologo_anterior} → {instance.odontologo})")
                 
-                if estado_anterior.paciente != instance.paciente:
+                if estado_anterior['paciente_id'] != instance.paciente_id:
                     cambios.append(f"paciente")
                 
                 if cambios:
@@ -90,7 +127,7 @@ def registrar_auditoria_turno(sender, instance, created, **kwargs):
     
     # Crear el registro de auditoría si hubo una acción relevante
     if accion:
-        AuditoriaTurnos.objects.create(
+        auditoria.registrar(AuditoriaTurnos(
             turno=instance,
             accion=accion,
             usuario=usuario_que_realizo_accion,
@@ -103,7 +140,7 @@ def registrar_auditoria_turno(sender, instance, created, **kwargs):
             estado_anterior=estado_anterior_nombre,
             estado_nuevo=estado_nuevo_nombre,
             observaciones=observaciones,
-        )
+        ))
 
 
 # 🚨 NUEVO: Guardar información ANTES de eliminar
@@ -157,7 +194,7 @@ def registrar_eliminacion_turno(sender, instance, **kwargs):
     usuario_que_elimino = info.get('modificado_por')
     
     # Crear registro de ELIMINACIÓN (liberación de horario)
-    AuditoriaTurnos.objects.create(
+    auditoria.registrar(AuditoriaTurnos(
         turno=None,  # Ya no existe el turno
         accion='ELIMINACION',
         usuario=usuario_que_elimino,  # 🚨 AHORA SÍ TENEMOS EL USUARIO
@@ -170,4 +207,210 @@ def registrar_eliminacion_turno(sender, instance, **kwargs):
         estado_anterior=estado_nombre,
         estado_nuevo='ELIMINADO',
         observaciones=f"Turno ELIMINADO para liberar horario. Paciente: {paciente_nombre}. Estado previo: {estado_nombre}.",
-    )
\ No newline at end of file
+    ))
+
+
+# ============================================
+# ÍNDICE DE DISPONIBILIDAD (cache en memoria)
+# ============================================
+
+@receiver(post_save, sender=Turnos)
+def actualizar_indice_disponibilidad(sender, instance, created, **kwargs):
+    """
+    Parchea el bitmap de disponibilidad cuando se agenda o se reprograma un turno.
+    Se aplica en on_commit para no dejar el cache sucio si la transacción se revierte.
+    """
+    anterior = getattr(instance, '_estado_anterior', None)
+    slot_nuevo = (instance.odontologo_id, instance.fecha_turno, instance.horario_turno_id)
+    slot_anterior = None
+    if anterior:
+        slot_anterior = (anterior['odontologo_id'], anterior['fecha_turno'], anterior['horario_turno_id'])
+
+    def aplicar():
+        if slot_anterior and slot_anterior != slot_nuevo:
+            indice_disponibilidad.marcar(*slot_anterior, ocupado=False)
+        indice_disponibilidad.marcar(*slot_nuevo, ocupado=True)
+
+    transaction.on_commit(aplicar)
+
+
+@receiver(post_delete, sender=Turnos)
+def liberar_indice_disponibilidad(sender, instance, **kwargs):
+    """Al eliminar un turno, su horario vuelve a quedar libre en el índice."""
+    slot = (instance.odontologo_id, instance.fecha_turno, instance.horario_turno_id)
+    transaction.on_commit(lambda: indice_disponibilidad.marcar(*slot, ocupado=False))
+
+
+@receiver(post_save, sender=HorarioFijo)
+@receiver(post_delete, sender=HorarioFijo)
+def invalidar_indice_por_horarios(sender, **kwargs):
+    """Un cambio en los horarios fijos reordena los bits: se descarta todo el índice."""
+    transaction.on_commit(indice_disponibilidad.invalidar)
+
+
+# ============================================
+# VERSIÓN DE AGENDA (ETag del feed .ics)
+# ============================================
+
+@receiver(post_save, sender=Turnos)
+def incrementar_version_agenda(sender, instance, **kwargs):
+    """
+    Un cambio en lo que muestra el feed invalida la agenda de su odontólogo
+    (y la del anterior). Si no cambió nada visible no se escribe.
+    """
+    if not _modifico(instance, CAMPOS_AGENDA):
+        return
+    anterior = getattr(instance, '_estado_anterior', None) or {}
+    VersionAgenda.incrementar(instance.odontologo_id, anterior.get('odontologo_id'))
+
+
+@receiver(post_delete, sender=Turnos)
+def incrementar_version_agenda_eliminacion(sender, instance, **kwargs):
+    VersionAgenda.incrementar(instance.odontologo_id)
+
+
+def _guardo_nombre(update_fields, campos):
+    """Si el save pudo cambiar 'campos' (sin update_fields se guarda todo)."""
+    return update_fields is None or not set(update_fields).isdisjoint(campos)
+
+
+@receiver(post_save, sender=Pacientes)
+def incrementar_version_agenda_paciente(sender, instance, created, update_fields=None, **kwargs):
+    """El nombre del paciente va en el SUMMARY: cambia la agenda de quienes lo atienden."""
+    if created or not _guardo_nombre(update_fields, ('nombre', 'apellido')):
+        return
+    odontologos = (
+        Turnos.objects.filter(paciente_id=instance.pk, fecha_turno__gte=timezone.localdate())
+        .order_by().values_list('odontologo_id', flat=True).distinct()
+    )
+    VersionAgenda.incrementar(*odontologos)
+
+
+@receiver(post_save, sender=Personal)
+def incrementar_version_agenda_odontologo(sender, instance, created, update_fields=None, **kwargs):
+    """El nombre del odontólogo es el nombre del calendario."""
+    if created or not _guardo_nombre(update_fields, ('nombre', 'apellido')):
+        return
+    VersionAgenda.objects.filter(odontologo_id=instance.pk).update(
+        version=F('version') + 1, modificado=timezone.now()
+    )
+
+
+@receiver(post_save, sender=EstadosTurnos)
+def incrementar_versiones_agenda_estado(sender, instance, created, **kwargs):
+    """El nombre del estado va en la DESCRIPTION de todos los feeds."""
+    if not created:
+        VersionAgenda.incrementar_todas()
+
+
+# ============================================
+# RESUMEN DE AGENDA DIARIA (incremental)
+# ============================================
+
+@receiver(post_save, sender=Turnos)
+def actualizar_resumen_agenda(sender, instance, created, **kwargs):
+    """Resta el aporte anterior del turno y suma el nuevo (en la misma transacción)."""
+    if not _modifico(instance, CAMPOS_RESUMEN):
+        return
+    anterior = getattr(instance, '_estado_anterior', None)
+    aportes = [aporte_turno(instance)]
+    if anterior:
+        aportes.append(aporte_valores(anterior, signo=-1))
+    aplicar_aportes(aportes)
+
+
+@receiver(post_delete, sender=Turnos)
+def descontar_resumen_agenda(sender, instance, **kwargs):
+    aplicar_aportes([aporte_turno(instance, signo=-1)])
+
+
+@receiver(post_save, sender=HorarioFijo)
+@receiver(post_delete, sender=HorarioFijo)
+def recalcular_libres_resumen(sender, **kwargs):
+    recalcular_libres()
+
+
+# ============================================
+# CACHE DE ESTADÍSTICAS
+# ============================================
+
+@receiver(post_save, sender=Turnos)
+@receiver(post_delete, sender=Turnos)
+def invalidar_cache_estadisticas(sender, **kwargs):
+    transaction.on_commit(invalidar_estadisticas)
+
+
+# ============================================
+# EVENTOS EN VIVO (push a los clientes)
+# ============================================
+
+def publicar_turnos(tipo, turnos):
+    """
+    Publica un evento por turno en el canal 'turnos' al confirmarse la
+    transacción ('creado' y 'modificado' llevan el turno serializado igual
+    que en la API; 'eliminado' solo el id). También lo usan las operaciones
+    masivas de services.py, que no disparan signals.
+
+    Si nadie está suscripto no se serializa nada: solo se avisa al broker
+    que hubo un cambio sin publicar (ver BrokerEnMemoria.omitir).
+    """
+    if not turnos:
+        return
+    broker = obtener_broker()
+    if not broker.tiene_suscriptores(CANAL_TURNOS):
+        transaction.on_commit(lambda: broker.omitir(CANAL_TURNOS))
+        return
+    if tipo == 'eliminado':
+        eventos = [{'id': turno.pk} for turno in turnos]
+    else:
+        eventos = [dict(TurnosSerializer(turno).data) for turno in turnos]
+
+    def publicar():
+        for datos in eventos:
+            broker.publicar(CANAL_TURNOS, tipo, datos)
+
+    transaction.on_commit(publicar)
+
+
+@receiver(post_save, sender=Turnos)
+def publicar_turno_guardado(sender, instance, created, **kwargs):
+    publicar_turnos('creado' if created else 'modificado', [instance])
+
+
+@receiver(post_delete, sender=Turnos)
+def publicar_turno_eliminado(sender, instance, **kwargs):
+    publicar_turnos('eliminado', [instance])
+
+
+# ============================================
+# LISTA DE ESPERA (ofertas de horarios liberados)
+# ============================================
+
+@receiver(post_delete, sender=Turnos)
+def ofrecer_horario_liberado(sender, instance, **kwargs):
+    """
+    El horario del turno eliminado se ofrece a la lista de espera dentro de
+    la misma transacción (si se revierte la baja, no queda oferta suelta).
+    """
+    ofrecer_horario(instance.odontologo_id, instance.fecha_turno, instance.horario_turno_id)
+
+
+@receiver(post_save, sender=ListaEspera)
+def actualizar_ventanas_espera(sender, instance, **kwargs):
+    """Cualquier cambio en la entrada (fechas, franja, estado...) regenera su índice."""
+    generar_ventanas(instance)
+
+
+# ============================================
+# CACHE DE CATÁLOGOS (ETag de los listados)
+# ============================================
+
+@receiver(post_save, sender=EstadosTurnos)
+@receiver(post_delete, sender=EstadosTurnos)
+@receiver(post_save, sender=HorarioFijo)
+@receiver(post_delete, sender=HorarioFijo)
+@receiver(post_save, sender=DiaSemana)
+@receiver(post_delete, sender=DiaSemana)
+def invalidar_catalogos_turnos(sender, **kwargs):
+    """Cambia el ETag de los listados de estados, horarios y días."""
+    invalidar_catalogo(sender)
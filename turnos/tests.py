@@ -1,3 +1,1643 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import zipfile
+from xml.etree import ElementTree
+from contextlib import suppress
+from datetime import date, time, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import particiones
+from core.auditoria import AuditoriaBufferMiddleware, auditoria
+from core.eventos import obtener_broker
+from pacientes.models import Pacientes, Generos
+from pagos.models import AuditoriaPagos
+from personal.models import Personal, Puestos
+from .calendario import escapar, plegar
+from .disponibilidad import (
+    MAX_DIAS_BUSQUEDA, indice_disponibilidad, iterar_fechas, primeros_horarios_libres,
+)
+from .signals import CANAL_TURNOS
+from .models import (
+    Turnos, EstadosTurnos, HorarioFijo, DiaSemana, AuditoriaTurnos, VersionAgenda, ResumenAgendaDiaria,
+    ListaEspera,
+)
+from .estadisticas import CACHE_VERSION_KEY, calcular_estadisticas
+from .resumen import reconstruir_resumen
+from .serializers import TURNOS_RELACIONES, TurnosSerializer, proyectar_turnos, turno_plano
+from .services import cambiar_estado_masivo, crear_serie_turnos, fechas_serie
+
+
+def proximo_lunes():
+    fecha = timezone.localdate() + timedelta(days=1)
+    while fecha.weekday() != 0:
+        fecha += timedelta(days=1)
+    return fecha
+
+
+class DatosTurnosMixin:
+    """Catálogos, dos odontólogos y un paciente para los tests de turnos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.puesto = Puestos.objects.create(nombre_puesto='Odontólogo/a')
+        genero = Generos.objects.create(nombre_ge='Otro')
+        cls.pendiente = EstadosTurnos.objects.create(nombre_est_tur='Pendiente')
+        cls.atendido = EstadosTurnos.objects.create(nombre_est_tur='Atendido')
+        cls.cancelado = EstadosTurnos.objects.create(nombre_est_tur='Cancelado')
+        for numero in range(5):
+            DiaSemana.objects.create(numero_dia=numero)
+        cls.horarios = [HorarioFijo.objects.create(hora=time(hora, 0)) for hora in range(8, 12)]
+        cls.odontologo = Personal.objects.create(
+            nombre='Ana', apellido='Pérez', dni='1', domicilio='-', telefono='1',
+            email='ana@consultorio.com', puesto=cls.puesto,
+        )
+        cls.odontologo2 = Personal.objects.create(
+            nombre='Beto', apellido='Gómez', dni='2', domicilio='-', telefono='2',
+            email='beto@consultorio.com', puesto=cls.puesto,
+        )
+        cls.paciente = Pacientes.objects.create(
+            nombre='Juan', apellido='López', dni='30111222', fecha_nacimiento=date(1990, 1, 1),
+            telefono='3', genero=genero,
+        )
+
+    def setUp(self):
+        super().setUp()
+        # El índice es global al proceso: que no arrastre datos de otro test
+        indice_disponibilidad.invalidar()
+
+    def crear_turno(self, horario=None, fecha=None, **campos):
+        campos.setdefault('odontologo', self.odontologo)
+        campos.setdefault('estado_turno', self.pendiente)
+        return Turnos.objects.create(
+            paciente=self.paciente,
+            fecha_turno=fecha or proximo_lunes(),
+            horario_turno=horario or self.horarios[0],
+            **campos
+        )
+
+
+# ============================================
+# ÍNDICE DE DISPONIBILIDAD
+# ============================================
+
+class IndiceDisponibilidadTests(DatosTurnosMixin, TestCase):
+
+    def test_parchea_el_indice_al_confirmar(self):
+        fecha = proximo_lunes()
+        horario = self.horarios[1]
+        indice_disponibilidad.cargar([self.odontologo.pk], fecha, fecha)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            turno = self.crear_turno(horario, fecha)
+        # Antes del commit el índice no cambia
+        self.assertTrue(indice_disponibilidad.esta_libre(self.odontologo.pk, fecha, horario.pk))
+        for callback in callbacks:
+            callback()
+        with self.assertNumQueries(0):
+            self.assertFalse(indice_disponibilidad.esta_libre(self.odontologo.pk, fecha, horario.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            turno.delete()
+        with self.assertNumQueries(0):
+            self.assertTrue(indice_disponibilidad.esta_libre(self.odontologo.pk, fecha, horario.pk))
+
+    def test_rollback_no_parchea_el_indice(self):
+        fecha = proximo_lunes()
+        horario = self.horarios[2]
+        indice_disponibilidad.cargar([self.odontologo.pk], fecha, fecha)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.crear_turno(horario, fecha)
+                    raise RuntimeError
+        self.assertTrue(indice_disponibilidad.esta_libre(self.odontologo.pk, fecha, horario.pk))
+
+    def test_cambio_de_horarios_fijos_invalida_el_indice(self):
+        fecha = proximo_lunes()
+        ocupado = self.horarios[0]
+        self.crear_turno(ocupado, fecha)
+        self.assertEqual(indice_disponibilidad.bit(ocupado.pk), 0)
+
+        # Un horario más temprano corre todos los bits un lugar
+        with self.captureOnCommitCallbacks(execute=True):
+            temprano = HorarioFijo.objects.create(hora=time(7, 0))
+        self.assertEqual(indice_disponibilidad.bit(temprano.pk), 0)
+        self.assertEqual(indice_disponibilidad.bit(ocupado.pk), 1)
+        self.assertTrue(indice_disponibilidad.esta_libre(self.odontologo.pk, fecha, temprano.pk))
+        self.assertFalse(indice_disponibilidad.esta_libre(self.odontologo.pk, fecha, ocupado.pk))
+
+    def test_invalidacion_durante_la_carga_de_horarios(self):
+        fecha = proximo_lunes()
+        self.crear_turno(self.horarios[3], fecha)
+        leer = indice_disponibilidad._leer_horarios
+        llamadas = []
+
+        def leer_e_invalidar():
+            llamadas.append(1)
+            horarios = leer()
+            if len(llamadas) == 1:
+                # Otro hilo invalida entre la consulta y el guardado
+                indice_disponibilidad.invalidar()
+            return horarios
+
+        with mock.patch.object(indice_disponibilidad, '_leer_horarios', leer_e_invalidar):
+            indice_disponibilidad.cargar([self.odontologo.pk], fecha, fecha)
+        self.assertEqual(len(llamadas), 2)
+        self.assertFalse(indice_disponibilidad.esta_libre(self.odontologo.pk, fecha, self.horarios[3].pk))
+        self.assertTrue(indice_disponibilidad.esta_libre(self.odontologo.pk, fecha, self.horarios[0].pk))
+
+
+# ============================================
+# RASTREO DE CAMBIOS (foto de valores originales)
+# ============================================
+
+class RastreoCambiosTests(DatosTurnosMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.turno = self.crear_turno(motivo='Control')
+
+    def test_la_foto_se_toma_al_leer_de_la_base(self):
+        turno = Turnos.objects.get(pk=self.turno.pk)
+        with self.assertNumQueries(0):
+            originales = turno.valores_originales()
+            self.assertEqual(originales['estado_turno_id'], self.pendiente.pk)
+            self.assertEqual(originales['motivo'], 'Control')
+            self.assertEqual(turno.campos_modificados(), set())
+
+            turno.estado_turno = self.atendido
+            turno.motivo = 'Urgencia'
+            self.assertEqual(turno.campos_modificados(), {'estado_turno', 'motivo'})
+            # La foto no cambia hasta guardar
+            self.assertEqual(turno.valor_original('estado_turno'), self.pendiente.pk)
+            self.assertEqual(turno.valor_original('estado_turno_id'), self.pendiente.pk)
+
+    def test_campos_diferidos_no_cuentan_como_modificados(self):
+        turno = Turnos.objects.only('id', 'motivo').get(pk=self.turno.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(set(turno.valores_originales()), {'id', 'motivo'})
+            self.assertEqual(turno.campos_modificados(), set())
+            turno.motivo = 'Otro'
+            self.assertEqual(turno.campos_modificados(), {'motivo'})
+
+    def test_guardar_cambios_actualiza_solo_las_columnas_modificadas(self):
+        turno = Turnos.objects.get(pk=self.turno.pk)
+        with self.assertNumQueries(0):
+            self.assertIsNone(turno.guardar_cambios())
+
+        turno.motivo = 'Urgencia'
+        with CaptureQueriesContext(connection) as consultas:
+            turno.guardar_cambios()
+        [update] = [q['sql'] for q in consultas if q['sql'].startswith('UPDATE "turnos_turnos"')]
+        columnas = update.split(' SET ', 1)[1].split(' WHERE ', 1)[0]
+        self.assertEqual(columnas.count('='), 1)
+        self.assertIn('"motivo"', columnas)
+        self.assertEqual(Turnos.objects.get(pk=turno.pk).motivo, 'Urgencia')
+
+    def test_la_foto_se_renueva_al_guardar_y_al_refrescar(self):
+        turno = Turnos.objects.get(pk=self.turno.pk)
+        turno.estado_turno = self.atendido
+        turno.save()
+        self.assertEqual(turno.campos_modificados(), set())
+        self.assertEqual(turno.valor_original('estado_turno'), self.atendido.pk)
+
+        # Con update_fields solo se renueva la foto de esos campos
+        turno.motivo = 'Urgencia'
+        turno.fecha_turno += timedelta(days=1)
+        turno.save(update_fields=['motivo'])
+        self.assertEqual(turno.campos_modificados(), {'fecha_turno'})
+
+        Turnos.objects.filter(pk=turno.pk).update(motivo='Cambiado en la base')
+        turno.refresh_from_db(fields=['motivo'])
+        self.assertEqual(turno.valor_original('motivo'), 'Cambiado en la base')
+        self.assertEqual(turno.campos_modificados(), {'fecha_turno'})
+        turno.refresh_from_db()
+        self.assertEqual(turno.campos_modificados(), set())
+        self.assertEqual(turno.valor_original('fecha_turno'), self.turno.fecha_turno)
+
+    def test_instancia_armada_a_mano_lee_la_base_una_vez(self):
+        turno = Turnos(pk=self.turno.pk, odontologo=self.odontologo, paciente=self.paciente,
+                       fecha_turno=self.turno.fecha_turno, horario_turno=self.horarios[0],
+                       estado_turno=self.atendido, motivo='Control')
+        with self.assertNumQueries(1):
+            self.assertEqual(turno.valor_original('estado_turno'), self.pendiente.pk)
+            self.assertEqual(turno.campos_modificados(), {'estado_turno'})
+        with self.assertNumQueries(1):
+            self.assertEqual(Turnos(pk=self.turno.pk + 1000).valores_originales(), {})
+        with self.assertNumQueries(0):
+            nuevo = Turnos(odontologo=self.odontologo, motivo='Nuevo')
+            self.assertEqual(nuevo.valores_originales(), {})
+            self.assertEqual(nuevo.campos_modificados(), {field.name for field in Turnos._meta.concrete_fields})
+
+
+# ============================================
+# DISPONIBILIDAD (endpoint)
+# ============================================
+
+class DisponibilidadTurnosTests(DatosTurnosMixin, TestCase):
+    url = '/api/turnos/disponibilidad/'
+
+    def test_horarios_libres_por_odontologo_y_dia(self):
+        lunes = proximo_lunes()
+        ocupado = self.crear_turno(self.horarios[1], lunes)
+        params = {
+            'odontologos': f'{self.odontologo.pk},{self.odontologo2.pk}',
+            'fecha_desde': lunes.isoformat(),
+            'fecha_hasta': (lunes + timedelta(days=6)).isoformat(),
+        }
+        respuesta = self.client.get(self.url, params)
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual([o['odontologo'] for o in datos['odontologos']], [self.odontologo.pk, self.odontologo2.pk])
+
+        ana, beto = datos['odontologos']
+        # Sábado y domingo no son días hábiles
+        self.assertEqual([dia['fecha'] for dia in ana['dias']],
+                         [(lunes + timedelta(days=n)).isoformat() for n in range(5)])
+        todos = [horario.pk for horario in self.horarios]
+        self.assertEqual([h['id'] for h in ana['dias'][0]['horarios_libres']],
+                         [pk for pk in todos if pk != self.horarios[1].pk])
+        self.assertEqual([h['id'] for h in beto['dias'][0]['horarios_libres']], todos)
+        self.assertEqual(ana['dias'][0]['horarios_libres'][0]['hora'], '08:00:00')
+
+        # Al editar un turno, su propio horario cuenta como libre
+        datos = self.client.get(self.url, dict(params, excluir_turno=ocupado.pk)).json()
+        self.assertEqual([h['id'] for h in datos['odontologos'][0]['dias'][0]['horarios_libres']], todos)
+
+    def test_parametros_invalidos_devuelven_400(self):
+        lunes = proximo_lunes().isoformat()
+        odontologos = str(self.odontologo.pk)
+        for params in (
+            {'fecha_desde': lunes},
+            {'odontologos': '1,a', 'fecha_desde': lunes},
+            {'odontologos': odontologos},
+            {'odontologos': odontologos, 'fecha_desde': lunes, 'fecha_hasta': '2000-01-01'},
+            {'odontologos': odontologos, 'fecha_desde': '2025-01-01', 'fecha_hasta': '2025-06-01'},
+            {'odontologos': odontologos, 'fecha_desde': lunes, 'excluir_turno': 'x'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_fecha_imposible_nombra_el_parametro(self):
+        # Bien formada pero inexistente: parse_date lanza ValueError
+        for param in ('fecha_desde', 'fecha_hasta'):
+            params = {'odontologos': str(self.odontologo.pk), 'fecha_desde': '2025-02-01', param: '2025-02-30'}
+            with self.subTest(param=param):
+                respuesta = self.client.get(self.url, params)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn(f"'{param}'", respuesta.json()['detail'])
+
+    def test_fechas_imposibles_en_los_demas_listados(self):
+        for url, param in (
+            ('/api/turnos/', 'fecha_desde'),
+            ('/api/turnos/', 'fecha'),
+            ('/api/turnos/disponibilidad/libre/', 'fecha'),
+            ('/api/turnos/disponibilidad/primeros/', 'fecha_desde'),
+            ('/api/turnos/resumen/', 'fecha_hasta'),
+            ('/api/turnos/auditoria/', 'fecha_accion'),
+            ('/api/turnos/auditoria/exportar/', 'fecha_desde'),
+        ):
+            with self.subTest(url=url, param=param):
+                respuesta = self.client.get(url, {param: '2025-02-30'})
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn(f"'{param}'", respuesta.json()['detail'])
+
+
+# ============================================
+# PRIMER TURNO DISPONIBLE
+# ============================================
+
+class PrimerosHorariosLibresTests(DatosTurnosMixin, TestCase):
+
+    def ocupar(self, odontologo, desde, hasta, salvo=()):
+        """Ocupa todos los horarios de los días del rango, salvo los (fecha, horario) de 'salvo'."""
+        Turnos.objects.bulk_create([
+            Turnos(odontologo=odontologo, paciente=self.paciente, fecha_turno=fecha,
+                   horario_turno=horario, estado_turno=self.pendiente)
+            for fecha in iterar_fechas(desde, hasta)
+            for horario in self.horarios
+            if (fecha, horario) not in salvo
+        ])
+
+    def test_intercala_odontologos_por_fecha_hora_e_id(self):
+        lunes = proximo_lunes()
+        for horario in self.horarios[:2]:
+            self.crear_turno(horario, lunes, odontologo=self.odontologo)
+        self.crear_turno(self.horarios[0], lunes, odontologo=self.odontologo2)
+
+        libres = primeros_horarios_libres([self.odontologo2.pk, self.odontologo.pk], 5, fecha_desde=lunes)
+        ana, beto = self.odontologo.pk, self.odontologo2.pk
+        self.assertEqual([(fecha, odontologo, horario) for fecha, _, odontologo, horario in libres], [
+            (lunes, beto, self.horarios[1].pk),
+            (lunes, ana, self.horarios[2].pk),
+            (lunes, beto, self.horarios[2].pk),
+            (lunes, ana, self.horarios[3].pk),
+            (lunes, beto, self.horarios[3].pk),
+        ])
+        self.assertEqual(libres[0][1], self.horarios[1].hora)
+
+    def test_avanza_de_a_bloques_de_una_semana(self):
+        lunes = proximo_lunes()
+        # Primera semana completa: el primer libre es el lunes siguiente
+        self.ocupar(self.odontologo, lunes, lunes + timedelta(days=6))
+
+        with mock.patch.object(indice_disponibilidad, 'cargar', wraps=indice_disponibilidad.cargar) as cargar:
+            libres = primeros_horarios_libres([self.odontologo.pk], 1, fecha_desde=lunes)
+        self.assertEqual(libres, [(lunes + timedelta(weeks=1), self.horarios[0].hora, self.odontologo.pk,
+                                   self.horarios[0].pk)])
+        rangos = [(desde, hasta) for _, desde, hasta in (llamada.args for llamada in cargar.call_args_list)]
+        # Solo se cargan las dos semanas recorridas, de a 7 días
+        self.assertEqual(sorted(set(rangos)), [
+            (lunes, lunes + timedelta(days=6)),
+            (lunes + timedelta(days=7), lunes + timedelta(days=13)),
+        ])
+
+    def test_horizonte_de_busqueda(self):
+        lunes = proximo_lunes()
+        ultimo_dia = lunes + timedelta(days=MAX_DIAS_BUSQUEDA - 1)
+        self.assertLess(ultimo_dia.weekday(), 5)
+        self.ocupar(self.odontologo, lunes, ultimo_dia + timedelta(days=7),
+                    salvo={(ultimo_dia, self.horarios[3]), (ultimo_dia + timedelta(days=3), self.horarios[0])})
+
+        # El último día del horizonte todavía se recorre; el siguiente hábil ya no
+        self.assertEqual(
+            primeros_horarios_libres([self.odontologo.pk], 5, fecha_desde=lunes),
+            [(ultimo_dia, self.horarios[3].hora, self.odontologo.pk, self.horarios[3].pk)],
+        )
+
+    def test_sin_horarios_libres(self):
+        lunes = proximo_lunes()
+        self.assertEqual(primeros_horarios_libres([], 5, fecha_desde=lunes), [])
+        self.assertEqual(primeros_horarios_libres([self.odontologo.pk], 0, fecha_desde=lunes), [])
+
+        self.ocupar(self.odontologo, lunes, lunes + timedelta(days=13))
+        self.assertEqual(primeros_horarios_libres([self.odontologo.pk], 3, fecha_desde=lunes, dias_max=14), [])
+
+        self.ocupar(self.odontologo2, lunes, lunes + timedelta(days=MAX_DIAS_BUSQUEDA + 7))
+        self.ocupar(self.odontologo, lunes + timedelta(days=14), lunes + timedelta(days=MAX_DIAS_BUSQUEDA + 7))
+        respuesta = self.client.get('/api/turnos/disponibilidad/primeros/', {'fecha_desde': lunes.isoformat()})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {'horarios': [], 'horizonte_dias': MAX_DIAS_BUSQUEDA})
+
+
+# ============================================
+# RESERVA CON CONFLICTO (409 + alternativas)
+# ============================================
+
+class ReservaHorarioOcupadoTests(DatosTurnosMixin, TestCase):
+
+    def datos_turno(self, horario, fecha):
+        return {
+            'odontologo': self.odontologo.pk,
+            'paciente': self.paciente.pk,
+            'horario_turno': horario.pk,
+            'estado_turno': self.pendiente.pk,
+            'fecha_turno': fecha.isoformat(),
+        }
+
+    def test_doble_reserva_devuelve_409_con_alternativas(self):
+        lunes = proximo_lunes()
+        martes = lunes + timedelta(days=1)
+        self.crear_turno(self.horarios[0], lunes)
+        self.crear_turno(self.horarios[1], lunes)
+
+        respuesta = self.client.post('/api/turnos/', self.datos_turno(self.horarios[1], lunes),
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 409)
+        datos = respuesta.json()
+        self.assertIn('detail', datos)
+        # Primero el mismo día, del horario más cercano al más lejano; después el mismo horario otro día
+        self.assertEqual(
+            [(alternativa['fecha'], alternativa['horario_turno']) for alternativa in datos['alternativas']],
+            [
+                (lunes.isoformat(), self.horarios[2].pk),
+                (lunes.isoformat(), self.horarios[3].pk),
+                (martes.isoformat(), self.horarios[1].pk),
+            ],
+        )
+        self.assertEqual(Turnos.objects.filter(fecha_turno=lunes).count(), 2)
+
+    def test_otro_odontologo_puede_reservar_el_mismo_horario(self):
+        lunes = proximo_lunes()
+        self.crear_turno(self.horarios[0], lunes)
+        datos = dict(self.datos_turno(self.horarios[0], lunes), odontologo=self.odontologo2.pk)
+        respuesta = self.client.post('/api/turnos/', datos, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+
+    def test_reprogramar_a_un_horario_ocupado_devuelve_409(self):
+        lunes = proximo_lunes()
+        self.crear_turno(self.horarios[0], lunes)
+        turno = self.crear_turno(self.horarios[3], lunes)
+
+        respuesta = self.client.patch(f'/api/turnos/{turno.pk}/', {'horario_turno': self.horarios[0].pk},
+                                      content_type='application/json')
+        self.assertEqual(respuesta.status_code, 409)
+        # La alternativa más cercana a las 8:00 es las 9:00
+        self.assertEqual(respuesta.json()['alternativas'][0]['horario_turno'], self.horarios[1].pk)
+        turno.refresh_from_db()
+        self.assertEqual(turno.horario_turno_id, self.horarios[3].pk)
+
+
+# ============================================
+# CAMBIO DE ESTADO MASIVO
+# ============================================
+
+class CambioEstadoMasivoTests(DatosTurnosMixin, TestCase):
+    url = '/api/turnos/cambiar-estado/'
+
+    def turnos_del_dia(self, fecha, por_odontologo):
+        """'por_odontologo' turnos de cada odontólogo el mismo día."""
+        return [
+            self.crear_turno(horario, fecha, odontologo=odontologo)
+            for odontologo in (self.odontologo, self.odontologo2)
+            for horario in self.horarios[:por_odontologo]
+        ]
+
+    def test_un_solo_update_sin_importar_la_cantidad(self):
+        lunes = proximo_lunes()
+        pocos = self.turnos_del_dia(lunes, 1)
+        muchos = self.turnos_del_dia(lunes + timedelta(days=1), 4)
+
+        def consultas(turnos):
+            with CaptureQueriesContext(connection) as capturadas:
+                cambiar_estado_masivo([turno.pk for turno in turnos], self.atendido)
+            updates = [q['sql'] for q in capturadas if q['sql'].startswith('UPDATE "turnos_turnos"')]
+            self.assertEqual(len(updates), 1)
+            return len(capturadas)
+
+        cantidad = consultas(pocos)
+        with self.assertNumQueries(cantidad):
+            cambiar_estado_masivo([turno.pk for turno in muchos], self.atendido)
+        self.assertEqual(Turnos.objects.filter(estado_turno=self.atendido).count(), len(pocos) + len(muchos))
+
+    def test_auditoria_y_clasificacion_de_ids(self):
+        lunes = proximo_lunes()
+        a_cambiar = self.turnos_del_dia(lunes, 2)
+        ya_atendido = self.crear_turno(self.horarios[3], lunes, estado_turno=self.atendido)
+        inexistente = max(turno.pk for turno in a_cambiar + [ya_atendido]) + 100
+
+        with mock.patch.object(auditoria, 'registrar_varios', wraps=auditoria.registrar_varios) as registrar:
+            with self.captureOnCommitCallbacks(execute=True):
+                respuesta = self.client.post(self.url, {
+                    'turnos': [turno.pk for turno in a_cambiar] + [ya_atendido.pk, inexistente],
+                    'estado_turno': self.atendido.pk,
+                    'modificado_por': self.odontologo.pk,
+                }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {
+            'actualizados': sorted(turno.pk for turno in a_cambiar),
+            'sin_cambios': [ya_atendido.pk],
+            'no_encontrados': [inexistente],
+        })
+
+        # Una sola llamada al escritor con un registro por turno que cambió
+        registrar.assert_called_once()
+        registros = AuditoriaTurnos.objects.filter(accion='CAMBIO_ESTADO').order_by('turno_numero')
+        self.assertEqual([registro.turno_numero for registro in registros], sorted(turno.pk for turno in a_cambiar))
+        registro = registros[0]
+        self.assertEqual(
+            (registro.usuario_id, registro.estado_anterior, registro.estado_nuevo, registro.paciente_dni,
+             registro.horario_turno),
+            (self.odontologo.pk, 'Pendiente', 'Atendido', '30111222', self.horarios[0].hora),
+        )
+        self.assertFalse(AuditoriaTurnos.objects.filter(accion='CAMBIO_ESTADO', turno_numero=ya_atendido.pk).exists())
+        self.assertEqual(
+            set(Turnos.objects.filter(pk__in=[t.pk for t in a_cambiar]).values_list('estado_turno', 'modificado_por')),
+            {(self.atendido.pk, self.odontologo.pk)},
+        )
+
+    def test_estado_invalido_devuelve_400(self):
+        turno = self.crear_turno()
+        for estado in (self.atendido.pk + 1000, 'atendido', None):
+            with self.subTest(estado=estado):
+                respuesta = self.client.post(self.url, {'turnos': [turno.pk], 'estado_turno': estado},
+                                             content_type='application/json')
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('estado_turno', respuesta.json())
+        turno.refresh_from_db()
+        self.assertEqual(turno.estado_turno, self.pendiente)
+
+
+# ============================================
+# SERIES DE TURNOS
+# ============================================
+
+class SerieTurnosTests(DatosTurnosMixin, TestCase):
+    url = '/api/turnos/series/'
+
+    def pedir_serie(self, fecha_inicio, frecuencia='semanal', cantidad=4, horario=None):
+        return self.client.post(self.url, {
+            'odontologo': self.odontologo.pk,
+            'paciente': self.paciente.pk,
+            'horario_turno': (horario or self.horarios[0]).pk,
+            'estado_turno': self.pendiente.pk,
+            'fecha_inicio': fecha_inicio.isoformat(),
+            'frecuencia': frecuencia,
+            'cantidad': cantidad,
+            'modificado_por': self.odontologo.pk,
+        }, content_type='application/json')
+
+    def test_fechas_de_cada_frecuencia(self):
+        lunes = date(2027, 3, 1)
+        self.assertEqual(fechas_serie(lunes, 'semanal', 3), [lunes, date(2027, 3, 8), date(2027, 3, 15)])
+        self.assertEqual(fechas_serie(lunes, 'quincenal', 3), [lunes, date(2027, 3, 15), date(2027, 3, 29)])
+        # Mensual desde fin de mes: se suma desde el inicio, sin arrastrar el recorte de febrero
+        self.assertEqual(
+            fechas_serie(date(2027, 1, 31), 'mensual', 4),
+            [date(2027, 1, 31), date(2027, 2, 28), date(2027, 3, 31), date(2027, 4, 30)],
+        )
+        self.assertEqual(fechas_serie(date(2028, 1, 31), 'mensual', 2)[1], date(2028, 2, 29))
+
+    def test_crea_la_serie_en_un_insert_con_su_auditoria(self):
+        lunes = proximo_lunes()
+        ocupado = self.crear_turno(self.horarios[0], lunes + timedelta(weeks=1), odontologo=self.odontologo)
+
+        with CaptureQueriesContext(connection) as consultas:
+            with self.captureOnCommitCallbacks(execute=True):
+                respuesta = self.pedir_serie(lunes)
+        self.assertEqual(respuesta.status_code, 201)
+        datos = respuesta.json()
+        esperadas = [lunes, lunes + timedelta(weeks=2), lunes + timedelta(weeks=3)]
+        self.assertEqual([turno['fecha_turno'] for turno in datos['creados']], [f.isoformat() for f in esperadas])
+        inserts = [q['sql'] for q in consultas if q['sql'].startswith('INSERT INTO "turnos_turnos"')]
+        self.assertEqual(len(inserts), 1)
+
+        # La fecha ocupada vuelve como conflicto, con horarios libres cercanos ese día
+        [conflicto] = datos['conflictos']
+        self.assertEqual((conflicto['fecha'], conflicto['motivo']), (ocupado.fecha_turno.isoformat(), 'ocupado'))
+        self.assertEqual([a['horario_turno'] for a in conflicto['alternativas']],
+                         [horario.pk for horario in self.horarios[1:4]])
+
+        registros = AuditoriaTurnos.objects.filter(accion='CREACION', turno_numero__in=[t['id'] for t in datos['creados']])
+        self.assertEqual(registros.count(), 3)
+        self.assertEqual({registro.usuario_id for registro in registros}, {self.odontologo.pk})
+
+    def test_todas_ocupadas_devuelve_409(self):
+        lunes = proximo_lunes()
+        for semana in range(2):
+            self.crear_turno(self.horarios[1], lunes + timedelta(weeks=semana))
+        respuesta = self.pedir_serie(lunes, cantidad=2, horario=self.horarios[1])
+        self.assertEqual(respuesta.status_code, 409)
+        datos = respuesta.json()
+        self.assertEqual(datos['creados'], [])
+        self.assertEqual([c['motivo'] for c in datos['conflictos']], ['ocupado', 'ocupado'])
+        # Del horario más cercano a las 9:00 al más lejano
+        self.assertEqual([a['horario_turno'] for a in datos['conflictos'][0]['alternativas']],
+                         [self.horarios[0].pk, self.horarios[2].pk, self.horarios[3].pk])
+        self.assertEqual(Turnos.objects.count(), 2)
+
+    def test_mensual_desde_el_31_saltea_los_dias_no_habiles(self):
+        inicio = date(timezone.localdate().year + 1, 1, 31)
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.pedir_serie(inicio, 'mensual', cantidad=6)
+        candidatas = fechas_serie(inicio, 'mensual', 6)
+        creadas = [turno['fecha_turno'] for turno in respuesta.json()['creados']]
+        self.assertEqual(creadas, [f.isoformat() for f in candidatas if f.weekday() < 5])
+        self.assertEqual(
+            [c['fecha'] for c in respuesta.json()['conflictos'] if c['motivo'] == 'dia_no_habil'],
+            [f.isoformat() for f in candidatas if f.weekday() >= 5],
+        )
+
+    def test_reintenta_una_vez_si_el_insert_choca(self):
+        lunes = proximo_lunes()
+        insertar = Turnos.objects.bulk_create
+
+        def primera_falla(*args, **kwargs):
+            # Como si otra recepción hubiera tomado una fecha entre el SELECT y el INSERT
+            if bulk.call_count == 1:
+                raise IntegrityError('carrera')
+            return insertar(*args, **kwargs)
+
+        with mock.patch.object(Turnos.objects, 'bulk_create', side_effect=primera_falla) as bulk:
+            with self.captureOnCommitCallbacks(execute=True):
+                creados, conflictos = crear_serie_turnos(
+                    self.odontologo, self.paciente, self.horarios[2], self.pendiente, lunes, 'quincenal', 2
+                )
+        self.assertEqual(bulk.call_count, 2)
+        self.assertEqual([turno.fecha_turno for turno in creados], [lunes, lunes + timedelta(weeks=2)])
+        self.assertEqual(conflictos, [])
+        # La auditoría del intento revertido se descarta con su savepoint
+        self.assertEqual(AuditoriaTurnos.objects.filter(accion='CREACION').count(), 2)
+
+        with mock.patch.object(Turnos.objects, 'bulk_create', side_effect=IntegrityError('carrera')) as bulk:
+            with self.assertRaises(IntegrityError):
+                crear_serie_turnos(self.odontologo, self.paciente, self.horarios[3], self.pendiente, lunes, 'semanal', 2)
+        self.assertEqual(bulk.call_count, 2)
+
+
+# ============================================
+# RESUMEN DE AGENDA DIARIA (incremental)
+# ============================================
+
+class ResumenAgendaTests(DatosTurnosMixin, TestCase):
+
+    def filas(self):
+        return sorted(
+            ResumenAgendaDiaria.objects.values_list(
+                'fecha', 'odontologo_id', 'total_turnos', 'por_estado', 'ocupados', 'libres'
+            )
+        )
+
+    def assertIgualAReconstruido(self):
+        incremental = self.filas()
+        reconstruir_resumen()
+        self.assertEqual(incremental, self.filas())
+
+    def test_altas_cambios_y_bajas_coinciden_con_la_reconstruccion(self):
+        lunes = proximo_lunes()
+        martes = lunes + timedelta(days=1)
+        turnos = [self.crear_turno(horario, lunes) for horario in self.horarios[:3]]
+        sin_horario = Turnos.objects.create(
+            odontologo=self.odontologo, paciente=self.paciente, estado_turno=self.pendiente,
+            fecha_turno=lunes, horario_turno=None,
+        )
+        self.crear_turno(self.horarios[0], lunes, odontologo=self.odontologo2)
+        self.assertIgualAReconstruido()
+
+        turnos[0].estado_turno = self.atendido
+        turnos[0].save()
+        turnos[1].fecha_turno = martes
+        turnos[1].save()
+        turnos[2].odontologo = self.odontologo2
+        turnos[2].save()
+        sin_horario.horario_turno = self.horarios[3]
+        sin_horario.estado_turno = self.cancelado
+        sin_horario.save()
+        self.assertIgualAReconstruido()
+
+        for turno in Turnos.objects.filter(odontologo=self.odontologo2):
+            turno.delete()
+        self.assertIgualAReconstruido()
+        # Un día que se queda sin turnos no tiene fila
+        self.assertFalse(ResumenAgendaDiaria.objects.filter(odontologo=self.odontologo2).exists())
+
+    def test_libres_sigue_a_los_horarios_fijos(self):
+        lunes = proximo_lunes()
+        self.crear_turno(self.horarios[0], lunes)
+        self.assertEqual(ResumenAgendaDiaria.objects.get().libres, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            HorarioFijo.objects.create(hora=time(12, 0))
+        self.assertEqual(ResumenAgendaDiaria.objects.get().libres, 4)
+        # El conteo cacheado también cambió de versión
+        self.crear_turno(self.horarios[1], lunes)
+        self.assertEqual(ResumenAgendaDiaria.objects.get().libres, 3)
+        self.assertIgualAReconstruido()
+
+    def test_cambio_que_no_afecta_agenda_ni_resumen_no_escribe(self):
+        turno = self.crear_turno(self.horarios[0])
+        version = VersionAgenda.objects.get(odontologo=self.odontologo).version
+        turno.modificado_por = None
+        with self.assertNumQueries(1):  # solo el UPDATE del turno
+            turno.save(update_fields=['modificado_por'])
+        self.assertEqual(VersionAgenda.objects.get(odontologo=self.odontologo).version, version)
+
+        turno.motivo = 'Control'
+        turno.save()
+        self.assertEqual(VersionAgenda.objects.get(odontologo=self.odontologo).version, version + 1)
+
+
+# ============================================
+# LISTA DE ESPERA
+# ============================================
+
+class ListaEsperaTests(DatosTurnosMixin, TestCase):
+
+    def crear_entrada(self, **campos):
+        lunes = proximo_lunes()
+        return ListaEspera.objects.create(
+            paciente=self.paciente, fecha_desde=lunes, fecha_hasta=lunes + timedelta(days=7), **campos
+        )
+
+    def test_filtros_invalidos_devuelven_400(self):
+        for params in ({'paciente': 'abc'}, {'odontologo': '1.5'}, {'estado': 'OTRO'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/turnos/lista-espera/', params).status_code, 400)
+        self.assertEqual(self.client.get('/api/turnos/ofertas/', {'estado': 'otro'}).status_code, 400)
+
+    def test_filtros_validos(self):
+        entrada = self.crear_entrada(odontologo=self.odontologo)
+        self.crear_entrada(estado='CANCELADO')
+        respuesta = self.client.get(
+            '/api/turnos/lista-espera/',
+            {'estado': 'ESPERANDO', 'paciente': self.paciente.pk, 'odontologo': self.odontologo.pk},
+        )
+        self.assertEqual([fila['id'] for fila in respuesta.json()], [entrada.pk])
+        self.assertEqual(self.client.get('/api/turnos/ofertas/', {'estado': 'PENDIENTE'}).json(), [])
+
+    def test_estado_solo_se_puede_cancelar(self):
+        entrada = self.crear_entrada()
+        url = f'/api/turnos/lista-espera/{entrada.pk}/'
+        for estado in ('ASIGNADO', 'OFRECIDO'):
+            with self.subTest(estado=estado):
+                respuesta = self.client.patch(url, {'estado': estado}, content_type='application/json')
+                self.assertEqual(respuesta.status_code, 400)
+
+        respuesta = self.client.patch(url, {'estado': 'CANCELADO'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        # Una entrada cancelada no vuelve a la lista
+        respuesta = self.client.patch(url, {'estado': 'ESPERANDO'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+        entrada.refresh_from_db()
+        self.assertEqual(entrada.estado, 'CANCELADO')
+        self.assertFalse(entrada.ventanas.exists())
+
+    def test_alta_con_otro_estado_devuelve_400(self):
+        lunes = proximo_lunes()
+        datos = {
+            'paciente': self.paciente.pk, 'fecha_desde': lunes.isoformat(),
+            'fecha_hasta': (lunes + timedelta(days=7)).isoformat(), 'estado': 'ASIGNADO',
+        }
+        respuesta = self.client.post('/api/turnos/lista-espera/', datos, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('estado', respuesta.json())
+
+
+# ============================================
+# ESTADÍSTICAS (agregación y cache)
+# ============================================
+
+class EstadisticasTurnosTests(DatosTurnosMixin, TestCase):
+    url = '/api/turnos/estadisticas/'
+
+    def setUp(self):
+        super().setUp()
+        # La versión de la cache es global al proceso
+        cache.clear()
+        lunes, miercoles, domingo = date(2025, 3, 3), date(2025, 3, 5), date(2025, 3, 9)
+        for fecha, horario, estado, odontologo in (
+            (lunes, 0, self.pendiente, self.odontologo),
+            (lunes, 1, self.atendido, self.odontologo),
+            (lunes, 1, self.atendido, self.odontologo2),
+            (miercoles, 2, self.atendido, self.odontologo),
+            (domingo, 0, self.cancelado, self.odontologo2),
+        ):
+            self.crear_turno(self.horarios[horario], fecha, estado_turno=estado, odontologo=odontologo)
+
+    def test_agrupa_en_una_consulta_por_dia_de_la_semana(self):
+        with self.assertNumQueries(1):
+            datos = calcular_estadisticas('all')
+        self.assertEqual(datos['total'], 5)
+        self.assertEqual(
+            [(g['numero_dia'], g['nombre'], g['cantidad']) for g in datos['por_dia_semana']],
+            [(0, 'Lunes', 3), (2, 'Miércoles', 1), (6, 'Domingo', 1)],
+        )
+        self.assertEqual(
+            [(g['nombre'], g['cantidad']) for g in datos['por_estado']],
+            [('Pendiente', 1), ('Atendido', 3), ('Cancelado', 1)],
+        )
+        self.assertEqual(
+            [(g['nombre'], g['cantidad']) for g in datos['por_odontologo']],
+            [('Ana Pérez', 3), ('Beto Gómez', 2)],
+        )
+        self.assertEqual(
+            [(g['hora'], g['cantidad']) for g in datos['por_horario']],
+            [('08:00', 2), ('09:00', 2), ('10:00', 1)],
+        )
+
+        # Los filtros se aplican antes de agrupar
+        datos = calcular_estadisticas('all', estado=self.atendido.pk, odontologo=self.odontologo.pk)
+        self.assertEqual(
+            [(g['nombre'], g['cantidad']) for g in datos['por_dia_semana']],
+            [('Lunes', 1), ('Miércoles', 1)],
+        )
+
+    def test_periodo_incluye_su_primer_dia(self):
+        hoy = timezone.localdate()
+        self.crear_turno(fecha=hoy - timedelta(days=7))
+        self.crear_turno(fecha=hoy - timedelta(days=8))
+        datos = calcular_estadisticas('last_week')
+        self.assertEqual((datos['fecha_desde'], datos['total']), (hoy - timedelta(days=7), 1))
+
+    def test_parametros_invalidos_devuelven_400(self):
+        for params in ({'periodo': 'siempre'}, {'estado': 'x'}, {'odontologo': '1.5'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_guardar_un_turno_invalida_la_cache(self):
+        params = {'periodo': 'all'}
+        self.assertEqual(self.client.get(self.url, params).json()['total'], 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, params).json()['total'], 5)
+
+        # Antes del commit la cache se sigue usando
+        version = VersionAgenda.objects.get(odontologo=self.odontologo).version
+        with self.captureOnCommitCallbacks() as callbacks:
+            turno = self.crear_turno(self.horarios[3], date(2025, 3, 4))
+        self.assertEqual(VersionAgenda.objects.get(odontologo=self.odontologo).version, version + 1)
+        self.assertEqual(self.client.get(self.url, params).json()['total'], 5)
+        for callback in callbacks:
+            callback()
+        datos = self.client.get(self.url, params).json()
+        self.assertEqual(datos['total'], 6)
+        self.assertIn({'numero_dia': 1, 'nombre': 'Martes', 'cantidad': 1}, datos['por_dia_semana'])
+
+        # Un cambio de estado (con su VersionAgenda) también
+        with self.captureOnCommitCallbacks(execute=True):
+            turno.estado_turno = self.atendido
+            turno.save()
+        self.assertEqual(VersionAgenda.objects.get(odontologo=self.odontologo).version, version + 2)
+        por_estado = {g['nombre']: g['cantidad'] for g in self.client.get(self.url, params).json()['por_estado']}
+        self.assertEqual(por_estado['Atendido'], 4)
+
+        # La versión se perdió de la cache: se crea otra y no se sirve lo viejo
+        cache.delete(CACHE_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            turno.delete()
+        self.assertEqual(self.client.get(self.url, params).json()['total'], 5)
+
+
+# ============================================
+# CACHE DE CATÁLOGOS (ETag / 304)
+# ============================================
+
+class CatalogosCacheTests(DatosTurnosMixin, TestCase):
+    url = '/api/turnos/horarios/'
+
+    def setUp(self):
+        super().setUp()
+        # Versiones nuevas: no se reusan listados cacheados por otro test
+        cache.clear()
+
+    def test_304_con_el_mismo_etag_y_sin_consultas(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()), 4)
+        etag = respuesta['ETag']
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+        # Un proxy puede debilitar el ETag
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"otro"').status_code, 200)
+
+    def test_un_cambio_confirmado_cambia_el_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(self.url, {'hora': '12:00'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()), 5)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_un_cambio_revertido_no_cambia_el_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    HorarioFijo.objects.create(hora=time(12, 0))
+                    raise RuntimeError
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+# ============================================
+# PAGINACIÓN POR CLAVE (TurnosList)
+# ============================================
+
+class TurnosListPaginacionTests(DatosTurnosMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        lunes = proximo_lunes()
+        for dia in range(3):
+            for horario in cls.horarios[:2]:
+                Turnos.objects.create(
+                    odontologo=cls.odontologo, paciente=cls.paciente, estado_turno=cls.pendiente,
+                    fecha_turno=lunes + timedelta(days=dia), horario_turno=horario,
+                )
+        # Sin horario: va primero dentro de su día
+        Turnos.objects.create(
+            odontologo=cls.odontologo2, paciente=cls.paciente, estado_turno=cls.pendiente,
+            fecha_turno=lunes + timedelta(days=1), horario_turno=None,
+        )
+
+    def test_recorrer_con_cursor_devuelve_todo_en_orden(self):
+        completa = [turno['id'] for turno in self.client.get('/api/turnos/').json()]
+        self.assertEqual(len(completa), 7)
+
+        vistos = []
+        url = '/api/turnos/?page_size=3'
+        while url:
+            datos = self.client.get(url).json()
+            self.assertLessEqual(len(datos['results']), 3)
+            vistos.extend(turno['id'] for turno in datos['results'])
+            url = datos['next']
+        self.assertEqual(vistos, completa)
+
+    def test_cursor_respeta_los_filtros(self):
+        primera = self.client.get(f'/api/turnos/?page_size=2&odontologo={self.odontologo.pk}').json()
+        segunda = self.client.get(primera['next']).json()
+        ids = [turno['id'] for turno in primera['results'] + segunda['results']]
+        self.assertEqual(
+            set(ids),
+            set(Turnos.objects.filter(odontologo=self.odontologo).order_by('fecha_turno', 'horario_turno__hora')
+                .values_list('id', flat=True)[:4]),
+        )
+
+    def test_proyeccion_plana_igual_al_serializer(self):
+        Turnos.objects.filter(horario_turno__isnull=False).update(modificado_por=self.odontologo2)
+        turnos = Turnos.objects.select_related(*TURNOS_RELACIONES).order_by('id')
+        filas = {fila['id']: fila for fila in proyectar_turnos(Turnos.objects.all())}
+        self.assertTrue(any(turno.horario_turno_id is None for turno in turnos))
+        for turno in turnos:
+            with self.subTest(turno=turno.pk, horario=turno.horario_turno_id):
+                self.assertEqual(turno_plano(filas[turno.pk]), TurnosSerializer(turno).data)
+
+        # Y lo mismo por la API, con y sin paginar
+        for params, resultados in (({}, lambda datos: datos), ({'page_size': 10}, lambda datos: datos['results'])):
+            with self.subTest(params=params):
+                plana = self.client.get('/api/turnos/', params).json()
+                completa = self.client.get('/api/turnos/', dict(params, vista='completa')).json()
+                self.assertEqual(resultados(plana), resultados(completa))
+
+    def test_cursor_invalido_devuelve_404(self):
+        from core.pagination import KeysetPagination
+        paginador = KeysetPagination(('fecha_turno', 'hora_orden', 'id'))
+        for cursor in (
+            'no-es-base64!!',
+            paginador.encode_cursor([1, 2]),          # cantidad de valores incorrecta
+            paginador.encode_cursor(['x', 'y', 'z']),  # valores de otro tipo
+        ):
+            with self.subTest(cursor=cursor):
+                respuesta = self.client.get('/api/turnos/', {'cursor': cursor})
+                self.assertEqual(respuesta.status_code, 404)
+
+
+# ============================================
+# PAGINACIÓN POR CURSOR DE LA AUDITORÍA
+# ============================================
+
+class AuditoriaTurnosCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        AuditoriaTurnos.objects.bulk_create([
+            AuditoriaTurnos(accion='CREACION', turno_numero=numero, paciente_nombre=f'Paciente {numero}')
+            for numero in range(25)
+        ])
+        # Varias filas con la misma fecha: el id desempata
+        ahora = timezone.now()
+        ids = list(AuditoriaTurnos.objects.order_by('id').values_list('id', flat=True))
+        AuditoriaTurnos.objects.filter(id__in=ids[:10]).update(fecha_accion=ahora - timedelta(days=1))
+        AuditoriaTurnos.objects.filter(id__in=ids[10:]).update(fecha_accion=ahora)
+
+    def test_recorrer_con_cursor_sin_repetir_ni_saltear(self):
+        esperados = list(AuditoriaTurnos.objects.order_by('-fecha_accion', '-id').values_list('id', flat=True))
+        vistos = []
+        datos = self.client.get('/api/turnos/auditoria/', {'paginacion': 'cursor', 'conteo': 'aprox'}).json()
+        self.assertEqual(datos['count'], 25)
+        while True:
+            vistos.extend(registro['id'] for registro in datos['results'])
+            if not datos['next']:
+                break
+            datos = self.client.get(datos['next']).json()
+            # El total solo se calcula en la primera página
+            self.assertNotIn('count', datos)
+        self.assertEqual(vistos, esperados)
+
+    def test_sin_cursor_sigue_la_paginacion_por_numero(self):
+        datos = self.client.get('/api/turnos/auditoria/').json()
+        self.assertEqual(datos['count'], 25)
+        self.assertEqual(len(datos['results']), 10)
+
+    def test_cursor_invalido_devuelve_404(self):
+        self.assertEqual(self.client.get('/api/turnos/auditoria/', {'cursor': '%%%'}).status_code, 404)
+
+
+# ============================================
+# EXPORTACIÓN DE LA AUDITORÍA (CSV / XLSX)
+# ============================================
+
+class ExportarAuditoriaTurnosTests(TestCase):
+    url = '/api/turnos/auditoria/exportar/'
+
+    @classmethod
+    def setUpTestData(cls):
+        AuditoriaTurnos.objects.create(
+            accion='CREACION', turno_numero=7, paciente_nombre='María Núñez', paciente_dni='30111222',
+            fecha_turno=date(2025, 3, 10), horario_turno=time(9, 30),
+            observaciones='Primera vez; trae "estudios" & radiografías\x01',
+        )
+        AuditoriaTurnos.objects.create(accion='ELIMINACION', turno_numero=8, paciente_nombre='Otro')
+
+    def contenido(self, respuesta):
+        self.assertEqual(respuesta.status_code, 200)
+        return b''.join(respuesta.streaming_content)
+
+    def test_csv_con_bom_y_filtros(self):
+        respuesta = self.client.get(self.url, {'turno_numero': 7})
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        datos = self.contenido(respuesta)
+        self.assertTrue(datos.startswith(b'\xef\xbb\xbf'))
+        filas = list(csv.reader(io.StringIO(datos.decode('utf-8-sig'))))
+        self.assertEqual(filas[0][:3], ['ID', 'Fecha de la acción', 'Acción'])
+        self.assertEqual(len(filas), 2)
+        self.assertEqual(filas[1][5], 'María Núñez')
+        self.assertEqual(filas[1][9], '09:30')
+
+    def test_xlsx_es_un_zip_valido_con_la_hoja(self):
+        respuesta = self.client.get(self.url, {'formato': 'xlsx'})
+        self.assertIn('attachment; filename="', respuesta['Content-Disposition'])
+        with zipfile.ZipFile(io.BytesIO(self.contenido(respuesta))) as archivo:
+            self.assertIsNone(archivo.testzip())
+            for nombre in archivo.namelist():
+                if nombre.endswith(('.xml', '.rels')):
+                    ElementTree.fromstring(archivo.read(nombre))  # XML bien formado
+            hoja = ElementTree.fromstring(archivo.read('xl/worksheets/sheet1.xml'))
+
+        ns = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        filas = hoja.findall('.//x:sheetData/x:row', ns)
+        self.assertEqual(len(filas), 3)  # encabezado + 2 registros
+        textos = [t.text for t in hoja.iterfind('.//x:t', ns)]
+        self.assertIn('Primera vez; trae "estudios" & radiografías', textos)  # sin el carácter de control
+        self.assertIn('Turno Eliminado (Horario Liberado)', textos)
+
+    def test_filtros_invalidos_devuelven_400(self):
+        for params in ({'turno_numero': 'abc'}, {'fecha_turno': '10/03/2025'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+                self.assertEqual(self.client.get('/api/turnos/auditoria/', params).status_code, 400)
+
+
+# ============================================
+# BÚSQUEDA DE TEXTO EN LA AUDITORÍA (FTS5 en SQLite)
+# ============================================
+
+@skipUnless(connection.vendor == 'sqlite', 'Ranking de FTS5 (en PostgreSQL se usa ts_rank y pg_trgm)')
+class BusquedaAuditoriaTurnosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        def registro(paciente, odontologo='Ana Pérez', observaciones=''):
+            return AuditoriaTurnos.objects.create(
+                accion='MODIFICACION', paciente_nombre=paciente,
+                odontologo_nombre=odontologo, observaciones=observaciones,
+            )
+
+        cls.gonzalez = registro('María González')
+        cls.gonzalez_repetido = registro('Luis González', observaciones='Reprogramado a pedido de González')
+        cls.gonzalez_largo = registro(
+            'Pedro Ramírez',
+            observaciones='Turno reprogramado: la paciente avisó que no puede venir esa semana por '
+                          'un viaje de trabajo, se ofreció otro día. Acompaña la señora Gonzalez.',
+        )
+        cls.otro = registro('Carla Díaz', observaciones='Turno cancelado')
+
+    def buscar(self, texto, **params):
+        respuesta = self.client.get('/api/turnos/auditoria/', {'buscar': texto, **params})
+        self.assertEqual(respuesta.status_code, 200)
+        return [registro['id'] for registro in respuesta.json()['results']]
+
+    def test_prefijo_sin_acentos_y_orden_por_relevancia(self):
+        ids = self.buscar('gonz')
+        self.assertEqual(ids[0], self.gonzalez_repetido.pk)  # dos apariciones
+        self.assertEqual(set(ids), {self.gonzalez.pk, self.gonzalez_repetido.pk, self.gonzalez_largo.pk})
+        # La mención dentro de una observación larga pesa menos que en el nombre
+        self.assertEqual(ids[-1], self.gonzalez_largo.pk)
+        self.assertEqual(self.buscar('GONZALEZ'), ids)
+
+    def test_todas_las_palabras(self):
+        self.assertEqual(self.buscar('maria gonz'), [self.gonzalez.pk])
+        self.assertEqual(self.buscar('turno cancel'), [self.otro.pk])
+
+    def test_texto_sin_palabras_no_devuelve_nada(self):
+        self.assertEqual(self.buscar('"*'), [])
+
+    def test_cursor_sigue_el_orden_por_relevancia(self):
+        completa = self.buscar('gonz')
+        vistos = []
+        datos = self.client.get(
+            '/api/turnos/auditoria/', {'buscar': 'gonz', 'paginacion': 'cursor', 'page_size': 1}
+        ).json()
+        while True:
+            vistos.extend(registro['id'] for registro in datos['results'])
+            if not datos['next']:
+                break
+            datos = self.client.get(datos['next']).json()
+        self.assertEqual(vistos, completa)
+
+
+# ============================================
+# ESCRITOR DE AUDITORÍA
+# ============================================
+
+class EscritorAuditoriaTests(TransactionTestCase):
+
+    def registro(self, numero):
+        return AuditoriaTurnos(accion='CREACION', turno_numero=numero, paciente_nombre='Paciente')
+
+    def numeros(self):
+        return sorted(AuditoriaTurnos.objects.values_list('turno_numero', flat=True))
+
+    def test_se_escribe_al_confirmar(self):
+        with transaction.atomic():
+            auditoria.registrar(self.registro(1))
+            auditoria.registrar_varios([self.registro(2), self.registro(3)])
+            self.assertEqual(self.numeros(), [])
+        self.assertEqual(self.numeros(), [1, 2, 3])
+
+    def test_rollback_de_savepoint_descarta_solo_sus_registros(self):
+        with transaction.atomic():
+            auditoria.registrar(self.registro(1))
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    auditoria.registrar(self.registro(2))
+                    raise RuntimeError
+            auditoria.registrar(self.registro(3))
+        self.assertEqual(self.numeros(), [1, 3])
+
+    def test_rollback_externo_no_afecta_la_transaccion_siguiente(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                auditoria.registrar(self.registro(1))
+                raise RuntimeError
+        with transaction.atomic():
+            auditoria.registrar(self.registro(2))
+        self.assertEqual(self.numeros(), [2])
+
+    def test_contexto_junta_los_registros_confirmados(self):
+        with auditoria.contexto() as buffer:
+            auditoria.registrar(self.registro(1))
+            with transaction.atomic():
+                auditoria.registrar(self.registro(2))
+            self.assertEqual(len(buffer), 2)
+            self.assertEqual(self.numeros(), [])
+        self.assertEqual(self.numeros(), [1, 2])
+
+    def test_middleware_no_convierte_en_500_un_error_de_la_auditoria(self):
+        def vista(request):
+            # El cambio ya se confirmó (autocommit) cuando falla el INSERT
+            Personal.objects.create(
+                nombre='Ana', apellido='Pérez', dni='1', domicilio='-', telefono='1',
+                email='ana@consultorio.com', puesto=Puestos.objects.create(nombre_puesto='Odontólogo/a'),
+            )
+            auditoria.registrar(self.registro(1))
+            auditoria.registrar(AuditoriaPagos(accion=None))  # NOT NULL: falla
+            return HttpResponse(status=201)
+
+        with self.assertLogs('core.auditoria', 'ERROR') as logs:
+            respuesta = AuditoriaBufferMiddleware(vista)(RequestFactory().post('/'))
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertIn('1 registros de AuditoriaPagos', logs.output[0])
+        # El lote del otro modelo se escribe igual
+        self.assertEqual(self.numeros(), [1])
+        self.assertTrue(Personal.objects.filter(dni='1').exists())
+
+    async def test_middleware_asincronico_escribe_al_terminar_el_request(self):
+        def vista(request):
+            # Las vistas síncronas corren en otro hilo con el contexto del request
+            auditoria.registrar(self.registro(1))
+            auditoria.registrar(self.registro(2))
+            self.assertEqual(self.numeros(), [])
+            return HttpResponse()
+
+        middleware = AuditoriaBufferMiddleware(sync_to_async(vista))
+        self.assertTrue(iscoroutinefunction(middleware))
+        await middleware(RequestFactory().get('/'))
+        self.assertEqual(await sync_to_async(self.numeros)(), [1, 2])
+
+
+# ============================================
+# FEED ICALENDAR
+# ============================================
+
+class CalendarioICSTests(DatosTurnosMixin, TestCase):
+
+    def test_escapar_texto(self):
+        self.assertEqual(escapar('a\\b;c,d\r\ne\nf'), 'a\\\\b\\;c\\,d\\ne\\nf')
+
+    def test_plegar_linea_corta(self):
+        self.assertEqual(plegar('SUMMARY:Turno'), 'SUMMARY:Turno\r\n')
+
+    def test_plegar_respeta_75_octetos_y_caracteres_multibyte(self):
+        linea = 'DESCRIPTION:' + 'ñandú ' * 40
+        plegada = plegar(linea)
+        self.assertTrue(plegada.endswith('\r\n'))
+        partes = plegada[:-2].split('\r\n')
+        self.assertGreater(len(partes), 1)
+        for indice, parte in enumerate(partes):
+            self.assertLessEqual(len(parte.encode('utf-8')), 75)
+            if indice:
+                self.assertTrue(parte.startswith(' '))
+        # Desplegar (quitar CRLF + espacio) devuelve la línea original
+        self.assertEqual(plegada[:-2].replace('\r\n ', ''), linea)
+
+    def test_feed_escapa_y_pliega_los_turnos(self):
+        self.paciente.apellido = 'López; Peña, ' + 'Ñ' * 60
+        self.paciente.save()
+        self.crear_turno(self.horarios[0], motivo='Control\ny limpieza')
+
+        respuesta = self.client.get(f'/api/turnos/odontologos/{self.odontologo.pk}/agenda.ics')
+        self.assertEqual(respuesta.status_code, 200)
+        contenido = b''.join(respuesta.streaming_content).decode('utf-8')
+
+        lineas = contenido.split('\r\n')
+        self.assertEqual(lineas[0], 'BEGIN:VCALENDAR')
+        self.assertEqual(lineas[-1], '')
+        for linea in lineas:
+            self.assertLessEqual(len(linea.encode('utf-8')), 75)
+        desplegado = contenido.replace('\r\n ', '')
+        self.assertIn('SUMMARY:Turno: Juan López\\; Peña\\, ' + 'Ñ' * 60 + '\r\n', desplegado)
+        self.assertIn('DESCRIPTION:Estado: Pendiente\\nMotivo: Control\\ny limpieza\r\n', desplegado)
+
+    def test_feed_responde_304_con_el_mismo_etag(self):
+        url = f'/api/turnos/odontologos/{self.odontologo.pk}/agenda.ics'
+        self.crear_turno(self.horarios[0])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.crear_turno(self.horarios[1])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_renombrar_paciente_estado_u_odontologo_cambia_el_etag(self):
+        url = f'/api/turnos/odontologos/{self.odontologo.pk}/agenda.ics'
+        self.crear_turno(self.horarios[0])
+
+        def revalidar():
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=self.etag)
+            self.etag = respuesta.get('ETag', self.etag)
+            return respuesta.status_code
+
+        self.etag = self.client.get(url)['ETag']
+        # Un cambio que el feed no muestra no invalida nada
+        self.paciente.telefono = '4'
+        self.paciente.save(update_fields=['telefono'])
+        self.assertEqual(revalidar(), 304)
+
+        for objeto, campo, nombre in (
+            (self.paciente, 'apellido', 'Lopes'),
+            (self.pendiente, 'nombre_est_tur', 'Por confirmar'),
+            (self.odontologo, 'apellido', 'Peres'),
+        ):
+            with self.subTest(campo=campo):
+                setattr(objeto, campo, nombre)
+                objeto.save()
+                self.assertEqual(revalidar(), 200)
+                self.assertEqual(revalidar(), 304)
+        contenido = b''.join(self.client.get(url).streaming_content).decode('utf-8')
+        for texto in ('Juan Lopes', 'Estado: Por confirmar', 'Agenda Ana Peres'):
+            self.assertIn(texto, contenido)
+
+    def test_al_cambiar_de_dia_el_feed_se_vuelve_a_descargar(self):
+        url = f'/api/turnos/odontologos/{self.odontologo.pk}/agenda.ics'
+        hoy = timezone.localdate()
+        turno = self.crear_turno(self.horarios[0], hoy)
+        respuesta = self.client.get(url)
+        validadores = {
+            'HTTP_IF_NONE_MATCH': respuesta['ETag'],
+            'HTTP_IF_MODIFIED_SINCE': respuesta['Last-Modified'],
+        }
+        for nombre, valor in validadores.items():
+            self.assertEqual(self.client.get(url, **{nombre: valor}).status_code, 304)
+
+        with mock.patch('django.utils.timezone.localdate', return_value=hoy + timedelta(days=1)):
+            for nombre, valor in validadores.items():
+                with self.subTest(validador=nombre):
+                    respuesta = self.client.get(url, **{nombre: valor})
+                    self.assertEqual(respuesta.status_code, 200)
+                    contenido = b''.join(respuesta.streaming_content).decode('utf-8')
+                    self.assertNotIn(f'UID:turno-{turno.pk}@', contenido)
+
+
+# ============================================
+# EVENTOS EN VIVO (SSE sobre ASGI)
+# ============================================
+
+class EventosTurnosTests(DatosTurnosMixin, TestCase):
+
+    async def siguiente_evento(self, cola):
+        """Próximo evento recibido (sin pings) como (tipo, datos)."""
+        while True:
+            bloque = (await asyncio.wait_for(cola.get(), timeout=5)).decode('utf-8')
+            campos = dict(
+                linea.split(': ', 1) for linea in bloque.strip().split('\n') if not linea.startswith(':')
+            )
+            if 'event' in campos:
+                return campos['event'], json.loads(campos['data'])
+
+    def confirmar(self, funcion, *args, **kwargs):
+        """Ejecuta 'funcion' y sus on_commit (el test corre dentro de una transacción)."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return funcion(*args, **kwargs)
+
+    async def test_recibe_los_deltas_de_alta_modificacion_y_baja(self):
+        respuesta = await self.async_client.get('/api/turnos/eventos/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        cola = asyncio.Queue()
+
+        async def leer():
+            async for bloque in respuesta.streaming_content:
+                await cola.put(bloque)
+
+        # Como el servidor ASGI: se lee en otra tarea y se cancela al desconectar
+        lector = asyncio.create_task(leer())
+        try:
+            # El primer bloque (retry) confirma que la suscripción ya existe
+            await asyncio.wait_for(cola.get(), timeout=5)
+
+            turno = await sync_to_async(self.confirmar)(self.crear_turno, self.horarios[0])
+            tipo, datos = await self.siguiente_evento(cola)
+            self.assertEqual((tipo, datos['id']), ('creado', turno.pk))
+
+            turno.estado_turno = self.atendido
+            await sync_to_async(self.confirmar)(turno.save)
+            tipo, datos = await self.siguiente_evento(cola)
+            self.assertEqual((tipo, datos['id']), ('modificado', turno.pk))
+            self.assertEqual(datos['estado_turno'], self.atendido.pk)
+
+            turno_id = turno.pk
+            await sync_to_async(self.confirmar)(turno.delete)
+            tipo, datos = await self.siguiente_evento(cola)
+            self.assertEqual((tipo, datos), ('eliminado', {'id': turno_id}))
+        finally:
+            lector.cancel()
+            with suppress(asyncio.CancelledError):
+                await lector
+        self.assertFalse(obtener_broker().tiene_suscriptores(CANAL_TURNOS))
+
+    def test_sin_suscriptores_no_se_serializa(self):
+        broker = obtener_broker()
+        self.assertFalse(broker.tiene_suscriptores(CANAL_TURNOS))
+        with mock.patch('turnos.signals.TurnosSerializer') as serializer:
+            self.confirmar(self.crear_turno, self.horarios[1])
+        serializer.assert_not_called()
+
+    def test_reconectar_despues_de_un_cambio_omitido_pide_reset(self):
+        broker = obtener_broker()
+        ultimo = broker.publicar(CANAL_TURNOS, 'modificado', {'id': 0}).id
+        self.confirmar(self.crear_turno, self.horarios[2])
+
+        async def reconectar():
+            suscripcion, pendientes = broker.suscribir(CANAL_TURNOS, ultimo)
+            suscripcion.cerrar()
+            return pendientes
+
+        pendientes = asyncio.run(reconectar())
+        self.assertEqual([evento.tipo for evento in pendientes], ['reset'])
+
+
+# ============================================
+# PARTICIONES DE AUDITORÍA
+# ============================================
+
+TABLA_AUDITORIA = AuditoriaTurnos._meta.db_table
+
+
+def auditoria_en(momento, **campos):
+    """Registro de auditoría con fecha_accion dada (auto_now_add la pisa al crear)."""
+    registro = AuditoriaTurnos.objects.create(accion='CREACION', **campos)
+    AuditoriaTurnos.objects.filter(pk=registro.pk).update(fecha_accion=momento)
+    return registro
+
+
+def mitad_de_mes(mes):
+    return particiones.limite(mes) + timedelta(days=14)
+
+
+class PodarAuditoriaTests(TestCase):
+    """Retención sin particiones (SQLite): DELETE de los meses anteriores al corte."""
+
+    def setUp(self):
+        self.mes = particiones.inicio_mes(timezone.localdate())
+        self.viejos = [auditoria_en(mitad_de_mes(particiones.sumar_meses(self.mes, -meses))) for meses in (13, 7)]
+        # Último instante del mes anterior al corte y primer instante del mes de corte
+        self.corte = particiones.sumar_meses(self.mes, -6)
+        self.borde = auditoria_en(particiones.limite(self.corte) - timedelta(microseconds=1))
+        self.conservados = [
+            auditoria_en(particiones.limite(self.corte)),
+            auditoria_en(timezone.now()),
+        ]
+
+    def test_podar_tabla_borra_antes_del_mes_de_corte(self):
+        # El día dentro del mes no importa: se corta al inicio del mes
+        borrados = particiones.podar_tabla(AuditoriaTurnos, self.corte + timedelta(days=20))
+        self.assertEqual(borrados, 3)
+        self.assertEqual(
+            set(AuditoriaTurnos.objects.values_list('pk', flat=True)),
+            {registro.pk for registro in self.conservados},
+        )
+
+    @skipUnless(connection.vendor != 'postgresql', 'En PostgreSQL el comando usa particiones')
+    def test_comando_sin_particiones_aplica_la_retencion(self):
+        pago = AuditoriaPagos.objects.create(accion='REGISTRO')
+        AuditoriaPagos.objects.filter(pk=pago.pk).update(fecha_accion=mitad_de_mes(particiones.sumar_meses(self.mes, -13)))
+        salida = io.StringIO()
+        with mock.patch('django.utils.timezone.localdate', return_value=self.mes + timedelta(days=3)):
+            call_command('particiones_auditoria', '--retener-meses', '6', stdout=salida)
+        self.assertIn('no soporta particiones', salida.getvalue())
+        self.assertIn(f'{TABLA_AUDITORIA}: 3 registros eliminados.', salida.getvalue())
+        self.assertEqual(
+            set(AuditoriaTurnos.objects.values_list('pk', flat=True)),
+            {registro.pk for registro in self.conservados},
+        )
+        self.assertFalse(AuditoriaPagos.objects.exists())
+
+    @skipUnless(connection.vendor != 'postgresql', 'En PostgreSQL el comando usa particiones')
+    def test_comando_sin_retencion_no_borra(self):
+        salida = io.StringIO()
+        call_command('particiones_auditoria', stdout=salida)
+        self.assertNotIn('eliminados', salida.getvalue())
+        self.assertEqual(AuditoriaTurnos.objects.count(), 5)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Las particiones solo existen en PostgreSQL')
+class ParticionesAuditoriaTests(DatosTurnosMixin, TestCase):
+    """
+    El DDL de Postgres es transaccional: cada test convierte, crea y
+    desvincula particiones dentro de su transacción y todo se revierte.
+    """
+    MIGRACION = ('turnos', '0008_particionar_auditoriaturnos')
+    ANTERIOR = ('turnos', '0007_resumenagendadiaria')
+
+    def setUp(self):
+        super().setUp()
+        self.mes = particiones.inicio_mes(timezone.localdate())
+        self.turno = self.crear_turno()
+        self.registros = [
+            auditoria_en(mitad_de_mes(particiones.sumar_meses(self.mes, -meses)),
+                         turno=self.turno, turno_numero=self.turno.pk, paciente_nombre=f'Paciente {meses}')
+            for meses in (14, 2, 0)
+        ]
+        # Las FKs de Django son diferidas: sus chequeos pendientes impiden el DDL
+        connection.check_constraints()
+
+    def consultar(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def particionada(self):
+        with connection.cursor() as cursor:
+            return particiones.esta_particionada(cursor, TABLA_AUDITORIA)
+
+    def columnas_pk(self):
+        return [fila[0] for fila in self.consultar(
+            """
+            SELECT a.attname
+            FROM pg_index i JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = %s::regclass AND i.indisprimary
+            ORDER BY a.attnum
+            """,
+            [TABLA_AUDITORIA],
+        )]
+
+    def restricciones(self):
+        """Nombres de los índices (sin la PK) y de las FKs de la tabla."""
+        indices = self.consultar(
+            "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary",
+            [TABLA_AUDITORIA],
+        )
+        fks = self.consultar(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLA_AUDITORIA],
+        )
+        return {fila[0] for fila in indices}, {fila[0] for fila in fks}
+
+    def ids_en(self, tabla):
+        """Ids guardados en la propia tabla (sin contar sus particiones)."""
+        return [fila[0] for fila in self.consultar(f'SELECT id FROM ONLY {connection.ops.quote_name(tabla)} ORDER BY id')]
+
+    def filas(self):
+        return list(AuditoriaTurnos.objects.order_by('pk').values_list('pk', 'fecha_accion', 'turno_id', 'paciente_nombre'))
+
+    def migrar(self, hacia_atras=False):
+        executor = MigrationExecutor(connection)
+        migracion = executor.loader.get_migration(*self.MIGRACION)
+        with connection.schema_editor() as editor:
+            if hacia_atras:
+                migracion.unapply(executor.loader.project_state(self.MIGRACION), editor)
+            else:
+                migracion.apply(executor.loader.project_state(self.ANTERIOR), editor)
+
+    def test_migracion_ida_y_vuelta_conserva_filas_indices_y_fks(self):
+        self.assertTrue(self.particionada())
+        filas, restricciones = self.filas(), self.restricciones()
+
+        self.migrar(hacia_atras=True)
+        self.assertFalse(self.particionada())
+        self.assertEqual(self.columnas_pk(), ['id'])
+        self.assertEqual(self.filas(), filas)
+        self.assertEqual(self.restricciones(), restricciones)
+        # Volver a aplicar la reversa no hace nada
+        particiones.desparticionar_tabla(connection, TABLA_AUDITORIA)
+        self.assertEqual(self.filas(), filas)
+
+        self.migrar()
+        self.assertTrue(self.particionada())
+        self.assertEqual(self.columnas_pk(), ['id', 'fecha_accion'])
+        self.assertEqual(self.filas(), filas)
+        self.assertEqual(self.restricciones(), restricciones)
+        with connection.cursor() as cursor:
+            meses = [mes for mes, _ in particiones.particiones_mensuales(cursor, TABLA_AUDITORIA)]
+        # Del mes más viejo con datos hasta tres meses adelante, sin huecos
+        desde = particiones.sumar_meses(self.mes, -14)
+        self.assertEqual(meses, [particiones.sumar_meses(desde, n) for n in range(14 + 3 + 1)])
+        # Cada fila quedó en la partición de su mes, ninguna en la DEFAULT
+        self.assertEqual(self.ids_en(TABLA_AUDITORIA + particiones.SUFIJO_DEFAULT), [])
+        viejo = self.registros[0]
+        self.assertEqual(self.ids_en(particiones.nombre_particion(TABLA_AUDITORIA, desde)), [viejo.pk])
+
+        # La secuencia sigue después del id más alto y la FK se sigue aplicando
+        nuevo = AuditoriaTurnos.objects.create(accion='CREACION', turno=self.turno)
+        self.assertGreater(nuevo.pk, max(registro.pk for registro in self.registros))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AuditoriaTurnos.objects.create(accion='CREACION', turno_id=self.turno.pk + 1000)
+            connection.check_constraints()
+
+    def test_crear_particion_mueve_las_filas_de_la_default(self):
+        futuro = particiones.sumar_meses(self.mes, 24)
+        default = TABLA_AUDITORIA + particiones.SUFIJO_DEFAULT
+        del_mes = [
+            auditoria_en(particiones.limite(futuro), turno=self.turno),
+            auditoria_en(particiones.limite(particiones.sumar_meses(futuro, 1)) - timedelta(microseconds=1)),
+        ]
+        otro_mes = auditoria_en(mitad_de_mes(particiones.sumar_meses(futuro, 1)))
+        antes = self.ids_en(default)
+        self.assertTrue({registro.pk for registro in del_mes + [otro_mes]} <= set(antes))
+        connection.check_constraints()
+        filas = self.filas()
+
+        self.assertTrue(particiones.crear_particion(connection, TABLA_AUDITORIA, futuro))
+        nombre = particiones.nombre_particion(TABLA_AUDITORIA, futuro)
+        self.assertEqual(self.ids_en(nombre), [registro.pk for registro in del_mes])
+        self.assertEqual(self.ids_en(default), [pk for pk in antes if pk not in {r.pk for r in del_mes}])
+        self.assertIn(otro_mes.pk, self.ids_en(default))
+        self.assertEqual(self.filas(), filas)
+        # Ya existe: no la vuelve a crear
+        self.assertFalse(particiones.crear_particion(connection, TABLA_AUDITORIA, futuro))
+
+        # Adjuntada con la FK e índices de la tabla madre
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AuditoriaTurnos.objects.create(accion='CREACION', turno_id=self.turno.pk + 1000)
+            connection.check_constraints()
+        indices = self.consultar("SELECT count(*) FROM pg_index WHERE indrelid = %s::regclass", [nombre])[0][0]
+        self.assertEqual(indices, len(self.restricciones()[0]) + 1)
+
+    def test_crear_particion_de_un_mes_vacio(self):
+        futuro = particiones.sumar_meses(self.mes, 30)
+        self.assertTrue(particiones.crear_particion(connection, TABLA_AUDITORIA, futuro))
+        registro = auditoria_en(mitad_de_mes(futuro))
+        self.assertEqual(self.ids_en(particiones.nombre_particion(TABLA_AUDITORIA, futuro)), [registro.pk])
+
+    def test_desvincular_y_eliminar_particiones_viejas(self):
+        corte = particiones.sumar_meses(self.mes, -1)
+        viejos = self.registros[:2]
+        # Meses viejos sin partición propia: sus filas están en la DEFAULT
+        default = TABLA_AUDITORIA + particiones.SUFIJO_DEFAULT
+        self.assertTrue({registro.pk for registro in viejos} <= set(self.ids_en(default)))
+        particiones.crear_particion(connection, TABLA_AUDITORIA, particiones.sumar_meses(self.mes, -14))
+        esperadas = [
+            particiones.nombre_particion(TABLA_AUDITORIA, particiones.sumar_meses(self.mes, meses))
+            for meses in (-14, -2)
+        ]
+
+        desvinculadas = particiones.desvincular_particiones(connection, TABLA_AUDITORIA, corte + timedelta(days=10))
+        self.assertEqual(desvinculadas, esperadas)
+        # Quedan como tablas sueltas (archivo) con sus filas, fuera de la tabla madre
+        self.assertEqual(list(AuditoriaTurnos.objects.values_list('pk', flat=True)), [self.registros[2].pk])
+        self.assertEqual([self.ids_en(nombre) for nombre in esperadas], [[viejos[0].pk], [viejos[1].pk]])
+        with connection.cursor() as cursor:
+            self.assertEqual([nombre for _, nombre in particiones.particiones_archivadas(cursor, TABLA_AUDITORIA)],
+                             esperadas)
+            self.assertTrue(all(mes >= corte for mes, _ in particiones.particiones_mensuales(cursor, TABLA_AUDITORIA)))
+
+        # Con eliminar=True también se borran las archivadas en corridas anteriores
+        eliminadas = particiones.desvincular_particiones(connection, TABLA_AUDITORIA, corte, eliminar=True)
+        self.assertEqual(eliminadas, esperadas)
+        with connection.cursor() as cursor:
+            self.assertFalse(any(particiones.existe_tabla(cursor, nombre) for nombre in esperadas))
+            self.assertEqual(particiones.particiones_archivadas(cursor, TABLA_AUDITORIA), [])
+
+    def test_comando_crea_las_proximas_y_elimina_las_viejas(self):
+        salida = io.StringIO()
+        call_command('particiones_auditoria', '--meses-adelante', '5', '--retener-meses', '12', '--eliminar',
+                     stdout=salida)
+        with connection.cursor() as cursor:
+            meses = [mes for mes, _ in particiones.particiones_mensuales(cursor, TABLA_AUDITORIA)]
+        self.assertEqual(meses[-1], particiones.sumar_meses(self.mes, 5))
+        self.assertGreaterEqual(meses[0], particiones.inicio_mes(timezone.localdate() - relativedelta(months=12)))
+        self.assertNotIn(self.registros[0].pk, AuditoriaTurnos.objects.values_list('pk', flat=True))
+        self.assertIn('particiones eliminadas', salida.getvalue())
+        self.assertIn('Particiones de auditoría al día.', salida.getvalue())
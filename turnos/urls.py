@@ -2,12 +2,27 @@ from django.urls import path, include
 from .views import (
     TurnosList, 
     TurnosDetail,
+    TurnosCambioEstadoMasivo,
+    TurnosSerie,
+    DisponibilidadTurnos,
+    HorarioLibre,
+    PrimerTurnoDisponible,
+    ResumenAgenda,
+    EstadisticasTurnos,
+    AgendaOdontologoICS,
+    EventosTurnos,
     EstadosTurnosList,
     HorarioFijoList,
     HorarioFijoDetail,
     DiaSemanaList,
     AuditoriaTurnosList,
     AuditoriaTurnosDetail,
+    ExportarAuditoriaTurnos,
+    ListaEsperaList,
+    ListaEsperaDetail,
+    OfertasTurnoList,
+    OfertaTurnoAceptar,
+    OfertaTurnoRechazar,
 )
 
 urlpatterns = [
@@ -16,6 +31,23 @@ urlpatterns = [
     path('', TurnosList.as_view(), name='turnos-list'), 
     # GET (Detalle), PUT/PATCH (Actualizar) y DELETE (Eliminar)
     path('<int:pk>/', TurnosDetail.as_view(), name='turnos-detail'),
+    # POST cambio de estado masivo (ej. marcar como atendidos)
+    path('cambiar-estado/', TurnosCambioEstadoMasivo.as_view(), name='turnos-cambiar-estado'),
+    # POST serie de turnos recurrentes
+    path('series/', TurnosSerie.as_view(), name='turnos-series'),
+    # GET horarios libres por odontólogo y rango de fechas
+    path('disponibilidad/', DisponibilidadTurnos.as_view(), name='turnos-disponibilidad'),
+    path('disponibilidad/libre/', HorarioLibre.as_view(), name='turnos-horario-libre'),
+    # Próximos horarios libres entre todos los odontólogos
+    path('disponibilidad/primeros/', PrimerTurnoDisponible.as_view(), name='turnos-primeros-libres'),
+    # GET resumen diario precalculado (dashboard / gráficos)
+    path('resumen/', ResumenAgenda.as_view(), name='turnos-resumen'),
+    # GET estadísticas agregadas por período (gráficos)
+    path('estadisticas/', EstadisticasTurnos.as_view(), name='turnos-estadisticas'),
+    # GET feed iCalendar (.ics) con la agenda de un odontólogo
+    path('odontologos/<int:pk>/agenda.ics', AgendaOdontologoICS.as_view(), name='turnos-agenda-ics'),
+    # GET canal de eventos en vivo (SSE, solo con servidor ASGI)
+    path('eventos/', EventosTurnos.as_view(), name='turnos-eventos'),
     
     # 2. Rutas para Listados de Opciones (Tablas Maestras)
     # Usadas por el frontend para llenar los select/dropdowns
@@ -27,4 +59,13 @@ urlpatterns = [
     # 3. Rutas para Auditoría (🚨 NUEVO)
     path('auditoria/', AuditoriaTurnosList.as_view(), name='auditoria-turnos-list'),
     path('auditoria/<int:pk>/', AuditoriaTurnosDetail.as_view(), name='auditoria-turno-detail'),
+    # Exportación CSV/XLSX (mismos filtros que el listado)
+    path('auditoria/exportar/', ExportarAuditoriaTurnos.as_view(), name='auditoria-turnos-exportar'),
+
+    # 4. Lista de espera y ofertas de horarios liberados
+    path('lista-espera/', ListaEsperaList.as_view(), name='lista-espera-list'),
+    path('lista-espera/<int:pk>/', ListaEsperaDetail.as_view(), name='lista-espera-detail'),
+    path('ofertas/', OfertasTurnoList.as_view(), name='ofertas-turno-list'),
+    path('ofertas/<int:pk>/aceptar/', OfertaTurnoAceptar.as_view(), name='oferta-turno-aceptar'),
+    path('ofertas/<int:pk>/rechazar/', OfertaTurnoRechazar.as_view(), name='oferta-turno-rechazar'),
 ]
\ No newline at end of file
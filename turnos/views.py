@@ -1,43 +1,155 @@
+import logging
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
 from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 # 👇 --- IMPORTAR PAGINADOR ---
 from rest_framework.pagination import PageNumberPagination 
 
-from django.utils.dateparse import parse_date
 from datetime import datetime, time
 from django.utils import timezone
 # -----------------------------
-from .models import Turnos, EstadosTurnos, HorarioFijo, DiaSemana, AuditoriaTurnos
+from core.eventos import obtener_broker
+from core.busqueda import buscar_texto, ORDEN_RELEVANCIA
+from core.catalogos import CatalogoCacheMixin
+from core.exportacion import FORMATOS, LOTE_FILAS, respuesta_exportacion
+from core.pagination import KeysetPagination, AuditoriaCursorPagination, iterar_por_clave
+from core.parametros import parametro_fecha
+from personal.models import Personal
+from .models import (
+    Turnos, EstadosTurnos, HorarioFijo, DiaSemana, AuditoriaTurnos, VersionAgenda, ResumenAgendaDiaria,
+    ListaEspera, OfertaTurno,
+)
 from .serializers import (
     TurnosSerializer, 
     EstadosTurnosSerializer, 
     HorarioFijoSerializer, 
     DiaSemanaSerializer,
-    AuditoriaTurnosSerializer
+    AuditoriaTurnosSerializer,
+    CambioEstadoMasivoSerializer,
+    SerieTurnosSerializer,
+    ListaEsperaSerializer,
+    OfertaTurnoSerializer,
+    AceptarOfertaSerializer,
+    TURNOS_RELACIONES,
+    proyectar_turnos,
+    turno_plano,
+)
+from .services import (
+    cambiar_estado_masivo, crear_serie_turnos, reservar_turno, HorarioOcupado,
+    aceptar_oferta, rechazar_oferta, OfertaNoDisponible,
+)
+from .disponibilidad import (
+    calcular_disponibilidad, indice_disponibilidad, odontologos_activos, primeros_horarios_libres,
+    MAX_DIAS_RANGO, MAX_DIAS_BUSQUEDA,
 )
+from .calendario import generar_ics
+from .estadisticas import obtener_estadisticas, PERIODOS
+from .signals import CANAL_TURNOS
+
+logger = logging.getLogger(__name__)
 
 # (El resto de tus Vistas: TurnosList, TurnosDetail, etc. quedan igual)
 # ...
+class TurnosPagination(KeysetPagination):
+    # Orden cronológico: fecha, hora (los turnos sin horario van primero) e id
+    ordering = ('fecha_turno', 'hora_orden', 'id')
+    page_size = 50
+    max_page_size = 200
+
+
+def filtrar_turnos(turnos, params):
+    """
+    Aplica los filtros de la lista de turnos (odontologo, paciente, estado,
+    fecha, fecha_desde, fecha_hasta). Devuelve None si algún ID es inválido;
+    una fecha inválida responde 400 (ver parametro_fecha).
+    """
+    for param, campo in (('odontologo', 'odontologo_id'), ('paciente', 'paciente_id'), ('estado', 'estado_turno_id')):
+        valor = params.get(param, None)
+        if valor:
+            if not valor.isdigit():
+                return None
+            turnos = turnos.filter(**{campo: int(valor)})
+
+    for param, lookup in (('fecha', 'fecha_turno'), ('fecha_desde', 'fecha_turno__gte'), ('fecha_hasta', 'fecha_turno__lte')):
+        fecha = parametro_fecha(params, param)
+        if fecha:
+            turnos = turnos.filter(**{lookup: fecha})
+    return turnos
+
+
+def respuesta_horario_ocupado(conflicto):
+    """409 con las alternativas libres más cercanas al horario pedido."""
+    return Response(
+        {"detail": str(conflicto), "alternativas": conflicto.alternativas},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
 class TurnosList(APIView):
+    pagination_class = TurnosPagination
+
     def get(self, request):
-        turnos = Turnos.objects.all()
-        serializer = TurnosSerializer(turnos, many=True) 
-        return Response(serializer.data)
+        """
+        Lista de turnos con filtros opcionales.
+        Si se envía 'cursor' o 'page_size' la respuesta se pagina por clave
+        (fecha_turno, hora, id): {"next": ..., "first": ..., "results": [...]}.
+        Sin esos parámetros se devuelve la lista completa, como antes.
+
+        La lectura se hace con una proyección plana (values() + JOINs): una
+        consulta por página, sin instanciar modelos. Con ?vista=completa se
+        usa TurnosSerializer sobre instancias (con select_related).
+        """
+        turnos = filtrar_turnos(Turnos.objects.all(), request.query_params)
+        if turnos is None:
+            return Response(
+                {"detail": "Filtros inválidos: use IDs numéricos y fechas AAAA-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        turnos = turnos.annotate(hora_orden=Coalesce('horario_turno__hora', Value(time.min)))
+
+        vista_completa = request.query_params.get('vista') == 'completa'
+        if vista_completa:
+            turnos = turnos.select_related(*TURNOS_RELACIONES)
+        else:
+            turnos = proyectar_turnos(turnos)
+
+        def serializar(filas):
+            if vista_completa:
+                return TurnosSerializer(filas, many=True).data
+            return [turno_plano(fila) for fila in filas]
+
+        if 'cursor' in request.query_params or 'page_size' in request.query_params:
+            paginator = self.pagination_class()
+            pagina = paginator.paginate_queryset(turnos, request, view=self)
+            return paginator.get_paginated_response(serializar(pagina))
+
+        turnos = turnos.order_by(*self.pagination_class.ordering)
+        return Response(serializar(turnos))
     
     def post(self, request):
         serializer = TurnosSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                reservar_turno(serializer)
+            except HorarioOcupado as conflicto:
+                return respuesta_horario_ocupado(conflicto)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     
 class TurnosDetail(APIView):
     def get_object(self, pk):
-        return get_object_or_404(Turnos, pk=pk)
+        return get_object_or_404(Turnos.objects.select_related(*TURNOS_RELACIONES), pk=pk)
 
     def get(self, request, pk):
         turno = self.get_object(pk)
@@ -48,7 +160,10 @@ class TurnosDetail(APIView):
         turno = self.get_object(pk)
         serializer = TurnosSerializer(turno, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                reservar_turno(serializer)
+            except HorarioOcupado as conflicto:
+                return respuesta_horario_ocupado(conflicto)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -56,7 +171,10 @@ class TurnosDetail(APIView):
         turno = self.get_object(pk)
         serializer = TurnosSerializer(turno, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                reservar_turno(serializer)
+            except HorarioOcupado as conflicto:
+                return respuesta_horario_ocupado(conflicto)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
@@ -66,11 +184,353 @@ class TurnosDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class EstadosTurnosList(generics.ListCreateAPIView):
+class TurnosCambioEstadoMasivo(APIView):
+    """
+    Cambia el estado de muchos turnos en una sola transacción
+    (ej. "marcar como atendidos" o cancelar en lote).
+    POST /api/turnos/cambiar-estado/  {"turnos": [1, 2], "estado_turno": 2, "modificado_por": 5}
+    """
+
+    def post(self, request):
+        serializer = CambioEstadoMasivoSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        resultado = cambiar_estado_masivo(
+            serializer.validated_data['turnos'],
+            serializer.validated_data['estado_turno'],
+            usuario=serializer.validated_data.get('modificado_por'),
+        )
+        return Response(resultado, status=status.HTTP_200_OK)
+
+
+class TurnosSerie(APIView):
+    """
+    Crea una serie de turnos recurrentes (ej. controles de ortodoncia).
+    POST /api/turnos/series/
+    {"odontologo": 1, "paciente": 2, "horario_turno": 3, "estado_turno": 3,
+     "fecha_inicio": "2025-12-01", "frecuencia": "mensual", "cantidad": 12}
+    Las fechas ocupadas no se crean: vuelven en 'conflictos' con alternativas.
+    """
+
+    def post(self, request):
+        serializer = SerieTurnosSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        datos = serializer.validated_data
+        creados, conflictos = crear_serie_turnos(
+            datos['odontologo'],
+            datos['paciente'],
+            datos['horario_turno'],
+            datos['estado_turno'],
+            datos['fecha_inicio'],
+            datos['frecuencia'],
+            datos['cantidad'],
+            usuario=datos.get('modificado_por'),
+            motivo=datos.get('motivo'),
+        )
+        return Response(
+            {
+                'creados': TurnosSerializer(creados, many=True).data,
+                'conflictos': conflictos,
+            },
+            status=status.HTTP_201_CREATED if creados else status.HTTP_409_CONFLICT
+        )
+
+
+def _parse_ids(valor):
+    """Convierte '1,2,3' en [1, 2, 3]. Lanza ValueError si hay basura."""
+    return [int(v) for v in valor.split(',') if v.strip()]
+
+
+class DisponibilidadTurnos(APIView):
+    """
+    Devuelve los horarios libres de uno o varios odontólogos en un rango de fechas.
+    GET /api/turnos/disponibilidad/?odontologos=1,2&fecha_desde=2025-11-24&fecha_hasta=2025-11-28
+    Parámetro opcional: excluir_turno (el turno que se está editando no ocupa su horario).
+    """
+
+    def get(self, request):
+        try:
+            odontologo_ids = _parse_ids(request.query_params.get('odontologos', ''))
+        except ValueError:
+            return Response(
+                {"detail": "El parámetro 'odontologos' debe ser una lista de IDs separados por coma."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not odontologo_ids:
+            return Response(
+                {"detail": "Debe indicar al menos un odontólogo."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fecha_desde = parametro_fecha(request.query_params, 'fecha_desde')
+        fecha_hasta = parametro_fecha(request.query_params, 'fecha_hasta') or fecha_desde
+        if not fecha_desde or fecha_hasta < fecha_desde:
+            return Response(
+                {"detail": "Rango de fechas inválido (use fecha_desde y fecha_hasta en formato AAAA-MM-DD)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (fecha_hasta - fecha_desde).days >= MAX_DIAS_RANGO:
+            return Response(
+                {"detail": f"El rango no puede superar los {MAX_DIAS_RANGO} días."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        excluir_turno = request.query_params.get('excluir_turno', None)
+        if excluir_turno and not excluir_turno.isdigit():
+            return Response(
+                {"detail": "El parámetro 'excluir_turno' debe ser un ID numérico."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        disponibilidad = calcular_disponibilidad(
+            odontologo_ids, fecha_desde, fecha_hasta, excluir_turno=excluir_turno
+        )
+        return Response({
+            'fecha_desde': fecha_desde,
+            'fecha_hasta': fecha_hasta,
+            'odontologos': disponibilidad,
+        })
+
+
+class HorarioLibre(APIView):
+    """
+    Responde si un horario puntual está libre, usando el índice en memoria.
+    GET /api/turnos/disponibilidad/libre/?odontologo=1&fecha=2025-11-24&horario=3
+    """
+
+    def get(self, request):
+        odontologo = request.query_params.get('odontologo', '')
+        horario = request.query_params.get('horario', '')
+        fecha = parametro_fecha(request.query_params, 'fecha')
+        if not odontologo.isdigit() or not horario.isdigit() or not fecha:
+            return Response(
+                {"detail": "Debe indicar odontologo, fecha (AAAA-MM-DD) y horario."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        libre = indice_disponibilidad.esta_libre(int(odontologo), fecha, int(horario))
+        return Response({'libre': libre})
+
+
+class PrimerTurnoDisponible(APIView):
+    """
+    Los próximos horarios libres entre todos los odontólogos activos,
+    del más cercano al más lejano ("¿cuándo es lo primero?").
+    GET /api/turnos/disponibilidad/primeros/?cantidad=5&especialidad=2&fecha_desde=2025-11-24
+    Todos los parámetros son opcionales (por defecto: 5 horarios desde hoy).
+    """
+    CANTIDAD_POR_DEFECTO = 5
+    MAX_CANTIDAD = 50
+
+    def get(self, request):
+        cantidad = request.query_params.get('cantidad', '') or str(self.CANTIDAD_POR_DEFECTO)
+        if not cantidad.isdigit() or not 1 <= int(cantidad) <= self.MAX_CANTIDAD:
+            return Response(
+                {"detail": f"El parámetro 'cantidad' debe ser un número entre 1 y {self.MAX_CANTIDAD}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        especialidad = request.query_params.get('especialidad', '')
+        if especialidad and not especialidad.isdigit():
+            return Response(
+                {"detail": "El parámetro 'especialidad' debe ser un ID numérico."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        fecha_desde = parametro_fecha(request.query_params, 'fecha_desde')
+
+        odontologo_ids = odontologos_activos(especialidad=especialidad or None)
+        libres = primeros_horarios_libres(odontologo_ids, int(cantidad), fecha_desde=fecha_desde)
+
+        nombres = {
+            o['id']: f"{o['nombre']} {o['apellido']}"
+            for o in Personal.objects.filter(id__in={libre[2] for libre in libres}).values('id', 'nombre', 'apellido')
+        }
+        return Response({
+            'horarios': [
+                {
+                    'fecha': fecha,
+                    'hora': hora.strftime('%H:%M'),
+                    'horario_turno': horario_id,
+                    'odontologo': odontologo_id,
+                    'odontologo_nombre': nombres.get(odontologo_id),
+                }
+                for fecha, hora, odontologo_id, horario_id in libres
+            ],
+            # Si no hay resultados, no hay lugar en este horizonte
+            'horizonte_dias': MAX_DIAS_BUSQUEDA,
+        })
+
+
+class ResumenAgenda(APIView):
+    """
+    Resumen precalculado de la agenda (una fila por día y odontólogo) y sus
+    totales, para el dashboard y los gráficos sin descargar los turnos.
+    GET /api/turnos/resumen/?fecha_desde=2025-01-01&fecha_hasta=2025-12-31&odontologo=1
+
+    Solo vienen los días con al menos un turno: un día que no aparece no
+    tiene turnos y todos sus horarios fijos están libres. Por eso
+    totales['libres'] suma los libres de los días con turnos, no los del rango.
+    """
+
+    def get(self, request):
+        resumenes = ResumenAgendaDiaria.objects.all()
+        odontologo = request.query_params.get('odontologo')
+        if odontologo:
+            if not odontologo.isdigit():
+                return Response(
+                    {"detail": "El parámetro 'odontologo' debe ser un ID numérico."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            resumenes = resumenes.filter(odontologo_id=odontologo)
+        for param, lookup in (('fecha_desde', 'fecha__gte'), ('fecha_hasta', 'fecha__lte')):
+            fecha = parametro_fecha(request.query_params, param)
+            if fecha:
+                resumenes = resumenes.filter(**{lookup: fecha})
+
+        dias = list(resumenes.values(
+            'fecha', 'odontologo', 'total_turnos', 'por_estado', 'ocupados', 'libres'
+        ))
+        totales = {'total_turnos': 0, 'por_estado': {}, 'ocupados': 0, 'libres': 0}
+        for dia in dias:
+            totales['total_turnos'] += dia['total_turnos']
+            totales['ocupados'] += dia['ocupados']
+            totales['libres'] += dia['libres']
+            for estado, cantidad in dia['por_estado'].items():
+                totales['por_estado'][estado] = totales['por_estado'].get(estado, 0) + cantidad
+        return Response({'totales': totales, 'dias': dias})
+
+
+class EstadisticasTurnos(APIView):
+    """
+    Cantidad de turnos por estado, odontólogo, día de la semana y horario.
+    GET /api/turnos/estadisticas/?periodo=last_month&estado=2&odontologo=1
+    periodo: last_week | last_month | last_year | all (por defecto last_month)
+    """
+
+    def get(self, request):
+        periodo = request.query_params.get('periodo', 'last_month')
+        if periodo not in PERIODOS:
+            return Response(
+                {"detail": f"Período inválido. Opciones: {', '.join(PERIODOS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        filtros = {}
+        for param in ('estado', 'odontologo'):
+            valor = request.query_params.get(param)
+            if valor:
+                if not valor.isdigit():
+                    return Response(
+                        {"detail": f"El parámetro '{param}' debe ser un ID numérico."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                filtros[param] = int(valor)
+
+        return Response(obtener_estadisticas(periodo, **filtros))
+
+
+class AgendaOdontologoICS(View):
+    """
+    Feed iCalendar con los próximos turnos de un odontólogo, para
+    suscribirse desde el calendario del celular.
+    GET /api/turnos/odontologos/1/agenda.ics
+
+    El ETag y el Last-Modified salen de VersionAgenda (se incrementa con cada
+    cambio en sus turnos y con los cambios de nombre de pacientes, estados
+    y del odontólogo), así que revalidar cuesta una sola consulta y
+    responde 304 sin tocar la tabla de turnos. El feed empieza hoy: el
+    ETag lleva la fecha y el Last-Modified nunca es anterior al inicio del
+    día, para que al cambiar de día salgan los turnos pasados.
+    """
+
+    def get(self, request, pk):
+        odontologo = (
+            Personal.objects.filter(pk=pk)
+            .select_related('version_agenda')
+            .first()
+        )
+        if odontologo is None:
+            raise Http404('Odontólogo no encontrado.')
+
+        try:
+            version = odontologo.version_agenda
+        except VersionAgenda.DoesNotExist:
+            version = None
+        numero = version.version if version else 0
+        modificado = version.modificado if version else None
+
+        hoy = timezone.localdate()
+        etag = f'"agenda-{pk}-{numero}-{hoy:%Y%m%d}"'
+        inicio_hoy = timezone.make_aware(datetime.combine(hoy, time.min))
+        last_modified = int(max(modificado or inicio_hoy, inicio_hoy).timestamp())
+        no_modificado = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if no_modificado is not None:
+            return no_modificado
+
+        response = StreamingHttpResponse(
+            generar_ics(pk, f'Agenda {odontologo}', modificado),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'no-cache'
+        response['Content-Disposition'] = f'inline; filename="agenda-{pk}.ics"'
+        return response
+
+
+class EventosTurnos(View):
+    """
+    Canal push (Server-Sent Events) con los cambios de turnos en vivo.
+    GET /api/turnos/eventos/
+
+    Cada evento es un delta: 'creado' / 'modificado' (turno con el mismo
+    formato que la lista) o 'eliminado' ({"id": ...}). Un evento 'reset'
+    indica que el cliente se perdió cambios y debe recargar la lista.
+    Al reconectarse, el navegador manda Last-Event-ID y se le reenvía lo
+    que falte. Necesita un servidor ASGI (ej. uvicorn core.asgi:application).
+    """
+
+    INTERVALO_PING = 15  # segundos; mantiene viva la conexión en proxies
+    REINTENTO_MS = 3000
+
+    async def get(self, request):
+        if not hasattr(request, 'scope'):
+            # Bajo WSGI la respuesta infinita bloquearía un worker entero
+            return JsonResponse(
+                {"detail": "Los eventos en vivo requieren el servidor ASGI."},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+
+        ultimo_id = request.headers.get('Last-Event-ID') or request.GET.get('ultimo_evento')
+        ultimo_id = int(ultimo_id) if ultimo_id and ultimo_id.isdigit() else None
+
+        response = StreamingHttpResponse(
+            self.eventos(ultimo_id), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def eventos(self, ultimo_id):
+        # La suscripción se crea al empezar a iterar, en el event loop que la lee
+        suscripcion, pendientes = obtener_broker().suscribir(CANAL_TURNOS, ultimo_id)
+        try:
+            yield f'retry: {self.REINTENTO_MS}\n\n'
+            for evento in pendientes:
+                yield evento.como_sse()
+            while True:
+                evento = await suscripcion.siguiente(timeout=self.INTERVALO_PING)
+                yield ': ping\n\n' if evento is None else evento.como_sse()
+        finally:
+            suscripcion.cerrar()
+
+
+class EstadosTurnosList(CatalogoCacheMixin, generics.ListCreateAPIView):
     queryset = EstadosTurnos.objects.all()
     serializer_class = EstadosTurnosSerializer
 
-class HorarioFijoList(generics.ListCreateAPIView):
+class HorarioFijoList(CatalogoCacheMixin, generics.ListCreateAPIView):
     queryset = HorarioFijo.objects.all()
     serializer_class = HorarioFijoSerializer
     
@@ -88,14 +548,14 @@ class HorarioFijoDetail(generics.RetrieveUpdateDestroyAPIView):
                 {"detail": "No se puede eliminar este horario porque ya tiene turnos asignados."}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-        except Exception as e:
-            print(f"Error inesperado al eliminar HorarioFijo: {e}")
+        except Exception:
+            logger.exception("Error inesperado al eliminar HorarioFijo %s", kwargs.get('pk'))
             return Response(
                 {"detail": "Ocurrió un error inesperado en el servidor."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class DiaSemanaList(generics.ListAPIView):
+class DiaSemanaList(CatalogoCacheMixin, generics.ListAPIView):
     queryset = DiaSemana.objects.all().order_by('numero_dia')
     serializer_class = DiaSemanaSerializer
 
@@ -112,14 +572,76 @@ class AuditoriaPagination(PageNumberPagination):
 # ----------------------------------------
 
 
+def filtrar_auditoria_turnos(auditorias, params):
+    """
+    Filtros del listado de auditoría de turnos (turno_numero, paciente_dni,
+    accion, fecha_accion, fecha_desde, fecha_hasta, fecha_turno, buscar),
+    compartidos con la exportación. Ordena por (-fecha_accion, -id) o por
+    relevancia si hay búsqueda. Devuelve None si turno_numero no es numérico;
+    una fecha inválida responde 400 (ver parametro_fecha).
+    """
+    auditorias = auditorias.order_by('-fecha_accion', '-id')
+
+    turno_numero = params.get('turno_numero', None)
+    if turno_numero:
+        if not turno_numero.isdigit():
+            return None
+        auditorias = auditorias.filter(turno_numero=int(turno_numero))
+    
+    paciente_dni = params.get('paciente_dni', None)
+    if paciente_dni:
+        auditorias = auditorias.filter(paciente_dni=paciente_dni)
+    
+    accion = params.get('accion', None)
+    if accion:
+        auditorias = auditorias.filter(accion=accion)
+
+    # Rangos por día completo sin __date (compatible con MySQL y Postgres)
+    date_obj = parametro_fecha(params, 'fecha_accion')
+    if date_obj:
+        start_of_day = timezone.make_aware(datetime.combine(date_obj, time.min)) # 00:00:00
+        end_of_day = timezone.make_aware(datetime.combine(date_obj, time.max))   # 23:59:59
+        auditorias = auditorias.filter(fecha_accion__range=(start_of_day, end_of_day))
+
+    # Período (exportaciones por rango de fechas)
+    date_obj = parametro_fecha(params, 'fecha_desde')
+    if date_obj:
+        auditorias = auditorias.filter(
+            fecha_accion__gte=timezone.make_aware(datetime.combine(date_obj, time.min))
+        )
+
+    date_obj = parametro_fecha(params, 'fecha_hasta')
+    if date_obj:
+        auditorias = auditorias.filter(
+            fecha_accion__lte=timezone.make_aware(datetime.combine(date_obj, time.max))
+        )
+
+    fecha = parametro_fecha(params, 'fecha_turno')
+    if fecha:
+        auditorias = auditorias.filter(fecha_turno=fecha)
+
+    # Búsqueda de texto (paciente, odontólogo, observaciones), por relevancia
+    buscar = params.get('buscar', '').strip()
+    if buscar:
+        auditorias = buscar_texto(auditorias, buscar, AuditoriaTurnos.CAMPOS_BUSQUEDA)
+    return auditorias
+
+
+FILTROS_AUDITORIA_INVALIDOS = "Filtros inválidos: 'turno_numero' debe ser numérico."
+
+
 class AuditoriaTurnosList(APIView):
     """
     Vista para listar los registros de auditoría de turnos (CON PAGINACIÓN).
-    Permite filtrar por paciente, odontólogo, acción y fechas.
+    Permite filtrar por paciente, odontólogo, acción y fechas (ver
+    filtrar_auditoria_turnos).
     """
     
     # 👇 --- AÑADIR LA CLASE DE PAGINACIÓN A LA VISTA ---
     pagination_class = AuditoriaPagination
+    # Con ?paginacion=cursor (o ?cursor=...) se pagina por (fecha_accion, id)
+    # sin COUNT(*) ni OFFSET; el total es opcional y aproximado (?conteo=aprox)
+    cursor_pagination_class = AuditoriaCursorPagination
 
     @property
     def paginator(self):
@@ -127,56 +649,21 @@ class AuditoriaTurnosList(APIView):
         if not hasattr(self, '_paginator'):
             if self.pagination_class is None:
                 self._paginator = None
+            elif self.cursor_pagination_class.solicitada(self.request):
+                # Con búsqueda, el cursor sigue el orden por relevancia
+                orden = ORDEN_RELEVANCIA if self.request.query_params.get('buscar') else None
+                self._paginator = self.cursor_pagination_class(orden)
             else:
                 self._paginator = self.pagination_class()
         return self._paginator
     # --------------------------------------------------
 
     def get(self, request):
+        auditorias = filtrar_auditoria_turnos(AuditoriaTurnos.objects.all(), request.query_params)
+        if auditorias is None:
+            return Response({"detail": FILTROS_AUDITORIA_INVALIDOS}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            auditorias = AuditoriaTurnos.objects.all().order_by('-fecha_accion')
-            
-            # (Todos tus filtros existentes se mantienen igual)
-            turno_numero = request.query_params.get('turno_numero', None)
-            if turno_numero:
-                auditorias = auditorias.filter(turno_numero=turno_numero)
-            
-            paciente_dni = request.query_params.get('paciente_dni', None)
-            if paciente_dni:
-                auditorias = auditorias.filter(paciente_dni=paciente_dni)
-            
-            accion = request.query_params.get('accion', None)
-            if accion:
-                auditorias = auditorias.filter(accion=accion)
-            
-            # fecha_accion = request.query_params.get('fecha_accion', None)
-            # if fecha_accion:
-            #     auditorias = auditorias.filter(fecha_accion__date=fecha_accion)
-
-            # ✅ NUEVO FILTRO (Compatible con MySQL y Postgres):
-            fecha_accion = request.query_params.get('fecha_accion', None)
-            if fecha_accion:
-                # 1. Convertir el texto '2023-11-27' a objeto fecha
-                date_obj = parse_date(fecha_accion)
-                
-                if date_obj:
-                    # 2. Crear inicio y fin del día
-                    start_of_day = datetime.combine(date_obj, time.min) # 00:00:00
-                    end_of_day = datetime.combine(date_obj, time.max)   # 23:59:59
-
-                    # 3. Hacerlos "conscientes" de la zona horaria (si usas USE_TZ=True)
-                    if timezone.is_naive(start_of_day):
-                        start_of_day = timezone.make_aware(start_of_day)
-                    if timezone.is_naive(end_of_day):
-                        end_of_day = timezone.make_aware(end_of_day)
-
-                    # 4. Filtrar por rango (BETWEEN en SQL)
-                    auditorias = auditorias.filter(fecha_accion__range=(start_of_day, end_of_day))
-            
-            fecha_turno = request.query_params.get('fecha_turno', None)
-            if fecha_turno:
-                auditorias = auditorias.filter(fecha_turno=fecha_turno)
-            
             # 👇 --- LÓGICA DE PAGINACIÓN ---
             if self.paginator:
                 # Paginar el queryset filtrado
@@ -190,13 +677,14 @@ class AuditoriaTurnosList(APIView):
             # (Fallback si no hay paginador)
             serializer = AuditoriaTurnosSerializer(auditorias, many=True)
             return Response(serializer.data)
-            
-        except Exception as e:
-            print(f"Error en AuditoriaTurnosList: {str(e)}")
-            import traceback
-            traceback.print_exc()
+
+        except NotFound:
+            # Cursor inválido: 404 de DRF, no un error del servidor
+            raise
+        except Exception:
+            logger.exception("Error inesperado al listar la auditoría de turnos")
             return Response(
-                {"error": str(e)}, 
+                {"detail": "Ocurrió un error inesperado en el servidor."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
@@ -209,4 +697,183 @@ class AuditoriaTurnosDetail(APIView):
     def get(self, request, pk):
         auditoria = get_object_or_404(AuditoriaTurnos, pk=pk)
         serializer = AuditoriaTurnosSerializer(auditoria)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+# Columnas de la exportación: (encabezado, campo de .values())
+COLUMNAS_EXPORTACION_AUDITORIA = (
+    ('ID', 'id'),
+    ('Fecha de la acción', 'fecha_accion'),
+    ('Acción', 'accion'),
+    ('Usuario', 'usuario_nombre'),
+    ('Turno', 'turno_numero'),
+    ('Paciente', 'paciente_nombre'),
+    ('DNI', 'paciente_dni'),
+    ('Odontólogo', 'odontologo_nombre'),
+    ('Fecha del turno', 'fecha_turno'),
+    ('Horario', 'horario_turno'),
+    ('Estado anterior', 'estado_anterior'),
+    ('Estado nuevo', 'estado_nuevo'),
+    ('Observaciones', 'observaciones'),
+)
+
+
+class ExportarAuditoriaTurnos(APIView):
+    """
+    Exporta la auditoría de turnos a CSV o XLSX con los mismos filtros que
+    el listado, sin paginar. Se envía en streaming: las filas se leen por
+    lotes (iterar_por_clave) y la memoria no depende del período.
+    GET /api/turnos/auditoria/exportar/?formato=xlsx&fecha_desde=2025-01-01&fecha_hasta=2025-12-31
+    """
+
+    def get(self, request):
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            return Response(
+                {"detail": "El parámetro 'formato' debe ser 'csv' o 'xlsx'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        auditorias = filtrar_auditoria_turnos(AuditoriaTurnos.objects.all(), request.query_params)
+        if auditorias is None:
+            return Response({"detail": FILTROS_AUDITORIA_INVALIDOS}, status=status.HTTP_400_BAD_REQUEST)
+        campos = [campo for _, campo in COLUMNAS_EXPORTACION_AUDITORIA if campo != 'usuario_nombre']
+        orden = ('-fecha_accion', '-id')
+        if request.query_params.get('buscar', '').strip():
+            # El orden por relevancia necesita el rango en cada fila
+            campos.append('rango')
+            orden = ORDEN_RELEVANCIA
+        auditorias = auditorias.values(*campos, 'usuario__nombre', 'usuario__apellido')
+
+        acciones = dict(AuditoriaTurnos.ACCIONES)
+
+        def filas():
+            for auditoria in iterar_por_clave(auditorias, orden, LOTE_FILAS):
+                auditoria['accion'] = acciones.get(auditoria['accion'], auditoria['accion'])
+                auditoria['usuario_nombre'] = (
+                    f"{auditoria['usuario__nombre']} {auditoria['usuario__apellido']}"
+                    if auditoria['usuario__nombre'] is not None else 'Sistema'
+                )
+                yield [auditoria[campo] for _, campo in COLUMNAS_EXPORTACION_AUDITORIA]
+
+        return respuesta_exportacion(
+            formato,
+            [encabezado for encabezado, _ in COLUMNAS_EXPORTACION_AUDITORIA],
+            filas(),
+            f'auditoria-turnos-{timezone.localdate():%Y%m%d}',
+            hoja='Auditoría de turnos',
+        )
+
+# =======================================================
+# 4. Vistas de Lista de Espera
+# =======================================================
+
+def filtrar_lista_espera(entradas, params):
+    """
+    Filtros de la lista de espera (estado, paciente, odontologo).
+    Devuelve None si algún valor es inválido.
+    """
+    estado = params.get('estado')
+    if estado:
+        if estado not in dict(ListaEspera.ESTADOS):
+            return None
+        entradas = entradas.filter(estado=estado)
+    for param in ('paciente', 'odontologo'):
+        valor = params.get(param)
+        if valor:
+            if not valor.isdigit():
+                return None
+            entradas = entradas.filter(**{f'{param}_id': int(valor)})
+    return entradas
+
+
+class ListaEsperaList(generics.ListCreateAPIView):
+    """
+    GET  /api/turnos/lista-espera/?estado=ESPERANDO&paciente=&odontologo=
+    POST /api/turnos/lista-espera/
+    {"paciente": 2, "odontologo": null, "fecha_desde": "2025-12-01", "fecha_hasta": "2025-12-31",
+     "dias_semana": [0, 2], "hora_desde": "08:00", "hora_hasta": "12:00", "prioridad": 1}
+    """
+    serializer_class = ListaEsperaSerializer
+
+    def get_queryset(self):
+        return filtrar_lista_espera(
+            ListaEspera.objects.select_related('paciente', 'odontologo'), self.request.query_params
+        )
+
+    def list(self, request, *args, **kwargs):
+        if self.get_queryset() is None:
+            return Response(
+                {"detail": "Filtros inválidos: use IDs numéricos y un estado de "
+                           f"{', '.join(dict(ListaEspera.ESTADOS))}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().list(request, *args, **kwargs)
+
+
+class ListaEsperaDetail(generics.RetrieveUpdateDestroyAPIView):
+    queryset = ListaEspera.objects.select_related('paciente', 'odontologo')
+    serializer_class = ListaEsperaSerializer
+
+
+class OfertasTurnoList(generics.ListAPIView):
+    """GET /api/turnos/ofertas/?estado=PENDIENTE — horarios liberados ofrecidos a la lista de espera."""
+    serializer_class = OfertaTurnoSerializer
+
+    def get_queryset(self):
+        ofertas = OfertaTurno.objects.select_related('lista_espera__paciente', 'odontologo', 'horario_turno')
+        estado = self.request.query_params.get('estado')
+        if estado:
+            ofertas = ofertas.filter(estado=estado)
+        return ofertas
+
+    def list(self, request, *args, **kwargs):
+        estado = request.query_params.get('estado')
+        if estado and estado not in dict(OfertaTurno.ESTADOS):
+            return Response(
+                {"detail": f"El parámetro 'estado' debe ser uno de {', '.join(dict(OfertaTurno.ESTADOS))}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return super().list(request, *args, **kwargs)
+
+
+class OfertaTurnoAceptar(APIView):
+    """
+    POST /api/turnos/ofertas/<pk>/aceptar/  {"estado_turno": 3, "modificado_por": 5}
+    Crea el turno para el paciente. 409 si el horario ya no está libre.
+    """
+
+    def post(self, request, pk):
+        get_object_or_404(OfertaTurno, pk=pk)
+        serializer = AceptarOfertaSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            turno = aceptar_oferta(
+                pk,
+                estado=serializer.validated_data.get('estado_turno'),
+                usuario=serializer.validated_data.get('modificado_por'),
+            )
+        except OfertaNoDisponible as error:
+            return Response({"detail": str(error)}, status=status.HTTP_409_CONFLICT)
+        except HorarioOcupado as conflicto:
+            return respuesta_horario_ocupado(conflicto)
+        return Response(TurnosSerializer(turno).data, status=status.HTTP_201_CREATED)
+
+
+class OfertaTurnoRechazar(APIView):
+    """
+    POST /api/turnos/ofertas/<pk>/rechazar/
+    El paciente vuelve a la lista y el horario pasa al siguiente candidato.
+    """
+
+    def post(self, request, pk):
+        get_object_or_404(OfertaTurno, pk=pk)
+        try:
+            siguiente = rechazar_oferta(pk)
+        except OfertaNoDisponible as error:
+            return Response({"detail": str(error)}, status=status.HTTP_409_CONFLICT)
+        return Response(
+            {"siguiente_oferta": OfertaTurnoSerializer(siguiente).data if siguiente else None},
+            status=status.HTTP_200_OK
+        )